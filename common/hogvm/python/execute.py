@@ -1,5 +1,8 @@
 from datetime import timedelta
+import hashlib
+import json
 import re
+import threading
 import time
 from copy import deepcopy
 from typing import Any, Optional, TYPE_CHECKING
@@ -24,8 +27,7 @@ from common.hogvm.python.utils import (
     HogVMException,
     get_nested_value,
     like,
-    set_nested_value,
-    calculate_cost,
+    CostCache,
     unify_comparison_types,
     HogVMRuntimeExceededException,
     HogVMMemoryExceededException,
@@ -37,6 +39,8 @@ if TYPE_CHECKING:
 MAX_MEMORY = 64 * 1024 * 1024  # 64 MB
 MAX_FUNCTION_ARGS_LENGTH = 300
 CALLSTACK_LENGTH = 1000
+# How many decoded chunks of bytecode to keep around, for programs that are executed again
+DECODED_BYTECODE_CACHE_SIZE = 1024
 
 
 @dataclass
@@ -54,126 +58,249 @@ def execute_bytecode(
     team: Optional["Team"] = None,
     debug=False,
 ) -> BytecodeResult:
-    bytecodes = input if isinstance(input, dict) else {"root": {"bytecode": input}}
-    root_bytecode = bytecodes.get("root", {}).get("bytecode", []) or []
+    return _Execution(_Program(input), globals, functions, timeout, team, debug).run()
 
-    if (
-        not root_bytecode
-        or len(root_bytecode) == 0
-        or (root_bytecode[0] != HOGQL_BYTECODE_IDENTIFIER and root_bytecode[0] != HOGQL_BYTECODE_IDENTIFIER_V0)
-    ):
-        raise HogVMException(f"Invalid bytecode. Must start with '{HOGQL_BYTECODE_IDENTIFIER}'")
-    version = root_bytecode[1] if len(root_bytecode) >= 2 and root_bytecode[0] == HOGQL_BYTECODE_IDENTIFIER else 0
-    start_time = time.time()
-    last_op = len(root_bytecode) - 1
-    stack: list = []
-    upvalues: list[dict] = []
-    upvalues_by_id: dict[int, dict] = {}
-    mem_stack: list = []
-    call_stack: list[CallFrame] = []
-    throw_stack: list[ThrowFrame] = []
-    declared_functions: dict[str, tuple[int, int]] = {}
-    mem_used = 0
-    max_mem_used = 0
-    ops = 0
-    stdout: list[str] = []
-    debug_bytecode = []
-    if isinstance(timeout, int):
-        timeout = timedelta(seconds=timeout)
-
-    if len(call_stack) == 0:
-        call_stack.append(
-            CallFrame(
-                ip=0,
-                chunk="root",
-                stack_start=0,
-                arg_len=0,
-                closure=new_hog_closure(
-                    new_hog_callable(
-                        type="local",
-                        arg_count=0,
-                        upvalue_count=0,
-                        ip=0,
-                        chunk="root",
-                        name="",
-                    )
-                ),
+
+def execute_many(
+    input: list[Any] | dict,
+    globals_list: list[Optional[dict[str, Any]]],
+    functions: Optional[dict[str, Callable[..., Any]]] = None,
+    timeout=timedelta(seconds=5),
+    team: Optional["Team"] = None,
+) -> list[BytecodeResult]:
+    """Executes the same bytecode once for each of `globals_list`, e.g. to run a filter against many events.
+
+    The bytecode is validated and decoded only once. Each execution gets the full `timeout`, and the first exception
+    raised by any of them is raised.
+    """
+    program = _Program(input)
+    return [_Execution(program, globals, functions, timeout, team, debug=False).run() for globals in globals_list]
+
+
+# An instruction is its handler, its operands, and the ip of the instruction after it
+Instruction = tuple[Callable[["_Execution", tuple], Optional[BytecodeResult]], tuple, int]
+
+
+class _DecodedChunk:
+    """A chunk of bytecode, with its instructions decoded the first time they're executed."""
+
+    def __init__(self, bytecode: list[Any]):
+        self.bytecode = bytecode
+        self.instructions: list[Optional[Instruction]] = [None] * len(bytecode)
+
+    def decode(self, ip: int) -> Instruction:
+        instruction = _decode_instruction(self.bytecode, ip)
+        self.instructions[ip] = instruction
+        return instruction
+
+
+_decoded_chunks: dict[str, _DecodedChunk] = {}
+_decoded_chunks_lock = threading.Lock()
+
+
+def _decode_chunk(bytecode: list[Any]) -> _DecodedChunk:
+    try:
+        key = hashlib.sha256(json.dumps(bytecode).encode()).hexdigest()
+    except (TypeError, ValueError):
+        return _DecodedChunk(list(bytecode))
+
+    decoded = _decoded_chunks.get(key)
+    if decoded is None:
+        # Copied, as decoding happens lazily and the caller could change their list in the meantime
+        decoded = _DecodedChunk(list(bytecode))
+        with _decoded_chunks_lock:
+            while len(_decoded_chunks) >= DECODED_BYTECODE_CACHE_SIZE:
+                _decoded_chunks.pop(next(iter(_decoded_chunks)))
+            _decoded_chunks[key] = decoded
+    return decoded
+
+
+class _Program:
+    """Validated bytecode, with its chunks decoded as they're first needed."""
+
+    def __init__(self, input: list[Any] | dict):
+        self.bytecodes = input if isinstance(input, dict) else {"root": {"bytecode": input}}
+        self.root_bytecode = self.bytecodes.get("root", {}).get("bytecode", []) or []
+
+        if (
+            not self.root_bytecode
+            or len(self.root_bytecode) == 0
+            or (
+                self.root_bytecode[0] != HOGQL_BYTECODE_IDENTIFIER
+                and self.root_bytecode[0] != HOGQL_BYTECODE_IDENTIFIER_V0
             )
+        ):
+            raise HogVMException(f"Invalid bytecode. Must start with '{HOGQL_BYTECODE_IDENTIFIER}'")
+        self.version = (
+            self.root_bytecode[1]
+            if len(self.root_bytecode) >= 2 and self.root_bytecode[0] == HOGQL_BYTECODE_IDENTIFIER
+            else 0
         )
-    frame = call_stack[-1]
-    chunk_bytecode: list[Any] = root_bytecode
-    chunk_globals = globals
-
-    def set_chunk_bytecode():
-        nonlocal chunk_bytecode, chunk_globals, last_op, debug_bytecode
+        self._chunks: dict[str, _DecodedChunk] = {}
+
+    def chunk(self, name: str, bytecode: list[Any]) -> _DecodedChunk:
+        decoded = self._chunks.get(name)
+        if decoded is None:
+            decoded = self._chunks[name] = _decode_chunk(bytecode)
+        return decoded
+
+
+class _Execution:
+    """The state of a single execution of a program, with a handler for each operation."""
+
+    def __init__(
+        self,
+        program: _Program,
+        globals: Optional[dict[str, Any]],
+        functions: Optional[dict[str, Callable[..., Any]]],
+        timeout,
+        team: Optional["Team"],
+        debug: bool,
+    ):
+        self.program = program
+        self.version = program.version
+        self.globals = globals
+        self.functions = functions
+        self.team = team
+        self.debug = debug
+        self.timeout = timedelta(seconds=timeout) if isinstance(timeout, int) else timeout
+        self.start_time = time.time()
+        self.stack: list = []
+        self.upvalues: list[dict] = []
+        self.upvalues_by_id: dict[int, dict] = {}
+        self.mem_stack: list = []
+        self.mem_costs = CostCache(max_cost=MAX_MEMORY)
+        self.call_stack: list[CallFrame] = []
+        self.throw_stack: list[ThrowFrame] = []
+        self.declared_functions: dict[str, tuple[int, int]] = {}
+        self.mem_used = 0
+        self.max_mem_used = 0
+        self.ops = 0
+        self.stdout: list[str] = []
+        self.debug_bytecode: list = []
+
+        self.frame = CallFrame(
+            ip=0,
+            chunk="root",
+            stack_start=0,
+            arg_len=0,
+            closure=new_hog_closure(
+                new_hog_callable(
+                    type="local",
+                    arg_count=0,
+                    upvalue_count=0,
+                    ip=0,
+                    chunk="root",
+                    name="",
+                )
+            ),
+        )
+        self.call_stack.append(self.frame)
+        self.set_chunk_bytecode()
+
+    def run(self) -> BytecodeResult:
+        while True:
+            frame = self.frame
+            # Return or jump back to the previous call frame if ran out of bytecode to execute in this one, and return null
+            if frame.ip > self.last_op:
+                last_call_frame = self.call_stack.pop()
+                if len(self.call_stack) == 0 or last_call_frame is None:
+                    if len(self.stack) > 1:
+                        raise HogVMException("Invalid bytecode. More than one value left on stack")
+                    return self.result(self.pop_stack() if len(self.stack) > 0 else None)
+                self.stack_keep_first_elements(last_call_frame.stack_start)
+                self.push_stack(None)
+                self.frame = self.call_stack[-1]
+                self.set_chunk_bytecode()
+                continue
+
+            self.ops += 1
+            if (self.ops & 127) == 0:  # every 128th operation
+                self.check_timeout()
+            elif self.debug:
+                debugger(
+                    self.chunk.bytecode[frame.ip],
+                    self.chunk.bytecode,
+                    self.debug_bytecode,
+                    frame.ip,
+                    self.stack,
+                    self.call_stack,
+                    self.throw_stack,
+                )
+            handler, operands, next_ip = self.chunk.instructions[frame.ip] or self.chunk.decode(frame.ip)
+            # Handlers that jump or call set the ip themselves
+            frame.ip = next_ip
+            result = handler(self, operands)
+            if result is not None:
+                return result
+
+    def result(self, value: Any) -> BytecodeResult:
+        return BytecodeResult(result=value, stdout=self.stdout, bytecodes=self.program.bytecodes)
+
+    def set_chunk_bytecode(self):
+        frame = self.frame
         if not frame.chunk or frame.chunk == "root":
-            chunk_bytecode = root_bytecode
-            chunk_globals = globals
+            self.chunk = self.program.chunk("root", self.program.root_bytecode)
+            self.chunk_globals = self.globals
         elif frame.chunk.startswith("stl/") and frame.chunk[4:] in BYTECODE_STL:
-            chunk_bytecode = BYTECODE_STL[frame.chunk[4:]][1]
-            chunk_globals = {}
-        elif bytecodes.get(frame.chunk):
-            chunk_bytecode = bytecodes[frame.chunk].get("bytecode", [])
-            chunk_globals = bytecodes[frame.chunk].get("globals", {})
+            self.chunk = self.program.chunk(frame.chunk, BYTECODE_STL[frame.chunk[4:]][1])
+            self.chunk_globals = {}
+        elif self.program.bytecodes.get(frame.chunk):
+            self.chunk = self.program.chunk(frame.chunk, self.program.bytecodes[frame.chunk].get("bytecode", []))
+            self.chunk_globals = self.program.bytecodes[frame.chunk].get("globals", {})
         else:
             raise HogVMException(f"Unknown chunk: {frame.chunk}")
-        last_op = len(chunk_bytecode) - 1
-        if debug:
-            debug_bytecode = color_bytecode(chunk_bytecode)
+        chunk_bytecode = self.chunk.bytecode
+        self.last_op = len(chunk_bytecode) - 1
+        if self.debug:
+            self.debug_bytecode = color_bytecode(chunk_bytecode)
         if frame.ip == 0 and (chunk_bytecode[0] == "_H" or chunk_bytecode[0] == "_h"):
             # TODO: store chunk version
             frame.ip += 2 if chunk_bytecode[0] == "_H" else 1
 
-    set_chunk_bytecode()
+    def call(self, frame: CallFrame):
+        self.frame = frame
+        self.set_chunk_bytecode()
+        self.call_stack.append(frame)
 
-    def stack_keep_first_elements(count: int) -> list[Any]:
-        nonlocal stack, mem_stack, mem_used
-        if count < 0 or len(stack) < count:
+    def stack_keep_first_elements(self, count: int) -> list[Any]:
+        if count < 0 or len(self.stack) < count:
             raise HogVMException("Stack underflow")
-        for upvalue in reversed(upvalues):
+        for upvalue in reversed(self.upvalues):
             if upvalue["location"] >= count:
                 if not upvalue["closed"]:
                     upvalue["closed"] = True
-                    upvalue["value"] = stack[upvalue["location"]]
+                    upvalue["value"] = self.stack[upvalue["location"]]
             else:
                 break
-        removed = stack[count:]
-        stack = stack[0:count]
-        mem_used -= sum(mem_stack[count:])
-        mem_stack = mem_stack[0:count]
+        removed = self.stack[count:]
+        self.stack = self.stack[0:count]
+        self.mem_used -= sum(self.mem_stack[count:])
+        self.mem_stack = self.mem_stack[0:count]
         return removed
 
-    def next_token():
-        nonlocal frame, chunk_bytecode
-        if frame.ip >= last_op:
-            raise HogVMException("Unexpected end of bytecode")
-        frame.ip += 1
-        return chunk_bytecode[frame.ip]
-
-    def pop_stack():
-        if not stack:
+    def pop_stack(self):
+        if not self.stack:
             raise HogVMException("Stack underflow")
-        nonlocal mem_used
-        mem_used -= mem_stack.pop()
-        return stack.pop()
-
-    def push_stack(value):
-        stack.append(value)
-        mem_stack.append(calculate_cost(value))
-        nonlocal mem_used
-        mem_used += mem_stack[-1]
-        nonlocal max_mem_used
-        max_mem_used = max(mem_used, max_mem_used)
-        if mem_used > MAX_MEMORY:
-            raise HogVMMemoryExceededException(memory_limit=MAX_MEMORY, attempted_memory=mem_used)
-
-    def check_timeout():
-        if time.time() - start_time > timeout.total_seconds() and not debug:
-            raise HogVMRuntimeExceededException(timeout_seconds=timeout.total_seconds(), ops_performed=ops)
-
-    def capture_upvalue(index) -> dict:
-        nonlocal upvalues
-        for upvalue in reversed(upvalues):
+        self.mem_used -= self.mem_stack.pop()
+        return self.stack.pop()
+
+    def push_stack(self, value):
+        self.stack.append(value)
+        cost = self.mem_costs.cost(value)
+        self.mem_stack.append(cost)
+        self.mem_used += cost
+        if self.mem_used > self.max_mem_used:
+            self.max_mem_used = self.mem_used
+        if self.mem_used > MAX_MEMORY:
+            raise HogVMMemoryExceededException(memory_limit=MAX_MEMORY, attempted_memory=self.mem_used)
+
+    def check_timeout(self):
+        if time.time() - self.start_time > self.timeout.total_seconds() and not self.debug:
+            raise HogVMRuntimeExceededException(timeout_seconds=self.timeout.total_seconds(), ops_performed=self.ops)
+
+    def capture_upvalue(self, index) -> dict:
+        for upvalue in reversed(self.upvalues):
             if upvalue["location"] < index:
                 break
             if upvalue["location"] == index:
@@ -183,499 +310,589 @@ def execute_bytecode(
             "location": index,
             "closed": False,
             "value": None,
-            "id": len(upvalues) + 1,
+            "id": len(self.upvalues) + 1,
         }
-        upvalues.append(created_upvalue)
-        upvalues_by_id[created_upvalue["id"]] = created_upvalue
-        upvalues.sort(key=lambda x: x["location"])
+        self.upvalues.append(created_upvalue)
+        self.upvalues_by_id[created_upvalue["id"]] = created_upvalue
+        self.upvalues.sort(key=lambda x: x["location"])
         return created_upvalue
 
-    symbol: Any = None
-    while True:
-        # Return or jump back to the previous call frame if ran out of bytecode to execute in this one, and return null
-        if frame.ip > last_op:
-            last_call_frame = call_stack.pop()
-            if len(call_stack) == 0 or last_call_frame is None:
-                if len(stack) > 1:
-                    raise HogVMException("Invalid bytecode. More than one value left on stack")
-                return BytecodeResult(
-                    result=pop_stack() if len(stack) > 0 else None, stdout=stdout, bytecodes=bytecodes
-                )
-            stack_start = last_call_frame.stack_start
-            stack_keep_first_elements(stack_start)
-            push_stack(None)
-            frame = call_stack[-1]
-            set_chunk_bytecode()
-
-        ops += 1
-        symbol = chunk_bytecode[frame.ip]
-        if (ops & 127) == 0:  # every 128th operation
-            check_timeout()
-        elif debug:
-            debugger(symbol, chunk_bytecode, debug_bytecode, frame.ip, stack, call_stack, throw_stack)
-        match symbol:
-            case None:
-                break
-            case Operation.STRING:
-                push_stack(next_token())
-            case Operation.INTEGER:
-                push_stack(next_token())
-            case Operation.FLOAT:
-                push_stack(next_token())
-            case Operation.TRUE:
-                push_stack(True)
-            case Operation.FALSE:
-                push_stack(False)
-            case Operation.NULL:
-                push_stack(None)
-            case Operation.NOT:
-                push_stack(not pop_stack())
-            case Operation.AND:
-                push_stack(all([pop_stack() for _ in range(next_token())]))  # noqa: C419
-            case Operation.OR:
-                push_stack(any([pop_stack() for _ in range(next_token())]))  # noqa: C419
-            case Operation.PLUS:
-                push_stack(pop_stack() + pop_stack())
-            case Operation.MINUS:
-                push_stack(pop_stack() - pop_stack())
-            case Operation.DIVIDE:
-                push_stack(pop_stack() / pop_stack())
-            case Operation.MULTIPLY:
-                push_stack(pop_stack() * pop_stack())
-            case Operation.MOD:
-                push_stack(pop_stack() % pop_stack())
-            case Operation.EQ:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 == var2)
-            case Operation.NOT_EQ:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 != var2)
-            case Operation.GT:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 > var2)
-            case Operation.GT_EQ:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 >= var2)
-            case Operation.LT:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 < var2)
-            case Operation.LT_EQ:
-                var1, var2 = unify_comparison_types(pop_stack(), pop_stack())
-                push_stack(var1 <= var2)
-            case Operation.LIKE:
-                push_stack(like(pop_stack(), pop_stack()))
-            case Operation.ILIKE:
-                push_stack(like(pop_stack(), pop_stack(), re.IGNORECASE))
-            case Operation.NOT_LIKE:
-                push_stack(not like(pop_stack(), pop_stack()))
-            case Operation.NOT_ILIKE:
-                push_stack(not like(pop_stack(), pop_stack(), re.IGNORECASE))
-            case Operation.IN:
-                push_stack(pop_stack() in pop_stack())
-            case Operation.NOT_IN:
-                push_stack(pop_stack() not in pop_stack())
-            case Operation.REGEX:
-                args = [pop_stack(), pop_stack()]
-                # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
-                push_stack(bool(re.search(re.compile(args[1]), args[0])) if args[0] and args[1] else False)
-            case Operation.NOT_REGEX:
-                args = [pop_stack(), pop_stack()]
-                # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
-                push_stack(not bool(re.search(re.compile(args[1]), args[0])) if args[0] and args[1] else False)
-            case Operation.IREGEX:
-                args = [pop_stack(), pop_stack()]
-                push_stack(
-                    bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0]))
-                    if args[0] and args[1]
-                    else False
-                )
-            case Operation.NOT_IREGEX:
-                args = [pop_stack(), pop_stack()]
-                push_stack(
-                    not bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0]))
-                    if args[0] and args[1]
-                    else False
-                )
-            case Operation.GET_GLOBAL:
-                chain = [pop_stack() for _ in range(next_token())]
-                if chunk_globals and chain[0] in chunk_globals:
-                    push_stack(deepcopy(get_nested_value(chunk_globals, chain, True)))
-                elif functions and chain[0] in functions:
-                    push_stack(
-                        new_hog_closure(
-                            new_hog_callable(
-                                type="stl",
-                                name=chain[0],
-                                arg_count=0,
-                                upvalue_count=0,
-                                ip=-1,
-                                chunk="stl",
-                            )
-                        )
-                    )
-                elif chain[0] in STL and len(chain) == 1:
-                    push_stack(
-                        new_hog_closure(
-                            new_hog_callable(
-                                type="stl",
-                                name=chain[0],
-                                arg_count=STL[chain[0]].maxArgs or 0,
-                                upvalue_count=0,
-                                ip=-1,
-                                chunk="stl",
-                            )
-                        )
-                    )
-                elif chain[0] in BYTECODE_STL and len(chain) == 1:
-                    push_stack(
-                        new_hog_closure(
-                            new_hog_callable(
-                                type="stl",
-                                name=chain[0],
-                                arg_count=len(BYTECODE_STL[chain[0]][0]),
-                                upvalue_count=0,
-                                ip=0,
-                                chunk=f"stl/{chain[0]}",
-                            )
-                        )
-                    )
-                else:
-                    raise HogVMException(f"Global variable not found: {chain[0]}")
-            case Operation.POP:
-                pop_stack()
-            case Operation.CLOSE_UPVALUE:
-                stack_keep_first_elements(len(stack) - 1)
-            case Operation.RETURN:
-                response = pop_stack()
-                last_call_frame = call_stack.pop()
-                if len(call_stack) == 0 or last_call_frame is None:
-                    return BytecodeResult(result=response, stdout=stdout, bytecodes=bytecodes)
-                stack_start = last_call_frame.stack_start
-                stack_keep_first_elements(stack_start)
-                push_stack(response)
-                frame = call_stack[-1]
-                set_chunk_bytecode()
-                continue  # resume the loop without incrementing frame.ip
-
-            case Operation.GET_LOCAL:
-                stack_start = 0 if not call_stack else call_stack[-1].stack_start
-                push_stack(stack[next_token() + stack_start])
-            case Operation.SET_LOCAL:
-                stack_start = 0 if not call_stack else call_stack[-1].stack_start
-                value = pop_stack()
-                index = next_token() + stack_start
-                stack[index] = value
-                last_cost = mem_stack[index]
-                mem_stack[index] = calculate_cost(value)
-                mem_used += mem_stack[index] - last_cost
-                max_mem_used = max(mem_used, max_mem_used)
-            case Operation.GET_PROPERTY:
-                property = pop_stack()
-                push_stack(get_nested_value(pop_stack(), [property]))
-            case Operation.GET_PROPERTY_NULLISH:
-                property = pop_stack()
-                push_stack(get_nested_value(pop_stack(), [property], nullish=True))
-            case Operation.SET_PROPERTY:
-                value = pop_stack()
-                field = pop_stack()
-                set_nested_value(pop_stack(), [field], value)
-            case Operation.DICT:
-                count = next_token()
-                if count > 0:
-                    elems = stack[-(count * 2) :]
-                    stack = stack[: -(count * 2)]
-                    mem_used -= sum(mem_stack[-(count * 2) :])
-                    mem_stack = mem_stack[: -(count * 2)]
-                    push_stack({elems[i]: elems[i + 1] for i in range(0, len(elems), 2)})
-                else:
-                    push_stack({})
-            case Operation.ARRAY:
-                count = next_token()
-                if count > 0:
-                    elems = stack[-count:]
-                    stack = stack[:-count]
-                    mem_used -= sum(mem_stack[-count:])
-                    mem_stack = mem_stack[:-count]
-                    push_stack(elems)
-                else:
-                    push_stack([])
-            case Operation.TUPLE:
-                count = next_token()
-                if count > 0:
-                    elems = stack[-count:]
-                    stack = stack[:-count]
-                    mem_used -= sum(mem_stack[-count:])
-                    mem_stack = mem_stack[:-count]
-                    push_stack(tuple(elems))
-                else:
-                    push_stack(())
-            case Operation.JUMP:
-                count = next_token()
-                frame.ip += count
-            case Operation.JUMP_IF_FALSE:
-                count = next_token()
-                if not pop_stack():
-                    frame.ip += count
-            case Operation.JUMP_IF_STACK_NOT_NULL:
-                count = next_token()
-                if len(stack) > 0 and stack[-1] is not None:
-                    frame.ip += count
-            case Operation.DECLARE_FN:
-                # DEPRECATED
-                name = next_token()
-                arg_len = next_token()
-                body_len = next_token()
-                declared_functions[name] = (frame.ip + 1, arg_len)
-                frame.ip += body_len
-            case Operation.CALLABLE:
-                name = next_token()  # TODO: do we need it? it could change as the variable is reassigned
-                arg_count = next_token()
-                upvalue_count = next_token()
-                body_length = next_token()
-                push_stack(
+    def get_upvalue(self, index: int) -> dict:
+        closure = self.frame.closure
+        if index >= len(closure["upvalues"]):
+            raise HogVMException(f"Invalid upvalue index: {index}")
+        upvalue = self.upvalues_by_id[closure["upvalues"][index]]
+        if not is_hog_upvalue(upvalue):
+            raise HogVMException(f"Invalid upvalue: {upvalue}")
+        return upvalue
+
+    def halt(self, operands: tuple) -> BytecodeResult:
+        return self.result(self.pop_stack() if len(self.stack) > 0 else None)
+
+    def unexpected_end(self, operands: tuple):
+        raise HogVMException("Unexpected end of bytecode")
+
+    def unexpected_node(self, operands: tuple):
+        raise HogVMException(f'Unexpected node while running bytecode in chunk "{self.frame.chunk}": {operands[0]}')
+
+    def op_constant(self, operands: tuple):
+        self.push_stack(operands[0])
+
+    def op_true(self, operands: tuple):
+        self.push_stack(True)
+
+    def op_false(self, operands: tuple):
+        self.push_stack(False)
+
+    def op_null(self, operands: tuple):
+        self.push_stack(None)
+
+    def op_not(self, operands: tuple):
+        self.push_stack(not self.pop_stack())
+
+    def op_and(self, operands: tuple):
+        self.push_stack(all([self.pop_stack() for _ in range(operands[0])]))  # noqa: C419
+
+    def op_or(self, operands: tuple):
+        self.push_stack(any([self.pop_stack() for _ in range(operands[0])]))  # noqa: C419
+
+    def op_plus(self, operands: tuple):
+        self.push_stack(self.pop_stack() + self.pop_stack())
+
+    def op_minus(self, operands: tuple):
+        self.push_stack(self.pop_stack() - self.pop_stack())
+
+    def op_divide(self, operands: tuple):
+        self.push_stack(self.pop_stack() / self.pop_stack())
+
+    def op_multiply(self, operands: tuple):
+        self.push_stack(self.pop_stack() * self.pop_stack())
+
+    def op_mod(self, operands: tuple):
+        self.push_stack(self.pop_stack() % self.pop_stack())
+
+    def op_eq(self, operands: tuple):
+        var1, var2 = unify_comparison_types(self.pop_stack(), self.pop_stack())
+        self.push_stack(var1 == var2)
+
+    def op_not_eq(self, operands: tuple):
+        var1, var2 = unify_comparison_types(self.pop_stack(), self.pop_stack())
+        self.push_stack(var1 != var2)
+
+    def op_gt(self, operands: tuple):
+        var1, var2 = unify_comparison_types(self.pop_stack(), self.pop_stack())
+        self.push_stack(var1 > var2)
+
+    def op_gt_eq(self, operands: tuple):
+        var1, var2 = unify_comparison_types(self.pop_stack(), self.pop_stack())
+        self.push_stack(var1 >= var2)
+
+    def op_lt(self, operands: tuple):
+        var1, var2 = unify_comparison_types(self.pop_stack(), self.pop_stack())
+        self.push_stack(var1 < var2)
+
+    def op_lt_eq(self, operands: tuple):
+        var1, var2 = unify_comparison_types(self.pop_stack(), self.pop_stack())
+        self.push_stack(var1 <= var2)
+
+    def op_like(self, operands: tuple):
+        self.push_stack(like(self.pop_stack(), self.pop_stack()))
+
+    def op_ilike(self, operands: tuple):
+        self.push_stack(like(self.pop_stack(), self.pop_stack(), re.IGNORECASE))
+
+    def op_not_like(self, operands: tuple):
+        self.push_stack(not like(self.pop_stack(), self.pop_stack()))
+
+    def op_not_ilike(self, operands: tuple):
+        self.push_stack(not like(self.pop_stack(), self.pop_stack(), re.IGNORECASE))
+
+    def op_in(self, operands: tuple):
+        self.push_stack(self.pop_stack() in self.pop_stack())
+
+    def op_not_in(self, operands: tuple):
+        self.push_stack(self.pop_stack() not in self.pop_stack())
+
+    def op_regex(self, operands: tuple):
+        args = [self.pop_stack(), self.pop_stack()]
+        # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
+        self.push_stack(bool(re.search(re.compile(args[1]), args[0])) if args[0] and args[1] else False)
+
+    def op_not_regex(self, operands: tuple):
+        args = [self.pop_stack(), self.pop_stack()]
+        # TODO: swap this for re2, as used in HogQL/ClickHouse and in the NodeJS VM
+        self.push_stack(not bool(re.search(re.compile(args[1]), args[0])) if args[0] and args[1] else False)
+
+    def op_iregex(self, operands: tuple):
+        args = [self.pop_stack(), self.pop_stack()]
+        self.push_stack(
+            bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0])) if args[0] and args[1] else False
+        )
+
+    def op_not_iregex(self, operands: tuple):
+        args = [self.pop_stack(), self.pop_stack()]
+        self.push_stack(
+            not bool(re.search(re.compile(args[1], re.RegexFlag.IGNORECASE), args[0])) if args[0] and args[1] else False
+        )
+
+    def op_get_global(self, operands: tuple):
+        chain = [self.pop_stack() for _ in range(operands[0])]
+        if self.chunk_globals and chain[0] in self.chunk_globals:
+            self.push_stack(deepcopy(get_nested_value(self.chunk_globals, chain, True)))
+        elif self.functions and chain[0] in self.functions:
+            self.push_stack(
+                new_hog_closure(
                     new_hog_callable(
-                        type="local",
-                        name=name,
-                        chunk=frame.chunk,
-                        arg_count=arg_count,
-                        upvalue_count=upvalue_count,
-                        ip=frame.ip + 1,
+                        type="stl",
+                        name=chain[0],
+                        arg_count=0,
+                        upvalue_count=0,
+                        ip=-1,
+                        chunk="stl",
                     )
                 )
-                frame.ip += body_length
-            case Operation.CLOSURE:
-                closure_callable = pop_stack()
-                closure = new_hog_closure(closure_callable)
-                stack_start = frame.stack_start
-                upvalue_count = next_token()
-                if upvalue_count != closure_callable["upvalueCount"]:
-                    raise HogVMException(
-                        f"Invalid upvalue count. Expected {closure_callable['upvalueCount']}, got {upvalue_count}"
+            )
+        elif chain[0] in STL and len(chain) == 1:
+            self.push_stack(
+                new_hog_closure(
+                    new_hog_callable(
+                        type="stl",
+                        name=chain[0],
+                        arg_count=STL[chain[0]].maxArgs or 0,
+                        upvalue_count=0,
+                        ip=-1,
+                        chunk="stl",
                     )
-                for _ in range(closure_callable["upvalueCount"]):
-                    is_local, index = next_token(), next_token()
-                    if is_local:
-                        closure["upvalues"].append(capture_upvalue(stack_start + index)["id"])
-                    else:
-                        closure["upvalues"].append(frame.closure["upvalues"][index])
-                push_stack(closure)
-            case Operation.GET_UPVALUE:
-                index = next_token()
-                closure = frame.closure
-                if index >= len(closure["upvalues"]):
-                    raise HogVMException(f"Invalid upvalue index: {index}")
-                upvalue = upvalues_by_id[closure["upvalues"][index]]
-                if not is_hog_upvalue(upvalue):
-                    raise HogVMException(f"Invalid upvalue: {upvalue}")
-                if upvalue["closed"]:
-                    push_stack(upvalue["value"])
-                else:
-                    push_stack(stack[upvalue["location"]])
-            case Operation.SET_UPVALUE:
-                index = next_token()
-                closure = frame.closure
-                if index >= len(closure["upvalues"]):
-                    raise HogVMException(f"Invalid upvalue index: {index}")
-                upvalue = upvalues_by_id[closure["upvalues"][index]]
-                if not is_hog_upvalue(upvalue):
-                    raise HogVMException(f"Invalid upvalue: {upvalue}")
-                if upvalue["closed"]:
-                    upvalue["value"] = pop_stack()
-                else:
-                    stack[upvalue["location"]] = pop_stack()
-            case Operation.CALL_GLOBAL:
-                check_timeout()
-                name = next_token()
-                arg_count = next_token()
-                # This is for backwards compatibility. We use a closure on the stack with local functions now.
-                if name in declared_functions:
-                    func_ip, arg_len = declared_functions[name]
-                    frame.ip += 1  # advance for when we return
-                    if arg_len > arg_count:
-                        for _ in range(arg_len - arg_count):
-                            push_stack(None)
-                    frame = CallFrame(
-                        ip=func_ip,
-                        chunk=frame.chunk,
-                        stack_start=len(stack) - arg_len,
-                        arg_len=arg_len,
-                        closure=new_hog_closure(
-                            new_hog_callable(
-                                type="local",
-                                name=name,
-                                arg_count=arg_len,
-                                upvalue_count=0,
-                                ip=func_ip,
-                                chunk=frame.chunk,
-                            )
-                        ),
+                )
+            )
+        elif chain[0] in BYTECODE_STL and len(chain) == 1:
+            self.push_stack(
+                new_hog_closure(
+                    new_hog_callable(
+                        type="stl",
+                        name=chain[0],
+                        arg_count=len(BYTECODE_STL[chain[0]][0]),
+                        upvalue_count=0,
+                        ip=0,
+                        chunk=f"stl/{chain[0]}",
                     )
-                    set_chunk_bytecode()
-                    call_stack.append(frame)
-                    continue  # resume the loop without incrementing frame.ip
-                else:
-                    if name == "import":
-                        if arg_count != 1:
-                            raise HogVMException("Function import requires exactly 1 argument")
-                        module_name = pop_stack()
-                        frame.ip += 1  # advance for when we return
-                        frame = CallFrame(
+                )
+            )
+        else:
+            raise HogVMException(f"Global variable not found: {chain[0]}")
+
+    def op_pop(self, operands: tuple):
+        self.pop_stack()
+
+    def op_close_upvalue(self, operands: tuple):
+        self.stack_keep_first_elements(len(self.stack) - 1)
+
+    def op_return(self, operands: tuple) -> Optional[BytecodeResult]:
+        response = self.pop_stack()
+        last_call_frame = self.call_stack.pop()
+        if len(self.call_stack) == 0 or last_call_frame is None:
+            return self.result(response)
+        self.stack_keep_first_elements(last_call_frame.stack_start)
+        self.push_stack(response)
+        self.frame = self.call_stack[-1]
+        self.set_chunk_bytecode()
+        return None
+
+    def op_get_local(self, operands: tuple):
+        stack_start = 0 if not self.call_stack else self.call_stack[-1].stack_start
+        self.push_stack(self.stack[operands[0] + stack_start])
+
+    def op_set_local(self, operands: tuple):
+        stack_start = 0 if not self.call_stack else self.call_stack[-1].stack_start
+        value = self.pop_stack()
+        index = operands[0] + stack_start
+        self.stack[index] = value
+        last_cost = self.mem_stack[index]
+        self.mem_stack[index] = self.mem_costs.cost(value)
+        self.mem_used += self.mem_stack[index] - last_cost
+        self.max_mem_used = max(self.mem_used, self.max_mem_used)
+
+    def op_get_property(self, operands: tuple):
+        property = self.pop_stack()
+        self.push_stack(get_nested_value(self.pop_stack(), [property]))
+
+    def op_get_property_nullish(self, operands: tuple):
+        property = self.pop_stack()
+        self.push_stack(get_nested_value(self.pop_stack(), [property], nullish=True))
+
+    def op_set_property(self, operands: tuple):
+        value = self.pop_stack()
+        field = self.pop_stack()
+        self.mem_costs.set_property(self.pop_stack(), field, value)
+
+    def op_dict(self, operands: tuple):
+        count = operands[0]
+        if count > 0:
+            elems = self.stack[-(count * 2) :]
+            self.stack = self.stack[: -(count * 2)]
+            self.mem_used -= sum(self.mem_stack[-(count * 2) :])
+            self.mem_stack = self.mem_stack[: -(count * 2)]
+            self.push_stack({elems[i]: elems[i + 1] for i in range(0, len(elems), 2)})
+        else:
+            self.push_stack({})
+
+    def op_array(self, operands: tuple):
+        count = operands[0]
+        if count > 0:
+            elems = self.stack[-count:]
+            self.stack = self.stack[:-count]
+            self.mem_used -= sum(self.mem_stack[-count:])
+            self.mem_stack = self.mem_stack[:-count]
+            self.push_stack(elems)
+        else:
+            self.push_stack([])
+
+    def op_tuple(self, operands: tuple):
+        count = operands[0]
+        if count > 0:
+            elems = self.stack[-count:]
+            self.stack = self.stack[:-count]
+            self.mem_used -= sum(self.mem_stack[-count:])
+            self.mem_stack = self.mem_stack[:-count]
+            self.push_stack(tuple(elems))
+        else:
+            self.push_stack(())
+
+    def op_jump(self, operands: tuple):
+        self.frame.ip = operands[0]
+
+    def op_jump_if_false(self, operands: tuple):
+        if not self.pop_stack():
+            self.frame.ip = operands[0]
+
+    def op_jump_if_stack_not_null(self, operands: tuple):
+        if len(self.stack) > 0 and self.stack[-1] is not None:
+            self.frame.ip = operands[0]
+
+    def op_declare_fn(self, operands: tuple):
+        # DEPRECATED
+        name, arg_len, body_end = operands
+        self.declared_functions[name] = (self.frame.ip, arg_len)
+        self.frame.ip = body_end
+
+    def op_callable(self, operands: tuple):
+        # TODO: do we need the name? it could change as the variable is reassigned
+        name, arg_count, upvalue_count, body_end = operands
+        frame = self.frame
+        self.push_stack(
+            new_hog_callable(
+                type="local",
+                name=name,
+                chunk=frame.chunk,
+                arg_count=arg_count,
+                upvalue_count=upvalue_count,
+                ip=frame.ip,
+            )
+        )
+        frame.ip = body_end
+
+    def op_closure(self, operands: tuple):
+        upvalue_count, upvalue_locations = operands
+        closure_callable = self.pop_stack()
+        closure = new_hog_closure(closure_callable)
+        frame = self.frame
+        if upvalue_count != closure_callable["upvalueCount"]:
+            raise HogVMException(
+                f"Invalid upvalue count. Expected {closure_callable['upvalueCount']}, got {upvalue_count}"
+            )
+        if upvalue_locations is None:
+            raise HogVMException("Unexpected end of bytecode")
+        for is_local, index in upvalue_locations:
+            if is_local:
+                closure["upvalues"].append(self.capture_upvalue(frame.stack_start + index)["id"])
+            else:
+                closure["upvalues"].append(frame.closure["upvalues"][index])
+        self.push_stack(closure)
+
+    def op_get_upvalue(self, operands: tuple):
+        upvalue = self.get_upvalue(operands[0])
+        if upvalue["closed"]:
+            self.push_stack(upvalue["value"])
+        else:
+            self.push_stack(self.stack[upvalue["location"]])
+
+    def op_set_upvalue(self, operands: tuple):
+        upvalue = self.get_upvalue(operands[0])
+        if upvalue["closed"]:
+            upvalue["value"] = self.pop_stack()
+        else:
+            self.stack[upvalue["location"]] = self.pop_stack()
+
+    def op_call_global(self, operands: tuple):
+        self.check_timeout()
+        name, arg_count = operands
+        frame = self.frame
+        # This is for backwards compatibility. We use a closure on the stack with local functions now.
+        if name in self.declared_functions:
+            func_ip, arg_len = self.declared_functions[name]
+            if arg_len > arg_count:
+                for _ in range(arg_len - arg_count):
+                    self.push_stack(None)
+            self.call(
+                CallFrame(
+                    ip=func_ip,
+                    chunk=frame.chunk,
+                    stack_start=len(self.stack) - arg_len,
+                    arg_len=arg_len,
+                    closure=new_hog_closure(
+                        new_hog_callable(
+                            type="local",
+                            name=name,
+                            arg_count=arg_len,
+                            upvalue_count=0,
+                            ip=func_ip,
+                            chunk=frame.chunk,
+                        )
+                    ),
+                )
+            )
+        elif name == "import":
+            if arg_count != 1:
+                raise HogVMException("Function import requires exactly 1 argument")
+            module_name = self.pop_stack()
+            self.call(
+                CallFrame(
+                    ip=0,
+                    chunk=module_name,
+                    stack_start=len(self.stack),
+                    arg_len=0,
+                    closure=new_hog_closure(
+                        new_hog_callable(
+                            type="local",
+                            name=module_name,
+                            arg_count=0,
+                            upvalue_count=0,
                             ip=0,
                             chunk=module_name,
-                            stack_start=len(stack),
-                            arg_len=0,
-                            closure=new_hog_closure(
-                                new_hog_callable(
-                                    type="local",
-                                    name=module_name,
-                                    arg_count=0,
-                                    upvalue_count=0,
-                                    ip=0,
-                                    chunk=module_name,
-                                )
-                            ),
                         )
-                        set_chunk_bytecode()
-                        call_stack.append(frame)
-                        continue
-                    elif functions is not None and name in functions:
-                        if version == 0:
-                            args = [pop_stack() for _ in range(arg_count)]
-                        else:
-                            args = stack_keep_first_elements(len(stack) - arg_count)
-                        push_stack(functions[name](*args))
-                    elif name in STL:
-                        if version == 0:
-                            args = [pop_stack() for _ in range(arg_count)]
-                        else:
-                            args = stack_keep_first_elements(len(stack) - arg_count)
-                        push_stack(STL[name].fn(args, team, stdout, timeout.total_seconds()))
-                    elif name in BYTECODE_STL:
-                        arg_names = BYTECODE_STL[name][0]
-                        if len(arg_names) != arg_count:
-                            raise HogVMException(f"Function {name} requires exactly {len(arg_names)} arguments")
-                        frame.ip += 1  # advance for when we return
-                        frame = CallFrame(
+                    ),
+                )
+            )
+        elif self.functions is not None and name in self.functions:
+            if self.version == 0:
+                args = [self.pop_stack() for _ in range(arg_count)]
+            else:
+                args = self.stack_keep_first_elements(len(self.stack) - arg_count)
+            self.push_stack(self.functions[name](*args))
+        elif name in STL:
+            if self.version == 0:
+                args = [self.pop_stack() for _ in range(arg_count)]
+            else:
+                args = self.stack_keep_first_elements(len(self.stack) - arg_count)
+            self.push_stack(STL[name].fn(args, self.team, self.stdout, self.timeout.total_seconds()))
+        elif name in BYTECODE_STL:
+            arg_names = BYTECODE_STL[name][0]
+            if len(arg_names) != arg_count:
+                raise HogVMException(f"Function {name} requires exactly {len(arg_names)} arguments")
+            self.call(
+                CallFrame(
+                    ip=0,
+                    chunk=f"stl/{name}",
+                    stack_start=len(self.stack) - arg_count,
+                    arg_len=arg_count,
+                    closure=new_hog_closure(
+                        new_hog_callable(
+                            type="stl",
+                            name=name,
+                            arg_count=arg_count,
+                            upvalue_count=0,
                             ip=0,
                             chunk=f"stl/{name}",
-                            stack_start=len(stack) - arg_count,
-                            arg_len=arg_count,
-                            closure=new_hog_closure(
-                                new_hog_callable(
-                                    type="stl",
-                                    name=name,
-                                    arg_count=arg_count,
-                                    upvalue_count=0,
-                                    ip=0,
-                                    chunk=f"stl/{name}",
-                                )
-                            ),
-                        )
-                        set_chunk_bytecode()
-                        call_stack.append(frame)
-                        continue  # resume the loop without incrementing frame.ip
-                    else:
-                        raise HogVMException(f"Unsupported function call: {name}")
-            case Operation.CALL_LOCAL:
-                check_timeout()
-                closure = pop_stack()
-                if not isinstance(closure, dict) or closure.get("__hogClosure__") is None:
-                    raise HogVMException(f"Invalid closure: {closure}")
-                callable = closure.get("callable")
-                if not isinstance(callable, dict) or callable.get("__hogCallable__") is None:
-                    raise HogVMException(f"Invalid callable: {callable}")
-                args_length = next_token()
-                if args_length > MAX_FUNCTION_ARGS_LENGTH:
-                    raise HogVMException("Too many arguments")
-
-                if callable.get("__hogCallable__") == "local":
-                    if callable["argCount"] > args_length:
-                        # TODO: specify minimum required arguments somehow
-                        for _ in range(callable["argCount"] - args_length):
-                            push_stack(None)
-                    elif callable["argCount"] < args_length:
-                        raise HogVMException(
-                            f"Too many arguments. Passed {args_length}, expected {callable['argCount']}"
-                        )
-                    frame.ip += 1  # advance for when we return
-                    frame = CallFrame(
-                        ip=callable["ip"],
-                        chunk=callable["chunk"],
-                        stack_start=len(stack) - callable["argCount"],
-                        arg_len=callable["argCount"],
-                        closure=closure,
-                    )
-                    set_chunk_bytecode()
-                    call_stack.append(frame)
-                    continue  # resume the loop without incrementing frame.ip
-
-                elif callable.get("__hogCallable__") == "stl":
-                    if callable["name"] not in STL:
-                        raise HogVMException(f"Unsupported function call: {callable['name']}")
-                    stl_fn = STL[callable["name"]]
-                    if stl_fn.minArgs is not None and args_length < stl_fn.minArgs:
-                        raise HogVMException(
-                            f"Function {callable['name']} requires at least {stl_fn.minArgs} arguments"
                         )
-                    if stl_fn.maxArgs is not None and args_length > stl_fn.maxArgs:
-                        raise HogVMException(f"Function {callable['name']} requires at most {stl_fn.maxArgs} arguments")
-                    if version == 0:
-                        args = [pop_stack() for _ in range(args_length)]
-                    else:
-                        args = list(reversed([pop_stack() for _ in range(args_length)]))
-                        if stl_fn.maxArgs is not None and len(args) < stl_fn.maxArgs:
-                            args = [*args, *([None] * (stl_fn.maxArgs - len(args)))]
-                    push_stack(stl_fn.fn(args, team, stdout, timeout.total_seconds()))
-
-                elif callable.get("__hogCallable__") == "async":
-                    raise HogVMException("Async functions are not supported")
-
-                else:
-                    raise HogVMException("Invalid callable")
-
-            case Operation.TRY:
-                throw_stack.append(
-                    ThrowFrame(
-                        call_stack_len=len(call_stack), stack_len=len(stack), catch_ip=frame.ip + 1 + next_token()
-                    )
+                    ),
                 )
-            case Operation.POP_TRY:
-                if throw_stack:
-                    throw_stack.pop()
-                else:
-                    raise HogVMException("Invalid operation POP_TRY: no try block to pop")
-            case Operation.THROW:
-                exception = pop_stack()
-                if not is_hog_error(exception):
-                    raise HogVMException("Can not throw: value is not of type Error")
-                if throw_stack:
-                    last_throw = throw_stack.pop()
-                    call_stack_len, stack_len, catch_ip = (
-                        last_throw.call_stack_len,
-                        last_throw.stack_len,
-                        last_throw.catch_ip,
-                    )
-                    stack_keep_first_elements(stack_len)
-                    call_stack = call_stack[0:call_stack_len]
-                    push_stack(exception)
-                    frame = call_stack[-1]
-                    set_chunk_bytecode()
-                    frame.ip = catch_ip
-                    continue
-                else:
-                    raise UncaughtHogVMException(
-                        type=exception.get("type"),
-                        message=exception.get("message"),
-                        payload=exception.get("payload"),
-                    )
-            case _:
-                raise HogVMException(
-                    f'Unexpected node while running bytecode in chunk "{frame.chunk}": {chunk_bytecode[frame.ip]}'
+            )
+        else:
+            raise HogVMException(f"Unsupported function call: {name}")
+
+    def op_call_local(self, operands: tuple):
+        self.check_timeout()
+        closure = self.pop_stack()
+        if not isinstance(closure, dict) or closure.get("__hogClosure__") is None:
+            raise HogVMException(f"Invalid closure: {closure}")
+        callable = closure.get("callable")
+        if not isinstance(callable, dict) or callable.get("__hogCallable__") is None:
+            raise HogVMException(f"Invalid callable: {callable}")
+        args_length = operands[0]
+        if args_length > MAX_FUNCTION_ARGS_LENGTH:
+            raise HogVMException("Too many arguments")
+
+        if callable.get("__hogCallable__") == "local":
+            if callable["argCount"] > args_length:
+                # TODO: specify minimum required arguments somehow
+                for _ in range(callable["argCount"] - args_length):
+                    self.push_stack(None)
+            elif callable["argCount"] < args_length:
+                raise HogVMException(f"Too many arguments. Passed {args_length}, expected {callable['argCount']}")
+            self.call(
+                CallFrame(
+                    ip=callable["ip"],
+                    chunk=callable["chunk"],
+                    stack_start=len(self.stack) - callable["argCount"],
+                    arg_len=callable["argCount"],
+                    closure=closure,
                 )
+            )
+
+        elif callable.get("__hogCallable__") == "stl":
+            if callable["name"] not in STL:
+                raise HogVMException(f"Unsupported function call: {callable['name']}")
+            stl_fn = STL[callable["name"]]
+            if stl_fn.minArgs is not None and args_length < stl_fn.minArgs:
+                raise HogVMException(f"Function {callable['name']} requires at least {stl_fn.minArgs} arguments")
+            if stl_fn.maxArgs is not None and args_length > stl_fn.maxArgs:
+                raise HogVMException(f"Function {callable['name']} requires at most {stl_fn.maxArgs} arguments")
+            if self.version == 0:
+                args = [self.pop_stack() for _ in range(args_length)]
+            else:
+                args = list(reversed([self.pop_stack() for _ in range(args_length)]))
+                if stl_fn.maxArgs is not None and len(args) < stl_fn.maxArgs:
+                    args = [*args, *([None] * (stl_fn.maxArgs - len(args)))]
+            self.push_stack(stl_fn.fn(args, self.team, self.stdout, self.timeout.total_seconds()))
+
+        elif callable.get("__hogCallable__") == "async":
+            raise HogVMException("Async functions are not supported")
 
-        frame.ip += 1
+        else:
+            raise HogVMException("Invalid callable")
 
-    return BytecodeResult(result=pop_stack() if len(stack) > 0 else None, stdout=stdout, bytecodes=bytecodes)
+    def op_try(self, operands: tuple):
+        self.throw_stack.append(
+            ThrowFrame(call_stack_len=len(self.call_stack), stack_len=len(self.stack), catch_ip=operands[0])
+        )
+
+    def op_pop_try(self, operands: tuple):
+        if self.throw_stack:
+            self.throw_stack.pop()
+        else:
+            raise HogVMException("Invalid operation POP_TRY: no try block to pop")
+
+    def op_throw(self, operands: tuple):
+        exception = self.pop_stack()
+        if not is_hog_error(exception):
+            raise HogVMException("Can not throw: value is not of type Error")
+        if self.throw_stack:
+            last_throw = self.throw_stack.pop()
+            self.stack_keep_first_elements(last_throw.stack_len)
+            self.call_stack = self.call_stack[0 : last_throw.call_stack_len]
+            self.push_stack(exception)
+            self.frame = self.call_stack[-1]
+            self.set_chunk_bytecode()
+            self.frame.ip = last_throw.catch_ip
+        else:
+            raise UncaughtHogVMException(
+                type=exception.get("type"),
+                message=exception.get("message"),
+                payload=exception.get("payload"),
+            )
+
+
+# The handler of each operation, and how many operands follow it in the bytecode
+_OPERATIONS: dict[int, tuple[Callable[[_Execution, tuple], Optional[BytecodeResult]], int]] = {
+    Operation.STRING.value: (_Execution.op_constant, 1),
+    Operation.INTEGER.value: (_Execution.op_constant, 1),
+    Operation.FLOAT.value: (_Execution.op_constant, 1),
+    Operation.TRUE.value: (_Execution.op_true, 0),
+    Operation.FALSE.value: (_Execution.op_false, 0),
+    Operation.NULL.value: (_Execution.op_null, 0),
+    Operation.NOT.value: (_Execution.op_not, 0),
+    Operation.AND.value: (_Execution.op_and, 1),
+    Operation.OR.value: (_Execution.op_or, 1),
+    Operation.PLUS.value: (_Execution.op_plus, 0),
+    Operation.MINUS.value: (_Execution.op_minus, 0),
+    Operation.DIVIDE.value: (_Execution.op_divide, 0),
+    Operation.MULTIPLY.value: (_Execution.op_multiply, 0),
+    Operation.MOD.value: (_Execution.op_mod, 0),
+    Operation.EQ.value: (_Execution.op_eq, 0),
+    Operation.NOT_EQ.value: (_Execution.op_not_eq, 0),
+    Operation.GT.value: (_Execution.op_gt, 0),
+    Operation.GT_EQ.value: (_Execution.op_gt_eq, 0),
+    Operation.LT.value: (_Execution.op_lt, 0),
+    Operation.LT_EQ.value: (_Execution.op_lt_eq, 0),
+    Operation.LIKE.value: (_Execution.op_like, 0),
+    Operation.ILIKE.value: (_Execution.op_ilike, 0),
+    Operation.NOT_LIKE.value: (_Execution.op_not_like, 0),
+    Operation.NOT_ILIKE.value: (_Execution.op_not_ilike, 0),
+    Operation.IN.value: (_Execution.op_in, 0),
+    Operation.NOT_IN.value: (_Execution.op_not_in, 0),
+    Operation.REGEX.value: (_Execution.op_regex, 0),
+    Operation.NOT_REGEX.value: (_Execution.op_not_regex, 0),
+    Operation.IREGEX.value: (_Execution.op_iregex, 0),
+    Operation.NOT_IREGEX.value: (_Execution.op_not_iregex, 0),
+    Operation.GET_GLOBAL.value: (_Execution.op_get_global, 1),
+    Operation.POP.value: (_Execution.op_pop, 0),
+    Operation.CLOSE_UPVALUE.value: (_Execution.op_close_upvalue, 0),
+    Operation.RETURN.value: (_Execution.op_return, 0),
+    Operation.GET_LOCAL.value: (_Execution.op_get_local, 1),
+    Operation.SET_LOCAL.value: (_Execution.op_set_local, 1),
+    Operation.GET_PROPERTY.value: (_Execution.op_get_property, 0),
+    Operation.GET_PROPERTY_NULLISH.value: (_Execution.op_get_property_nullish, 0),
+    Operation.SET_PROPERTY.value: (_Execution.op_set_property, 0),
+    Operation.DICT.value: (_Execution.op_dict, 1),
+    Operation.ARRAY.value: (_Execution.op_array, 1),
+    Operation.TUPLE.value: (_Execution.op_tuple, 1),
+    Operation.JUMP.value: (_Execution.op_jump, 1),
+    Operation.JUMP_IF_FALSE.value: (_Execution.op_jump_if_false, 1),
+    Operation.JUMP_IF_STACK_NOT_NULL.value: (_Execution.op_jump_if_stack_not_null, 1),
+    Operation.DECLARE_FN.value: (_Execution.op_declare_fn, 3),
+    Operation.CALLABLE.value: (_Execution.op_callable, 4),
+    Operation.CLOSURE.value: (_Execution.op_closure, 1),
+    Operation.GET_UPVALUE.value: (_Execution.op_get_upvalue, 1),
+    Operation.SET_UPVALUE.value: (_Execution.op_set_upvalue, 1),
+    Operation.CALL_GLOBAL.value: (_Execution.op_call_global, 2),
+    Operation.CALL_LOCAL.value: (_Execution.op_call_local, 1),
+    Operation.TRY.value: (_Execution.op_try, 1),
+    Operation.POP_TRY.value: (_Execution.op_pop_try, 0),
+    Operation.THROW.value: (_Execution.op_throw, 0),
+}
+
+# Operations followed by an offset from the next instruction, as their last operand
+_RELATIVE_JUMP_OPERATIONS = {
+    Operation.JUMP.value,
+    Operation.JUMP_IF_FALSE.value,
+    Operation.JUMP_IF_STACK_NOT_NULL.value,
+    Operation.DECLARE_FN.value,
+    Operation.CALLABLE.value,
+}
+
+
+def _decode_instruction(bytecode: list[Any], ip: int) -> Instruction:
+    symbol = bytecode[ip]
+    if symbol is None:
+        return (_Execution.halt, (), ip + 1)
+    try:
+        operation = _OPERATIONS.get(symbol)
+    except TypeError:
+        operation = None
+    if operation is None:
+        return (_Execution.unexpected_node, (symbol,), ip + 1)
+
+    handler, operand_count = operation
+    last_op = len(bytecode) - 1
+    if ip + operand_count > last_op:
+        return (_Execution.unexpected_end, (), ip + 1)
+    operands = tuple(bytecode[ip + 1 : ip + 1 + operand_count])
+    next_ip = ip + 1 + operand_count
+
+    if symbol == Operation.CLOSURE:
+        # Followed by a pair of operands for each upvalue
+        upvalue_count = operands[0]
+        if ip + 1 + upvalue_count * 2 > last_op:
+            return (handler, (upvalue_count, None), next_ip)
+        end_ip = next_ip + upvalue_count * 2
+        upvalue_locations = tuple(zip(bytecode[next_ip:end_ip:2], bytecode[next_ip + 1 : end_ip : 2]))
+        return (handler, (upvalue_count, upvalue_locations), end_ip)
+    if symbol in _RELATIVE_JUMP_OPERATIONS:
+        operands = (*operands[:-1], next_ip + operands[-1])
+    elif symbol == Operation.TRY:
+        # The catch offset is relative to the operand, not to the next instruction
+        operands = (ip + 1 + operands[0],)
+    return (handler, operands, next_ip)
 
 
 def validate_bytecode(bytecode: list[Any] | dict, inputs: Optional[dict] = None) -> tuple[bool, Optional[str]]:
@@ -3,13 +3,13 @@ from typing import Any, Optional
 from collections.abc import Callable
 
 
-from common.hogvm.python.execute import execute_bytecode, get_nested_value
+from common.hogvm.python.execute import execute_bytecode, execute_many, get_nested_value
 from common.hogvm.python.operation import (
     Operation as op,
     HOGQL_BYTECODE_IDENTIFIER as _H,
     HOGQL_BYTECODE_VERSION as VERSION,
 )
-from common.hogvm.python.utils import UncaughtHogVMException
+from common.hogvm.python.utils import CostCache, UncaughtHogVMException, calculate_cost
 from posthog.hogql.compiler.bytecode import create_bytecode
 from posthog.hogql.parser import parse_expr, parse_program
 
@@ -272,6 +272,54 @@ class TestBytecodeExecute:
         else:
             raise AssertionError("Expected Exception not raised")
 
+    def test_memory_limits_set_property(self):
+        try:
+            self._run_program(
+                """
+                let obj := {}
+                let string := 'banana'
+                for (let i := 0; i < 100; i := i + 1) {
+                    string := string || string
+                    obj[i] := string
+                }
+                return obj
+                """
+            )
+        except Exception as e:
+            assert str(e).startswith("Memory limit of 67108864 bytes exceeded")
+        else:
+            raise AssertionError("Expected Exception not raised")
+
+    def test_memory_costs_follow_changes(self):
+        costs = CostCache(max_cost=1024 * 1024, min_cost=0)
+        inner = {"key": "value"}
+        outer = {"inner": inner, "list": [inner, "banana"]}
+        assert costs.cost(outer) == calculate_cost(outer)
+
+        costs.set_property(inner, "key", "a much longer value")
+        assert costs.cost(inner) == calculate_cost(inner)
+        assert costs.cost(outer) == calculate_cost(outer)
+
+        costs.set_property(outer["list"], 2, ["nested", "list"])
+        assert costs.cost(outer) == calculate_cost(outer)
+
+        costs.set_property(inner, "outer", outer)
+        assert costs.cost(inner) == calculate_cost(inner)
+        assert costs.cost(outer) == calculate_cost(outer)
+
+    def test_memory_costs_cache_only_large_acyclic_containers(self):
+        costs = CostCache(max_cost=1024 * 1024)
+        small = {"key": "value"}
+        large = {"small": small, "list": list(range(100))}
+        assert costs.cost(small) == calculate_cost(small)
+        assert costs.cost(large) == calculate_cost(large)
+        assert set(costs._entries) == {id(large), id(large["list"])}
+
+        cyclic: list = [large]
+        cyclic.append(cyclic)
+        assert costs.cost(cyclic) == calculate_cost(cyclic)
+        assert id(cyclic) not in costs._entries
+
     def test_functions(self):
         def stringify(*args):
             if args[0] == 1:
@@ -1009,6 +1057,24 @@ class TestBytecodeExecute:
         else:
             raise AssertionError("Expected Exception not raised")
 
+    def test_execute_many(self):
+        # return properties.value
+        bytecode = [_H, VERSION, op.STRING, "value", op.STRING, "properties", op.GET_GLOBAL, 2, op.RETURN]
+        results = execute_many(
+            bytecode,
+            [{"properties": {"value": 1}}, {"properties": {"value": "two"}}, {"properties": {}}],
+        )
+        assert [result.result for result in results] == [1, "two", None]
+
+    def test_truncated_bytecode(self):
+        for bytecode in [[_H, VERSION, op.INTEGER], [_H, VERSION, op.TRUE, op.JUMP_IF_FALSE]]:
+            try:
+                execute_bytecode(bytecode, {})
+            except Exception as e:
+                assert str(e) == "Unexpected end of bytecode"
+            else:
+                raise AssertionError("Expected Exception not raised")
+
     def test_multiple_bytecodes(self):
         ret = lambda string: {"bytecode": ["_H", 1, op.STRING, string, op.RETURN]}
         call = lambda chunk: {"bytecode": ["_H", 1, op.STRING, chunk, op.CALL_GLOBAL, "import", 1, op.RETURN]}
@@ -1,4 +1,5 @@
 import re
+from itertools import chain
 from typing import Any
 
 
@@ -115,6 +116,84 @@ def calculate_cost(object, marked: set | None = None) -> int:
     return COST_PER_UNIT
 
 
+class CostCache:
+    """Caches the costs of containers, as `calculate_cost` would return them, so that pushing a large dict or list on
+    the stack doesn't walk all of it every time.
+
+    Entries keep a reference to their container, so that its id can't be reused while cached, and are evicted once the
+    cached costs add up to more than `max_cost`. Containers costing less than `min_cost` are cheaper to walk than to
+    cache, and aren't. Once a walk finds a cycle, the cost is worked out by `calculate_cost` instead, as it then depends
+    on where the walk started. Changing any container makes the costs cached so far stale, as the containers holding it
+    aren't known, so containers must be changed through `set_property`.
+    """
+
+    def __init__(self, max_cost: int, min_cost: int = 64 * COST_PER_UNIT):
+        self.max_cost = max_cost
+        self.min_cost = min_cost
+        self._entries: dict[int, tuple[Any, int, int]] = {}
+        self._cached_cost = 0
+        self._version = 0
+
+    def cost(self, object) -> int:
+        if isinstance(object, dict | list | tuple):
+            cost = self._cost(object, set())
+            return cost if cost is not None else calculate_cost(object)
+        return calculate_cost(object)
+
+    def set_property(self, obj, key, value) -> None:
+        """Sets `key` of `obj` to `value` like `set_nested_value` does, dropping the costs cached so far."""
+        self._version += 1
+        set_nested_value(obj, [key], value)
+
+    def _cost(self, object, marked: set[int]) -> int | None:
+        """Returns the cost of `object`, or None if it holds a container that is being walked."""
+        if not isinstance(object, dict | list | tuple):
+            return calculate_cost(object)
+        object_id = id(object)
+        if object_id in marked:
+            return None
+        if (cached := self._get(object)) is not None:
+            return cached
+
+        marked.add(object_id)
+        cost = COST_PER_UNIT
+        try:
+            for value in chain.from_iterable(object.items()) if isinstance(object, dict) else object:
+                value_cost = self._cost(value, marked)
+                if value_cost is None:
+                    return None
+                cost += value_cost
+        finally:
+            marked.remove(object_id)
+
+        if cost >= self.min_cost:
+            self._put(object, cost)
+        return cost
+
+    def _get(self, object) -> int | None:
+        entry = self._entries.pop(id(object), None)
+        if entry is None:
+            return None
+        if entry[2] != self._version:
+            self._cached_cost -= entry[1]
+            return None
+        # Re-inserted to evict the least recently used entries first
+        self._entries[id(object)] = entry
+        return entry[1]
+
+    def _put(self, object, cost: int) -> None:
+        replaced = self._entries.pop(id(object), None)
+        if replaced is not None:
+            self._cached_cost -= replaced[1]
+        if cost > self.max_cost:
+            return
+        self._entries[id(object)] = (object, cost, self._version)
+        self._cached_cost += cost
+        while self._cached_cost > self.max_cost:
+            evicted = self._entries.pop(next(iter(self._entries)))
+            self._cached_cost -= evicted[1]
+
+
 def unify_comparison_types(left, right):
     if isinstance(left, int | float) and isinstance(right, str):
         return left, float(right)
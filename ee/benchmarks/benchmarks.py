@@ -1,6 +1,6 @@
 # isort: skip_file
 # Needs to be first to set up django environment
-from .helpers import benchmark_clickhouse, no_materialized_columns, now
+from .helpers import benchmark_clickhouse, get_benchmark_team, no_materialized_columns, now
 from datetime import timedelta
 from ee.clickhouse.materialized_columns.analyze import (
     backfill_materialized_columns,
@@ -19,7 +19,7 @@ from posthog.queries.session_recordings.session_recording_list import (
     SessionRecordingList,
 )
 from posthog.queries.util import get_earliest_timestamp
-from posthog.models import Action, Cohort, Team, Organization
+from posthog.models import Action, Cohort, Team
 from posthog.models.filters.session_recordings_filter import SessionRecordingsFilter
 from posthog.models.filters.stickiness_filter import StickinessFilter
 from posthog.models.filters.filter import Filter
@@ -676,12 +676,7 @@ class QuerySuite:
                 backfill_period=timedelta(days=1_000),
             )
 
-        # :TRICKY: Data in benchmark servers has ID=2
-        team = Team.objects.filter(id=2).first()
-        if team is None:
-            organization = Organization.objects.create()
-            team = Team.objects.create(id=2, organization=organization, name="The Bakery")
-        self.team = team
+        self.team = get_benchmark_team()
 
         cohort = Cohort.objects.filter(name="benchmarking cohort").first()
         if cohort is None:
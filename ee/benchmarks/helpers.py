@@ -17,6 +17,9 @@ django.setup()
 from ee.clickhouse.materialized_columns.columns import get_enabled_materialized_columns  # noqa: E402
 from posthog import client  # noqa: E402
 from posthog.clickhouse.query_tagging import reset_query_tags, tag_queries  # noqa: E402
+from posthog.hogql.constants import LimitContext  # noqa: E402
+from posthog.hogql_queries.query_runner import get_query_runner  # noqa: E402
+from posthog.models import Organization, Team  # noqa: E402
 from posthog.models.utils import UUIDT  # noqa: E402
 
 get_column = lambda rows, index: [row[index] for row in rows]
@@ -59,6 +62,47 @@ def get_clickhouse_query_stats(uuid):
     }
 
 
+def get_benchmark_team() -> Team:
+    # :TRICKY: Data in benchmark servers has ID=2
+    team = Team.objects.filter(id=2).first()
+    if team is None:
+        organization = Organization.objects.create()
+        team = Team.objects.create(id=2, organization=organization, name="The Bakery")
+    return team
+
+
+def _sum_timings(timings, suffix: str) -> float:
+    return sum(timing.t for timing in timings if timing.k.endswith(suffix))
+
+
+def run_query_runner(query: dict, team: Team) -> dict:
+    """
+    Calculates a query through its HogQL query runner, bypassing the cache, and returns the Python-side stage timings
+    (in ms, from `HogQLTimings`) together with the ClickHouse stats of every query it ran.
+    """
+    uuid = str(UUIDT())
+    tag_queries(kind="benchmark", id=f"{uuid}::{query['kind']}")
+    try:
+        runner = get_query_runner(query, team, limit_context=LimitContext.QUERY)
+        response = runner.calculate()
+        clickhouse_stats = get_clickhouse_query_stats(uuid)
+    finally:
+        reset_query_tags()
+
+    timings = getattr(response, "timings", None) or []
+    total = _sum_timings([timing for timing in timings if timing.k == "."], ".")
+    clickhouse_execute = _sum_timings(timings, "/clickhouse_execute")
+
+    return {
+        "hogql_total_time": total * 1000,
+        "hogql_compile_time": (total - clickhouse_execute) * 1000,
+        "hogql_prepare_ast_time": _sum_timings(timings, "/prepare_ast_for_printing") * 1000,
+        "hogql_print_time": _sum_timings(timings, "/print_prepared_ast") * 1000,
+        "clickhouse_execute_time": clickhouse_execute * 1000,
+        **clickhouse_stats,
+    }
+
+
 def benchmark_clickhouse(fn):
     @wraps(fn)
     def inner(*args):
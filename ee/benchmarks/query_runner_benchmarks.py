@@ -0,0 +1,159 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import get_benchmark_team, run_query_runner
+from statistics import median
+from typing import Any
+
+# Uses the same pre-filled date range as `benchmarks.py`
+DATE_RANGE = {"date_from": "2021-01-01", "date_to": "2021-10-01"}
+SHORT_DATE_RANGE = {"date_from": "2021-07-01", "date_to": "2021-10-01"}
+
+PAGEVIEW = {"kind": "EventsNode", "event": "$pageview"}
+AUTOCAPTURE = {"kind": "EventsNode", "event": "$autocapture"}
+
+QUERIES: dict[str, dict[str, Any]] = {
+    "trends": {
+        "kind": "TrendsQuery",
+        "series": [PAGEVIEW],
+        "dateRange": DATE_RANGE,
+        "interval": "week",
+    },
+    "trends_multiple_series": {
+        "kind": "TrendsQuery",
+        "series": [PAGEVIEW, AUTOCAPTURE, {**PAGEVIEW, "math": "dau"}],
+        "dateRange": DATE_RANGE,
+        "interval": "week",
+    },
+    "trends_event_property_breakdown": {
+        "kind": "TrendsQuery",
+        "series": [PAGEVIEW],
+        "dateRange": SHORT_DATE_RANGE,
+        "interval": "week",
+        "breakdownFilter": {"breakdown": "$browser", "breakdown_type": "event"},
+    },
+    "trends_person_property_filter": {
+        "kind": "TrendsQuery",
+        "series": [{**PAGEVIEW, "math": "dau"}],
+        "dateRange": DATE_RANGE,
+        "interval": "week",
+        "properties": [{"key": "email", "operator": "icontains", "value": ".com", "type": "person"}],
+    },
+    "funnel": {
+        "kind": "FunnelsQuery",
+        "series": [PAGEVIEW, AUTOCAPTURE],
+        "dateRange": SHORT_DATE_RANGE,
+        "funnelsFilter": {"useUdf": False},
+    },
+    "funnel_udf": {
+        "kind": "FunnelsQuery",
+        "series": [PAGEVIEW, AUTOCAPTURE],
+        "dateRange": SHORT_DATE_RANGE,
+        "funnelsFilter": {"useUdf": True},
+    },
+    "funnel_trends_udf": {
+        "kind": "FunnelsQuery",
+        "series": [PAGEVIEW, AUTOCAPTURE],
+        "dateRange": SHORT_DATE_RANGE,
+        "interval": "week",
+        "funnelsFilter": {"useUdf": True, "funnelVizType": "trends"},
+    },
+    "retention": {
+        "kind": "RetentionQuery",
+        "dateRange": {"date_from": "2021-09-01", "date_to": "2021-10-01"},
+        "retentionFilter": {
+            "period": "Week",
+            "totalIntervals": 4,
+            "targetEntity": {"id": "$pageview", "type": "events"},
+            "returningEntity": {"id": "$pageview", "type": "events"},
+        },
+    },
+    "paths": {
+        "kind": "PathsQuery",
+        "dateRange": SHORT_DATE_RANGE,
+        "pathsFilter": {"includeEventTypes": ["$pageview"]},
+    },
+    "lifecycle": {
+        "kind": "LifecycleQuery",
+        "series": [PAGEVIEW],
+        "dateRange": SHORT_DATE_RANGE,
+        "interval": "week",
+    },
+    "web_overview": {
+        "kind": "WebOverviewQuery",
+        "dateRange": SHORT_DATE_RANGE,
+        "properties": [],
+    },
+    "web_stats_table_page": {
+        "kind": "WebStatsTableQuery",
+        "dateRange": SHORT_DATE_RANGE,
+        "properties": [],
+        "breakdownBy": "Page",
+    },
+    "web_stats_table_initial_channel_type": {
+        "kind": "WebStatsTableQuery",
+        "dateRange": SHORT_DATE_RANGE,
+        "properties": [],
+        "breakdownBy": "InitialChannelType",
+    },
+    "actors": {
+        "kind": "ActorsQuery",
+        "select": ["person", "created_at"],
+        "properties": [{"key": "email", "operator": "icontains", "value": ".com", "type": "person"}],
+    },
+    "actors_from_trends": {
+        "kind": "ActorsQuery",
+        "select": ["actor", "event_count"],
+        "source": {
+            "kind": "InsightActorsQuery",
+            "day": "2021-07-05",
+            "source": {
+                "kind": "TrendsQuery",
+                "series": [PAGEVIEW],
+                "dateRange": SHORT_DATE_RANGE,
+                "interval": "week",
+            },
+        },
+    },
+}
+
+# Python side: everything but waiting on ClickHouse. ClickHouse side: as reported in system.query_log.
+METRICS = [
+    "hogql_total_time",
+    "hogql_compile_time",
+    "hogql_prepare_ast_time",
+    "hogql_print_time",
+    "clickhouse_execute_time",
+    "ch_query_time",
+    "read_rows",
+    "read_bytes",
+    "memory_usage",
+    "query_count",
+]
+
+SAMPLES = 4
+
+
+class QueryRunnerSuite:
+    """
+    Benchmarks the HogQL query runners used in production, against the same pre-filled ClickHouse as `QuerySuite`.
+
+    Every query is run once per sample in `setup_cache`, and each `track_` result looks up one metric of one query,
+    so that asv keeps separate histories for Python compile time and for the cost of the generated SQL.
+    """
+
+    timeout = 3000.0
+    version = "v001"
+
+    params = (list(QUERIES.keys()), METRICS)
+    param_names = ["query", "metric"]
+
+    def setup_cache(self) -> dict[str, dict[str, float]]:
+        team = get_benchmark_team()
+        results: dict[str, dict[str, float]] = {}
+        for name, query in QUERIES.items():
+            samples = [run_query_runner(query, team) for _ in range(SAMPLES)]
+            results[name] = {metric: median(sample[metric] for sample in samples) for metric in METRICS}
+        return results
+
+    def track_query_runner(self, results: dict[str, dict[str, float]], query: str, metric: str) -> float:
+        return results[query][metric]
@@ -180,6 +180,13 @@ tables: dict[str, TableInfo | ShardedTableInfo] = {
 }
 
 
+def _invalidate_property_indexes() -> None:
+    # HogQL caches which properties are materialized, see `posthog.hogql.property_index`
+    from posthog.hogql.property_index import invalidate_materialized_columns_in_property_indexes
+
+    invalidate_materialized_columns_in_property_indexes()
+
+
 def get_minmax_index_name(column: str) -> str:
     return f"minmax_{column}"
 
@@ -277,6 +284,7 @@ def materialize(
             ).execute
         ).result()
 
+    _invalidate_property_indexes()
     return column
 
 
@@ -315,6 +323,8 @@ def update_column_is_disabled(
         ).execute
     ).result()
 
+    _invalidate_property_indexes()
+
 
 def check_index_exists(client: Client, table: str, index: str) -> bool:
     [(count,)] = client.execute(
@@ -396,6 +406,8 @@ def drop_column(table: TablesWithMaterializedColumns, column_names: Iterable[str
         ).execute,
     ).result()
 
+    _invalidate_property_indexes()
+
 
 @dataclass
 class BackfillColumnTask:
@@ -7,7 +7,8 @@ from freezegun import freeze_time
 from posthog.clickhouse.client import sync_execute
 from posthog.models.cohort import Cohort
 from posthog.models.person import Person
-from posthog.tasks.calculate_cohort import insert_cohort_from_insight_filter
+from posthog.models.cohort.util import get_cohort_size
+from posthog.tasks.calculate_cohort import calculate_cohorts_batch_ch, insert_cohort_from_insight_filter
 from posthog.tasks.test.test_calculate_cohort import calculate_cohort_test_factory
 from posthog.test.base import ClickhouseTestMixin, _create_event, _create_person
 
@@ -539,3 +540,39 @@ class TestClickhouseCalculateCohort(ClickhouseTestMixin, calculate_cohort_test_f
         self.assertEqual(cohort.count, 2)
         people_result = Person.objects.filter(cohort__id=cohort.pk).values_list("id", flat=True)
         self.assertCountEqual([people[1].id, people[2].id], people_result)
+
+    def test_calculate_cohorts_batch_matches_single_calculation(self):
+        _create_person(team_id=self.team.pk, distinct_ids=["p1"], properties={"email": "a@posthog.com", "plan": "pro"})
+        _create_person(team_id=self.team.pk, distinct_ids=["p2"], properties={"email": "b@posthog.com", "plan": "pro"})
+        _create_person(team_id=self.team.pk, distinct_ids=["p3"], properties={"email": "c@example.com"})
+
+        def person_cohort(name, *values):
+            return Cohort.objects.create(
+                team=self.team,
+                name=name,
+                filters={"properties": {"type": "AND", "values": list(values)}},
+                is_calculating=True,
+                pending_version=1,
+            )
+
+        cohorts = [
+            person_cohort("pro", {"key": "plan", "value": "pro", "type": "person"}),
+            person_cohort(
+                "posthog_pro",
+                {"key": "email", "value": "posthog.com", "operator": "icontains", "type": "person"},
+                {"key": "plan", "value": "pro", "type": "person"},
+            ),
+            person_cohort("nobody", {"key": "plan", "value": "enterprise", "type": "person"}),
+        ]
+
+        calculate_cohorts_batch_ch([[cohort.pk, 1] for cohort in cohorts])
+
+        expected_counts = [2, 2, 0]
+        for cohort, expected_count in zip(cohorts, expected_counts):
+            cohort.refresh_from_db()
+            self.assertFalse(cohort.is_calculating)
+            self.assertEqual(cohort.version, 1)
+            self.assertEqual(cohort.count, expected_count)
+
+            cohort.calculate_people_ch(pending_version=2)
+            self.assertEqual(get_cohort_size(cohort, override_version=2, team_id=self.team.pk), expected_count)
@@ -1,9 +1,13 @@
 import json
+from collections.abc import Iterator
+from functools import partial
 from typing import Any, Optional, cast
 
 import pydantic_core
 import structlog
+from django.conf import settings
 from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.utils.timezone import now
 from rest_framework import exceptions, serializers, viewsets
 from rest_framework.permissions import SAFE_METHODS, BasePermission
@@ -20,6 +24,7 @@ from posthog.models.group_type_mapping import GroupTypeMapping
 from posthog.models.insight_variable import InsightVariable
 from posthog.rbac.access_control_api_mixin import AccessControlViewSetMixin
 from posthog.rbac.user_access_control import UserAccessControlSerializerMixin
+from posthog.api.dashboards.parallel_tiles import get_tiles_max_parallelism, iter_in_parallel
 from posthog.api.forbid_destroy_model import ForbidDestroyModel
 from posthog.api.insight import InsightSerializer, InsightViewSet
 from posthog.api.monitoring import Feature, monitor
@@ -34,6 +39,8 @@ from posthog.models import Dashboard, DashboardTile, Insight, Text
 from posthog.models.dashboard_templates import DashboardTemplate
 from posthog.models.tagged_item import TaggedItem
 from posthog.models.user import User
+from posthog.exceptions_capture import capture_exception
+from posthog.renderers import SafeJSONRenderer, ServerSentEventRenderer
 from posthog.user_permissions import UserPermissionsSerializerMixin
 from posthog.utils import filters_override_requested_by_client, variables_override_requested_by_client
 from posthog.clickhouse.client.async_task_chain import task_chain_context
@@ -46,6 +53,15 @@ logger = structlog.get_logger(__name__)
 tracer = trace.get_tracer(__name__)
 
 
+def _server_sent_event(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + SafeJSONRenderer().render(data) + b"\n\n"
+
+
+def _hit_concurrency_limit(tile_data: ReturnDict) -> bool:
+    query_status = (tile_data.get("insight") or {}).get("query_status")
+    return isinstance(query_status, dict) and query_status.get("error_message") == "concurrency_limit_exceeded"
+
+
 class CanEditDashboard(BasePermission):
     message = "You don't have edit permissions for this dashboard."
 
@@ -431,14 +447,17 @@ class DashboardSerializer(DashboardBasicSerializer):
 
     @tracer.start_as_current_span("DashboardSerializer.get_tiles")
     def get_tiles(self, dashboard: Dashboard) -> Optional[list[ReturnDict]]:
-        if self.context["view"].action == "list":
+        # Tiles aren't listed, and streamed dashboards send them one by one after the rest of the dashboard
+        if self.context["view"].action in ("list", "stream_tiles"):
             return None
 
+        return sorted(self.iter_tiles(dashboard), key=lambda tile_data: tile_data["order"])
+
+    def iter_tiles(self, dashboard: Dashboard) -> Iterator[ReturnDict]:
+        """Yields the serialized tiles of `dashboard`, in order of completion when they're serialized in parallel."""
         # used by insight serializer to load insight filters in correct context
         self.context.update({"dashboard": dashboard})
 
-        serialized_tiles = []
-
         tiles = DashboardTile.dashboard_queryset(dashboard.tiles).prefetch_related(
             Prefetch(
                 "insight__tagged_items",
@@ -466,37 +485,56 @@ class DashboardSerializer(DashboardBasicSerializer):
             ),
         )
 
-        with task_chain_context() if chained_tile_refresh_enabled else nullcontext():
-            for order, tile in enumerate(sorted_tiles):
-                self.context.update(
-                    {
-                        "dashboard_tile": tile,
-                        "order": order,
-                    }
-                )
+        # Chained refreshes collect the tiles' queries in thread-local state, so they stay on this thread
+        if not settings.DASHBOARD_TILES_PARALLEL_ENABLED or chained_tile_refresh_enabled or len(sorted_tiles) <= 1:
+            with task_chain_context() if chained_tile_refresh_enabled else nullcontext():
+                for order, tile in enumerate(sorted_tiles):
+                    self.context.update(
+                        {
+                            "dashboard_tile": tile,
+                            "order": order,
+                        }
+                    )
+                    yield self._serialize_tile(tile, self.context)
+            return
+
+        # Each tile gets a context of its own, as serializing it updates the context
+        contexts = [{**self.context, "dashboard_tile": tile, "order": order} for order, tile in enumerate(sorted_tiles)]
+        limited_tiles: list[int] = []
+        for index, tile_data in iter_in_parallel(
+            [partial(self._serialize_tile, tile, context) for tile, context in zip(sorted_tiles, contexts)],
+            max_parallelism=get_tiles_max_parallelism(),
+        ):
+            if _hit_concurrency_limit(tile_data):
+                limited_tiles.append(index)
+            else:
+                yield tile_data
+
+        # Other requests of the organization were holding on to the dashboard query slots, try again one at a time
+        for index in sorted(limited_tiles):
+            yield self._serialize_tile(sorted_tiles[index], contexts[index])
+
+    @staticmethod
+    def _serialize_tile(tile: DashboardTile, context: dict[str, Any]) -> ReturnDict:
+        if isinstance(tile.layouts, str):
+            tile.layouts = json.loads(tile.layouts)
 
-                if isinstance(tile.layouts, str):
-                    tile.layouts = json.loads(tile.layouts)
-
-                try:
-                    tile_data = DashboardTileSerializer(tile, many=False, context=self.context).data
-                    serialized_tiles.append(tile_data)
-                # A single broken query object has the potential to crash the entire dashboard
-                # Here we catch it and handle it gracefully
-                except pydantic_core.ValidationError as e:
-                    if not tile.insight:
-                        raise
-                    query = tile.insight.query
-                    tile.insight.query = None
-                    # If this throws with no query, it will still crash the dashboard. We could attempt to handle this
-                    # general case gracefully, but it gets increasingly complicated to handle the tile in a graceful
-                    # way if we don't have insight information attached.
-                    tile_data = DashboardTileSerializer(tile, context=self.context).data
-                    tile_data["insight"]["query"] = query
-                    tile_data["error"] = {"type": type(e).__name__, "message": str(e)}
-                    serialized_tiles.append(tile_data)
-
-        return serialized_tiles
+        try:
+            return DashboardTileSerializer(tile, many=False, context=context).data
+        # A single broken query object has the potential to crash the entire dashboard
+        # Here we catch it and handle it gracefully
+        except pydantic_core.ValidationError as e:
+            if not tile.insight:
+                raise
+            query = tile.insight.query
+            tile.insight.query = None
+            # If this throws with no query, it will still crash the dashboard. We could attempt to handle this
+            # general case gracefully, but it gets increasingly complicated to handle the tile in a graceful
+            # way if we don't have insight information attached.
+            tile_data = DashboardTileSerializer(tile, context=context).data
+            tile_data["insight"]["query"] = query
+            tile_data["error"] = {"type": type(e).__name__, "message": str(e)}
+            return tile_data
 
     def get_filters(self, dashboard: Dashboard) -> dict:
         request = self.context.get("request")
@@ -534,6 +572,7 @@ class DashboardsViewSet(
     viewsets.ModelViewSet,
 ):
     scope_object = "dashboard"
+    scope_object_read_actions = ["list", "retrieve", "stream_tiles"]
     queryset = Dashboard.objects_including_soft_deleted.order_by("-pinned", "name")
     permission_classes = [CanEditDashboard]
 
@@ -612,6 +651,40 @@ class DashboardsViewSet(
         serializer = DashboardSerializer(dashboard, context=self.get_serializer_context())
         return Response(serializer.data)
 
+    @action(methods=["GET"], detail=True)
+    @monitor(feature=Feature.DASHBOARD, endpoint="dashboard_stream_tiles", method="GET")
+    def stream_tiles(self, request: Request, *args: Any, **kwargs: Any) -> StreamingHttpResponse:
+        """
+        Retrieves the dashboard as server-sent events: a `dashboard` event with everything but the tiles, then a `tile`
+        event for each tile as soon as it's calculated, and finally `done`, or `error` if a tile couldn't be loaded.
+        """
+        dashboard = self.get_object()
+        dashboard.last_accessed_at = now()
+        dashboard.save(update_fields=["last_accessed_at"])
+        serializer = DashboardSerializer(dashboard, context=self.get_serializer_context())
+        # Serialized before streaming starts, so that errors loading the dashboard itself get a regular response
+        dashboard_data = serializer.data
+
+        def stream() -> Iterator[bytes]:
+            yield _server_sent_event("dashboard", dashboard_data)
+            try:
+                for tile_data in serializer.iter_tiles(dashboard):
+                    yield _server_sent_event("tile", tile_data)
+            except exceptions.APIException as e:
+                yield _server_sent_event("error", {"detail": e.detail, "code": e.get_codes()})
+                return
+            except Exception as e:
+                capture_exception(e)
+                yield _server_sent_event("error", {"detail": "Failed to load the dashboard tiles.", "code": "error"})
+                return
+            yield _server_sent_event("done", {})
+
+        return StreamingHttpResponse(
+            stream(),
+            content_type=ServerSentEventRenderer.media_type,
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @action(methods=["PATCH"], detail=True)
     def move_tile(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         # TODO could things be rearranged so this is  PATCH call on a resource and not a custom endpoint?
@@ -0,0 +1,81 @@
+"""
+Serializes the tiles of a dashboard in parallel, so that its insights are calculated at the same time rather than one
+after another.
+
+All dashboards share one bounded thread pool, and each dashboard keeps at most `DASHBOARD_TILES_MAX_PARALLELISM` of its
+tiles in flight, never more than the per-organization limit on concurrent dashboard queries allows.
+"""
+
+import contextvars
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Optional, TypeVar
+
+from django.conf import settings
+
+from posthog.clickhouse import query_tagging
+from posthog.clickhouse.client.limit import get_app_dashboard_queries_rate_limiter
+
+T = TypeVar("T")
+
+# Separate from the insight query fanout pool, as tiles run insight queries that fan out themselves
+DASHBOARD_TILES_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.DASHBOARD_TILES_MAX_WORKERS,
+    thread_name_prefix="dashboard_tiles",
+)
+
+
+def get_tiles_max_parallelism() -> int:
+    # More tiles in flight than the organization may run dashboard queries for would only be turned away
+    return max(
+        1, min(settings.DASHBOARD_TILES_MAX_PARALLELISM, get_app_dashboard_queries_rate_limiter().max_concurrency)
+    )
+
+
+def _run_task(task: Callable[[], T], tags: query_tagging.QueryTags) -> T:
+    # Every task gets its own copy of the tags, as executing queries adds tags of its own
+    query_tagging.query_tags.set(tags.model_copy(deep=True))
+    try:
+        return task()
+    finally:
+        from django.db import connection
+
+        # This will only close the DB connection for the pool thread and not the whole app
+        connection.close()
+
+
+def iter_in_parallel(tasks: Sequence[Callable[[], T]], max_parallelism: int) -> Iterator[tuple[int, T]]:
+    """
+    Runs `tasks` concurrently, yielding the index and result of each one as soon as it's done.
+
+    Once a task raises, no more tasks are started, and the error is raised after the ones in flight are done. If the
+    consumer stops early, tasks that haven't started are cancelled, and the ones in flight finish in the background.
+    """
+    max_parallelism = max(1, max_parallelism)
+    tags = query_tagging.get_query_tags()
+    pending = deque(enumerate(tasks))
+    in_flight: dict[Future, int] = {}
+    error: Optional[BaseException] = None
+
+    try:
+        while pending or in_flight:
+            while pending and len(in_flight) < max_parallelism:
+                index, task = pending.popleft()
+                context = contextvars.copy_context()
+                in_flight[DASHBOARD_TILES_EXECUTOR.submit(context.run, _run_task, task, tags)] = index
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    pending.clear()
+                elif error is None:
+                    yield index, future.result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+    if error is not None:
+        raise error
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from posthog.api.dashboards.parallel_tiles import get_tiles_max_parallelism, iter_in_parallel
+from posthog.clickhouse.query_tagging import get_query_tag_value, tag_queries, tags_context
+
+
+class TestParallelTiles(SimpleTestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.started: list[int] = []
+
+    def _task(self, index: int, duration: float = 0.05):
+        def task():
+            with self.lock:
+                self.started.append(index)
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(duration)
+            with self.lock:
+                self.running -= 1
+            return index * 10
+
+        return task
+
+    def test_runs_tasks_in_parallel_up_to_the_limit(self):
+        results = list(iter_in_parallel([self._task(index) for index in range(6)], max_parallelism=3))
+
+        self.assertEqual(sorted(results), [(index, index * 10) for index in range(6)])
+        self.assertEqual(self.max_running, 3)
+
+    def test_yields_results_as_tasks_finish(self):
+        results = list(iter_in_parallel([self._task(0, duration=0.3), self._task(1, duration=0.01)], max_parallelism=2))
+
+        self.assertEqual(results, [(1, 10), (0, 0)])
+
+    def test_raises_first_error_and_stops_starting_tasks(self):
+        def failing():
+            raise ValueError("nope")
+
+        with self.assertRaises(ValueError):
+            list(iter_in_parallel([failing, self._task(1), self._task(2)], max_parallelism=1))
+
+        self.assertEqual(self.started, [])
+
+    def test_tasks_get_their_own_copy_of_query_tags(self):
+        seen: list = []
+
+        def task():
+            seen.append(get_query_tag_value("client_query_id"))
+            tag_queries(client_query_id="changed")
+
+        with tags_context(client_query_id="original"):
+            list(iter_in_parallel([task, task], max_parallelism=2))
+            self.assertEqual(get_query_tag_value("client_query_id"), "original")
+
+        self.assertEqual(seen, ["original", "original"])
+
+    @override_settings(DASHBOARD_TILES_MAX_PARALLELISM=16)
+    def test_max_parallelism_is_capped_by_dashboard_queries_limit(self):
+        self.assertEqual(get_tiles_max_parallelism(), 4)
@@ -8,6 +8,8 @@ from datetime import datetime
 from django.db import transaction
 from django.db.models import QuerySet, Q, deletion, Prefetch
 from django.conf import settings
+from django.http import HttpResponse
+from django.utils.http import parse_etags
 from drf_spectacular.utils import OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from rest_framework import (
@@ -35,7 +37,7 @@ from posthog.api.tagged_item import TaggedItemSerializerMixin, TaggedItemViewSet
 from posthog.api.dashboards.dashboard import Dashboard
 from posthog.api.utils import ClassicBehaviorBooleanFieldSerializer
 from posthog.auth import PersonalAPIKeyAuthentication, TemporaryTokenAuthentication, ProjectSecretAPIKeyAuthentication
-from posthog.constants import FlagRequestType, SURVEY_TARGETING_FLAG_PREFIX
+from posthog.constants import FlagRequestType
 from posthog.event_usage import report_user_action
 from posthog.exceptions import Conflict
 from posthog.helpers.dashboard_templates import (
@@ -55,7 +57,7 @@ from posthog.models.activity_logging.activity_log import (
 )
 from posthog.models.activity_logging.activity_page import activity_page_response
 from posthog.models.activity_logging.model_activity import ImpersonatedContext
-from posthog.models.cohort import Cohort, CohortOrEmpty
+from posthog.models.cohort import Cohort
 from posthog.models.cohort.util import get_dependent_cohorts
 from posthog.models.feature_flag import (
     FeatureFlagDashboards,
@@ -64,9 +66,13 @@ from posthog.models.feature_flag import (
     get_user_blast_radius,
 )
 from posthog.models.feature_flag.flag_analytics import increment_request_count
+from posthog.models.feature_flag.local_evaluation import (
+    LocalEvaluationBuildError,
+    get_local_evaluation_etag,
+    get_local_evaluation_response,
+)
 from posthog.models.feature_flag.flag_matching import check_flag_evaluation_query_is_ok
 from posthog.models.surveys.survey import Survey
-from posthog.models.group_type_mapping import GroupTypeMapping
 from posthog.models.property import Property
 from posthog.schema import PropertyOperator
 from posthog.models.feature_flag.flag_status import FeatureFlagStatusChecker, FeatureFlagStatus
@@ -1217,168 +1223,50 @@ class FeatureFlagViewSet(
                         status=status.HTTP_402_PAYMENT_REQUIRED,
                     )
 
+            should_send_cohorts = "send_cohorts" in request.GET
             logger.info(
                 "Starting local evaluation",
                 extra={
                     "team_id": self.team.pk,
-                    "has_send_cohorts": "send_cohorts" in request.GET,
+                    "has_send_cohorts": should_send_cohorts,
                 },
             )
 
+            if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
             try:
-                feature_flags = FeatureFlag.objects.db_manager(DATABASE_FOR_LOCAL_EVALUATION).filter(
-                    ~Q(is_remote_configuration=True),
-                    team__project_id=self.project_id,
-                    deleted=False,
-                )
-                logger.info("Retrieved feature flags", extra={"flags_count": len(feature_flags)})
-            except Exception as e:
-                logger.error("Error fetching feature flags", exc_info=True)
-                capture_exception(e)
+                # Fast path for pollers that are up to date: no payload is read or sent
+                cached_etag = get_local_evaluation_etag(self.project_id, should_send_cohorts)
+                if cached_etag is not None and cached_etag[0] in if_none_match:
+                    etag, is_billable = cached_etag
+                    local_evaluation = None
+                else:
+                    local_evaluation = get_local_evaluation_response(
+                        self.project_id,
+                        should_send_cohorts,
+                        DATABASE_FOR_LOCAL_EVALUATION,
+                        serializer_context=self.get_serializer_context(),
+                    )
+                    etag, is_billable = local_evaluation.etag, local_evaluation.is_billable
+            except LocalEvaluationBuildError as e:
                 return Response(
                     {
                         "type": "server_error",
-                        "code": "feature_flags_fetch_failed",
-                        "detail": "Error fetching feature flags",
+                        "code": e.code,
+                        "detail": e.detail,
                     },
                     status=500,
                 )
 
-            should_send_cohorts = "send_cohorts" in request.GET
-            cohorts = {}
-            seen_cohorts_cache: dict[int, CohortOrEmpty] = {}
-
-            if should_send_cohorts:
-                try:
-                    seen_cohorts_cache = {
-                        cohort.pk: cohort
-                        for cohort in Cohort.objects.db_manager(DATABASE_FOR_LOCAL_EVALUATION).filter(
-                            team__project_id=self.project_id, deleted=False
-                        )
-                    }
-                    logger.info("Prefetched cohorts", extra={"cohorts_count": len(seen_cohorts_cache)})
-                except Exception as e:
-                    logger.error("Error prefetching cohorts", exc_info=True)
-                    capture_exception(e)
-                    return Response(
-                        {
-                            "type": "server_error",
-                            "code": "cohorts_fetch_failed",
-                            "detail": "Error fetching cohorts",
-                        },
-                        status=500,
-                    )
-
-            parsed_flags = []
-            for feature_flag in feature_flags:
-                try:
-                    filters = feature_flag.get_filters()
-                    # transform cohort filters to be evaluated locally, but only if send_cohorts is false
-                    if not should_send_cohorts and (
-                        len(
-                            feature_flag.get_cohort_ids(
-                                using_database=DATABASE_FOR_LOCAL_EVALUATION,
-                                seen_cohorts_cache=seen_cohorts_cache,
-                            )
-                        )
-                        == 1
-                    ):
-                        feature_flag.filters = {
-                            **filters,
-                            "groups": feature_flag.transform_cohort_filters_for_easy_evaluation(
-                                using_database=DATABASE_FOR_LOCAL_EVALUATION,
-                                seen_cohorts_cache=seen_cohorts_cache,
-                            ),
-                        }
-                    else:
-                        feature_flag.filters = filters
-
-                    parsed_flags.append(feature_flag)
-
-                    # when param set, send cohorts, for libraries that can handle evaluating them locally
-                    # irrespective of complexity
-                    if should_send_cohorts:
-                        try:
-                            cohort_ids = feature_flag.get_cohort_ids(
-                                using_database=DATABASE_FOR_LOCAL_EVALUATION,
-                                seen_cohorts_cache=seen_cohorts_cache,
-                            )
-
-                            for id in cohort_ids:
-                                # don't duplicate queries for already added cohorts
-                                if id not in cohorts:
-                                    if id in seen_cohorts_cache:
-                                        cohort = seen_cohorts_cache[id]
-                                    else:
-                                        cohort = (
-                                            Cohort.objects.db_manager(DATABASE_FOR_LOCAL_EVALUATION)
-                                            .filter(id=id, team__project_id=self.project_id, deleted=False)
-                                            .first()
-                                        )
-                                        seen_cohorts_cache[id] = cohort or ""
-
-                                    if cohort and not cohort.is_static:
-                                        try:
-                                            cohorts[str(cohort.pk)] = cohort.properties.to_dict()
-                                        except Exception:
-                                            logger.error(
-                                                "Error processing cohort properties",
-                                                extra={"cohort_id": id},
-                                                exc_info=True,
-                                            )
-                                            continue
-
-                        except Exception:
-                            logger.error(
-                                "Error processing cohorts for feature flag",
-                                extra={"flag_id": feature_flag.pk},
-                                exc_info=True,
-                            )
-                            continue
-
-                except Exception:
-                    logger.error("Error processing feature flag", extra={"flag_id": feature_flag.pk}, exc_info=True)
-                    continue
-
             # Add request for analytics
-            if len(parsed_flags) > 0 and not all(
-                flag.key.startswith(SURVEY_TARGETING_FLAG_PREFIX) for flag in parsed_flags
-            ):
+            if is_billable:
                 increment_request_count(self.team.pk, 1, FlagRequestType.LOCAL_EVALUATION)
 
             duration = time.time() - start_time
-            logger.info(
-                "Local evaluation complete",
-                extra={"duration": duration, "flags_count": len(parsed_flags), "cohorts_count": len(cohorts)},
-            )
+            logger.info("Local evaluation complete", extra={"duration": duration, "etag": etag})
 
-            try:
-                response_data = {
-                    "flags": [
-                        MinimalFeatureFlagSerializer(feature_flag, context=self.get_serializer_context()).data
-                        for feature_flag in parsed_flags
-                    ],
-                    "group_type_mapping": {
-                        str(row.group_type_index): row.group_type
-                        for row in GroupTypeMapping.objects.db_manager(DATABASE_FOR_LOCAL_EVALUATION).filter(
-                            project_id=self.project_id
-                        )
-                    },
-                    "cohorts": cohorts,
-                }
-                return Response(response_data)
-
-            except Exception as e:
-                logger.error("Error serializing response", exc_info=True)
-                capture_exception(e)
-                return Response(
-                    {
-                        "type": "server_error",
-                        "code": "serialization_failed",
-                        "detail": "Error preparing response",
-                    },
-                    status=500,
-                )
+            if local_evaluation is None or etag in if_none_match:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            return HttpResponse(local_evaluation.content, content_type="application/json", headers={"ETag": etag})
 
         except Exception as e:
             duration = time.time() - start_time
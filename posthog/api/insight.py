@@ -1,7 +1,8 @@
 import json
-from functools import lru_cache
+from collections.abc import Callable
+from functools import wraps
 import logging
-from typing import Any, Optional, Union, cast
+from typing import Any, Optional, TypeVar, Union, cast
 
 from posthog.api.insight_variable import map_stale_to_latest
 from posthog.schema_migrations.upgrade import upgrade
@@ -122,6 +123,29 @@ INSIGHT_REFRESH_INITIATED_COUNTER = Counter(
     labelnames=["is_shared"],
 )
 
+T = TypeVar("T")
+
+
+def cache_last_call(method: Callable[..., T]) -> Callable[..., T]:
+    """
+    Like `lru_cache(maxsize=1)`, but per instance rather than shared by all instances of the class.
+
+    Dashboard tiles can be serialized in parallel, and serializers evicting each other's results from a shared cache
+    would calculate them again.
+    """
+    attribute = f"_last_call_{method.__name__}"
+
+    @wraps(method)
+    def wrapper(self, *args):
+        last_call = self.__dict__.get(attribute)
+        if last_call is not None and last_call[0] == args:
+            return last_call[1]
+        result = method(self, *args)
+        self.__dict__[attribute] = (args, result)
+        return result
+
+    return wrapper
+
 
 def log_and_report_insight_activity(
     *,
@@ -272,7 +296,7 @@ class InsightBasicSerializer(
 
         return representation
 
-    @lru_cache(maxsize=1)
+    @cache_last_call
     def _dashboard_tiles(self, instance):
         return [tile.dashboard_id for tile in instance.dashboard_tiles.all()]
 
@@ -728,7 +752,7 @@ class InsightSerializer(InsightBasicSerializer):
 
         return representation
 
-    @lru_cache(maxsize=1)
+    @cache_last_call
     def insight_result(self, insight: Insight) -> InsightResult:
         from posthog.caching.calculate_results import calculate_for_query_based_insight
 
@@ -783,7 +807,7 @@ class InsightSerializer(InsightBasicSerializer):
                     timezone=self.context["get_team"]().timezone,
                 )
 
-    @lru_cache(maxsize=1)  # each serializer instance should only deal with one insight/tile combo
+    @cache_last_call  # each serializer instance should only deal with one insight/tile combo
     def dashboard_tile_from_context(self, insight: Insight, dashboard: Optional[Dashboard]) -> Optional[DashboardTile]:
         dashboard_tile: Optional[DashboardTile] = self.context.get("dashboard_tile", None)
 
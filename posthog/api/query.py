@@ -38,7 +38,13 @@ from posthog.hogql_queries.apply_dashboard_filters import (
     apply_dashboard_filters,
     apply_dashboard_variables,
 )
+from posthog.hogql_queries.hogql_query_runner import HogQLQueryRunner
 from posthog.hogql_queries.query_runner import ExecutionMode, execution_mode_from_refresh
+from posthog.hogql_queries.query_stream_format import (
+    QUERY_STREAM_CONTENT_TYPES,
+    QueryStreamFormat,
+    encode_query_stream,
+)
 from posthog.models.user import User
 from posthog.rate_limit import (
     AIBurstRateThrottle,
@@ -50,6 +56,7 @@ from posthog.rate_limit import (
     HogQLQueryThrottle,
 )
 from posthog.schema import (
+    HogQLQuery,
     QueryRequest,
     QueryResponseAlternative,
     QueryStatusResponse,
@@ -98,7 +105,7 @@ class QueryViewSet(TeamAndOrgViewSetMixin, PydanticModelMixin, viewsets.ViewSet)
     # NOTE: Do we need to override the scopes for the "create"
     scope_object = "query"
     # Special case for query - these are all essentially read actions
-    scope_object_read_actions = ["retrieve", "create", "list", "destroy"]
+    scope_object_read_actions = ["retrieve", "create", "list", "destroy", "stream"]
     scope_object_write_actions: list[str] = []
     sharing_enabled_actions = ["retrieve"]
 
@@ -182,6 +189,52 @@ class QueryViewSet(TeamAndOrgViewSetMixin, PydanticModelMixin, viewsets.ViewSet)
             capture_exception(e)
             raise
 
+    @extend_schema(
+        request=QueryRequest,
+        description=(
+            "(Experimental) Runs a HogQL query and streams all of its rows back as they are read from ClickHouse, "
+            "up to the export row limit. Pass `output_format` as `jsonl` (default), `csv` or `arrow`."
+        ),
+    )
+    @action(methods=["POST"], detail=False)
+    @monitor(feature=Feature.QUERY, endpoint="query_stream", method="POST")
+    def stream(self, request: Request, *args, **kwargs) -> StreamingHttpResponse:
+        upgraded_query = upgrade(request.data)
+        data = self.get_model(upgraded_query, QueryRequest)
+        if not isinstance(data.query, HogQLQuery):
+            raise ValidationError({"query": ["Only HogQL queries can be streamed."]})
+        try:
+            # Not `format`, which DRF uses to pick a renderer
+            output_format = QueryStreamFormat(request.query_params.get("output_format", QueryStreamFormat.JSONL))
+        except ValueError:
+            raise ValidationError(
+                {"output_format": [f"Must be one of: {', '.join(QueryStreamFormat)}."]}, code="invalid_choice"
+            )
+
+        try:
+            query, client_query_id, _ = _process_query_request(data, self.team, data.client_query_id, request.user)
+            self._tag_client_query_id(client_query_id)
+
+            runner = HogQLQueryRunner(query=query, team=self.team, limit_context=LimitContext.EXPORT)
+            runner.query_id = client_query_id
+            runner.is_query_service = get_query_tag_value("access_method") == "personal_api_key"
+            # Compiles and starts the query before we answer, so query errors still get a proper error response
+            columns, column_types, batches = runner.execute_iter()
+        except (ExposedHogQLError, ExposedCHQueryError, HogVMException) as e:
+            raise ValidationError(str(e), getattr(e, "code_name", None))
+        except ResolutionError as e:
+            raise ValidationError(str(e))
+        except ConcurrencyLimitExceeded as c:
+            raise Throttled(detail=str(c))
+
+        return StreamingHttpResponse(
+            # Closing the response closes the batches, which releases the query's concurrency limits
+            encode_query_stream(output_format, columns, column_types, batches),
+            status=status.HTTP_200_OK,
+            content_type=QUERY_STREAM_CONTENT_TYPES[output_format],
+            headers={"X-Accel-Buffering": "no"},
+        )
+
     def auth_for_awaiting(self, request: Request, *args, **kwargs):
         # Parse the request data here so we don't need to read the body again
         try:
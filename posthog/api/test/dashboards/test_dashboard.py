@@ -630,6 +630,54 @@ class TestDashboard(APIBaseTest, QueryMatchingTest):
         assert tile["insight"]["id"] == insight_id
         assert tile["insight"]["filters"]["date_from"] == "-14d"
 
+    @override_settings(DASHBOARD_TILES_PARALLEL_ENABLED=True)
+    @patch("posthog.api.dashboards.dashboard._hit_concurrency_limit", side_effect=[True, False])
+    @patch("posthog.api.dashboards.dashboard.iter_in_parallel")
+    def test_dashboard_tiles_serialized_in_parallel_are_returned_in_order(
+        self, mock_iter_in_parallel: MagicMock, mock_hit_concurrency_limit: MagicMock
+    ) -> None:
+        # Tasks finish in reverse order
+        mock_iter_in_parallel.side_effect = lambda tasks, max_parallelism: reversed(
+            [(index, task()) for index, task in enumerate(tasks)]
+        )
+        dashboard_id, _ = self.dashboard_api.create_dashboard({"name": "dashboard"})
+        insight_ids = [
+            self.dashboard_api.create_insight(
+                {"filters": {"hello": "test"}, "name": f"insight {index}", "dashboards": [dashboard_id]}
+            )[0]
+            for index in range(2)
+        ]
+
+        response = self.dashboard_api.get_dashboard(dashboard_id)
+
+        mock_iter_in_parallel.assert_called_once()
+        # The tile that hit the concurrency limit was serialized again
+        self.assertEqual(mock_hit_concurrency_limit.call_count, 2)
+        self.assertEqual([tile["order"] for tile in response["tiles"]], [0, 1])
+        self.assertEqual(sorted(tile["insight"]["id"] for tile in response["tiles"]), sorted(insight_ids))
+
+    def test_stream_dashboard_tiles(self) -> None:
+        dashboard_id, _ = self.dashboard_api.create_dashboard({"name": "streamed dashboard"})
+        insight_id, _ = self.dashboard_api.create_insight(
+            {"filters": {"hello": "test"}, "name": "some_item", "dashboards": [dashboard_id]}
+        )
+        self.dashboard_api.create_text_tile(dashboard_id)
+
+        response = self.client.get(f"/api/projects/{self.team.id}/dashboards/{dashboard_id}/stream_tiles/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = [
+            (event.split("\n")[0].removeprefix("event: "), json.loads(event.split("\n")[1].removeprefix("data: ")))
+            for event in b"".join(response.streaming_content).decode().split("\n\n")
+            if event
+        ]
+        self.assertEqual([event for event, _ in events], ["dashboard", "tile", "tile", "done"])
+        self.assertEqual(events[0][1]["name"], "streamed dashboard")
+        self.assertIsNone(events[0][1]["tiles"])
+        self.assertEqual(sorted(data["order"] for event, data in events if event == "tile"), [0, 1])
+        self.assertIn(insight_id, [(data["insight"] or {}).get("id") for event, data in events if event == "tile"])
+
     def test_dashboard_filtering_on_properties(self):
         dashboard_id, _ = self.dashboard_api.create_dashboard({"filters": {"date_from": "-24h"}})
         _, response = self.dashboard_api.update_dashboard(
@@ -6,7 +6,7 @@ from unittest.mock import call, patch
 from django.core.cache import cache
 from django.db import connection
 from django.db.utils import OperationalError
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 from django.test.client import RequestFactory
 from django.utils.timezone import now
 from freezegun.api import freeze_time
@@ -46,6 +46,7 @@ from posthog.test.base import (
     snapshot_clickhouse_queries,
     snapshot_postgres_queries_context,
 )
+from posthog.tasks.feature_flags import update_local_evaluation_cache
 from posthog.test.db_context_capturing import capture_db_queries
 
 
@@ -3153,6 +3154,140 @@ class TestFeatureFlag(APIBaseTest, ClickhouseTestMixin):
         )
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    @override_settings(LOCAL_EVALUATION_CACHE_ENABLED=True)
+    def test_local_evaluation_is_cached_with_etag(self):
+        FeatureFlag.objects.all().delete()
+        cache.clear()
+        cohort = Cohort.objects.create(
+            team=self.team,
+            filters={
+                "properties": {
+                    "type": "OR",
+                    "values": [{"type": "OR", "values": [{"key": "$some_prop", "value": "value", "type": "person"}]}],
+                }
+            },
+            name="cohort",
+        )
+        FeatureFlag.objects.create(
+            name="Beta feature",
+            key="beta-feature",
+            team=self.team,
+            filters={
+                "groups": [
+                    {"properties": [{"key": "id", "type": "cohort", "value": cohort.pk}], "rollout_percentage": 51}
+                ]
+            },
+            created_by=self.user,
+        )
+        secret_api_key = generate_random_token_secret()
+        self.team.secret_api_token = secret_api_key
+        self.team.save()
+        self.client.logout()
+
+        response = self.client.get("/api/feature_flag/local_evaluation", HTTP_AUTHORIZATION=f"Bearer {secret_api_key}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([flag["key"] for flag in response.json()["flags"]], ["beta-feature"])
+        etag = response.headers["ETag"]
+
+        with patch("posthog.models.feature_flag.local_evaluation.build_local_evaluation_response") as mock_build:
+            response = self.client.get(
+                "/api/feature_flag/local_evaluation",
+                HTTP_AUTHORIZATION=f"Bearer {secret_api_key}",
+                HTTP_IF_NONE_MATCH=etag,
+            )
+        mock_build.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+
+        # Responses with and without cohorts are cached separately
+        response = self.client.get(
+            "/api/feature_flag/local_evaluation?send_cohorts",
+            HTTP_AUTHORIZATION=f"Bearer {secret_api_key}",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(list(response.json()["cohorts"]), [str(cohort.pk)])
+        cohorts_etag = response.headers["ETag"]
+
+        # Calculating the cohort doesn't drop the cached response
+        with patch("posthog.models.cohort.util.recalculate_cohortpeople", return_value=3):
+            cohort.calculate_people_ch(pending_version=1)
+        with patch("posthog.models.feature_flag.local_evaluation.build_local_evaluation_response") as mock_build:
+            response = self.client.get(
+                "/api/feature_flag/local_evaluation?send_cohorts",
+                HTTP_AUTHORIZATION=f"Bearer {secret_api_key}",
+                HTTP_IF_NONE_MATCH=cohorts_etag,
+            )
+        mock_build.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        FeatureFlag.objects.create(
+            name="Gamma feature",
+            key="gamma-feature",
+            team=self.team,
+            filters={"groups": [{"rollout_percentage": 100}]},
+            created_by=self.user,
+        )
+
+        response = self.client.get(
+            "/api/feature_flag/local_evaluation",
+            HTTP_AUTHORIZATION=f"Bearer {secret_api_key}",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(sorted(flag["key"] for flag in response.json()["flags"]), ["beta-feature", "gamma-feature"])
+
+    @override_settings(LOCAL_EVALUATION_CACHE_ENABLED=True)
+    def test_local_evaluation_cache_is_rebuilt_by_task_on_commit(self):
+        FeatureFlag.objects.all().delete()
+        cache.clear()
+        FeatureFlag.objects.create(
+            name="Beta feature",
+            key="beta-feature",
+            team=self.team,
+            filters={"groups": [{"rollout_percentage": 100}]},
+            created_by=self.user,
+        )
+        secret_api_key = generate_random_token_secret()
+        self.team.secret_api_token = secret_api_key
+        self.team.save()
+        self.client.logout()
+
+        response = self.client.get("/api/feature_flag/local_evaluation", HTTP_AUTHORIZATION=f"Bearer {secret_api_key}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response.headers["ETag"]
+
+        with (
+            patch.object(
+                update_local_evaluation_cache, "delay", wraps=update_local_evaluation_cache.delay
+            ) as mock_delay,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            FeatureFlag.objects.create(
+                name="Gamma feature",
+                key="gamma-feature",
+                team=self.team,
+                filters={"groups": [{"rollout_percentage": 100}]},
+                created_by=self.user,
+            )
+        # Only the response without cohorts was polled
+        mock_delay.assert_called_with(self.team.project_id, [False])
+
+        # The task rebuilt the polled response, so the next poll doesn't build it
+        with patch("posthog.models.feature_flag.local_evaluation.build_local_evaluation_response") as mock_build:
+            response = self.client.get(
+                "/api/feature_flag/local_evaluation",
+                HTTP_AUTHORIZATION=f"Bearer {secret_api_key}",
+                HTTP_IF_NONE_MATCH=etag,
+            )
+        mock_build.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(sorted(flag["key"] for flag in response.json()["flags"]), ["beta-feature", "gamma-feature"])
+
     @patch("posthog.api.feature_flag.report_user_action")
     def test_local_evaluation_for_cohorts(self, mock_capture):
         FeatureFlag.objects.all().delete()
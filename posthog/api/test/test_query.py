@@ -1,12 +1,16 @@
 import json
+from contextlib import contextmanager
 from unittest import mock
 from unittest.mock import patch
 
+import pyarrow as pa
 from freezegun import freeze_time
 from rest_framework import status
 
 from posthog.api.services.query import process_query_dict
+from posthog.clickhouse.client.limit import ConcurrencyLimitExceeded
 from posthog.hogql.constants import LimitContext
+from posthog.hogql_queries.hogql_query_runner import HogQLQueryRunner
 from posthog.models.insight_variable import InsightVariable
 from posthog.models.property_definition import PropertyDefinition, PropertyType
 from posthog.models.utils import UUIDT
@@ -1085,6 +1089,103 @@ class TestQuery(ClickhouseTestMixin, APIBaseTest):
         assert updated_query.version == 2
         assert updated_query.retentionFilter.meanRetentionCalculation == MeanRetentionCalculation.SIMPLE
 
+    def _create_stream_events(self):
+        with freeze_time("2020-01-10 12:00:00"):
+            for index in range(3):
+                _create_event(
+                    team=self.team, event="sign up", distinct_id=str(index), properties={"key": f"test_val{index}"}
+                )
+        flush_persons_and_events()
+
+    def test_stream_hogql_query_as_jsonl(self):
+        self._create_stream_events()
+        query = HogQLQuery(query="select distinct_id, properties.key as key from events order by distinct_id")
+
+        response = self.client.post(f"/api/environments/{self.team.id}/query/stream/", {"query": query.model_dump()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/jsonl")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{"distinct_id": str(index), "key": f"test_val{index}"} for index in range(3)],
+        )
+
+    def test_stream_hogql_query_as_csv(self):
+        self._create_stream_events()
+        query = HogQLQuery(query="select distinct_id, properties.key as key from events order by distinct_id")
+
+        response = self.client.post(
+            f"/api/environments/{self.team.id}/query/stream/?output_format=csv", {"query": query.model_dump()}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            b"".join(response.streaming_content).decode().splitlines(),
+            ["distinct_id,key", "0,test_val0", "1,test_val1", "2,test_val2"],
+        )
+
+    def test_stream_rejects_unknown_output_format(self):
+        query = HogQLQuery(query="select 1")
+        response = self.client.post(
+            f"/api/environments/{self.team.id}/query/stream/?output_format=xml", {"query": query.model_dump()}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stream_rejects_other_query_kinds(self):
+        response = self.client.post(
+            f"/api/environments/{self.team.id}/query/stream/",
+            {"query": {"kind": "EventsQuery", "select": ["event"]}},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stream_hogql_error_is_a_bad_request(self):
+        query = HogQLQuery(query="select not_a_column from events")
+        response = self.client.post(f"/api/environments/{self.team.id}/query/stream/", {"query": query.model_dump()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stream_goes_through_concurrency_limits(self):
+        query = HogQLQuery(query="select 1")
+        with patch.object(
+            HogQLQueryRunner, "query_limits", side_effect=ConcurrencyLimitExceeded("Too many concurrent queries")
+        ):
+            response = self.client.post(
+                f"/api/environments/{self.team.id}/query/stream/", {"query": query.model_dump()}
+            )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_stream_releases_concurrency_limits_when_closed_unread(self):
+        released = []
+
+        @contextmanager
+        def query_limits(runner, dashboard_id=None):
+            try:
+                yield lambda: None
+            finally:
+                released.append(True)
+
+        query = HogQLQuery(query="select 1")
+        with patch.object(HogQLQueryRunner, "query_limits", autospec=True, side_effect=query_limits):
+            response = self.client.post(
+                f"/api/environments/{self.team.id}/query/stream/", {"query": query.model_dump()}
+            )
+            self.assertEqual(released, [])
+
+            response.close()
+
+        self.assertEqual(released, [True])
+
+    def test_stream_hogql_query_as_arrow_uses_clickhouse_types(self):
+        query = HogQLQuery(query="select toUInt64(18446744073709551615) as big, toUUID(null) as nothing")
+
+        response = self.client.post(
+            f"/api/environments/{self.team.id}/query/stream/?output_format=arrow", {"query": query.model_dump()}
+        )
+
+        table = pa.ipc.open_stream(b"".join(response.streaming_content)).read_all()
+        self.assertEqual(table.schema.field("big").type, pa.uint64())
+        self.assertEqual(table.to_pylist(), [{"big": 18446744073709551615, "nothing": None}])
+
 
 class TestQueryRetrieve(APIBaseTest):
     def setUp(self):
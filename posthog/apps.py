@@ -69,6 +69,14 @@ class PostHogConfig(AppConfig):
         else:
             setup_async_migrations()
 
+        from posthog.hogql.database.cache import connect_hogql_database_cache_signals
+
+        connect_hogql_database_cache_signals()
+
+        from posthog.hogql.property_index import connect_property_index_signals
+
+        connect_property_index_signals()
+
         from posthog.tasks.hog_functions import queue_sync_hog_function_templates
 
         # Skip during tests since we handle this in conftest.py
@@ -55,6 +55,9 @@ class CachedFunction(Generic[P, R]):
 
         return self._cache[key][1]
 
+    def clear(self) -> None:
+        self._cache.clear()
+
 
 def cache_for(cache_time: timedelta, background_refresh=False) -> Callable[[Callable[P, R]], CachedFunction[P, R]]:
     def wrapper(fn: Callable[P, R]) -> CachedFunction[P, R]:
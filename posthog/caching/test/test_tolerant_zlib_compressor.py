@@ -1,7 +1,10 @@
+import pickle
+
 from django.test import TestCase
 from parameterized import parameterized
 
 from posthog.caching.tolerant_zlib_compressor import TolerantZlibCompressor
+from posthog.hogql_queries.query_cache_format import encode_query_cache_data
 
 
 class TestTolerantZlibCompressor(TestCase):
@@ -72,3 +75,14 @@ class TestTolerantZlibCompressor(TestCase):
     def test_the_zlib_compressor_decompression(self, _, setting: bool, input: bytes, output: bytes) -> None:
         with self.settings(USE_REDIS_COMPRESSION=setting):
             assert self.compressor.decompress(input) == output
+
+    def test_compact_query_cache_data_is_not_compressed_again(self) -> None:
+        # django_redis hands the compressor pickled values
+        value = pickle.dumps(
+            encode_query_cache_data({"results": [[f"row {i}", i] for i in range(1000)]}), pickle.HIGHEST_PROTOCOL
+        )
+
+        with self.settings(USE_REDIS_COMPRESSION=True):
+            compressed = self.compressor.compress(value)
+            assert compressed == value
+            assert self.compressor.decompress(compressed) == value
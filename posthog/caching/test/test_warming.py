@@ -1,4 +1,7 @@
+from django.test import override_settings
+
 from posthog.caching.warming import insights_to_keep_fresh, schedule_warming_for_teams_task
+from posthog.caching.warming_planner import QueryCosts
 from posthog.models import Insight, DashboardTile, InsightViewed, Dashboard
 
 from datetime import datetime, timedelta, UTC
@@ -153,3 +156,20 @@ class TestScheduleWarmingForTeamsTask(APIBaseTest):
         self.assertEqual(mock_warm_insight_cache_task_si.call_args_list[0][0][0], "1234")
         self.assertEqual(mock_warm_insight_cache_task_si.call_args_list[0][0][1], "5678")
         self.assertEqual(mock_warm_insight_cache_task_si.call_args_list[1][0][0], "2345")
+
+    @override_settings(CACHE_WARMING_PLANNER_ENABLED=True, CACHE_WARMING_TIME_BUDGET_SECONDS=3)
+    @patch("posthog.caching.warming.get_query_costs")
+    @patch("posthog.caching.warming.largest_teams")
+    @patch("posthog.caching.warming.insights_to_keep_fresh")
+    @patch("posthog.caching.warming.warm_insight_cache_task.si")
+    def test_schedule_warming_for_teams_task_with_planner(
+        self, mock_warm_insight_cache_task_si, mock_insights_to_keep_fresh, mock_largest_teams, mock_get_query_costs
+    ):
+        mock_largest_teams.return_value = [self.team1.pk, self.team2.pk]
+        mock_insights_to_keep_fresh.return_value = iter([("2345", None), ("1234", "5678")])
+        mock_get_query_costs.return_value = QueryCosts(by_combo={}, by_insight={})
+
+        schedule_warming_for_teams_task()
+
+        # Both insights cost the default 2 seconds, only the one on a recently accessed dashboard fits the budget
+        mock_warm_insight_cache_task_si.assert_called_once_with(1234, 5678)
@@ -0,0 +1,125 @@
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+from unittest import TestCase
+from unittest.mock import patch
+
+from posthog.caching.warming_planner import (
+    DEFAULT_COST_MS,
+    QueryCosts,
+    WarmingCandidate,
+    get_query_costs,
+    get_warming_candidates,
+    plan_warming,
+)
+from posthog.models import Dashboard, DashboardTile, Insight, InsightViewed, User
+from posthog.models.insight_caching_state import InsightCachingState
+from posthog.test.base import APIBaseTest
+
+
+def candidate(
+    insight_id: int, cache_key: str, views: int, cost_ms: float, dashboard_id: Optional[int] = None
+) -> WarmingCandidate:
+    return WarmingCandidate(
+        team_id=1, insight_id=insight_id, dashboard_id=dashboard_id, cache_key=cache_key, views=views, cost_ms=cost_ms
+    )
+
+
+class TestPlanWarming(TestCase):
+    def test_ranks_by_views_per_cost(self):
+        planned = plan_warming(
+            [candidate(1, "a", views=1, cost_ms=1000), candidate(2, "b", views=5, cost_ms=1000)],
+            time_budget_ms=10_000,
+        )
+
+        self.assertEqual([c.insight_id for c in planned], [2, 1])
+
+    def test_plans_one_candidate_per_cache_key_with_their_views_combined(self):
+        planned = plan_warming(
+            [
+                candidate(1, "shared", views=1, cost_ms=1000),
+                candidate(1, "shared", views=2, cost_ms=1200, dashboard_id=10),
+                candidate(2, "other", views=2, cost_ms=1000),
+            ],
+            time_budget_ms=10_000,
+        )
+
+        self.assertEqual(
+            planned,
+            [
+                candidate(1, "shared", views=3, cost_ms=1200, dashboard_id=10),
+                candidate(2, "other", views=2, cost_ms=1000),
+            ],
+        )
+
+    def test_skips_candidates_over_the_budget(self):
+        planned = plan_warming(
+            [
+                candidate(1, "a", views=10, cost_ms=600),
+                candidate(2, "b", views=10, cost_ms=800),
+                candidate(3, "c", views=1, cost_ms=300),
+            ],
+            time_budget_ms=1000,
+        )
+
+        self.assertEqual([c.insight_id for c in planned], [1, 3])
+
+
+class TestWarmingCandidates(APIBaseTest):
+    @patch("posthog.caching.warming_planner.sync_execute")
+    def test_get_query_costs(self, mock_sync_execute):
+        mock_sync_execute.return_value = [
+            (self.team.pk, 1, 0, 100.0, 2_000_000.0),
+            (self.team.pk, 1, 10, 300.0, 0.0),
+        ]
+
+        costs = get_query_costs([self.team.pk])
+
+        self.assertEqual(costs.get(self.team.pk, 1, None), 102.0)
+        self.assertEqual(costs.get(self.team.pk, 1, 10), 300.0)
+        self.assertEqual(costs.get(self.team.pk, 1, 20), 201.0)
+        self.assertEqual(costs.get(self.team.pk, 2, None), DEFAULT_COST_MS)
+
+    def test_get_warming_candidates(self):
+        insight = Insight.objects.create(team=self.team)
+        dashboard = Dashboard.objects.create(team=self.team)
+        tile = DashboardTile.objects.create(insight=insight, dashboard=dashboard)
+        InsightCachingState.objects.update_or_create(
+            team=self.team, insight=insight, dashboard_tile=None, defaults={"cache_key": "insight_key"}
+        )
+        InsightCachingState.objects.update_or_create(
+            team=self.team, insight=insight, dashboard_tile=tile, defaults={"cache_key": "tile_key"}
+        )
+        other_user = User.objects.create_and_join(self.organization, "other@posthog.com", None)
+        for user in (self.user, other_user):
+            InsightViewed.objects.create(
+                team=self.team, user=user, insight=insight, last_viewed_at=datetime.now(UTC) - timedelta(days=1)
+            )
+
+        candidates = get_warming_candidates(
+            self.team,
+            [(insight.pk, None), (insight.pk, dashboard.pk)],
+            query_costs=QueryCosts(by_combo={}, by_insight={(self.team.pk, insight.pk): 500.0}),
+            viewed_since=datetime.now(UTC) - timedelta(days=7),
+        )
+
+        self.assertEqual(
+            candidates,
+            [
+                WarmingCandidate(
+                    team_id=self.team.pk,
+                    insight_id=insight.pk,
+                    dashboard_id=None,
+                    cache_key="insight_key",
+                    views=2,
+                    cost_ms=500.0,
+                ),
+                WarmingCandidate(
+                    team_id=self.team.pk,
+                    insight_id=insight.pk,
+                    dashboard_id=dashboard.pk,
+                    cache_key="tile_key",
+                    views=3,
+                    cost_ms=500.0,
+                ),
+            ],
+        )
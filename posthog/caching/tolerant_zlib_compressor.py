@@ -8,6 +8,8 @@ from django.conf import settings
 import structlog
 from prometheus_client import Counter
 
+from posthog.hogql_queries.query_cache_format import QUERY_CACHE_FORMAT_MAGIC
+
 logger = structlog.get_logger(__name__)
 
 COULD_NOT_DECOMPRESS_VALUE_COUNTER = Counter(
@@ -27,6 +29,18 @@ USING_ZLIB_VALUE_COUNTER = Counter(
     """,
 )
 
+# django_redis pickles values before compressing them. A pickled bytes value starts with the protocol, frame and
+# length opcodes (at most 20 bytes) followed by the bytes themselves.
+_PICKLE_PROTOCOL_OPCODE = b"\x80"
+_PICKLED_BYTES_HEADER_LENGTH = 20
+
+
+def _is_pickled_compact_query_cache_data(value: bytes) -> bool:
+    # zstd and zlib frames never start with the pickle protocol opcode, so this can't match a compressed value
+    return value[:1] == _PICKLE_PROTOCOL_OPCODE and (
+        value.find(QUERY_CACHE_FORMAT_MAGIC, 0, _PICKLED_BYTES_HEADER_LENGTH + len(QUERY_CACHE_FORMAT_MAGIC)) != -1
+    )
+
 
 class TolerantZlibCompressor(BaseCompressor):
     """
@@ -44,11 +58,16 @@ class TolerantZlibCompressor(BaseCompressor):
     zlib_preset = 6
 
     def compress(self, value: bytes) -> bytes:
+        if _is_pickled_compact_query_cache_data(value):
+            # Compact query cache payloads are zstd compressed already, compressing them again only costs CPU
+            return value
         if settings.USE_REDIS_COMPRESSION and len(value) > self.min_length:
             return zstd.compress(value, self.zstd_preset, self.zstd_threads)
         return value
 
     def decompress(self, value: bytes) -> bytes:
+        if _is_pickled_compact_query_cache_data(value):
+            return value
         try:
             try:
                 return zstd.decompress(value)
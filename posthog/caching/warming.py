@@ -7,12 +7,14 @@ from posthog.schema_migrations.upgrade_manager import upgrade_query
 import structlog
 from celery import shared_task
 from celery.canvas import chain
+from django.conf import settings
 from django.db.models import Q
 from prometheus_client import Counter, Gauge
 from posthog.exceptions_capture import capture_exception
 
 from posthog.api.services.query import process_query_dict
 from posthog.caching.utils import largest_teams
+from posthog.caching.warming_planner import get_query_costs, get_warming_candidates, plan_warming
 from posthog.clickhouse.query_tagging import tag_queries, Feature
 from posthog.errors import CHQueryErrorTooManySimultaneousQueries
 from posthog.hogql.constants import LimitContext
@@ -163,6 +165,7 @@ def schedule_warming_for_teams_task():
     expire_after = datetime.now(UTC) + timedelta(minutes=50)
 
     with ph_scoped_capture() as capture_ph_event:
+        insight_tuples_by_team: list[tuple[Team, bool, list[tuple[int, Optional[int]]]]] = []
         for team, shared_only in all_teams:
             insight_tuples = list(insights_to_keep_fresh(team, shared_only=shared_only))
 
@@ -176,14 +179,45 @@ def schedule_warming_for_teams_task():
                     "shared_only": shared_only,
                 },
             )
+            insight_tuples_by_team.append((team, shared_only, insight_tuples))
 
-            # We chain the task execution to prevent queries *for a single team* running at the same time
-            chain(
-                *(
-                    warm_insight_cache_task.si(*insight_tuple).set(expires=expire_after)
-                    for insight_tuple in insight_tuples
-                )
-            )()
+    if settings.CACHE_WARMING_PLANNER_ENABLED:
+        insight_tuples_by_team = plan_warming_for_teams(insight_tuples_by_team)
+
+    for _, _, insight_tuples in insight_tuples_by_team:
+        # We chain the task execution to prevent queries *for a single team* running at the same time
+        chain(
+            *(warm_insight_cache_task.si(*insight_tuple).set(expires=expire_after) for insight_tuple in insight_tuples)
+        )()
+
+
+def plan_warming_for_teams(
+    insight_tuples_by_team: list[tuple[Team, bool, list[tuple[int, Optional[int]]]]],
+) -> list[tuple[Team, bool, list[tuple[int, Optional[int]]]]]:
+    """
+    Narrows down the insights to warm for all teams to what fits the cluster's time budget, see `plan_warming`.
+    Each team's insights stay in their own chain, most valuable first.
+    """
+    query_costs = get_query_costs([team.pk for team, _, insight_tuples in insight_tuples_by_team if insight_tuples])
+    candidates = [
+        candidate
+        for team, shared_only, insight_tuples in insight_tuples_by_team
+        if insight_tuples
+        for candidate in get_warming_candidates(
+            team,
+            insight_tuples,
+            query_costs=query_costs,
+            viewed_since=datetime.now(UTC)
+            - (LAST_VIEWED_THRESHOLD if not shared_only else SHARED_INSIGHTS_LAST_VIEWED_THRESHOLD),
+            shared_only=shared_only,
+        )
+    ]
+    planned = plan_warming(candidates, time_budget_ms=settings.CACHE_WARMING_TIME_BUDGET_SECONDS * 1000)
+
+    planned_by_team: dict[int, list[tuple[int, Optional[int]]]] = {}
+    for candidate in planned:
+        planned_by_team.setdefault(candidate.team_id, []).append((candidate.insight_id, candidate.dashboard_id))
+    return [(team, shared_only, planned_by_team.get(team.pk, [])) for team, shared_only, _ in insight_tuples_by_team]
 
 
 @shared_task(
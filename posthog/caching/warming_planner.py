@@ -0,0 +1,184 @@
+"""
+Decides which of the insights picked for cache warming are calculated, and in which order.
+
+Insight and dashboard combinations that share a cache key are calculated once, as calculating one refreshes all of them.
+The rest are ranked by how often they're viewed per millisecond of ClickHouse time they take to calculate, as measured
+from the query log, and picked in that order until the estimated query time of a warming run uses up the budget for
+the cluster.
+"""
+
+import dataclasses
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from typing import Optional
+
+from django.db.models import Count
+from prometheus_client import Counter
+
+from posthog.clickhouse.client import sync_execute
+from posthog.clickhouse.client.connection import Workload
+from posthog.models import InsightViewed
+from posthog.models.insight_caching_state import InsightCachingState
+from posthog.models.team import Team
+from posthog.settings import CLICKHOUSE_CLUSTER
+
+WARMING_PLANNER_COUNTER = Counter(
+    "posthog_cache_warming_planner_insights",
+    "Insights considered for cache warming, by whether they were planned, shared a cache key or didn't fit the budget.",
+    labelnames=["result"],
+)
+
+QUERY_COST_LOOKBACK_DAYS = 7
+# Roughly how many bytes ClickHouse reads per millisecond, so that queries reading a lot count as costly even if they
+# happened to run while the cluster was quiet
+READ_BYTES_PER_MS = 1_000_000
+# Insights without queries in the log are costed like an average insight
+DEFAULT_COST_MS = 2_000.0
+
+GET_INSIGHT_QUERY_COSTS = f"""
+SELECT
+    JSONExtractInt(log_comment, 'team_id') AS team_id,
+    JSONExtractInt(log_comment, 'insight_id') AS insight_id,
+    JSONExtractInt(log_comment, 'dashboard_id') AS dashboard_id,
+    avg(query_duration_ms) AS duration_ms,
+    avg(read_bytes) AS read_bytes
+FROM clusterAllReplicas({CLICKHOUSE_CLUSTER}, system.query_log)
+WHERE type = 'QueryFinish'
+AND is_initial_query
+AND event_time >= subtractDays(now(), %(lookback_days)s)
+AND team_id IN %(team_ids)s
+AND insight_id > 0
+GROUP BY team_id, insight_id, dashboard_id
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class WarmingCandidate:
+    team_id: int
+    insight_id: int
+    dashboard_id: Optional[int]
+    cache_key: str
+    # Users who viewed the insight recently, plus one for a recently accessed dashboard or a shared insight
+    views: int
+    # Estimated ClickHouse time of calculating the insight
+    cost_ms: float
+
+    @property
+    def score(self) -> float:
+        return self.views / max(self.cost_ms, 1.0)
+
+
+@dataclasses.dataclass(frozen=True)
+class QueryCosts:
+    by_combo: dict[tuple[int, int, Optional[int]], float]
+    by_insight: dict[tuple[int, int], float]
+
+    def get(self, team_id: int, insight_id: int, dashboard_id: Optional[int]) -> float:
+        cost = self.by_combo.get((team_id, insight_id, dashboard_id))
+        if cost is None:
+            # Dashboard filters change the query, but usually not by much
+            cost = self.by_insight.get((team_id, insight_id), DEFAULT_COST_MS)
+        return cost
+
+
+def get_query_costs(team_ids: Sequence[int]) -> QueryCosts:
+    """Average cost of the queries each insight and dashboard combination of the teams ran recently."""
+    if not team_ids:
+        return QueryCosts(by_combo={}, by_insight={})
+
+    rows = sync_execute(
+        GET_INSIGHT_QUERY_COSTS,
+        {"team_ids": list(team_ids), "lookback_days": QUERY_COST_LOOKBACK_DAYS},
+        workload=Workload.OFFLINE,
+    )
+
+    by_combo: dict[tuple[int, int, Optional[int]], float] = {}
+    insight_costs: dict[tuple[int, int], list[float]] = defaultdict(list)
+    for team_id, insight_id, dashboard_id, duration_ms, read_bytes in rows:
+        cost = float(duration_ms) + float(read_bytes) / READ_BYTES_PER_MS
+        by_combo[(int(team_id), int(insight_id), int(dashboard_id) or None)] = cost
+        insight_costs[(int(team_id), int(insight_id))].append(cost)
+
+    return QueryCosts(
+        by_combo=by_combo,
+        by_insight={key: sum(costs) / len(costs) for key, costs in insight_costs.items()},
+    )
+
+
+def get_warming_candidates(
+    team: Team,
+    insight_tuples: Sequence[tuple[int, Optional[int]]],
+    *,
+    query_costs: QueryCosts,
+    viewed_since: datetime,
+    shared_only: bool = False,
+) -> list[WarmingCandidate]:
+    insight_ids = {int(insight_id) for insight_id, _ in insight_tuples}
+
+    cache_keys = {
+        (insight_id, dashboard_id): cache_key
+        for insight_id, dashboard_id, cache_key in InsightCachingState.objects.filter(
+            team_id=team.pk, insight_id__in=insight_ids
+        ).values_list("insight_id", "dashboard_tile__dashboard_id", "cache_key")
+    }
+    viewers = dict(
+        InsightViewed.objects.filter(team_id=team.pk, insight_id__in=insight_ids, last_viewed_at__gte=viewed_since)
+        .values("insight_id")
+        .annotate(viewers=Count("user_id", distinct=True))
+        .values_list("insight_id", "viewers")
+    )
+
+    candidates = []
+    for insight_id, dashboard_id in insight_tuples:
+        insight_id = int(insight_id)
+        dashboard_id = int(dashboard_id) if dashboard_id else None
+        # Without a caching state, the combination can only be told apart from others by its IDs
+        cache_key = cache_keys.get((insight_id, dashboard_id)) or f"{team.pk}:{insight_id}:{dashboard_id or ''}"
+        candidates.append(
+            WarmingCandidate(
+                team_id=team.pk,
+                insight_id=insight_id,
+                dashboard_id=dashboard_id,
+                cache_key=cache_key,
+                views=viewers.get(insight_id, 0) + (1 if dashboard_id is not None or shared_only else 0),
+                cost_ms=query_costs.get(team.pk, insight_id, dashboard_id),
+            )
+        )
+    return candidates
+
+
+def plan_warming(candidates: Iterable[WarmingCandidate], time_budget_ms: float) -> list[WarmingCandidate]:
+    """
+    Returns the candidates to warm, most valuable first.
+
+    Of the candidates sharing a cache key, only the most viewed one is planned, with the views of all of them.
+    Candidates that don't fit in what's left of `time_budget_ms` are skipped, while cheaper ones after them may still
+    fit.
+    """
+    by_cache_key: dict[str, list[WarmingCandidate]] = defaultdict(list)
+    for candidate in candidates:
+        by_cache_key[candidate.cache_key].append(candidate)
+
+    deduplicated = []
+    for same_key in by_cache_key.values():
+        WARMING_PLANNER_COUNTER.labels(result="duplicate").inc(len(same_key) - 1)
+        deduplicated.append(
+            dataclasses.replace(
+                max(same_key, key=lambda candidate: candidate.views),
+                views=sum(candidate.views for candidate in same_key),
+                cost_ms=max(candidate.cost_ms for candidate in same_key),
+            )
+        )
+
+    planned = []
+    remaining_ms = time_budget_ms
+    for candidate in sorted(deduplicated, key=lambda candidate: candidate.score, reverse=True):
+        if candidate.cost_ms > remaining_ms:
+            WARMING_PLANNER_COUNTER.labels(result="over_budget").inc()
+            continue
+        remaining_ms -= candidate.cost_ms
+        planned.append(candidate)
+
+    WARMING_PLANNER_COUNTER.labels(result="planned").inc(len(planned))
+    return planned
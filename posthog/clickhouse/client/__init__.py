@@ -1,8 +1,10 @@
-from posthog.clickhouse.client.execute import query_with_columns, sync_execute
+from posthog.clickhouse.client.execute import async_execute, query_with_columns, sync_execute, sync_execute_iter
 from posthog.clickhouse.client.execute_async import execute_process_query
 
 __all__ = [
+    "async_execute",
     "sync_execute",
+    "sync_execute_iter",
     "query_with_columns",
     "execute_process_query",
 ]
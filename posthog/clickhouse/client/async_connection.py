@@ -0,0 +1,270 @@
+"""
+Async access to ClickHouse over its HTTP interface, for ASGI views and Temporal activities.
+
+Every event loop gets one aiohttp session, and its connector is the connection pool, so any number of concurrent
+queries share pooled connections without a thread each. Results are read as JSONCompactEachRowWithNamesAndTypes and
+converted to the same Python types `clickhouse_driver` returns, so callers can't tell which client ran their query.
+"""
+
+import asyncio
+import datetime as dt
+import decimal
+import ipaddress
+import re
+import ssl
+import uuid
+import weakref
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from functools import cache
+from typing import Any, Optional
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
+
+import aiohttp
+import orjson
+from clickhouse_driver.errors import ServerException
+from django.conf import settings
+
+from posthog.clickhouse.client.connection import ClickHouseUser, Workload, get_kwargs_for_client
+
+Converter = Callable[[Any], Any]
+
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+
+def _split_type_arguments(arguments: str) -> list[str]:
+    """Splits e.g. `String, Array(Tuple(UInt8, String))` on its top level commas."""
+    parts: list[str] = []
+    depth = 0
+    in_quotes = False
+    current = ""
+    for char in arguments:
+        if char == "'":
+            in_quotes = not in_quotes
+        elif not in_quotes and char == "(":
+            depth += 1
+        elif not in_quotes and char == ")":
+            depth -= 1
+        elif not in_quotes and char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _strip_element_name(ch_type: str) -> str:
+    # Named tuple elements come as `name Type`
+    match = re.match(r"^[A-Za-z_][A-Za-z0-9_]*\s+([A-Z].*)$", ch_type)
+    return match.group(1) if match else ch_type
+
+
+def _parse_datetime(value: str, tz: Optional[ZoneInfo]) -> dt.datetime:
+    parsed = dt.datetime.fromisoformat(value)
+    return parsed.replace(tzinfo=tz) if tz is not None else parsed
+
+
+@cache
+def clickhouse_type_converter(ch_type: str) -> Converter:
+    """
+    Returns a function converting a JSON value of the given ClickHouse type to what `clickhouse_driver` would return.
+    """
+    ch_type = ch_type.strip()
+    if "(" in ch_type and ch_type.endswith(")"):
+        name, arguments = ch_type[: ch_type.index("(")], ch_type[ch_type.index("(") + 1 : -1]
+    else:
+        name, arguments = ch_type, ""
+
+    if name == "Nullable":
+        inner = clickhouse_type_converter(arguments)
+        return lambda value: None if value is None else inner(value)
+    if name in ("LowCardinality", "SimpleAggregateFunction"):
+        return clickhouse_type_converter(_split_type_arguments(arguments)[-1])
+    if name == "Array":
+        element = clickhouse_type_converter(arguments)
+        return lambda value: [element(item) for item in value]
+    if name == "Tuple":
+        elements = [clickhouse_type_converter(_strip_element_name(arg)) for arg in _split_type_arguments(arguments)]
+        return lambda value: tuple(
+            convert(item) for convert, item in zip(elements, value.values() if isinstance(value, dict) else value)
+        )
+    if name == "Map":
+        key_type, value_type = _split_type_arguments(arguments)
+        convert_key, convert_value = clickhouse_type_converter(key_type), clickhouse_type_converter(value_type)
+        return lambda value: {convert_key(key): convert_value(item) for key, item in value.items()}
+    if name in ("DateTime", "DateTime64"):
+        timezones = [arg.strip("'") for arg in _split_type_arguments(arguments) if arg.startswith("'")]
+        tz = ZoneInfo(timezones[0]) if timezones else None
+        return lambda value: _parse_datetime(value, tz)
+    if name in ("Date", "Date32"):
+        return dt.date.fromisoformat
+    if name == "UUID":
+        return uuid.UUID
+    if name.startswith("Int") or name.startswith("UInt"):
+        return int
+    if name.startswith("Float"):
+        return float
+    if name.startswith("Decimal"):
+        return lambda value: decimal.Decimal(str(value))
+    if name == "Bool":
+        return bool
+    if name == "IPv4":
+        return ipaddress.IPv4Address
+    if name == "IPv6":
+        return ipaddress.IPv6Address
+    if name == "Nothing":
+        return lambda value: None
+    return lambda value: value
+
+
+# Once ClickHouse has sent the status line, an error while producing the result is appended to the body instead
+_EXCEPTION_IN_BODY = re.compile(r"Code: (\d+)\. DB::Exception")
+
+
+def _exception_in_body(text: str) -> ServerException:
+    match = _EXCEPTION_IN_BODY.search(text)
+    return ServerException(text.strip(), code=int(match.group(1)) if match else None)
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        parsed = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        raise _exception_in_body(line.decode("utf-8", errors="replace"))
+    if isinstance(parsed, dict) and "exception" in parsed:
+        # Written as an object by servers with `http_write_exception_in_output_format` on
+        raise _exception_in_body(str(parsed["exception"]))
+    return parsed
+
+
+def _setting_value(value: Any) -> str:
+    return str(int(value)) if isinstance(value, bool) else str(value)
+
+
+@cache
+def _ssl_context(ca_certs: Optional[str]) -> ssl.SSLContext:
+    return ssl.create_default_context(cafile=ca_certs)
+
+
+def _get_session() -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.CLICKHOUSE_CONN_POOL_MAX),
+            timeout=aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=10,
+                # Same as `send_receive_timeout` for the sync clients
+                sock_read=30 if settings.TEST else None,
+            ),
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_async_clickhouse_sessions() -> None:
+    """Closes the connection pool of the running event loop, e.g. when an ASGI app or worker shuts down."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+class AsyncProxyClient:
+    """
+    Counterpart of `ProxyClient` for async code. Only supports queries which don't send rows along, so no
+    `INSERT ... VALUES` with data.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        host: str,
+        user: str,
+        password: str,
+        database: str,
+        secure: bool,
+        port: int,
+        verify: bool = True,
+        ca_certs: Optional[str] = None,
+        **_kwargs,
+    ):
+        self._session = session
+        self._url = f"{'https' if secure else 'http'}://{host}:{port}/"
+        self._headers = {"X-ClickHouse-User": user, "X-ClickHouse-Key": password}
+        self._database = database
+        self._ssl: ssl.SSLContext | bool = (_ssl_context(ca_certs) if verify else False) if secure else False
+        self.written_rows = 0
+
+    async def execute(self, query: str, with_column_types=False, query_id=None, settings=None):
+        params = {
+            "database": self._database,
+            "default_format": "JSONCompactEachRowWithNamesAndTypes",
+            # Keep precision of big numbers, the converters take them from strings
+            "output_format_json_quote_64bit_integers": "1",
+            "output_format_json_quote_decimals": "1",
+            **{key: _setting_value(value) for key, value in (settings or {}).items() if value is not None},
+        }
+        if query_id:
+            params["query_id"] = query_id
+
+        async with self._session.post(
+            self._url, params=params, headers=self._headers, data=query.encode("utf-8"), ssl=self._ssl
+        ) as response:
+            if response.status != 200:
+                message = await response.text()
+                code = response.headers.get("X-ClickHouse-Exception-Code")
+                # Raised as what `clickhouse_driver` raises, so the usual error wrapping applies
+                raise ServerException(message, code=int(code) if code and code.isdigit() else None)
+
+            summary = orjson.loads(response.headers.get("X-ClickHouse-Summary", "{}"))
+            self.written_rows = int(summary.get("written_rows", 0))
+
+            # Read in full rather than by line, as rows can be longer than aiohttp's line buffer
+            body = await response.read()
+
+        lines = [line for line in body.split(b"\n") if line.strip()]
+        if len(lines) == 1:
+            # An error right after the status line, before the names and types of the columns
+            _parse_line(lines[0])
+        if len(lines) < 2:
+            # Statements without a result set, e.g. INSERT ... SELECT
+            return ([], []) if with_column_types else []
+
+        names, types = _parse_line(lines[0]), _parse_line(lines[1])
+        converters = [clickhouse_type_converter(ch_type) for ch_type in types]
+        rows = [
+            tuple(None if value is None else convert(value) for convert, value in zip(converters, _parse_line(line)))
+            for line in lines[2:]
+        ]
+        if with_column_types:
+            return rows, list(zip(names, types))
+        return rows
+
+
+@asynccontextmanager
+async def get_async_client_from_pool(
+    workload: Workload = Workload.DEFAULT,
+    team_id=None,
+    readonly=False,
+    ch_user: ClickHouseUser = ClickHouseUser.DEFAULT,
+) -> AsyncIterator[AsyncProxyClient]:
+    """
+    Async counterpart of `get_client_from_pool`, picking the same host and credentials for a given workload.
+    """
+    kwargs = {
+        "host": settings.CLICKHOUSE_HOST,
+        "database": settings.CLICKHOUSE_DATABASE,
+        "secure": settings.CLICKHOUSE_SECURE,
+        "verify": settings.CLICKHOUSE_VERIFY,
+        "ca_certs": settings.CLICKHOUSE_CA,
+        **get_kwargs_for_client(workload=workload, team_id=team_id, readonly=readonly, ch_user=ch_user),
+    }
+    # After the client kwargs, as a port in there is for the native protocol. The HTTP URL may leave out the port,
+    # and per team hosts take the port of the default host, so fall back to the default HTTP(S) port.
+    kwargs["port"] = urlparse(settings.CLICKHOUSE_HTTP_URL).port or (8443 if kwargs["secure"] else 8123)
+    yield AsyncProxyClient(_get_session(), **kwargs)
@@ -109,6 +109,44 @@ class ProxyClient:
             return result.result_set, column_types_driver_format
         return result.result_set
 
+    def execute_iter(
+        self,
+        query,
+        params=None,
+        query_id=None,
+        settings=None,
+        chunk_size=1,
+        with_column_types=False,
+    ):
+        # Mirrors `clickhouse_driver.Client.execute_iter`: single rows, or lists of up to `chunk_size` rows, with the
+        # `(name, type)` pairs of the columns as the first row if `with_column_types` is set
+        settings = {**(settings or {})}
+        if query_id:
+            settings["query_id"] = query_id
+        with self._client.query_row_block_stream(query=query, parameters=params, settings=settings) as stream:
+            chunk: list = []
+            if with_column_types:
+                column_types = [(a, b.name) for (a, b) in zip(stream.source.column_names, stream.source.column_types)]
+                if chunk_size <= 1:
+                    yield column_types
+                else:
+                    chunk.append(column_types)
+            for block in stream:
+                for row in block:
+                    if chunk_size <= 1:
+                        yield row
+                        continue
+                    chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+            if chunk:
+                yield chunk
+
+    def disconnect(self):
+        # Connections belong to the HTTP pool manager, and closing a stream releases its connection
+        pass
+
     # Implement methods for session managment: https://peps.python.org/pep-0343/ so ProxyClient can be used in all places a clickhouse_driver.Client is.
     def __enter__(self):
         return self
@@ -2,13 +2,14 @@ import logging
 import threading
 import traceback
 import types
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 from contextlib import contextmanager
 from functools import lru_cache
 from time import perf_counter
 from typing import Any, Optional, Union
 
 import sqlparse
+from asgiref.sync import sync_to_async
 from clickhouse_driver import Client as SyncClient
 from django.conf import settings as app_settings
 from prometheus_client import Counter
@@ -19,6 +20,7 @@ from posthog.clickhouse.client.connection import (
     get_default_clickhouse_workload_type,
     ClickHouseUser,
 )
+from posthog.clickhouse.client.async_connection import get_async_client_from_pool
 from posthog.clickhouse.client.escape import substitute_params
 from posthog.clickhouse.query_tagging import get_query_tag_value, get_query_tags, QueryTags, AccessMethod, Feature
 from posthog.cloud_utils import is_cloud
@@ -106,32 +108,16 @@ def validated_client_query_id() -> Optional[str]:
 logger = logging.getLogger(__name__)
 
 
-@patchable
-@trace_clickhouse_query_decorator
-def sync_execute(
-    query,
-    args=None,
-    settings=None,
-    with_column_types=False,
-    flush=True,
-    *,
-    workload: Workload = Workload.DEFAULT,
-    team_id: Optional[int] = None,
-    readonly=False,
-    sync_client: Optional[SyncClient] = None,
-    ch_user: ClickHouseUser = ClickHouseUser.DEFAULT,
-):
+def _route_query(
+    workload: Workload, team_id: Optional[int], ch_user: ClickHouseUser
+) -> tuple[Workload, ClickHouseUser, QueryTags]:
+    """
+    Decides which cluster and ClickHouse user a query runs on, based on who is asking for it.
+    """
     if not workload:
         workload = Workload.DEFAULT
         # TODO replace this by assert, sorry, no messing with ClickHouse should be possible
         logging.warning(f"workload is None", traceback.format_stack())
-    if TEST and flush:
-        try:
-            from posthog.test.base import flush_persons_and_events
-
-            flush_persons_and_events()
-        except ModuleNotFoundError:  # when we run plugin server tests it tries to run above, ignore
-            pass
     tags = get_query_tags()
     is_personal_api_key = tags.access_method == AccessMethod.PERSONAL_API_KEY
 
@@ -164,6 +150,108 @@ def sync_execute(
     if team_id is not None:
         tags.team_id = team_id
 
+    if ch_user == ClickHouseUser.DEFAULT:
+        if is_personal_api_key:
+            ch_user = ClickHouseUser.API
+        elif tags.kind == "request" and "api/" in tags_id and "capture" not in tags_id:
+            # process requests made to API from the PH app
+            ch_user = ClickHouseUser.APP
+        elif tags.feature == Feature.CACHE_WARMUP:
+            ch_user = ClickHouseUser.CACHE_WARMUP
+
+    return workload, ch_user, tags
+
+
+def _query_settings(core_settings: dict, tags: QueryTags, query_id: Optional[str], workload: Workload) -> dict:
+    settings = {
+        **core_settings,
+        "log_comment": tags.to_json(),
+        "query_id": query_id,
+    }
+    if workload == Workload.OFFLINE:
+        # disabling hedged requests for offline queries reduces the likelihood of these queries bleeding over into the
+        # online resource pool when the offline resource pool is under heavy load. this comes at the cost of higher and
+        # more variable latency and a higher likelihood of query failures - but offline workloads should be tolerant to
+        # these disruptions
+        settings["use_hedged_requests"] = "0"
+    return settings
+
+
+def _count_query_started(team_id: Optional[int], tags: QueryTags) -> None:
+    QUERY_STARTED_COUNTER.labels(
+        team_id=str(team_id or ""),
+        access_method=tags.access_method or "other",
+        chargeable=str(tags.chargeable or "0"),
+    ).inc()
+
+
+def _count_query_finished(team_id: Optional[int], tags: QueryTags, start_time: float) -> None:
+    execution_time = perf_counter() - start_time
+
+    QUERY_FINISHED_COUNTER.labels(
+        team_id=str(team_id or ""),
+        access_method=tags.access_method or "other",
+        chargeable=str(tags.chargeable or "0"),
+    ).inc()
+
+    if query_counter := getattr(thread_local_storage, "query_counter", None):
+        query_counter.total_query_time += execution_time
+
+    if app_settings.SHELL_PLUS_PRINT_SQL:
+        print("Execution time: %.6fs" % (execution_time,))  # noqa T201
+
+
+def _handle_query_error(e: Exception, query_type: str, workload: Workload, tags: QueryTags) -> tuple[Exception, bool]:
+    """
+    Counts and wraps a query failure. Returns the error to raise, and whether the query should rather be retried on
+    the online cluster, which we do for API queries when the offline one is at capacity.
+    """
+    exception_type = ch_error_type(e)
+    QUERY_ERROR_COUNTER.labels(
+        exception_type=exception_type,
+        query_type=query_type,
+        workload=workload.value if workload else "None",
+        chargeable=str(tags.chargeable or "0"),
+    ).inc()
+    err = wrap_query_error(e)
+    if (
+        isinstance(err, ClickHouseAtCapacity)
+        and tags.access_method == AccessMethod.PERSONAL_API_KEY
+        and workload == Workload.OFFLINE
+    ):
+        tags.clickhouse_exception_type = exception_type
+        return err, True
+    return err, False
+
+
+def _flush_test_data(flush: bool) -> None:
+    if TEST and flush:
+        try:
+            from posthog.test.base import flush_persons_and_events
+
+            flush_persons_and_events()
+        except ModuleNotFoundError:  # when we run plugin server tests it tries to run above, ignore
+            pass
+
+
+@patchable
+@trace_clickhouse_query_decorator
+def sync_execute(
+    query,
+    args=None,
+    settings=None,
+    with_column_types=False,
+    flush=True,
+    *,
+    workload: Workload = Workload.DEFAULT,
+    team_id: Optional[int] = None,
+    readonly=False,
+    sync_client: Optional[SyncClient] = None,
+    ch_user: ClickHouseUser = ClickHouseUser.DEFAULT,
+):
+    _flush_test_data(flush)
+    workload, ch_user, tags = _route_query(workload, team_id, ch_user)
+
     prepared_sql, prepared_args, tags = _prepare_query(query=query, args=args, workload=workload)
     query_id = validated_client_query_id()
     core_settings = {
@@ -173,37 +261,15 @@ def sync_execute(
     }
     tags.query_settings = core_settings
     query_type = tags.query_type or "Other"
-    if ch_user == ClickHouseUser.DEFAULT:
-        if is_personal_api_key:
-            ch_user = ClickHouseUser.API
-        elif tags.kind == "request" and "api/" in tags_id and "capture" not in tags_id:
-            # process requests made to API from the PH app
-            ch_user = ClickHouseUser.APP
-        elif tags.feature == Feature.CACHE_WARMUP:
-            ch_user = ClickHouseUser.CACHE_WARMUP
 
     # update tags if inside temporal (should not)
     update_query_tags_with_temporal_info()
 
     while True:
-        settings = {
-            **core_settings,
-            "log_comment": tags.to_json(),
-            "query_id": query_id,
-        }
-        if workload == Workload.OFFLINE:
-            # disabling hedged requests for offline queries reduces the likelihood of these queries bleeding over into the
-            # online resource pool when the offline resource pool is under heavy load. this comes at the cost of higher and
-            # more variable latency and a higher likelihood of query failures - but offline workloads should be tolerant to
-            # these disruptions
-            settings["use_hedged_requests"] = "0"
+        settings = _query_settings(core_settings, tags, query_id, workload)
         start_time = perf_counter()
         try:
-            QUERY_STARTED_COUNTER.labels(
-                team_id=str(team_id or ""),
-                access_method=tags.access_method or "other",
-                chargeable=str(tags.chargeable or "0"),
-            ).inc()
+            _count_query_started(team_id, tags)
             with sync_client or get_client_from_pool(workload, team_id, readonly, ch_user) as client:
                 result = client.execute(
                     prepared_sql,
@@ -215,34 +281,199 @@ def sync_execute(
                 if "INSERT INTO" in prepared_sql and client.last_query.progress.written_rows > 0:
                     result = client.last_query.progress.written_rows
         except Exception as e:
-            exception_type = ch_error_type(e)
-            QUERY_ERROR_COUNTER.labels(
-                exception_type=exception_type,
-                query_type=query_type,
-                workload=workload.value if workload else "None",
-                chargeable=str(tags.chargeable or "0"),
-            ).inc()
-            err = wrap_query_error(e)
-            if isinstance(err, ClickHouseAtCapacity) and is_personal_api_key and workload == Workload.OFFLINE:
+            err, retry_online = _handle_query_error(e, query_type, workload, tags)
+            if retry_online:
+                workload = Workload.ONLINE
+                tags.workload = str(workload)
+                continue
+            raise err from e
+        finally:
+            _count_query_finished(team_id, tags, start_time)
+
+        break
+
+    return result
+
+
+@patchable
+@trace_clickhouse_query_decorator
+def sync_execute_iter(
+    query,
+    args=None,
+    settings=None,
+    flush=True,
+    *,
+    workload: Workload = Workload.DEFAULT,
+    team_id: Optional[int] = None,
+    readonly=False,
+    ch_user: ClickHouseUser = ClickHouseUser.DEFAULT,
+    batch_size: int = 10_000,
+    with_column_types: bool = False,
+) -> Iterator[list]:
+    """
+    Same as `sync_execute` for SELECT queries, but returns an iterator over batches of rows as they arrive from
+    ClickHouse, instead of loading the whole result set into memory first. With `with_column_types`, the first item
+    is the list of `(name, type)` pairs of the columns, before any batch of rows.
+
+    Routing, query tags, settings, metrics and error wrapping are the same as for `sync_execute`. The query is
+    prepared (and tags are read) right away, so the iterator can be consumed after the request context is gone, e.g.
+    by a `StreamingHttpResponse`. It starts running on the first `next()`, and holds on to its connection until the
+    iterator is exhausted or closed.
+    """
+    _flush_test_data(flush)
+    workload, ch_user, tags = _route_query(workload, team_id, ch_user)
+
+    prepared_sql, prepared_args, tags = _prepare_query(query=query, args=args, workload=workload)
+    query_id = validated_client_query_id()
+    core_settings = {
+        **default_settings(),
+        **CLICKHOUSE_PER_TEAM_QUERY_SETTINGS.get(str(team_id), {}),
+        **(settings or {}),
+    }
+    tags.query_settings = core_settings
+
+    update_query_tags_with_temporal_info()
+
+    return _iter_query_batches(
+        prepared_sql,
+        prepared_args,
+        core_settings,
+        query_id=query_id,
+        tags=tags,
+        workload=workload,
+        team_id=team_id,
+        readonly=readonly,
+        ch_user=ch_user,
+        batch_size=batch_size,
+        with_column_types=with_column_types,
+    )
+
+
+def _iter_query_batches(
+    prepared_sql: str,
+    prepared_args: Optional[QueryArgs],
+    core_settings: dict,
+    *,
+    query_id: Optional[str],
+    tags: QueryTags,
+    workload: Workload,
+    team_id: Optional[int],
+    readonly: bool,
+    ch_user: ClickHouseUser,
+    batch_size: int,
+    with_column_types: bool,
+) -> Iterator[list]:
+    query_type = tags.query_type or "Other"
+
+    while True:
+        settings = _query_settings(core_settings, tags, query_id, workload)
+        start_time = perf_counter()
+        has_yielded = False
+        try:
+            _count_query_started(team_id, tags)
+            with get_client_from_pool(workload, team_id, readonly, ch_user) as client:
+                batches = client.execute_iter(
+                    prepared_sql,
+                    params=prepared_args,
+                    settings=settings,
+                    query_id=query_id,
+                    chunk_size=batch_size,
+                    with_column_types=with_column_types,
+                )
+                try:
+                    for batch in batches:
+                        if with_column_types and not has_yielded:
+                            # Like `execute_iter` of clickhouse_driver, the column types come as the first row
+                            column_types, batch = batch[0], batch[1:]
+                            has_yielded = True
+                            yield column_types
+                            if not batch:
+                                continue
+                        has_yielded = True
+                        yield batch
+                except GeneratorExit:
+                    # The consumer went away mid-stream. Drop the connection rather than hand it back to the pool
+                    # in the middle of a response, which also makes ClickHouse cancel the query.
+                    client.disconnect()
+                    raise
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            err, retry_online = _handle_query_error(e, query_type, workload, tags)
+            # Once rows went out, a retry would send them twice
+            if retry_online and not has_yielded:
                 workload = Workload.ONLINE
-                tags.clickhouse_exception_type = exception_type
                 tags.workload = str(workload)
                 continue
             raise err from e
         finally:
-            execution_time = perf_counter() - start_time
+            _count_query_finished(team_id, tags, start_time)
+
+        break
+
+
+async def async_execute(
+    query,
+    args: Optional[NonInsertParams] = None,
+    settings=None,
+    with_column_types=False,
+    flush=True,
+    *,
+    workload: Workload = Workload.DEFAULT,
+    team_id: Optional[int] = None,
+    readonly=False,
+    ch_user: ClickHouseUser = ClickHouseUser.DEFAULT,
+):
+    """
+    Async version of `sync_execute` for ASGI views and Temporal activities, with the same routing, query tags,
+    settings, metrics and error wrapping, and the same result types.
 
-            QUERY_FINISHED_COUNTER.labels(
-                team_id=str(team_id or ""),
-                access_method=tags.access_method or "other",
-                chargeable=str(tags.chargeable or "0"),
-            ).inc()
+    Queries go over HTTP through a connection pool per event loop (see `async_connection`), so waiting on ClickHouse
+    doesn't hold a thread. Inserting rows passed as args isn't supported, use `sync_execute` for that.
+    """
+    if isinstance(args, list | tuple | types.GeneratorType):
+        raise ValueError("async_execute doesn't support inserting rows, use sync_execute instead")
+
+    if TEST and flush:
+        # Flushing goes through the ORM, which can't be used from async code directly
+        await sync_to_async(_flush_test_data)(flush)
+    workload, ch_user, tags = _route_query(workload, team_id, ch_user)
+
+    prepared_sql, _, tags = _prepare_query(query=query, args=args, workload=workload)
+    query_id = validated_client_query_id()
+    core_settings = {
+        **default_settings(),
+        **CLICKHOUSE_PER_TEAM_QUERY_SETTINGS.get(str(team_id), {}),
+        **(settings or {}),
+    }
+    tags.query_settings = core_settings
+    query_type = tags.query_type or "Other"
 
-            if query_counter := getattr(thread_local_storage, "query_counter", None):
-                query_counter.total_query_time += execution_time
+    update_query_tags_with_temporal_info()
 
-            if app_settings.SHELL_PLUS_PRINT_SQL:
-                print("Execution time: %.6fs" % (execution_time,))  # noqa T201
+    while True:
+        settings = _query_settings(core_settings, tags, query_id, workload)
+        start_time = perf_counter()
+        try:
+            _count_query_started(team_id, tags)
+            async with get_async_client_from_pool(workload, team_id, readonly, ch_user) as client:
+                result = await client.execute(
+                    prepared_sql,
+                    with_column_types=with_column_types,
+                    query_id=query_id,
+                    settings=settings,
+                )
+                if "INSERT INTO" in prepared_sql and client.written_rows > 0:
+                    result = client.written_rows
+        except Exception as e:
+            err, retry_online = _handle_query_error(e, query_type, workload, tags)
+            if retry_online:
+                workload = Workload.ONLINE
+                tags.workload = str(workload)
+                continue
+            raise err from e
+        finally:
+            _count_query_finished(team_id, tags, start_time)
 
         break
 
@@ -80,28 +80,95 @@ class RateLimit:
         if applicable:
             running_task_key, task_id = self.use(*args, **kwargs)
 
+        def refresh() -> None:
+            if applicable and running_task_key and task_id:
+                self.refresh(running_task_key, task_id)
+
         try:
-            yield
+            # Tasks that can run for longer than `ttl` (e.g. streams) call this now and then to keep their slot
+            yield refresh
         finally:
             if applicable and running_task_key and task_id:
                 self.release(running_task_key, task_id)
 
+    @contextmanager
+    def run_if_available(self, *args, slot_id: Optional[str] = None, **kwargs):
+        """
+        Like `run`, but never waits or raises when the limit is hit. Yields whether the task may run, so callers can
+        do something else (e.g. wait for their own tasks to finish) instead of failing.
+
+        `slot_id` is held in place of the task's id, for tasks taking extra slots: in Celery, `get_task_id` returns
+        the id of the Celery task, which already holds a slot.
+        """
+        if self.applicable and not self.applicable(*args, **kwargs):
+            yield True
+            return
+
+        running_tasks_key, task_id = self._get_task_key_and_id(*args, **kwargs)
+        if slot_id is not None:
+            task_id = slot_id
+        team_id: Optional[int] = kwargs.get("team_id", None)
+        max_concurrency = self._get_max_concurrency(**kwargs)
+        acquired = (
+            self.redis_client.eval(
+                lua_script, 1, running_tasks_key, int(self.get_time()), task_id, max_concurrency, self.ttl
+            )
+            == 1
+        )
+        if not acquired and self._bypass(self.get_task_name(*args, **kwargs), team_id, max_concurrency, **kwargs):
+            yield True
+            return
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release(running_tasks_key, task_id)
+
+    def _get_task_key_and_id(self, *args, **kwargs) -> tuple[str, str]:
+        task_name = self.get_task_name(*args, **kwargs)
+        running_tasks_key = self.get_task_key(*args, **kwargs) if self.get_task_key else task_name
+        return running_tasks_key, self.get_task_id(*args, **kwargs)
+
+    def _get_max_concurrency(self, **kwargs) -> int:
+        team_id: Optional[int] = kwargs.get("team_id", None)
+        if kwargs.get("is_api") and (team_id in settings.API_QUERIES_PER_TEAM):
+            return settings.API_QUERIES_PER_TEAM[team_id]  # type: ignore
+        if "limit" in kwargs:
+            return kwargs.get("limit") or self.max_concurrency
+        return self.max_concurrency
+
+    def _bypass(self, task_name: str, team_id: Optional[int], max_concurrency: int, **kwargs) -> bool:
+        """
+        Whether a task may run without a slot when the limit is hit.
+        """
+        from posthog.rate_limit import team_is_allowed_to_bypass_throttle
+
+        bypass = team_is_allowed_to_bypass_throttle(team_id)
+        in_beta = kwargs.get("is_api") and (team_id in settings.API_QUERIES_PER_TEAM)
+
+        # team in beta cannot skip limits
+        if bypass or (not in_beta and self.bypass_all):
+            result = "allow" if bypass else "block"
+            CONCURRENT_QUERY_LIMIT_EXCEEDED_COUNTER.labels(
+                task_name=task_name,
+                team_id=str(team_id),
+                limit=max_concurrency,
+                limit_name=self.limit_name,
+                result=result,
+            ).inc()
+            return True
+        return False
+
     def use(self, *args, **kwargs) -> tuple[Optional[str], Optional[str]]:
         """
         Acquire the resource before execution or throw exception.
         """
         wait_deadline = self.get_time() + self.retry_timeout
         task_name = self.get_task_name(*args, **kwargs)
-        running_tasks_key = self.get_task_key(*args, **kwargs) if self.get_task_key else task_name
-        task_id = self.get_task_id(*args, **kwargs)
+        running_tasks_key, task_id = self._get_task_key_and_id(*args, **kwargs)
         team_id: Optional[int] = kwargs.get("team_id", None)
 
-        max_concurrency = self.max_concurrency
-        in_beta = kwargs.get("is_api") and (team_id in settings.API_QUERIES_PER_TEAM)
-        if in_beta:
-            max_concurrency = settings.API_QUERIES_PER_TEAM[team_id]  # type: ignore
-        elif "limit" in kwargs:
-            max_concurrency = kwargs.get("limit") or max_concurrency
+        max_concurrency = self._get_max_concurrency(**kwargs)
 
         # p80 is below 1.714ms, therefore max retry is 1.714s
         backoff = ExponentialBackoff(self.retry or 0.15, max_delay=1.714, exp=1.5)
@@ -113,20 +180,7 @@ class RateLimit:
             )
             == 0
         ):
-            from posthog.rate_limit import team_is_allowed_to_bypass_throttle
-
-            bypass = team_is_allowed_to_bypass_throttle(team_id)
-
-            # team in beta cannot skip limits
-            if bypass or (not in_beta and self.bypass_all):
-                result = "allow" if bypass else "block"
-                CONCURRENT_QUERY_LIMIT_EXCEEDED_COUNTER.labels(
-                    task_name=task_name,
-                    team_id=str(team_id),
-                    limit=max_concurrency,
-                    limit_name=self.limit_name,
-                    result=result,
-                ).inc()
+            if self._bypass(task_name, team_id, max_concurrency, **kwargs):
                 return None, None
 
             if self.retry and self.get_time() < wait_deadline:
@@ -155,6 +209,12 @@ class RateLimit:
 
         return running_tasks_key, task_id
 
+    def refresh(self, running_task_key, task_id):
+        """
+        Push the expiry of a running task out by another `ttl`. Does nothing if the task was released already.
+        """
+        self.redis_client.zadd(running_task_key, {task_id: int(self.get_time()) + self.ttl}, xx=True)
+
     def release(self, running_task_key, task_id):
         """
         Release the resource, when the execution finishes.
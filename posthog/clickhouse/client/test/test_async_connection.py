@@ -0,0 +1,139 @@
+import datetime as dt
+import decimal
+import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from zoneinfo import ZoneInfo
+
+from asgiref.sync import async_to_sync
+from clickhouse_driver.errors import ServerException
+from django.test import SimpleTestCase, TestCase, override_settings
+from parameterized import parameterized
+
+from posthog.clickhouse.client import async_execute, sync_execute
+from posthog.clickhouse.client.async_connection import (
+    AsyncProxyClient,
+    clickhouse_type_converter,
+    get_async_client_from_pool,
+)
+from posthog.clickhouse.client.connection import ClickHouseUser, Workload
+from posthog.clickhouse.query_tagging import tag_queries
+from posthog.test.base import ClickhouseTestMixin
+
+
+class TestClickHouseTypeConverter(SimpleTestCase):
+    @parameterized.expand(
+        [
+            ("UInt64", "18446744073709551615", 18446744073709551615),
+            ("Float64", 1.5, 1.5),
+            ("String", "a", "a"),
+            ("Nullable(Int8)", None, None),
+            ("LowCardinality(Nullable(String))", "a", "a"),
+            ("UUID", "01234567-89ab-cdef-0123-456789abcdef", uuid.UUID("01234567-89ab-cdef-0123-456789abcdef")),
+            ("Date", "2024-01-02", dt.date(2024, 1, 2)),
+            ("DateTime", "2024-01-02 03:04:05", dt.datetime(2024, 1, 2, 3, 4, 5)),
+            (
+                "DateTime64(6, 'UTC')",
+                "2024-01-02 03:04:05.123456",
+                dt.datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=ZoneInfo("UTC")),
+            ),
+            ("Decimal(76, 2)", "1.10", decimal.Decimal("1.10")),
+            ("Array(Tuple(String, Int64))", [["a", "1"]], [("a", 1)]),
+            ("Tuple(name String, ts Date)", {"name": "a", "ts": "2024-01-02"}, ("a", dt.date(2024, 1, 2))),
+            ("Map(String, Array(UInt8))", {"a": [1]}, {"a": [1]}),
+        ]
+    )
+    def test_converts_like_clickhouse_driver(self, ch_type, value, expected):
+        self.assertEqual(clickhouse_type_converter(ch_type)(value), expected)
+
+
+class TestAsyncProxyClient(SimpleTestCase):
+    def _client_returning(self, body: bytes) -> AsyncProxyClient:
+        response = MagicMock(status=200, headers={})
+        response.read = AsyncMock(return_value=body)
+        session = MagicMock()
+        session.post.return_value.__aenter__ = AsyncMock(return_value=response)
+        session.post.return_value.__aexit__ = AsyncMock(return_value=False)
+        return AsyncProxyClient(
+            session, host="localhost", user="default", password="", database="default", secure=False, port=8123
+        )
+
+    @parameterized.expand(
+        [
+            (
+                "after_rows",
+                b'["n"]\n["UInt64"]\n["1"]\nCode: 395. DB::Exception: nope: (FUNCTION_THROW_IF_VALUE_IS_NON_ZERO)\n',
+            ),
+            ("mid_row", b'["n"]\n["UInt64"]\n["1"]\n["2Code: 395. DB::Exception: nope\n'),
+            ("as_object", b'["n"]\n["UInt64"]\n{"exception": "Code: 395. DB::Exception: nope"}\n'),
+            ("before_names", b"Code: 395. DB::Exception: nope\n"),
+        ]
+    )
+    def test_raises_errors_sent_after_the_status_line(self, _name, body):
+        with self.assertRaises(ServerException) as error:
+            async_to_sync(self._client_returning(body).execute)("SELECT 1")
+
+        self.assertEqual(error.exception.code, 395)
+
+    @parameterized.expand([("http://clickhouse/", False, 8123), ("https://clickhouse/", True, 8443)])
+    def test_defaults_to_the_http_port(self, url, secure, port):
+        async def client_url() -> str:
+            async with get_async_client_from_pool() as client:
+                return client._url
+
+        with override_settings(CLICKHOUSE_HTTP_URL=url, CLICKHOUSE_SECURE=secure):
+            self.assertTrue(async_to_sync(client_url)().endswith(f":{port}/"))
+
+
+class TestAsyncExecute(ClickhouseTestMixin, TestCase):
+    def test_returns_same_results_as_sync_execute(self):
+        query = """
+            SELECT
+                number,
+                toString(number) AS str,
+                toDateTime64('2024-01-02 03:04:05.123456', 6, 'UTC') AS ts,
+                toUUID('01234567-89ab-cdef-0123-456789abcdef') AS id,
+                [number, number + 1] AS arr,
+                if(number = 1, NULL, number) AS maybe
+            FROM numbers(3)
+            WHERE number < %(limit)s
+            ORDER BY number
+        """
+
+        result = async_to_sync(async_execute)(query, {"limit": 3}, with_column_types=True)
+
+        self.assertEqual(result, sync_execute(query, {"limit": 3}, with_column_types=True))
+
+    def test_wraps_errors_like_sync_execute(self):
+        with self.assertRaises(Exception) as sync_error:
+            sync_execute("SELECT throwIf(1, 'nope')")
+        with self.assertRaises(Exception) as async_error:
+            async_to_sync(async_execute)("SELECT throwIf(1, 'nope')")
+
+        self.assertEqual(type(async_error.exception), type(sync_error.exception))
+
+    def test_rejects_insert_rows(self):
+        with self.assertRaises(ValueError):
+            async_to_sync(async_execute)("INSERT INTO some_table VALUES", [(1,)])
+
+    @patch("posthog.clickhouse.client.execute.get_async_client_from_pool")
+    def test_offline_workload_if_personal_api_key_and_retries_online(self, mock_get_client):
+        failing_client = MagicMock()
+        failing_client.execute = AsyncMock(side_effect=ServerException("Test error", code=202))
+        working_client = MagicMock()
+        working_client.execute = AsyncMock(return_value=[(1,)])
+        working_client.written_rows = 0
+        clients = iter([failing_client, working_client])
+
+        @asynccontextmanager
+        async def get_client(*args):
+            yield next(clients)
+
+        mock_get_client.side_effect = get_client
+
+        tag_queries(access_method="personal_api_key")
+        result = async_to_sync(async_execute)("SELECT 1")
+
+        mock_get_client.assert_any_call(Workload.OFFLINE, None, False, ClickHouseUser.API)
+        mock_get_client.assert_any_call(Workload.ONLINE, None, False, ClickHouseUser.API)
+        self.assertEqual(result, [(1,)])
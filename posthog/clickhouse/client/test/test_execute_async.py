@@ -11,7 +11,7 @@ from django.test import TestCase, SimpleTestCase
 from django.db import transaction
 
 from posthog.clickhouse.client import execute_async as client
-from posthog.clickhouse.client import sync_execute
+from posthog.clickhouse.client import sync_execute, sync_execute_iter
 from posthog.clickhouse.query_tagging import tag_queries
 from posthog.errors import CHQueryErrorTooManySimultaneousQueries
 from posthog.models import Organization, Team
@@ -390,3 +390,42 @@ class ClickhouseClientTestCase(TestCase, ClickhouseTestMixin):
 
         # Verify final result
         self.assertEqual(result, "success")
+
+    def test_sync_execute_iter_yields_batches(self):
+        batches = list(sync_execute_iter("SELECT number FROM numbers(25)", batch_size=10))
+
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual([row[0] for batch in batches for row in batch], list(range(25)))
+
+    def test_sync_execute_iter_with_column_types(self):
+        batches = list(sync_execute_iter("SELECT number FROM numbers(3)", batch_size=10, with_column_types=True))
+
+        self.assertEqual([tuple(column) for column in batches[0]], [("number", "UInt64")])
+        self.assertEqual(batches[1:], [[(0,), (1,), (2,)]])
+
+    @patch("posthog.clickhouse.client.execute.get_client_from_pool")
+    def test_sync_execute_iter_retries_online_before_first_batch(self, mock_get_client):
+        mock_client1 = MagicMock()
+        mock_client2 = MagicMock()
+        mock_client1.__enter__.return_value.execute_iter.side_effect = ServerException("Test error", code=202)
+        mock_client2.__enter__.return_value.execute_iter.return_value = iter([[(1,)], [(2,)]])
+        mock_get_client.side_effect = [mock_client1, mock_client2]
+
+        tag_queries(access_method="personal_api_key")
+        batches = list(sync_execute_iter("SELECT 1"))
+
+        mock_get_client.assert_any_call(Workload.OFFLINE, None, False, ClickHouseUser.API)
+        mock_get_client.assert_any_call(Workload.ONLINE, None, False, ClickHouseUser.API)
+        self.assertEqual(batches, [[(1,)], [(2,)]])
+
+    @patch("posthog.clickhouse.client.execute.get_client_from_pool")
+    def test_sync_execute_iter_drops_connection_when_abandoned(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_client.__enter__.return_value.execute_iter.return_value = iter([[(1,)], [(2,)]])
+        mock_get_client.return_value = mock_client
+
+        batches = sync_execute_iter("SELECT 1")
+        self.assertEqual(next(batches), [(1,)])
+        batches.close()
+
+        mock_client.__enter__.return_value.disconnect.assert_called_once()
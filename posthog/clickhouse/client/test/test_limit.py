@@ -95,6 +95,62 @@ class TestRateLimit(BaseTest):
 
         assert result == 7
 
+    def test_run_if_available(self):
+        with self.limit.run(is_api=True, team_id=9, task_id=17):
+            with self.limit.run_if_available(is_api=True, team_id=9, task_id=18) as available:
+                assert not available
+            with self.limit.run_if_available(is_api=False, team_id=9, task_id=18) as available:
+                assert available
+
+        with self.limit.run_if_available(is_api=True, team_id=9, task_id=18) as available:
+            assert available
+            with self.assertRaises(ConcurrencyLimitExceeded):
+                with self.limit.run(is_api=True, team_id=9, task_id=19):
+                    pass
+
+        # Released on exit
+        with self.limit.run(is_api=True, team_id=9, task_id=19):
+            pass
+
+    def test_run_if_available_holds_the_slot_id(self):
+        # Like limiters in Celery, where every task id is the Celery task's
+        self.limit.max_concurrency = 2
+        self.limit.get_task_id = lambda *args, **kwargs: "celery-task"
+        key = "limit:rate-limit-test-task:9"
+
+        with self.limit.run(is_api=True, team_id=9):
+            with self.limit.run_if_available(is_api=True, team_id=9, slot_id="celery-task:fanout:1") as available:
+                assert available
+                assert self.limit.redis_client.zscore(key, "celery-task:fanout:1") is not None
+
+            # Releasing the extra slot leaves the task's own slot alone
+            assert self.limit.redis_client.zscore(key, "celery-task:fanout:1") is None
+            assert self.limit.redis_client.zscore(key, "celery-task") is not None
+
+    def test_run_if_available_bypass_all(self):
+        self.limit.bypass_all = True
+        with self.limit.run(is_api=True, team_id=9, task_id=17):
+            with self.limit.run_if_available(is_api=True, team_id=9, task_id=18) as available:
+                assert available
+
+    def test_run_refresh_keeps_the_slot_past_its_ttl(self):
+        now = 0
+        self.limit.get_time = lambda: now
+
+        with self.limit.run(is_api=True, team_id=9, task_id=17) as refresh:
+            now = 8
+            refresh()
+            now = 15
+            # Would have expired at 10 without the refresh
+            with self.assertRaises(ConcurrencyLimitExceeded):
+                with self.limit.run(is_api=True, team_id=9, task_id=18):
+                    pass
+
+        # Refreshing after the release doesn't take the slot again
+        refresh()
+        with self.limit.run(is_api=True, team_id=9, task_id=18):
+            pass
+
     def test_custom_rate_limit_fail(self):
         self.cancels.append(self.limit.use(is_api=True, team_id=8, task_id=17))
         self.cancels.append(self.limit.use(is_api=True, team_id=8, task_id=18, limit=2))
@@ -1,5 +1,7 @@
 import logging
+from collections.abc import Iterator
 from functools import wraps
+from types import GeneratorType
 from time import perf_counter
 import re
 
@@ -87,6 +89,9 @@ def trace_clickhouse_query_decorator(func):
                     span.set_attribute("clickhouse.result_rows", len(result))
                 elif isinstance(result, int):
                     span.set_attribute("clickhouse.written_rows", result)
+                elif isinstance(result, GeneratorType):
+                    # Streamed results are read after we return, trace that in a span of its own
+                    return _trace_stream(tracer, span, result)
 
                 return result
 
@@ -103,3 +108,24 @@ def trace_clickhouse_query_decorator(func):
                 raise
 
     return wrapper
+
+
+def _trace_stream(tracer: trace.Tracer, parent: trace.Span, batches: Iterator[list]) -> Iterator[list]:
+    # Not the current span, as the stream may be consumed in another context than the one it was created in
+    span = tracer.start_span("clickhouse.query.stream", context=trace.set_span_in_context(parent))
+    start_time = perf_counter()
+    rows = 0
+    try:
+        for batch in batches:
+            rows += len(batch)
+            yield batch
+        span.set_status(Status(StatusCode.OK))
+    except Exception as e:
+        span.set_attribute("clickhouse.error_type", type(e).__name__)
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        span.record_exception(e)
+        raise
+    finally:
+        span.set_attribute("clickhouse.result_rows", rows)
+        span.set_attribute("clickhouse.execution_time_ms", (perf_counter() - start_time) * 1000)
+        span.end()
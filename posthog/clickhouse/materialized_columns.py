@@ -24,9 +24,15 @@ if EE_AVAILABLE:
             return None
 
         return get_enabled_materialized_columns(table).get((property_name, table_column))
+
+    def clear_materialized_columns_cache() -> None:
+        get_enabled_materialized_columns.clear()
 else:
 
     def get_materialized_column_for_property(
         table: TablesWithMaterializedColumns, table_column: TableColumn, property_name: PropertyName
     ) -> MaterializedColumn | None:
         return None
+
+    def clear_materialized_columns_cache() -> None:
+        pass
@@ -0,0 +1,7 @@
+from posthog.clickhouse.client.connection import NodeRole
+from posthog.clickhouse.client.migration_tools import run_sql_with_exceptions
+from posthog.models.event_rollup.sql import EVENT_ROLLUPS_TABLE_SQL
+
+operations = [
+    run_sql_with_exceptions(EVENT_ROLLUPS_TABLE_SQL(on_cluster=False), node_role=NodeRole.ALL),
+]
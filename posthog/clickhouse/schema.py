@@ -56,6 +56,7 @@ from posthog.models.error_tracking.sql import (
     ERROR_TRACKING_ISSUE_FINGERPRINT_OVERRIDES_TABLE_SQL,
     KAFKA_ERROR_TRACKING_ISSUE_FINGERPRINT_OVERRIDES_TABLE_SQL,
 )
+from posthog.models.event_rollup.sql import EVENT_ROLLUPS_TABLE_SQL
 from posthog.models.event.sql import (
     DISTRIBUTED_EVENTS_RECENT_TABLE_SQL,
     DISTRIBUTED_EVENTS_TABLE_SQL,
@@ -185,6 +186,7 @@ CREATE_MERGETREE_TABLE_QUERIES = (
     WEB_BOUNCES_HOURLY_SQL,
     WEB_STATS_SQL,
     WEB_BOUNCES_SQL,
+    EVENT_ROLLUPS_TABLE_SQL,
 )
 CREATE_DISTRIBUTED_TABLE_QUERIES = (
     WRITABLE_EVENTS_TABLE_SQL,
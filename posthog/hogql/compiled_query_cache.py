@@ -0,0 +1,126 @@
+"""
+Process-local LRU of compiled HogQL queries.
+
+Dashboards and API clients send the same queries over and over, and for cheap queries parsing, resolving and printing
+them twice (HogQL and ClickHouse dialects) is a big part of the total latency. A compiled query is keyed by everything
+that goes into compiling it: the query itself, placeholders, variables, settings, modifiers, the team's settings and
+its HogQL database version (see `posthog.hogql.database.cache`), which changes whenever tables, views or joins change.
+
+Things read while compiling that have no version of their own (e.g. property definitions and materialized columns) are
+covered by keeping entries for a short TTL only.
+"""
+
+import dataclasses
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+from prometheus_client import Counter
+
+from posthog.hogql.base import AST
+
+HOGQL_COMPILED_QUERY_CACHE_COUNTER = Counter(
+    "posthog_hogql_compiled_query_cache",
+    "Lookups of the process-local compiled HogQL query cache",
+    labelnames=["result"],
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledQuery:
+    hogql: str
+    clickhouse_sql: str
+    values: dict
+    print_columns: list[str]
+
+
+_cache: "OrderedDict[str, tuple[float, CompiledQuery]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compiled_query_cache_key(*parts: str) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+# Source positions don't change what a query compiles to, and types are only set on nodes that were resolved already
+_AST_FIELDS_NOT_IN_KEY = frozenset({"start", "end", "type"})
+
+
+class UncacheableAST(Exception):
+    pass
+
+
+def _write_canonical(value: object, parts: list[str]) -> None:
+    if isinstance(value, AST):
+        if getattr(value, "type", None) is not None:
+            # Resolved nodes carry types that reference tables and fields, which can't be keyed on
+            raise UncacheableAST(type(value).__name__)
+        parts.append(type(value).__name__)
+        parts.append("(")
+        for field in dataclasses.fields(value):
+            if field.name not in _AST_FIELDS_NOT_IN_KEY:
+                parts.append(field.name)
+                parts.append("=")
+                _write_canonical(getattr(value, field.name), parts)
+                parts.append(",")
+        parts.append(")")
+    elif isinstance(value, list | tuple):
+        parts.append("[")
+        for item in value:
+            _write_canonical(item, parts)
+            parts.append(",")
+        parts.append("]")
+    elif isinstance(value, dict):
+        parts.append("{")
+        for key, item in sorted(value.items(), key=lambda key_and_item: str(key_and_item[0])):
+            parts.append(repr(key))
+            parts.append(":")
+            _write_canonical(item, parts)
+            parts.append(",")
+        parts.append("}")
+    else:
+        parts.append(repr(value))
+
+
+def canonical_ast_key(value: object) -> str:
+    """
+    Serializes an AST (or a list or dict of them) with every field, including ones that don't show up when printed
+    (like hidden aliases), but without source positions. Raises `UncacheableAST` for resolved nodes.
+    """
+    parts: list[str] = []
+    _write_canonical(value, parts)
+    return "".join(parts)
+
+
+def get_compiled_query(key: str) -> Optional[CompiledQuery]:
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[0] < settings.HOGQL_COMPILED_QUERY_CACHE_TTL:
+                _cache.move_to_end(key)
+            else:
+                del _cache[key]
+                entry = None
+
+    HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="hit" if entry is not None else "miss").inc()
+    return entry[1] if entry is not None else None
+
+
+def set_compiled_query(key: str, compiled_query: CompiledQuery) -> None:
+    with _cache_lock:
+        _cache[key] = (time.monotonic(), compiled_query)
+        _cache.move_to_end(key)
+        while len(_cache) > settings.HOGQL_COMPILED_QUERY_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def clear_compiled_query_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -8,6 +8,7 @@ from posthog.hogql.constants import LimitContext
 
 if TYPE_CHECKING:
     from posthog.hogql.database.database import Database
+    from posthog.hogql.property_index import PropertyIndex
     from posthog.hogql.transforms.property_types import PropertySwapper
     from posthog.models import Team
 
@@ -60,6 +61,8 @@ class HogQLContext:
     debug: bool = False
 
     property_swapper: Optional["PropertySwapper"] = None
+    # Property types and materialized columns of the team's project, see `get_property_index_for_context`
+    property_index: Optional["PropertyIndex"] = None
 
     def __post_init__(self):
         if self.team:
@@ -0,0 +1,191 @@
+"""
+Process-local cache of built HogQL `Database` objects.
+
+Building a `Database` for a team touches a handful of Postgres tables (group type mappings, saved queries, warehouse
+tables, joins, revenue analytics sources). The result only changes when one of those rows changes, so we keep the
+built object around per process and hand out deep copies.
+
+The built object holds join functions and locally defined table classes, so it can't be serialized into Redis.
+Instead, Redis holds a version counter per team, which is bumped from `post_save`/`post_delete`
+signals. Every lookup compares the cached entry's version against Redis, so a change made in any process invalidates
+the entry in all of them.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+import structlog
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from prometheus_client import Counter
+
+from posthog.redis import get_client
+from posthog.schema import HogQLQueryModifiers
+
+if TYPE_CHECKING:
+    from posthog.hogql.database.database import Database
+    from posthog.models import Team
+
+logger = structlog.get_logger(__name__)
+
+HOGQL_DATABASE_CACHE_COUNTER = Counter(
+    "posthog_hogql_database_cache",
+    "Lookups of the process-local HogQL database cache",
+    labelnames=["result"],
+)
+
+TEAM_VERSION_KEY = "hogql_database:version:team:{team_id}"
+
+CacheKey = tuple[int, str, str]
+
+_cache: "OrderedDict[CacheKey, tuple[int, float, Database]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(team_id: int, team: Optional["Team"], modifiers: Optional[HogQLQueryModifiers]) -> CacheKey:
+    # A passed in team may carry unsaved changes (e.g. modifiers set in tests or by the API before saving),
+    # so everything `create_hogql_database` reads from the team object is part of the key.
+    team_fingerprint = ""
+    if team is not None:
+        # Without an explicit mode, the persons on events mode falls back to a default resolved from feature flags,
+        # which can change without any of the team's own fields changing
+        persons_on_events_default = (
+            team.person_on_events_mode_flag_based_default
+            if modifiers is None or modifiers.personsOnEventsMode is None
+            else None
+        )
+        team_fingerprint = repr(
+            (team.project_id, team.timezone, team.week_start_day, team.modifiers, persons_on_events_default)
+        )
+    modifiers_key = modifiers.model_dump_json(exclude_none=True) if modifiers is not None else ""
+    return team_id, team_fingerprint, modifiers_key
+
+
+def get_hogql_database_version(team_id: int) -> int:
+    return int(get_client().get(TEAM_VERSION_KEY.format(team_id=team_id)) or 0)
+
+
+def get_cached_hogql_database(
+    team_id: int, team: Optional["Team"], modifiers: Optional[HogQLQueryModifiers]
+) -> tuple[Optional["Database"], Optional[int]]:
+    """
+    Returns a copy of the cached database if it's still current, plus the version read from Redis.
+    The version must be passed on to `set_cached_hogql_database` so that a concurrent invalidation
+    isn't overwritten by a database built from older data.
+    """
+    if not settings.HOGQL_DATABASE_CACHE_ENABLED:
+        return None, None
+
+    key = _cache_key(team_id, team, modifiers)
+    try:
+        version = get_hogql_database_version(team_id)
+    except Exception as e:
+        logger.warning("hogql_database_cache_version_lookup_failed", team_id=team_id, error=str(e))
+        HOGQL_DATABASE_CACHE_COUNTER.labels(result="error").inc()
+        return None, None
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            cached_version, built_at, _ = entry
+            if cached_version == version and time.monotonic() - built_at < settings.HOGQL_DATABASE_CACHE_TTL:
+                _cache.move_to_end(key)
+            else:
+                del _cache[key]
+                entry = None
+
+    if entry is None:
+        HOGQL_DATABASE_CACHE_COUNTER.labels(result="miss").inc()
+        return None, version
+
+    HOGQL_DATABASE_CACHE_COUNTER.labels(result="hit").inc()
+    # Callers are free to mutate the database (e.g. add fields to tables), so never hand out the cached instance
+    return copy.deepcopy(entry[2]), version
+
+
+def set_cached_hogql_database(
+    team_id: int,
+    team: Optional["Team"],
+    modifiers: Optional[HogQLQueryModifiers],
+    version: Optional[int],
+    database: "Database",
+) -> None:
+    if not settings.HOGQL_DATABASE_CACHE_ENABLED or version is None:
+        return
+
+    key = _cache_key(team_id, team, modifiers)
+    entry = (version, time.monotonic(), copy.deepcopy(database))
+    with _cache_lock:
+        _cache[key] = entry
+        _cache.move_to_end(key)
+        while len(_cache) > settings.HOGQL_DATABASE_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def clear_hogql_database_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def invalidate_hogql_database_for_team(team_id: int) -> None:
+    try:
+        get_client().incr(TEAM_VERSION_KEY.format(team_id=team_id))
+    except Exception as e:
+        logger.warning("hogql_database_cache_invalidation_failed", team_id=team_id, error=str(e))
+
+
+def invalidate_hogql_database_for_project(project_id: int) -> None:
+    from posthog.models import Team
+
+    for team_id in Team.objects.filter(project_id=project_id).values_list("id", flat=True):
+        invalidate_hogql_database_for_team(team_id)
+
+
+def _team_changed(sender, instance, **kwargs) -> None:
+    invalidate_hogql_database_for_team(instance.pk)
+
+
+def _group_type_mapping_changed(sender, instance, **kwargs) -> None:
+    invalidate_hogql_database_for_project(instance.project_id)
+
+
+def _team_scoped_model_changed(sender, instance, **kwargs) -> None:
+    if instance.team_id is not None:
+        invalidate_hogql_database_for_team(instance.team_id)
+
+
+def connect_hogql_database_cache_signals() -> None:
+    """Called from `PostHogConfig.ready()`, so that every process bumps versions, not only those running queries."""
+    from posthog.models import EventRollup, Team
+    from posthog.models.group_type_mapping import GroupTypeMapping
+    from posthog.models.team.team_revenue_analytics_config import TeamRevenueAnalyticsConfig
+    from posthog.warehouse.models import (
+        DataWarehouseJoin,
+        DataWarehouseSavedQuery,
+        DataWarehouseTable,
+        ExternalDataSchema,
+        ExternalDataSource,
+    )
+
+    handlers = [
+        (Team, _team_changed),
+        (GroupTypeMapping, _group_type_mapping_changed),
+        *[
+            (model, _team_scoped_model_changed)
+            for model in (
+                EventRollup,
+                TeamRevenueAnalyticsConfig,
+                DataWarehouseJoin,
+                DataWarehouseSavedQuery,
+                DataWarehouseTable,
+                ExternalDataSchema,
+                ExternalDataSource,
+            )
+        ],
+    ]
+    for model, handler in handlers:
+        for signal in (post_save, post_delete):
+            signal.connect(handler, sender=model, dispatch_uid=f"hogql_database_cache_{model.__name__}")
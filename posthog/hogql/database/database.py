@@ -12,12 +12,14 @@ from typing import (
 )
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from django.conf import settings
 from django.db.models import Prefetch, Q
 from pydantic import BaseModel, ConfigDict
 
 from posthog.exceptions_capture import capture_exception
 from posthog.hogql import ast
 from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.cache import get_cached_hogql_database, set_cached_hogql_database
 from posthog.hogql.database.models import (
     BooleanDatabaseField,
     DatabaseField,
@@ -52,6 +54,7 @@ from posthog.hogql.database.schema.error_tracking_issue_fingerprint_overrides im
     RawErrorTrackingIssueFingerprintOverridesTable,
     join_with_error_tracking_issue_fingerprint_overrides_table,
 )
+from posthog.hogql.database.schema.event_rollups import EventRollupsTable
 from posthog.hogql.database.schema.events import EventsTable
 from posthog.hogql.database.schema.exchange_rate import ExchangeRateTable
 from posthog.hogql.database.schema.groups import GroupsTable, RawGroupsTable
@@ -161,6 +164,9 @@ class Database(BaseModel):
     web_stats_combined: WebStatsCombinedTable = WebStatsCombinedTable()
     web_bounces_combined: WebBouncesCombinedTable = WebBouncesCombinedTable()
 
+    # Event rollups for product analytics trends (internal use only)
+    event_rollups: EventRollupsTable = EventRollupsTable()
+
     # Revenue analytics tables
     raw_persons_revenue_analytics: RawPersonsRevenueAnalyticsTable = RawPersonsRevenueAnalyticsTable()
 
@@ -413,6 +419,41 @@ def create_hogql_database(
     team: Optional["Team"] = None,
     modifiers: Optional[HogQLQueryModifiers] = None,
     timings: Optional[HogQLTimings] = None,
+) -> Database:
+    if timings is None:
+        timings = HogQLTimings()
+
+    if team_id is None and team is None:
+        raise ValueError("Either team_id or team must be provided")
+
+    if team is not None and team_id is not None and team.pk != team_id:
+        raise ValueError("team_id and team must be the same")
+
+    cache_team_id = team_id if team_id is not None else cast("Team", team).pk
+    if team is None and settings.HOGQL_DATABASE_CACHE_ENABLED:
+        from posthog.models import Team
+
+        # The cache key depends on the team's flag based persons on events default, so load the team up front
+        # (the build below would load it anyway)
+        with timings.measure("team"):
+            team = Team.objects.get(pk=team_id)
+
+    with timings.measure("cache_lookup"):
+        cached_database, cache_version = get_cached_hogql_database(cache_team_id, team, modifiers)
+    if cached_database is not None:
+        return cached_database
+
+    database = _create_hogql_database(team_id, team=team, modifiers=modifiers, timings=timings)
+    set_cached_hogql_database(cache_team_id, team, modifiers, cache_version, database)
+    return database
+
+
+def _create_hogql_database(
+    team_id: Optional[int],
+    *,
+    team: Optional["Team"],
+    modifiers: Optional[HogQLQueryModifiers],
+    timings: HogQLTimings,
 ) -> Database:
     from posthog.hogql.database.s3_table import S3Table
     from posthog.hogql.query import create_default_modifiers_for_team
@@ -422,16 +463,7 @@ def create_hogql_database(
         RevenueAnalyticsBaseView,
     )
 
-    if timings is None:
-        timings = HogQLTimings()
-
     with timings.measure("team"):
-        if team_id is None and team is None:
-            raise ValueError("Either team_id or team must be provided")
-
-        if team is not None and team_id is not None and team.pk != team_id:
-            raise ValueError("team_id and team must be the same")
-
         if team is None:
             team = Team.objects.get(pk=team_id)
 
@@ -0,0 +1,27 @@
+from posthog.hogql.database.models import (
+    DatabaseField,
+    DateTimeDatabaseField,
+    FieldOrTable,
+    IntegerDatabaseField,
+    StringDatabaseField,
+    Table,
+)
+
+
+class EventRollupsTable(Table):
+    fields: dict[str, FieldOrTable] = {
+        "team_id": IntegerDatabaseField(name="team_id"),
+        "rollup_id": StringDatabaseField(name="rollup_id"),
+        "bucket": DateTimeDatabaseField(name="bucket"),
+        "property_value": StringDatabaseField(name="property_value", nullable=True),
+        "events_count_state": DatabaseField(name="events_count_state"),
+        "persons_uniq_exact_state": DatabaseField(name="persons_uniq_exact_state"),
+        "math_sum_state": DatabaseField(name="math_sum_state"),
+        "math_avg_state": DatabaseField(name="math_avg_state"),
+    }
+
+    def to_printed_clickhouse(self, context):
+        return "event_rollups"
+
+    def to_printed_hogql(self):
+        return "event_rollups"
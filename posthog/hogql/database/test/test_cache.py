@@ -0,0 +1,117 @@
+from unittest.mock import PropertyMock, patch
+
+from django.test import override_settings
+
+from posthog.hogql.database.cache import clear_hogql_database_cache
+from posthog.hogql.database.database import create_hogql_database
+from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.timings import HogQLTimings
+from posthog.models import Team
+from posthog.models.group_type_mapping import GroupTypeMapping
+from posthog.schema import HogQLQueryModifiers, PersonsOnEventsMode
+from posthog.test.base import APIBaseTest, BaseTest, ClickhouseTestMixin, _create_event, flush_persons_and_events
+from posthog.warehouse.models import DataWarehouseSavedQuery
+
+
+@override_settings(HOGQL_DATABASE_CACHE_ENABLED=True)
+class TestHogQLDatabaseCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_hogql_database_cache()
+
+    def tearDown(self):
+        clear_hogql_database_cache()
+        super().tearDown()
+
+    def test_second_build_is_served_from_cache(self):
+        create_hogql_database(team=self.team)
+
+        timings = HogQLTimings()
+        with self.assertNumQueries(0):
+            database = create_hogql_database(team=self.team, timings=timings)
+
+        assert database.has_table("events")
+        assert not any("group_type_mapping" in key for key in timings.timings)
+
+    def test_cached_database_is_a_copy(self):
+        first = create_hogql_database(team=self.team)
+        first.events.fields.pop("person")
+
+        second = create_hogql_database(team=self.team)
+        assert "person" in second.events.fields
+
+    def test_modifiers_are_part_of_the_key(self):
+        create_hogql_database(team=self.team)
+
+        database = create_hogql_database(
+            team=self.team,
+            modifiers=HogQLQueryModifiers(
+                personsOnEventsMode=PersonsOnEventsMode.PERSON_ID_NO_OVERRIDE_PROPERTIES_ON_EVENTS
+            ),
+        )
+        assert database.events.fields["person_id"].__class__.__name__ == "StringDatabaseField"
+
+    def test_flag_based_persons_on_events_default_is_part_of_the_key(self):
+        create_hogql_database(team_id=self.team.pk)
+
+        with patch.object(
+            Team,
+            "person_on_events_mode_flag_based_default",
+            new_callable=PropertyMock,
+            return_value=PersonsOnEventsMode.PERSON_ID_NO_OVERRIDE_PROPERTIES_ON_EVENTS,
+        ):
+            database = create_hogql_database(team_id=self.team.pk)
+        assert database.events.fields["person_id"].__class__.__name__ == "StringDatabaseField"
+
+    def test_saving_saved_query_invalidates(self):
+        create_hogql_database(team=self.team)
+
+        DataWarehouseSavedQuery.objects.create(
+            team=self.team, name="my_view", query={"kind": "HogQLQuery", "query": "select event from events"}
+        )
+
+        database = create_hogql_database(team=self.team)
+        assert database.has_table("my_view")
+
+    def test_group_type_mapping_invalidates_for_project(self):
+        create_hogql_database(team_id=self.team.pk)
+
+        GroupTypeMapping.objects.create(
+            team=self.team, project_id=self.team.project_id, group_type="organization", group_type_index=0
+        )
+
+        database = create_hogql_database(team_id=self.team.pk)
+        assert "organization" in database.events.fields
+
+    @override_settings(HOGQL_DATABASE_CACHE_TTL=0)
+    def test_expired_entries_are_rebuilt(self):
+        create_hogql_database(team=self.team)
+
+        timings = HogQLTimings()
+        create_hogql_database(team=self.team, timings=timings)
+        assert any("group_type_mapping" in key for key in timings.timings)
+
+
+@override_settings(HOGQL_DATABASE_CACHE_ENABLED=True)
+class TestHogQLDatabaseCacheQueries(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_hogql_database_cache()
+
+    def tearDown(self):
+        clear_hogql_database_cache()
+        super().tearDown()
+
+    def test_queries_on_a_cached_database_match_fresh_ones(self):
+        _create_event(team=self.team, event="$pageview", distinct_id="d1", properties={"$browser": "Chrome"})
+        _create_event(team=self.team, event="$pageview", distinct_id="d2", properties={"$browser": "Firefox"})
+        flush_persons_and_events()
+        query = "select properties.$browser, count() from events group by 1 order by 1"
+
+        first = execute_hogql_query(query, team=self.team)
+        cached = execute_hogql_query(query, team=self.team)
+        with override_settings(HOGQL_DATABASE_CACHE_ENABLED=False):
+            fresh = execute_hogql_query(query, team=self.team)
+
+        assert cached.results == first.results == fresh.results == [("Chrome", 1), ("Firefox", 1)]
+        assert cached.clickhouse == fresh.clickhouse
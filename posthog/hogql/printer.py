@@ -49,6 +49,7 @@ from posthog.hogql.functions.mapping import (
     is_allowed_parametric_function,
 )
 from posthog.hogql.modifiers import create_default_modifiers_for_team, set_default_in_cohort_via
+from posthog.hogql.property_index import get_property_index_for_context
 from posthog.hogql.resolver import resolve_types
 from posthog.hogql.resolver_utils import lookup_field_by_name
 from posthog.hogql.transforms.in_cohort import resolve_in_cohorts, resolve_in_cohorts_conjoined
@@ -1552,9 +1553,7 @@ class _Printer(Visitor[str]):
                 # For now, we're assuming that properties are in either no groups or one group, so just using the
                 # first group returned is fine. If we start putting properties in multiple groups, this should be
                 # revisited to find the optimal set (i.e. smallest set) of groups to read from.
-                for property_group_column in property_groups.get_property_group_columns(
-                    table_name, field_name, property_name
-                ):
+                for property_group_column in self._get_property_group_columns(table_name, field_name, property_name):
                     yield PrintableMaterializedPropertyGroupItem(
                         self.visit(field_type.table_type),
                         self._print_identifier(property_group_column),
@@ -1821,10 +1820,21 @@ class _Printer(Visitor[str]):
     def _get_materialized_column(
         self, table_name: str, property_name: PropertyName, field_name: TableColumn
     ) -> MaterializedColumn | None:
+        property_index = get_property_index_for_context(self.context)
+        if property_index is not None:
+            return property_index.materialized_property_sources(table_name, field_name, property_name).column
         return get_materialized_column_for_property(
             cast(TablesWithMaterializedColumns, table_name), field_name, property_name
         )
 
+    def _get_property_group_columns(self, table_name: str, field_name: str, property_name: str) -> Iterable[str]:
+        property_index = get_property_index_for_context(self.context)
+        if property_index is not None:
+            return property_index.materialized_property_sources(
+                table_name, field_name, property_name
+            ).property_group_columns
+        return property_groups.get_property_group_columns(table_name, field_name, property_name)
+
     def _get_timezone(self) -> str:
         if self.context.modifiers.convertToProjectTimezone is False:
             return "UTC"
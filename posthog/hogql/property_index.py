@@ -0,0 +1,253 @@
+"""
+Process-local index of what HogQL needs to know about properties while compiling a query.
+
+For each property reference, compiling reads the property's type from `PropertyDefinition` (to wrap it in
+`toFloat()`, `toDateTime()` etc.) and looks for a materialized column or property group map to read it from. Done
+per query, that's a few Postgres queries for the types, and an instance setting lookup per reference for the
+materialized columns. The index holds all of that per project, so lookups are dictionary hits.
+
+Like `posthog.hogql.database.cache`, Redis holds version counters: one per project, bumped from `PropertyDefinition`
+signals, and one for materialized columns, bumped whenever columns are created, dropped, enabled or disabled. Most
+property definitions are written by ingestion and never go through signals, so entries also expire after a short TTL.
+"""
+
+import dataclasses
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, cast
+
+import structlog
+from django.conf import settings
+from django.db import models
+from django.db.models.functions.comparison import Coalesce
+from django.db.models.signals import post_delete, post_save
+from prometheus_client import Counter
+
+from posthog.clickhouse.materialized_columns import (
+    MaterializedColumn,
+    TablesWithMaterializedColumns,
+    clear_materialized_columns_cache,
+    get_materialized_column_for_property,
+)
+from posthog.clickhouse.property_groups import property_groups
+from posthog.models.property import PropertyName, TableColumn
+from posthog.redis import get_client
+
+if TYPE_CHECKING:
+    from posthog.hogql.context import HogQLContext
+
+logger = structlog.get_logger(__name__)
+
+HOGQL_PROPERTY_INDEX_COUNTER = Counter(
+    "posthog_hogql_property_index",
+    "Lookups of the process-local HogQL property index",
+    labelnames=["result"],
+)
+
+PROJECT_VERSION_KEY = "hogql_property_index:version:project:{project_id}"
+MATERIALIZED_COLUMNS_VERSION_KEY = "hogql_property_index:version:materialized_columns"
+
+# (table, table column, property name)
+MaterializedSourceKey = tuple[str, str, str]
+
+
+@dataclasses.dataclass(frozen=True)
+class MaterializedPropertySources:
+    column: Optional[MaterializedColumn]
+    property_group_columns: tuple[str, ...]
+
+
+@dataclasses.dataclass
+class PropertyIndex:
+    project_id: int
+    version: tuple[int, int]
+    built_at: float
+    # None if the project has more typed properties than we're willing to hold, the types are then queried per query
+    event_property_types: Optional[dict[str, str]]
+    person_property_types: Optional[dict[str, str]]
+    # Keyed by `{group_type_index}_{name}`, same as `PropertySwapper.group_properties`
+    group_property_types: Optional[dict[str, str]]
+    _materialized_sources: dict[MaterializedSourceKey, MaterializedPropertySources] = dataclasses.field(
+        default_factory=dict, repr=False
+    )
+
+    @property
+    def has_property_types(self) -> bool:
+        return self.event_property_types is not None
+
+    def materialized_property_sources(
+        self, table_name: str, table_column: str, property_name: str
+    ) -> MaterializedPropertySources:
+        key = (table_name, table_column, property_name)
+        sources = self._materialized_sources.get(key)
+        if sources is None:
+            column = get_materialized_column_for_property(
+                cast(TablesWithMaterializedColumns, table_name),
+                cast(TableColumn, table_column),
+                cast(PropertyName, property_name),
+            )
+            sources = MaterializedPropertySources(
+                column=column,
+                property_group_columns=tuple(
+                    property_groups.get_property_group_columns(table_name, table_column, property_name)
+                ),
+            )
+            # Racing threads compute the same value, so it doesn't matter who wins
+            self._materialized_sources[key] = sources
+        return sources
+
+
+_cache: "OrderedDict[int, PropertyIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+_materialized_columns_version: Optional[int] = None
+
+
+def _get_versions(project_id: int) -> tuple[int, int]:
+    project_version, materialized_columns_version = get_client().mget(
+        [PROJECT_VERSION_KEY.format(project_id=project_id), MATERIALIZED_COLUMNS_VERSION_KEY]
+    )
+    return int(project_version or 0), int(materialized_columns_version or 0)
+
+
+def _sync_materialized_columns(version: int) -> None:
+    global _materialized_columns_version
+
+    # The materialized columns themselves are cached per process for a while, drop them once columns changed
+    if _materialized_columns_version is not None and _materialized_columns_version != version:
+        clear_materialized_columns_cache()
+    _materialized_columns_version = version
+
+
+def _build_property_index(project_id: int, version: tuple[int, int]) -> PropertyIndex:
+    from posthog.models import PropertyDefinition
+
+    max_properties = settings.HOGQL_PROPERTY_INDEX_MAX_PROPERTIES
+    rows = list(
+        PropertyDefinition.objects.alias(
+            effective_project_id=Coalesce("project_id", "team_id", output_field=models.BigIntegerField())
+        )
+        .filter(effective_project_id=project_id, property_type__isnull=False)
+        .values_list("name", "property_type", "type", "group_type_index")[: max_properties + 1]
+    )
+
+    index = PropertyIndex(
+        project_id=project_id,
+        version=version,
+        built_at=time.monotonic(),
+        event_property_types=None,
+        person_property_types=None,
+        group_property_types=None,
+    )
+    if len(rows) > max_properties:
+        HOGQL_PROPERTY_INDEX_COUNTER.labels(result="too_many_properties").inc()
+        return index
+
+    event_property_types: dict[str, str] = {}
+    person_property_types: dict[str, str] = {}
+    group_property_types: dict[str, str] = {}
+    for name, property_type, definition_type, group_type_index in rows:
+        if not property_type:
+            continue
+        if definition_type is None or definition_type == PropertyDefinition.Type.EVENT:
+            event_property_types[name] = property_type
+        elif definition_type == PropertyDefinition.Type.PERSON:
+            person_property_types[name] = property_type
+        elif definition_type == PropertyDefinition.Type.GROUP and group_type_index is not None:
+            group_property_types[f"{group_type_index}_{name}"] = property_type
+
+    index.event_property_types = event_property_types
+    index.person_property_types = person_property_types
+    index.group_property_types = group_property_types
+    return index
+
+
+def get_property_index(project_id: int) -> Optional[PropertyIndex]:
+    """
+    Returns the project's property index, building it if the cached one is outdated.
+    Returns None if the index is disabled or Redis can't be reached, in which case callers look things up themselves.
+    """
+    if not settings.HOGQL_PROPERTY_INDEX_ENABLED:
+        return None
+
+    try:
+        version = _get_versions(project_id)
+    except Exception as e:
+        logger.warning("hogql_property_index_version_lookup_failed", project_id=project_id, error=str(e))
+        HOGQL_PROPERTY_INDEX_COUNTER.labels(result="error").inc()
+        return None
+
+    with _cache_lock:
+        index = _cache.get(project_id)
+        if index is not None:
+            if index.version == version and time.monotonic() - index.built_at < settings.HOGQL_PROPERTY_INDEX_TTL:
+                _cache.move_to_end(project_id)
+            else:
+                del _cache[project_id]
+                index = None
+
+    if index is not None:
+        HOGQL_PROPERTY_INDEX_COUNTER.labels(result="hit").inc()
+        return index
+
+    HOGQL_PROPERTY_INDEX_COUNTER.labels(result="miss").inc()
+    # Built with the version read before querying, so a concurrent change leaves us with an entry that's outdated
+    # on the next lookup, never with stale data under a new version
+    _sync_materialized_columns(version[1])
+    index = _build_property_index(project_id, version)
+    with _cache_lock:
+        _cache[project_id] = index
+        _cache.move_to_end(project_id)
+        while len(_cache) > settings.HOGQL_PROPERTY_INDEX_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return index
+
+
+def get_property_index_for_context(context: "HogQLContext") -> Optional[PropertyIndex]:
+    """Looks up the index once per context, as every printed property reference asks for it."""
+    if context.property_index is None and context.team is not None:
+        context.property_index = get_property_index(context.team.project_id)
+    return context.property_index
+
+
+def clear_property_index_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def invalidate_property_index_for_project(project_id: int) -> None:
+    try:
+        get_client().incr(PROJECT_VERSION_KEY.format(project_id=project_id))
+    except Exception as e:
+        logger.warning("hogql_property_index_invalidation_failed", project_id=project_id, error=str(e))
+
+
+def invalidate_materialized_columns_in_property_indexes() -> None:
+    try:
+        get_client().incr(MATERIALIZED_COLUMNS_VERSION_KEY)
+    except Exception as e:
+        logger.warning("hogql_property_index_materialized_columns_invalidation_failed", error=str(e))
+
+
+def _property_definition_changed(sender, instance, **kwargs) -> None:
+    project_id = instance.project_id if instance.project_id is not None else instance.team_id
+    if project_id is not None:
+        invalidate_property_index_for_project(project_id)
+
+
+def connect_property_index_signals() -> None:
+    """Called from `PostHogConfig.ready()`, next to the HogQL database cache signals."""
+    from posthog.models import PropertyDefinition
+
+    models_to_watch: list[type[models.Model]] = [PropertyDefinition]
+    if settings.EE_AVAILABLE:
+        from ee.models.property_definition import EnterprisePropertyDefinition
+
+        # Multi-table inheritance, saving the subclass sends signals with it as the sender
+        models_to_watch.append(EnterprisePropertyDefinition)
+
+    for model in models_to_watch:
+        for signal in (post_save, post_delete):
+            signal.connect(
+                _property_definition_changed, sender=model, dispatch_uid=f"hogql_property_index_{model.__name__}"
+            )
@@ -1,12 +1,25 @@
 import dataclasses
+from collections.abc import Iterator
 from typing import ClassVar, Optional, Union, cast
 
-from posthog.clickhouse.client import sync_execute
+from django.conf import settings as app_settings
+
+from posthog.clickhouse.client import sync_execute, sync_execute_iter
 from posthog.clickhouse.client.connection import Workload
 from posthog.clickhouse.query_tagging import tag_queries
 from posthog.errors import ExposedCHQueryError
 from posthog.hogql import ast
+from posthog.hogql.compiled_query_cache import (
+    CompiledQuery,
+    UncacheableAST,
+    canonical_ast_key,
+    compiled_query_cache_key,
+    get_compiled_query,
+    set_compiled_query,
+)
 from posthog.hogql.constants import HogQLGlobalSettings, LimitContext, get_default_limit_for_context
+from posthog.hogql.database.cache import get_hogql_database_version
+from posthog.hogql.database.database import create_hogql_database
 from posthog.hogql.errors import ExposedHogQLError
 from posthog.hogql.filters import replace_filters
 from posthog.hogql.hogql import HogQLContext
@@ -20,6 +33,7 @@ from posthog.hogql.printer import (
 )
 from posthog.hogql.resolver_utils import extract_select_queries
 from posthog.hogql.timings import HogQLTimings
+from posthog.hogql.transforms.event_rollups import EVENT_ROLLUP_QUERY_TYPES, do_event_rollup_transforms
 from posthog.hogql.transforms.preaggregated_table_transformation import do_preaggregated_table_transforms
 from posthog.hogql.variables import replace_variables
 from posthog.hogql.visitor import clone_expr
@@ -57,7 +71,9 @@ class HogQLQueryExecutor:
     __uninitialized_context: ClassVar[HogQLContext] = HogQLContext()
 
     def __post_init__(self):
-        if self.context is self.__uninitialized_context:
+        # Compiled queries are only cached when we own the context, as a passed in one can carry anything
+        self._uses_default_context = self.context is self.__uninitialized_context
+        if self._uses_default_context:
             self.context = HogQLContext(team_id=self.team.pk)
 
         self.query_modifiers = create_default_modifiers_for_team(self.team, self.modifiers)
@@ -116,6 +132,12 @@ class HogQLQueryExecutor:
                 transformed_node = do_preaggregated_table_transforms(self.select_query, self.context)
                 if isinstance(transformed_node, ast.SelectQuery) or isinstance(transformed_node, ast.SelectSetQuery):
                     self.select_query = transformed_node
+        if self._uses_event_rollups():
+            with self.timings.measure("event_rollup_transforms"):
+                self.select_query = do_event_rollup_transforms(self.select_query, self.team, self.query_modifiers)
+
+    def _uses_event_rollups(self) -> bool:
+        return app_settings.EVENT_ROLLUPS_ENABLED and self.query_type in EVENT_ROLLUP_QUERY_TYPES
 
     def _generate_hogql(self):
         self.hogql_context = dataclasses.replace(
@@ -207,19 +229,22 @@ class HogQLQueryExecutor:
             else:
                 raise
 
+    def _tag_clickhouse_query(self, timings_dict: dict[str, float]):
+        tag_queries(
+            team_id=self.team.pk,
+            query_type=self.query_type,
+            has_joins="JOIN" in self.clickhouse_sql,
+            has_json_operations="JSONExtract" in self.clickhouse_sql or "JSONHas" in self.clickhouse_sql,
+            timings=timings_dict,
+            modifiers=(
+                {k: v for k, v in self.modifiers.model_dump().items() if v is not None} if self.modifiers else {}
+            ),
+        )
+
     def _execute_clickhouse_query(self):
         timings_dict = self.timings.to_dict()
         with self.timings.measure("clickhouse_execute"):
-            tag_queries(
-                team_id=self.team.pk,
-                query_type=self.query_type,
-                has_joins="JOIN" in self.clickhouse_sql,
-                has_json_operations="JSONExtract" in self.clickhouse_sql or "JSONHas" in self.clickhouse_sql,
-                timings=timings_dict,
-                modifiers=(
-                    {k: v for k, v in self.modifiers.model_dump().items() if v is not None} if self.modifiers else {}
-                ),
-            )
+            self._tag_clickhouse_query(timings_dict)
 
             try:
                 self.results, self.types = sync_execute(
@@ -258,7 +283,85 @@ class HogQLQueryExecutor:
                     HogQLMetadata(language=HogLanguage.HOG_QL, query=self.hogql, debug=True), self.team
                 )
 
+    def _compiled_query_cache_key(self) -> Optional[str]:
+        # Filters resolve relative dates at compile time, and debug queries should always go through the whole pipeline
+        if not app_settings.HOGQL_COMPILED_QUERY_CACHE_ENABLED or not self._uses_default_context:
+            return None
+        if self.debug or self.filters is not None:
+            return None
+
+        with self.timings.measure("compiled_query_cache_key"):
+            try:
+                database_version = get_hogql_database_version(self.team.pk)
+            except Exception:
+                return None
+
+            if self.query is None:
+                return None
+            try:
+                # Source positions aren't part of the key, so equal queries share a key however they were built
+                query_key = self.query if isinstance(self.query, str) else canonical_ast_key(self.query)
+                placeholders_key = canonical_ast_key(self.placeholders or {})
+            except UncacheableAST:
+                return None
+
+            return compiled_query_cache_key(
+                str(self.team.pk),
+                str(database_version),
+                str(self.team.timezone),
+                str(self.team.week_start_day),
+                query_key,
+                placeholders_key,
+                repr(sorted((key, value.model_dump_json()) for key, value in (self.variables or {}).items())),
+                self.settings.model_dump_json() if self.settings else "",
+                self.query_modifiers.model_dump_json(),
+                str(self.limit_context),
+                str(self.pretty),
+                # Optimizers run after the cache lookup, so whether the ones toggled by settings run is part of the key
+                str(self._uses_event_rollups()),
+            )
+
+    def _load_compiled_query(self, compiled_query: CompiledQuery) -> None:
+        if isinstance(self.query, ast.SelectQuery) or isinstance(self.query, ast.SelectSetQuery):
+            # Same as `_parse_query`, the response doesn't echo back AST queries
+            self.select_query = self.query
+            self.query = None
+        if self.limit_context in (LimitContext.COHORT_CALCULATION, LimitContext.SAVED_QUERY):
+            self.context.limit_top_select = False
+
+        self.hogql_context = dataclasses.replace(
+            self.context,
+            team_id=self.team.pk,
+            team=self.team,
+            enable_select_queries=True,
+            timings=self.timings,
+            modifiers=self.query_modifiers,
+            limit_context=self.limit_context,
+            values=dict(compiled_query.values),
+        )
+        if self.hogql_context.database is None:
+            # Nothing needs it to print the query anymore, but callers read column types and tables off of it
+            with self.timings.measure("create_hogql_database"):
+                self.hogql_context.database = create_hogql_database(
+                    self.team.pk, team=self.team, modifiers=self.query_modifiers, timings=self.timings
+                )
+        self.clickhouse_context = self.hogql_context
+        self.hogql = compiled_query.hogql
+        self.clickhouse_sql = compiled_query.clickhouse_sql
+        self.print_columns = list(compiled_query.print_columns)
+
     def generate_clickhouse_sql(self) -> tuple[str, HogQLContext]:
+        """
+        Returns the ClickHouse SQL and the context holding its values and database.
+        """
+        cache_key = self._compiled_query_cache_key()
+        if cache_key is not None:
+            compiled_query = get_compiled_query(cache_key)
+            if compiled_query is not None:
+                with self.timings.measure("compiled_query_cache_hit"):
+                    self._load_compiled_query(compiled_query)
+                return self.clickhouse_sql, self.clickhouse_context
+
         self._parse_query()
         self._process_variables()
         self._process_placeholders()
@@ -268,6 +371,17 @@ class HogQLQueryExecutor:
             self._generate_hogql()
         with self.timings.measure("_generate_clickhouse_sql"):
             self._generate_clickhouse_sql()
+
+        if cache_key is not None and self.error is None:
+            set_compiled_query(
+                cache_key,
+                CompiledQuery(
+                    hogql=self.hogql,
+                    clickhouse_sql=self.clickhouse_sql,
+                    values=dict(self.clickhouse_context.values),
+                    print_columns=list(self.print_columns),
+                ),
+            )
         return self.clickhouse_sql, self.clickhouse_context
 
     def execute(self) -> HogQLQueryResponse:
@@ -289,6 +403,31 @@ class HogQLQueryExecutor:
             metadata=self.metadata,
         )
 
+    def execute_iter(self, batch_size: int = 10_000) -> Iterator[list]:
+        """
+        Compiles the query and starts it right away, so errors surface before any rows are read, and returns an
+        iterator over batches of result rows as they come from ClickHouse. Column names are in `print_columns` and
+        their ClickHouse types in `types` once this returns.
+
+        Nothing is buffered, so this is meant for exporting large results. Debug mode isn't supported.
+        """
+        if self.debug:
+            raise ValueError("Can't stream the results of a debug query")
+
+        self.generate_clickhouse_sql()
+        self._tag_clickhouse_query(self.timings.to_dict())
+        batches = sync_execute_iter(
+            self.clickhouse_sql,
+            self.clickhouse_context.values,
+            workload=self.workload,
+            team_id=self.team.pk,
+            readonly=True,
+            batch_size=batch_size,
+            with_column_types=True,
+        )
+        self.types = next(batches, [])
+        return batches
+
 
 def execute_hogql_query(*args, **kwargs) -> HogQLQueryResponse:
     return HogQLQueryExecutor(*args, **kwargs).execute()
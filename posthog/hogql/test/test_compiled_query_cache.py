@@ -0,0 +1,145 @@
+from django.test import override_settings
+from freezegun import freeze_time
+
+from posthog.hogql import ast
+from posthog.hogql.compiled_query_cache import clear_compiled_query_cache
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.cache import invalidate_hogql_database_for_team
+from posthog.hogql.parser import parse_select
+from posthog.hogql.printer import prepare_ast_for_printing
+from posthog.hogql.query import HogQLQueryExecutor, execute_hogql_query
+from posthog.schema import DateRange, HogQLFilters
+from posthog.test.base import APIBaseTest, BaseTest, ClickhouseTestMixin, _create_event, flush_persons_and_events
+
+
+@override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=True)
+class TestCompiledQueryCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_compiled_query_cache()
+
+    def tearDown(self):
+        clear_compiled_query_cache()
+        super().tearDown()
+
+    def _compile(self, query="select event from events where event = {event}", **kwargs) -> HogQLQueryExecutor:
+        executor = HogQLQueryExecutor(
+            query=query,
+            team=self.team,
+            placeholders=kwargs.pop("placeholders", {"event": ast.Constant(value="$pageview")}),
+            **kwargs,
+        )
+        executor.generate_clickhouse_sql()
+        return executor
+
+    def _hit(self, executor: HogQLQueryExecutor) -> bool:
+        return any(key.endswith("compiled_query_cache_hit") for key in executor.timings.to_dict())
+
+    def test_second_compilation_is_cached(self):
+        first = self._compile()
+        second = self._compile()
+
+        assert not self._hit(first)
+        assert self._hit(second)
+        assert second.clickhouse_sql == first.clickhouse_sql
+        assert second.hogql == first.hogql
+        assert second.clickhouse_context.values == first.clickhouse_context.values
+        assert second.print_columns == first.print_columns
+
+    def test_placeholders_are_part_of_the_key(self):
+        first = self._compile()
+        second = self._compile(placeholders={"event": ast.Constant(value="$autocapture")})
+
+        assert not self._hit(second)
+        assert second.clickhouse_context.values != first.clickhouse_context.values
+
+    def test_database_invalidation_busts_the_cache(self):
+        self._compile()
+        invalidate_hogql_database_for_team(self.team.pk)
+        assert not self._hit(self._compile())
+
+    def test_team_timezone_is_part_of_the_key(self):
+        self._compile()
+        self.team.timezone = "Europe/Berlin"
+        self.team.save()
+        assert not self._hit(self._compile())
+
+    def test_ast_queries_are_cached(self):
+        # Parsed from differently formatted text, so the nodes' source positions differ
+        first = self._compile(query=parse_select("select event from events"), placeholders=None)
+        second = self._compile(query=parse_select("select  event\nfrom   events"), placeholders=None)
+
+        assert self._hit(second)
+        assert second.clickhouse_sql == first.clickhouse_sql
+
+    def test_ast_queries_with_placeholders_are_cached(self):
+        first = self._compile(query=parse_select("select event from events where event = {event}"))
+        second = self._compile(query=parse_select("select event from events where event = {event}"))
+
+        assert self._hit(second)
+        assert second.clickhouse_context.values == first.clickhouse_context.values
+
+    def test_hidden_aliases_are_part_of_the_key(self):
+        def query(hidden: bool) -> ast.SelectQuery:
+            return ast.SelectQuery(
+                select=[ast.Alias(alias="e", hidden=hidden, expr=ast.Field(chain=["event"]))],
+                select_from=ast.JoinExpr(table=ast.Field(chain=["events"])),
+            )
+
+        self._compile(query=query(hidden=False), placeholders=None)
+        assert not self._hit(self._compile(query=query(hidden=True), placeholders=None))
+
+    def test_resolved_asts_bypass_the_cache(self):
+        context = HogQLContext(team_id=self.team.pk, team=self.team, enable_select_queries=True)
+        resolved = prepare_ast_for_printing(parse_select("select event from events"), context, dialect="clickhouse")
+        assert resolved is not None and resolved.type is not None
+
+        self._compile(query=resolved, placeholders=None)
+        assert not self._hit(self._compile(query=resolved, placeholders=None))
+
+    def test_cache_hits_fill_in_the_database(self):
+        self._compile()
+        executor = self._compile()
+
+        assert self._hit(executor)
+        assert executor.clickhouse_context.database is not None
+        assert executor.clickhouse_context.database.has_table("events")
+
+    def test_filters_bypass_the_cache(self):
+        filters = HogQLFilters(dateRange=DateRange(date_from="-7d"))
+        with freeze_time("2024-01-10"):
+            self._compile(query="select event from events where {filters}", placeholders={}, filters=filters)
+        with freeze_time("2024-01-20"):
+            executor = self._compile(query="select event from events where {filters}", placeholders={}, filters=filters)
+        assert not self._hit(executor)
+
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=False)
+    def test_disabled(self):
+        self._compile()
+        assert not self._hit(self._compile())
+
+
+@override_settings(HOGQL_COMPILED_QUERY_CACHE_ENABLED=True)
+class TestCompiledQueryCacheQueries(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_compiled_query_cache()
+
+    def tearDown(self):
+        clear_compiled_query_cache()
+        super().tearDown()
+
+    def test_cached_queries_return_the_same_results(self):
+        _create_event(team=self.team, event="$pageview", distinct_id="d1")
+        _create_event(team=self.team, event="$pageview", distinct_id="d2")
+        _create_event(team=self.team, event="$autocapture", distinct_id="d1")
+        flush_persons_and_events()
+        query = "select count() from events where event = {event}"
+
+        first = execute_hogql_query(query, team=self.team, placeholders={"event": ast.Constant(value="$pageview")})
+        cached = execute_hogql_query(query, team=self.team, placeholders={"event": ast.Constant(value="$pageview")})
+        other = execute_hogql_query(query, team=self.team, placeholders={"event": ast.Constant(value="$autocapture")})
+
+        assert "compiled_query_cache_hit" in str(cached.timings)
+        assert first.results == cached.results == [(2,)]
+        assert other.results == [(1,)]
@@ -0,0 +1,124 @@
+from django.test import override_settings
+
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.parser import parse_select
+from posthog.hogql.printer import print_ast
+from posthog.hogql.property_index import (
+    clear_property_index_cache,
+    get_property_index,
+    invalidate_materialized_columns_in_property_indexes,
+)
+from posthog.models import PropertyDefinition
+from posthog.hogql.query import execute_hogql_query
+from posthog.test.base import APIBaseTest, BaseTest, ClickhouseTestMixin, _create_event, flush_persons_and_events
+
+
+@override_settings(HOGQL_PROPERTY_INDEX_ENABLED=True)
+class TestPropertyIndex(BaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_property_index_cache()
+        PropertyDefinition.objects.create(
+            team=self.team, type=PropertyDefinition.Type.EVENT, name="$screen_width", property_type="Numeric"
+        )
+        PropertyDefinition.objects.create(
+            team=self.team, type=PropertyDefinition.Type.EVENT, name="$browser", property_type=None
+        )
+        PropertyDefinition.objects.create(
+            team=self.team, type=PropertyDefinition.Type.PERSON, name="tickets", property_type="Numeric"
+        )
+        PropertyDefinition.objects.create(
+            team=self.team,
+            type=PropertyDefinition.Type.GROUP,
+            name="inty",
+            property_type="Numeric",
+            group_type_index=0,
+        )
+
+    def tearDown(self):
+        clear_property_index_cache()
+        super().tearDown()
+
+    def test_index_holds_typed_properties_by_kind(self):
+        index = get_property_index(self.team.project_id)
+
+        assert index is not None
+        assert index.event_property_types == {"$screen_width": "Numeric"}
+        assert index.person_property_types == {"tickets": "Numeric"}
+        assert index.group_property_types == {"0_inty": "Numeric"}
+
+    def test_index_is_reused_until_property_definitions_change(self):
+        index = get_property_index(self.team.project_id)
+        with self.assertNumQueries(0):
+            assert get_property_index(self.team.project_id) is index
+
+        PropertyDefinition.objects.create(
+            team=self.team, type=PropertyDefinition.Type.EVENT, name="$screen_height", property_type="Numeric"
+        )
+
+        updated_index = get_property_index(self.team.project_id)
+        assert updated_index is not index
+        assert updated_index is not None and updated_index.event_property_types == {
+            "$screen_width": "Numeric",
+            "$screen_height": "Numeric",
+        }
+
+    def test_materialized_column_changes_rebuild_the_index(self):
+        index = get_property_index(self.team.project_id)
+        invalidate_materialized_columns_in_property_indexes()
+        assert get_property_index(self.team.project_id) is not index
+
+    @override_settings(HOGQL_PROPERTY_INDEX_MAX_PROPERTIES=2)
+    def test_projects_with_too_many_properties_fall_back_to_querying_types(self):
+        index = get_property_index(self.team.project_id)
+        assert index is not None and not index.has_property_types
+
+        printed = print_ast(
+            parse_select("select properties.$screen_width from events"),
+            HogQLContext(team_id=self.team.pk, enable_select_queries=True),
+            "clickhouse",
+        )
+        assert "toFloat" in printed
+
+    def test_printed_queries_match_without_the_index(self):
+        query = "select properties.$screen_width, person.properties.tickets, properties.$browser from events"
+
+        printed = print_ast(
+            parse_select(query), HogQLContext(team_id=self.team.pk, enable_select_queries=True), "clickhouse"
+        )
+        with override_settings(HOGQL_PROPERTY_INDEX_ENABLED=False):
+            printed_without_index = print_ast(
+                parse_select(query), HogQLContext(team_id=self.team.pk, enable_select_queries=True), "clickhouse"
+            )
+
+        assert printed == printed_without_index
+        assert printed.count("toFloat") == 2
+
+
+@override_settings(HOGQL_PROPERTY_INDEX_ENABLED=True)
+class TestPropertyIndexQueries(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_property_index_cache()
+
+    def tearDown(self):
+        clear_property_index_cache()
+        super().tearDown()
+
+    def test_queries_with_the_index_match_queries_without(self):
+        PropertyDefinition.objects.create(
+            team=self.team, type=PropertyDefinition.Type.EVENT, name="$screen_width", property_type="Numeric"
+        )
+        for width in ("1024", "800"):
+            _create_event(team=self.team, event="$pageview", distinct_id="d1", properties={"$screen_width": width})
+        flush_persons_and_events()
+        query = "select sum(properties.$screen_width), max(properties.$screen_width) from events"
+
+        response = execute_hogql_query(query, team=self.team)
+        # Served from the index built by the first query
+        cached_response = execute_hogql_query(query, team=self.team)
+        with override_settings(HOGQL_PROPERTY_INDEX_ENABLED=False):
+            response_without_index = execute_hogql_query(query, team=self.team)
+
+        assert response.results == cached_response.results == response_without_index.results == [(1824, 1024)]
+        assert response.clickhouse == response_without_index.clickhouse
@@ -0,0 +1,473 @@
+"""
+Routes trends shaped queries on events to event rollups (see `posthog.models.event_rollup`).
+
+Only queries built by the trends runner are routed, so HogQL written by users always reads what it says. A SELECT is
+routed when it reads only from `events`, filters on the rollup's event and on timestamps aligned with its buckets,
+aggregates with `count()`, unique persons, or the sum or average of the rollup's math property, and groups by time
+buckets and the rollup's breakdown property. It's rewritten to merge the aggregate states of the materialized buckets
+with states calculated from events that are outside of them:
+
+    SELECT countMerge(events_count_state) AS total, toStartOfDay(toTimeZone(bucket, 'UTC')) AS day_start
+    FROM (
+        SELECT bucket, events_count_state FROM event_rollups
+        WHERE rollup_id = '...' AND bucket >= <materialized_from> AND bucket < <materialized_until> AND bucket >= ...
+        UNION ALL
+        SELECT toStartOfDay(timestamp) AS bucket, countState() AS events_count_state FROM events
+        WHERE event = '...' AND timestamp >= ...
+            AND (timestamp < <materialized_from> OR timestamp >= <materialized_until>)
+        GROUP BY bucket
+    ) AS e
+    GROUP BY day_start
+
+Unique persons are merged from `uniqExact` states, so they're as exact as the trends runner's `count(DISTINCT ...)`.
+Rollups are only used by queries with the same modifiers as the ones they were materialized with (see
+`EVENT_ROLLUP_MODIFIERS`), so persons are resolved the same way. Like events ingested late, persons merged after a
+bucket was materialized aren't reflected in it.
+"""
+
+from collections.abc import Sequence
+from typing import Any, Optional, TypeVar, cast
+
+from posthog.hogql import ast
+from posthog.hogql.ast import CompareOperationOp
+from posthog.hogql.base import AST
+from posthog.hogql.transforms.preaggregated_table_transformation import flatten_and
+from posthog.hogql.visitor import CloningVisitor
+from posthog.models.event_rollup import EventRollup
+from posthog.models.event_rollup.sql import EVENT_ROLLUP_STATE_COLUMNS, EVENT_ROLLUPS_TABLE
+from posthog.models.team import Team
+from posthog.schema import HogQLQueryModifiers
+
+_T_AST = TypeVar("_T_AST", bound=AST)
+
+# Query types of the runners whose queries are routed
+EVENT_ROLLUP_QUERY_TYPES = {"TrendsQuery"}
+# Modifiers changing what the states of a rollup are calculated from, e.g. the timezone of buckets
+EVENT_ROLLUP_MODIFIERS = {"convertToProjectTimezone", "materializationMode", "personsOnEventsMode"}
+
+# Functions truncating timestamps, by the rollup intervals they can be calculated from
+TIME_BUCKET_FUNCTIONS: dict[str, tuple[str, ...]] = {
+    "toStartOfHour": ("hour",),
+    "toStartOfDay": ("hour", "day"),
+    "toStartOfWeek": ("hour", "day"),
+    "toStartOfMonth": ("hour", "day"),
+    "toStartOfQuarter": ("hour", "day"),
+    "toStartOfYear": ("hour", "day"),
+}
+INTERVAL_FUNCTIONS: dict[str, tuple[str, ...]] = {
+    "toIntervalHour": ("hour",),
+    "toIntervalDay": ("hour", "day"),
+    "toIntervalWeek": ("hour", "day"),
+    "toIntervalMonth": ("hour", "day"),
+    "toIntervalQuarter": ("hour", "day"),
+    "toIntervalYear": ("hour", "day"),
+}
+# How constant datetimes at the start and at the last second of a bucket end, as formatted by `QueryDateRange`
+BUCKET_START_SUFFIX = {"hour": ":00:00", "day": " 00:00:00"}
+BUCKET_END_SUFFIX = {"hour": ":59:59", "day": " 23:59:59"}
+
+MERGE_FUNCTIONS = {
+    "events_count_state": "countMerge",
+    "persons_uniq_exact_state": "uniqExactMerge",
+    "math_sum_state": "sumMerge",
+    "math_avg_state": "avgMerge",
+}
+MATH_STATE_COLUMNS = {"sum": "math_sum_state", "avg": "math_avg_state"}
+
+COMPARISON_FUNCTIONS = {
+    "equals": CompareOperationOp.Eq,
+    "greaterOrEquals": CompareOperationOp.GtEq,
+    "lessOrEquals": CompareOperationOp.LtEq,
+    "greater": CompareOperationOp.Gt,
+    "less": CompareOperationOp.Lt,
+}
+FLIPPED_COMPARISONS = {
+    CompareOperationOp.Eq: CompareOperationOp.Eq,
+    CompareOperationOp.GtEq: CompareOperationOp.LtEq,
+    CompareOperationOp.LtEq: CompareOperationOp.GtEq,
+    CompareOperationOp.Gt: CompareOperationOp.Lt,
+    CompareOperationOp.Lt: CompareOperationOp.Gt,
+}
+
+
+def _state_expr(rollup: EventRollup, column: str) -> ast.Expr:
+    if column == "events_count_state":
+        return ast.Call(name="countState", args=[])
+    if column == "persons_uniq_exact_state":
+        return ast.Call(
+            name="uniqExactState", args=[ast.Call(name="assumeNotNull", args=[ast.Field(chain=["person_id"])])]
+        )
+    if column in ("math_sum_state", "math_avg_state") and rollup.math_property:
+        return ast.Call(
+            name="sumState" if column == "math_sum_state" else "avgState",
+            args=[ast.Call(name="toFloat", args=[ast.Field(chain=["properties", rollup.math_property])])],
+        )
+    raise ValueError(f"Rollup has no column {column}")
+
+
+def event_rollup_modifiers(modifiers: HogQLQueryModifiers) -> dict[str, Any]:
+    return modifiers.model_dump(mode="json", include=EVENT_ROLLUP_MODIFIERS)
+
+
+def event_rollup_events_select(
+    rollup: EventRollup, columns: Sequence[str], where: ast.Expr, alias: Optional[str] = None
+) -> ast.SelectQuery:
+    """Calculates `columns` of the rollup from events, per bucket and breakdown value."""
+    select: list[ast.Expr] = [
+        ast.Alias(
+            alias="bucket",
+            expr=ast.Call(name=f"toStartOf{rollup.interval.title()}", args=[ast.Field(chain=["timestamp"])]),
+        )
+    ]
+    group_by: list[ast.Expr] = [ast.Field(chain=["bucket"])]
+    for column in columns:
+        if column == "property_value":
+            if not rollup.breakdown_property:
+                raise ValueError("Rollup has no breakdown property")
+            select.append(
+                ast.Alias(
+                    alias="property_value",
+                    expr=ast.Call(name="toString", args=[ast.Field(chain=["properties", rollup.breakdown_property])]),
+                )
+            )
+            group_by.append(ast.Field(chain=["property_value"]))
+        else:
+            select.append(ast.Alias(alias=column, expr=_state_expr(rollup, column)))
+
+    return ast.SelectQuery(
+        select=select,
+        select_from=ast.JoinExpr(table=ast.Field(chain=["events"]), alias=alias),
+        where=where,
+        group_by=group_by,
+    )
+
+
+def _is_events_field(expr: ast.Expr, chain: list[str], alias: Optional[str]) -> bool:
+    if not isinstance(expr, ast.Field):
+        return False
+    return (
+        expr.chain == chain or expr.chain == ["events", *chain] or (alias is not None and expr.chain == [alias, *chain])
+    )
+
+
+def _is_timestamp_field(expr: ast.Expr, alias: Optional[str]) -> bool:
+    return _is_events_field(expr, ["timestamp"], alias)
+
+
+def _is_person_id_field(expr: ast.Expr, alias: Optional[str]) -> bool:
+    return _is_events_field(expr, ["person_id"], alias) or _is_events_field(expr, ["person", "id"], alias)
+
+
+def _constant_datetime(expr: ast.Expr) -> Optional[str]:
+    """Returns the constant of `toDateTime('2024-01-01 00:00:00')`, optionally wrapped in `assumeNotNull`."""
+    if isinstance(expr, ast.Call) and expr.name == "assumeNotNull" and len(expr.args) == 1:
+        return _constant_datetime(expr.args[0])
+    if (
+        isinstance(expr, ast.Call)
+        and expr.name == "toDateTime"
+        and len(expr.args) == 1
+        and isinstance(expr.args[0], ast.Constant)
+        and isinstance(expr.args[0].value, str)
+        # Only the plain "%Y-%m-%d %H:%M:%S" format
+        and len(expr.args[0].value) == 19
+    ):
+        return expr.args[0].value
+    return None
+
+
+def _is_bucket_start(expr: ast.Expr, interval: str) -> bool:
+    """Whether `expr` is a constant datetime at the start of a bucket of `interval`."""
+    if isinstance(expr, ast.Call) and expr.name == "assumeNotNull" and len(expr.args) == 1:
+        return _is_bucket_start(expr.args[0], interval)
+    if isinstance(expr, ast.Call) and expr.name in TIME_BUCKET_FUNCTIONS and len(expr.args) >= 1:
+        return interval in TIME_BUCKET_FUNCTIONS[expr.name] and _constant_datetime(expr.args[0]) is not None
+    if (
+        isinstance(expr, ast.Call)
+        and expr.name == "toStartOfInterval"
+        and len(expr.args) == 2
+        and isinstance(expr.args[1], ast.Call)
+        and expr.args[1].name in INTERVAL_FUNCTIONS
+    ):
+        return interval in INTERVAL_FUNCTIONS[expr.args[1].name] and _constant_datetime(expr.args[0]) is not None
+    value = _constant_datetime(expr)
+    return value is not None and value.endswith(BUCKET_START_SUFFIX[interval])
+
+
+def _is_bucket_end(expr: ast.Expr, interval: str) -> bool:
+    """Whether `expr` is a constant datetime at the last second of a bucket of `interval`."""
+    value = _constant_datetime(expr)
+    return value is not None and value.endswith(BUCKET_END_SUFFIX[interval])
+
+
+def _as_comparison(expr: ast.Expr) -> Optional[tuple[CompareOperationOp, ast.Expr, ast.Expr]]:
+    if isinstance(expr, ast.CompareOperation):
+        return expr.op, expr.left, expr.right
+    if isinstance(expr, ast.Call) and expr.name in COMPARISON_FUNCTIONS and len(expr.args) == 2:
+        return COMPARISON_FUNCTIONS[expr.name], expr.args[0], expr.args[1]
+    return None
+
+
+def _bucket_bounds(where: list[ast.Expr], rollup: EventRollup, alias: Optional[str]) -> list[ast.Expr]:
+    """
+    Translates the filters of a query on events into filters on the buckets of the rollup.
+    Raises a ValueError if the query filters on anything but the rollup's event and on timestamps that don't split
+    buckets.
+    """
+    has_event_filter = False
+    bounds: list[ast.Expr] = []
+    for expr in where:
+        comparison = _as_comparison(expr)
+        if comparison is None:
+            raise ValueError("Unsupported filter")
+        op, left, right = comparison
+        if not _is_events_field(left, ["event"], alias) and not _is_timestamp_field(left, alias):
+            op, left, right = FLIPPED_COMPARISONS[op], right, left
+
+        if _is_events_field(left, ["event"], alias):
+            if op != CompareOperationOp.Eq or not isinstance(right, ast.Constant) or right.value != rollup.event:
+                raise ValueError("Filter on another event")
+            has_event_filter = True
+        elif _is_timestamp_field(left, alias) and (
+            (op in (CompareOperationOp.GtEq, CompareOperationOp.Lt) and _is_bucket_start(right, rollup.interval))
+            or (op == CompareOperationOp.LtEq and _is_bucket_end(right, rollup.interval))
+        ):
+            bounds.append(ast.CompareOperation(op=op, left=ast.Field(chain=["bucket"]), right=right))
+        else:
+            raise ValueError("Unsupported filter")
+
+    if not has_event_filter:
+        raise ValueError("No filter on the rollup's event")
+    return bounds
+
+
+class EventRollupExprTransformer(CloningVisitor):
+    """Rewrites expressions on events into merges of the rollup's states, raising a ValueError where it can't."""
+
+    def __init__(self, rollup: EventRollup, timezone: str, alias: Optional[str]) -> None:
+        super().__init__()
+        self.rollup = rollup
+        self.timezone = timezone
+        self.alias = alias
+        self.columns: set[str] = set()
+        self.seen_aliases: set[str] = set()
+        self.has_transformed_aggregation = False
+
+    def _state_column(self, node: ast.Call) -> Optional[str]:
+        if node.name == "count" and not node.distinct:
+            if len(node.args) == 0 or (len(node.args) == 1 and _is_events_field(node.args[0], ["*"], self.alias)):
+                return "events_count_state"
+        # `uniq` is approximate, so it isn't merged from exact states
+        if (node.name == "uniqExact" or (node.name == "count" and node.distinct)) and len(node.args) == 1:
+            if _is_person_id_field(node.args[0], self.alias):
+                return "persons_uniq_exact_state"
+        if node.name in MATH_STATE_COLUMNS and len(node.args) == 1 and self.rollup.math_property:
+            arg = node.args[0]
+            if (
+                isinstance(arg, ast.Call)
+                and arg.name == "toFloat"
+                and len(arg.args) == 1
+                and _is_events_field(arg.args[0], ["properties", self.rollup.math_property], self.alias)
+            ):
+                return MATH_STATE_COLUMNS[node.name]
+        return None
+
+    def _bucket(self) -> ast.Expr:
+        # Buckets are aligned to the team's timezone, convert them back to it as `timestamp` would be
+        return ast.Call(name="toTimeZone", args=[ast.Field(chain=["bucket"]), ast.Constant(value=self.timezone)])
+
+    def visit_call(self, node: ast.Call):
+        column = self._state_column(node)
+        if column is not None:
+            self.columns.add(column)
+            self.has_transformed_aggregation = True
+            return ast.Call(name=MERGE_FUNCTIONS[column], args=[ast.Field(chain=[column])])
+
+        if node.name in TIME_BUCKET_FUNCTIONS and node.args and _is_timestamp_field(node.args[0], self.alias):
+            if self.rollup.interval not in TIME_BUCKET_FUNCTIONS[node.name]:
+                raise ValueError(f"Can't calculate {node.name} from buckets of an {self.rollup.interval}")
+            return ast.Call(name=node.name, args=[self._bucket(), *[self.visit(arg) for arg in node.args[1:]]])
+
+        if (
+            node.name == "toStartOfInterval"
+            and len(node.args) == 2
+            and _is_timestamp_field(node.args[0], self.alias)
+            and isinstance(node.args[1], ast.Call)
+            and node.args[1].name in INTERVAL_FUNCTIONS
+        ):
+            if self.rollup.interval not in INTERVAL_FUNCTIONS[node.args[1].name]:
+                raise ValueError(f"Can't calculate {node.args[1].name} from buckets of an {self.rollup.interval}")
+            return ast.Call(name=node.name, args=[self._bucket(), self.visit(node.args[1])])
+
+        if (
+            node.name == "toString"
+            and len(node.args) == 1
+            and self.rollup.breakdown_property
+            and _is_events_field(node.args[0], ["properties", self.rollup.breakdown_property], self.alias)
+        ):
+            self.columns.add("property_value")
+            return ast.Field(chain=["property_value"])
+
+        return super().visit_call(node)
+
+    def visit_field(self, node: ast.Field):
+        # Aliases of expressions we've already transformed, e.g. in GROUP BY
+        if len(node.chain) == 1 and node.chain[0] in self.seen_aliases:
+            return super().visit_field(node)
+        raise ValueError(f"Unsupported field: {node.chain}")
+
+    def visit_alias(self, node: ast.Alias):
+        self.seen_aliases.add(node.alias)
+        return super().visit_alias(node)
+
+
+def _is_constant_one(expr: Optional[ast.Expr]) -> bool:
+    return isinstance(expr, ast.Constant) and expr.value == 1
+
+
+def _is_valid_select_from(node: Optional[ast.JoinExpr]) -> bool:
+    if not node or not isinstance(node.table, ast.Field) or node.table.chain != ["events"]:
+        return False
+    if node.next_join or node.constraint:
+        return False
+    if node.sample:
+        # Rollups hold all events, so they can only answer unsampled queries
+        sample_value = node.sample.sample_value
+        if not _is_constant_one(sample_value.left) or not (
+            sample_value.right is None or _is_constant_one(sample_value.right)
+        ):
+            return False
+        if node.sample.offset_value is not None:
+            return False
+    return True
+
+
+def _route_to_rollup(node: ast.SelectQuery, rollup: EventRollup, timezone: str) -> ast.SelectQuery:
+    assert node.select_from is not None
+    assert rollup.materialized_from is not None and rollup.materialized_until is not None
+    alias = node.select_from.alias
+
+    visitor = EventRollupExprTransformer(rollup, timezone, alias)
+    select = [visitor.visit(expr) for expr in node.select]
+    group_by = [visitor.visit(expr) for expr in node.group_by] if node.group_by else None
+    having = visitor.visit(node.having) if node.having else None
+    order_by = [visitor.visit(expr) for expr in node.order_by] if node.order_by else None
+    if not visitor.has_transformed_aggregation:
+        raise ValueError("No aggregation to calculate from the rollup")
+
+    where = flatten_and(node.where)
+    bounds = _bucket_bounds(where, rollup, alias)
+    columns = [column for column in ["property_value", *EVENT_ROLLUP_STATE_COLUMNS] if column in visitor.columns]
+    materialized_from = ast.Constant(value=rollup.materialized_from)
+    materialized_until = ast.Constant(value=rollup.materialized_until)
+
+    materialized = ast.SelectQuery(
+        select=[ast.Field(chain=["bucket"]), *[ast.Field(chain=[column]) for column in columns]],
+        select_from=ast.JoinExpr(table=ast.Field(chain=[EVENT_ROLLUPS_TABLE])),
+        where=ast.And(
+            exprs=[
+                ast.CompareOperation(
+                    op=CompareOperationOp.Eq,
+                    left=ast.Field(chain=["rollup_id"]),
+                    right=ast.Constant(value=str(rollup.id)),
+                ),
+                ast.CompareOperation(
+                    op=CompareOperationOp.GtEq, left=ast.Field(chain=["bucket"]), right=materialized_from
+                ),
+                ast.CompareOperation(
+                    op=CompareOperationOp.Lt, left=ast.Field(chain=["bucket"]), right=materialized_until
+                ),
+                *bounds,
+            ]
+        ),
+    )
+    timestamp = ast.Field(chain=[alias, "timestamp"] if alias else ["timestamp"])
+    not_materialized = event_rollup_events_select(
+        rollup,
+        columns,
+        where=ast.And(
+            exprs=[
+                *where,
+                ast.Or(
+                    exprs=[
+                        ast.CompareOperation(op=CompareOperationOp.Lt, left=timestamp, right=materialized_from),
+                        ast.CompareOperation(op=CompareOperationOp.GtEq, left=timestamp, right=materialized_until),
+                    ]
+                ),
+            ]
+        ),
+        alias=alias,
+    )
+
+    return ast.SelectQuery(
+        select=select,
+        select_from=ast.JoinExpr(
+            table=ast.SelectSetQuery.create_from_queries([materialized, not_materialized], "UNION ALL"),
+            alias=alias,
+        ),
+        group_by=group_by,
+        having=having,
+        order_by=order_by,
+        limit=node.limit,
+        offset=node.offset,
+        settings=node.settings,
+        ctes=node.ctes,
+    )
+
+
+class EventRollupTransformer(CloningVisitor):
+    def __init__(self, team: Team, modifiers: HogQLQueryModifiers) -> None:
+        super().__init__()
+        self.team = team
+        self.modifiers = event_rollup_modifiers(modifiers)
+        self._rollups: Optional[list[EventRollup]] = None
+
+    @property
+    def rollups(self) -> list[EventRollup]:
+        if self._rollups is None:
+            # Daily and breakdown-less rollups have fewer rows to merge, so try them first
+            self._rollups = sorted(
+                (
+                    rollup
+                    for rollup in EventRollup.objects.filter(
+                        team_id=self.team.pk,
+                        timezone=self.team.timezone,
+                        materialized_from__isnull=False,
+                        materialized_until__isnull=False,
+                    )
+                    if rollup.modifiers == self.modifiers
+                ),
+                key=lambda rollup: (rollup.interval == EventRollup.Interval.HOUR, bool(rollup.breakdown_property)),
+            )
+        return self._rollups
+
+    def visit_select_query(self, node: ast.SelectQuery) -> ast.SelectQuery:
+        transformed_node = cast(ast.SelectQuery, super().visit_select_query(node))
+
+        # Bail if any unsupported part of the SELECT query exist
+        if (
+            transformed_node.array_join_list
+            or transformed_node.array_join_op
+            or transformed_node.limit_by
+            or transformed_node.limit_with_ties
+            or transformed_node.window_exprs
+            or transformed_node.prewhere
+            or transformed_node.view_name
+            or transformed_node.distinct
+            or not _is_valid_select_from(transformed_node.select_from)
+        ):
+            return transformed_node
+
+        for rollup in self.rollups:
+            try:
+                return _route_to_rollup(transformed_node, rollup, self.team.timezone)
+            except ValueError:
+                continue
+        return transformed_node
+
+
+def do_event_rollup_transforms(node: _T_AST, team: Team, modifiers: HogQLQueryModifiers) -> _T_AST:
+    """Returns the query with every SELECT that can be calculated from one of the team's event rollups rewritten to."""
+    if not isinstance(node, ast.SelectQuery | ast.SelectSetQuery):
+        return node
+
+    return cast(_T_AST, EventRollupTransformer(team, modifiers).visit(node))
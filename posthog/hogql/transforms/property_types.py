@@ -14,6 +14,7 @@ from posthog.hogql.database.models import (
     BooleanDatabaseField,
 )
 from posthog.hogql.escape_sql import escape_hogql_identifier
+from posthog.hogql.property_index import PropertyIndex, get_property_index_for_context
 from posthog.hogql.visitor import CloningVisitor, TraversingVisitor
 from posthog.models import Team
 from posthog.models.property import PropertyName, TableColumn
@@ -23,8 +24,6 @@ from django.db import models
 
 
 def build_property_swapper(node: ast.AST, context: HogQLContext) -> None:
-    from posthog.models import PropertyDefinition
-
     if not context or not context.team_id:
         return
 
@@ -38,12 +37,60 @@ def build_property_swapper(node: ast.AST, context: HogQLContext) -> None:
     property_finder = PropertyFinder(context)
     property_finder.visit(node)
 
+    property_index = get_property_index_for_context(context)
+    if property_index is not None and property_index.has_property_types:
+        event_properties, person_properties, group_properties = _property_types_from_index(
+            property_finder, property_index
+        )
+    else:
+        event_properties, person_properties, group_properties = _query_property_types(
+            property_finder, context.team.project_id
+        )
+
+    timezone = context.database.get_timezone() if context and context.database else "UTC"
+    context.property_swapper = PropertySwapper(
+        timezone=timezone,
+        event_properties=event_properties,
+        person_properties=person_properties,
+        group_properties=group_properties,
+        context=context,
+        setTimeZones=True,
+    )
+
+
+def _property_types_from_index(
+    property_finder: "PropertyFinder", property_index: PropertyIndex
+) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
+    event_property_types = cast(dict[str, str], property_index.event_property_types)
+    person_property_types = cast(dict[str, str], property_index.person_property_types)
+    group_property_types = cast(dict[str, str], property_index.group_property_types)
+
+    event_properties = {
+        name: event_property_types[name] for name in property_finder.event_properties if name in event_property_types
+    }
+    person_properties = {
+        name: person_property_types[name] for name in property_finder.person_properties if name in person_property_types
+    }
+    group_properties = {
+        f"{group_id}_{name}": group_property_types[f"{group_id}_{name}"]
+        for group_id, properties in property_finder.group_properties.items()
+        for name in properties
+        if f"{group_id}_{name}" in group_property_types
+    }
+    return event_properties, person_properties, group_properties
+
+
+def _query_property_types(
+    property_finder: "PropertyFinder", project_id: int
+) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
+    from posthog.models import PropertyDefinition
+
     event_property_values = (
         PropertyDefinition.objects.alias(
             effective_project_id=Coalesce("project_id", "team_id", output_field=models.BigIntegerField())
         )
         .filter(
-            effective_project_id=context.team.project_id,  # type: ignore
+            effective_project_id=project_id,
             name__in=property_finder.event_properties,
             type__in=[None, PropertyDefinition.Type.EVENT],
         )
@@ -58,7 +105,7 @@ def build_property_swapper(node: ast.AST, context: HogQLContext) -> None:
             effective_project_id=Coalesce("project_id", "team_id", output_field=models.BigIntegerField())
         )
         .filter(
-            effective_project_id=context.team.project_id,  # type: ignore
+            effective_project_id=project_id,
             name__in=property_finder.person_properties,
             type=PropertyDefinition.Type.PERSON,
         )
@@ -77,7 +124,7 @@ def build_property_swapper(node: ast.AST, context: HogQLContext) -> None:
                 effective_project_id=Coalesce("project_id", "team_id", output_field=models.BigIntegerField())
             )
             .filter(
-                effective_project_id=context.team.project_id,  # type: ignore
+                effective_project_id=project_id,
                 name__in=properties,
                 type=PropertyDefinition.Type.GROUP,
                 group_type_index=group_id,
@@ -87,16 +134,7 @@ def build_property_swapper(node: ast.AST, context: HogQLContext) -> None:
         group_properties.update(
             {f"{group_id}_{name}": property_type for name, property_type in group_property_values if property_type}
         )
-
-    timezone = context.database.get_timezone() if context and context.database else "UTC"
-    context.property_swapper = PropertySwapper(
-        timezone=timezone,
-        event_properties=event_properties,
-        person_properties=person_properties,
-        group_properties=group_properties,
-        context=context,
-        setTimeZones=True,
-    )
+    return event_properties, person_properties, group_properties
 
 
 class PropertyFinder(TraversingVisitor):
@@ -322,6 +360,9 @@ class PropertySwapper(CloningVisitor):
     def _get_materialized_column(
         self, table_name: str, property_name: PropertyName, field_name: TableColumn
     ) -> MaterializedColumn | None:
+        property_index = get_property_index_for_context(self.context)
+        if property_index is not None:
+            return property_index.materialized_property_sources(table_name, field_name, property_name).column
         return get_materialized_column_for_property(
             cast(TablesWithMaterializedColumns, table_name), field_name, property_name
         )
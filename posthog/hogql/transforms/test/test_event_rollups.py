@@ -0,0 +1,246 @@
+from datetime import datetime, UTC
+
+from django.test import override_settings
+from freezegun import freeze_time
+
+from posthog.hogql.modifiers import create_default_modifiers_for_team
+from posthog.hogql.parser import parse_select
+from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.transforms.event_rollups import do_event_rollup_transforms, event_rollup_modifiers
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.models.event_rollup import EventRollup
+from posthog.models.event_rollup.util import materialize_event_rollup
+from posthog.schema import (
+    BaseMathType,
+    BreakdownFilter,
+    DateRange,
+    EventsNode,
+    HogQLQueryModifiers,
+    PropertyMathType,
+    TrendsQuery,
+)
+from posthog.test.base import APIBaseTest, BaseTest, ClickhouseTestMixin, _create_event, _create_person
+
+TRENDS_INNER_QUERY = """
+    SELECT {aggregation} AS total, toStartOfDay(timestamp) AS day_start
+    FROM events AS e SAMPLE 1
+    WHERE and(
+        greaterOrEquals(timestamp, toStartOfInterval(assumeNotNull(toDateTime('2025-07-10 14:04:24')), toIntervalDay(1))),
+        lessOrEquals(timestamp, assumeNotNull(toDateTime('2025-07-17 23:59:59'))),
+        equals(event, '$pageview')
+    )
+    GROUP BY day_start
+"""
+
+
+class TestEventRollupTransforms(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.rollup = EventRollup.objects.create(
+            team=self.team,
+            event="$pageview",
+            math_property="revenue",
+            timezone="UTC",
+            modifiers=event_rollup_modifiers(create_default_modifiers_for_team(self.team)),
+            materialized_from=datetime(2025, 4, 1, tzinfo=UTC),
+            materialized_until=datetime(2025, 7, 15, tzinfo=UTC),
+        )
+
+    def _transform(self, query: str, modifiers: HogQLQueryModifiers | None = None) -> str:
+        modifiers = create_default_modifiers_for_team(self.team, modifiers)
+        return str(do_event_rollup_transforms(parse_select(query), self.team, modifiers))
+
+    def test_trends_count(self):
+        query = self._transform(TRENDS_INNER_QUERY.format(aggregation="count()"))
+        assert "event_rollups" in query
+        assert "countMerge(events_count_state)" in query
+        assert str(self.rollup.id) in query
+
+    def test_trends_unique_persons(self):
+        for aggregation in ["count(DISTINCT e.person_id)", "uniqExact(person_id)"]:
+            query = self._transform(TRENDS_INNER_QUERY.format(aggregation=aggregation))
+            assert "uniqExactMerge(persons_uniq_exact_state)" in query
+
+    def test_approximate_unique_persons_are_not_routed(self):
+        query = self._transform(TRENDS_INNER_QUERY.format(aggregation="uniq(person_id)"))
+        assert "event_rollups" not in query
+
+    def test_trends_sum_of_math_property(self):
+        query = self._transform(TRENDS_INNER_QUERY.format(aggregation="ifNull(sum(toFloat(properties.revenue)), 0)"))
+        assert "sumMerge(math_sum_state)" in query
+
+    def test_sum_of_another_property_is_not_routed(self):
+        query = self._transform(TRENDS_INNER_QUERY.format(aggregation="sum(toFloat(properties.price))"))
+        assert "event_rollups" not in query
+
+    def test_another_event_is_not_routed(self):
+        query = self._transform(TRENDS_INNER_QUERY.replace("$pageview", "$autocapture").format(aggregation="count()"))
+        assert "event_rollups" not in query
+
+    def test_property_filter_is_not_routed(self):
+        query = self._transform(
+            "SELECT count() FROM events WHERE event = '$pageview' AND properties.$browser = 'Chrome'"
+        )
+        assert "event_rollups" not in query
+
+    def test_timestamp_splitting_a_bucket_is_not_routed(self):
+        query = self._transform(
+            "SELECT count() FROM events WHERE event = '$pageview' "
+            "AND timestamp >= assumeNotNull(toDateTime('2025-07-10 14:04:24'))"
+        )
+        assert "event_rollups" not in query
+
+    def test_sampled_query_is_not_routed(self):
+        query = self._transform(TRENDS_INNER_QUERY.replace("SAMPLE 1", "SAMPLE 0.1").format(aggregation="count()"))
+        assert "event_rollups" not in query
+
+    def test_hourly_query_is_not_routed_to_daily_rollup(self):
+        query = self._transform(
+            TRENDS_INNER_QUERY.replace("toStartOfDay(timestamp)", "toStartOfHour(timestamp)").format(
+                aggregation="count()"
+            )
+        )
+        assert "event_rollups" not in query
+
+    def test_hourly_query_is_routed_to_hourly_rollup(self):
+        self.rollup.interval = EventRollup.Interval.HOUR
+        self.rollup.save()
+
+        query = self._transform(
+            TRENDS_INNER_QUERY.replace("toStartOfDay(timestamp)", "toStartOfHour(timestamp)").format(
+                aggregation="count()"
+            )
+        )
+        assert "event_rollups" in query
+
+    def test_breakdown_is_routed_to_breakdown_rollup(self):
+        EventRollup.objects.create(
+            team=self.team,
+            event="$pageview",
+            breakdown_property="$browser",
+            timezone="UTC",
+            modifiers=self.rollup.modifiers,
+            materialized_from=datetime(2025, 4, 1, tzinfo=UTC),
+            materialized_until=datetime(2025, 7, 15, tzinfo=UTC),
+        )
+
+        query = self._transform(
+            TRENDS_INNER_QUERY.replace(
+                "AS day_start",
+                "AS day_start, "
+                "ifNull(nullIf(toString(properties.$browser), ''), '$$_posthog_breakdown_null_$$') AS breakdown_value",
+            )
+            .replace("GROUP BY day_start", "GROUP BY day_start, breakdown_value")
+            .format(aggregation="count()")
+        )
+        assert "event_rollups" in query
+        assert "property_value" in query
+
+    def test_rollup_materialized_with_other_modifiers_is_not_used(self):
+        query = self._transform(
+            TRENDS_INNER_QUERY.format(aggregation="count()"),
+            modifiers=HogQLQueryModifiers(convertToProjectTimezone=False),
+        )
+        assert "event_rollups" not in query
+
+    def test_rollup_of_another_timezone_is_not_used(self):
+        self.rollup.timezone = "Europe/Berlin"
+        self.rollup.save()
+
+        query = self._transform(TRENDS_INNER_QUERY.format(aggregation="count()"))
+        assert "event_rollups" not in query
+
+
+@override_settings(EVENT_ROLLUPS_ENABLED=True, EVENT_ROLLUPS_BACKFILL_DAYS=10)
+class TestEventRollupsIntegration(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        for index, distinct_id in enumerate(["p1", "p2", "p3"]):
+            _create_person(team=self.team, distinct_ids=[distinct_id])
+            for day in range(10, 10 + index + 1):
+                _create_event(
+                    team=self.team,
+                    event="$pageview",
+                    distinct_id=distinct_id,
+                    timestamp=datetime(2025, 7, day, 12, tzinfo=UTC),
+                    properties={"$browser": "Chrome" if index else "Safari", "revenue": index + 1},
+                )
+        # After the materialized buckets, so it's read from the events table
+        _create_event(
+            team=self.team,
+            event="$pageview",
+            distinct_id="p1",
+            timestamp=datetime(2025, 7, 15, 0, 30, tzinfo=UTC),
+            properties={"$browser": "Safari", "revenue": 5},
+        )
+
+    def _materialize(self, **kwargs) -> EventRollup:
+        rollup = EventRollup.objects.create(team=self.team, event="$pageview", **kwargs)
+        with freeze_time("2025-07-15T01:00:00Z"):
+            materialize_event_rollup(rollup)
+        rollup.refresh_from_db()
+        assert rollup.materialized_until == datetime(2025, 7, 14, tzinfo=UTC)
+        return rollup
+
+    def _calculate(self, query: TrendsQuery) -> list[dict]:
+        with freeze_time("2025-07-15T01:00:00Z"):
+            return TrendsQueryRunner(team=self.team, query=query).calculate().results
+
+    def test_only_trends_queries_are_routed(self):
+        self._materialize()
+
+        query = "SELECT count() FROM events WHERE event = '$pageview'"
+        response = execute_hogql_query(query, team=self.team, query_type="TrendsQuery")
+        assert response.hogql and "event_rollups" in response.hogql
+        assert response.results == [(7,)]
+
+        response = execute_hogql_query(query, team=self.team)
+        assert response.hogql and "event_rollups" not in response.hogql
+        assert response.results == [(7,)]
+
+    def test_trends_match_events(self):
+        self._materialize(math_property="revenue")
+
+        for math, math_property in [
+            (BaseMathType.TOTAL, None),
+            (BaseMathType.DAU, None),
+            (PropertyMathType.SUM, "revenue"),
+            (PropertyMathType.AVG, "revenue"),
+        ]:
+            query = TrendsQuery(
+                series=[EventsNode(event="$pageview", math=math, math_property=math_property)],
+                dateRange=DateRange(date_from="2025-07-09", date_to="2025-07-15"),
+            )
+            with override_settings(EVENT_ROLLUPS_ENABLED=False):
+                expected = self._calculate(query)
+            assert self._calculate(query) == expected
+
+    def test_dau_trend_is_routed_and_matches_events(self):
+        self._materialize()
+
+        query = TrendsQuery(
+            series=[EventsNode(event="$pageview", math=BaseMathType.DAU)],
+            dateRange=DateRange(date_from="2025-07-09", date_to="2025-07-15"),
+        )
+        with override_settings(EVENT_ROLLUPS_ENABLED=False):
+            expected = self._calculate(query)
+        with self.capture_select_queries() as queries:
+            results = self._calculate(query)
+        assert any("persons_uniq_exact_state" in sql for sql in queries)
+        assert results == expected
+        # p1 on the 10th and the 15th, p2 on the 10th and 11th, p3 on the 10th to the 12th
+        assert results[0]["data"] == [0, 3, 2, 1, 0, 0, 1]
+
+    def test_trends_breakdown_match_events(self):
+        self._materialize(breakdown_property="$browser")
+
+        query = TrendsQuery(
+            series=[EventsNode(event="$pageview")],
+            dateRange=DateRange(date_from="2025-07-09", date_to="2025-07-15"),
+            breakdownFilter=BreakdownFilter(breakdown="$browser"),
+        )
+        with override_settings(EVENT_ROLLUPS_ENABLED=False):
+            expected = self._calculate(query)
+        results = self._calculate(query)
+        assert results == expected
+        assert sorted(series["count"] for series in results) == [2, 5]
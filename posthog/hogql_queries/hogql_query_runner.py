@@ -1,6 +1,8 @@
+import time
 from datetime import datetime
 from typing import Optional, cast
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack
 
 from posthog import settings as app_settings
 from posthog.caching.utils import ThresholdMode, staleness_threshold_map
@@ -9,7 +11,7 @@ from posthog.hogql.constants import HogQLGlobalSettings
 from posthog.hogql.filters import replace_filters
 from posthog.hogql.parser import parse_select
 from posthog.hogql.placeholders import find_placeholders, replace_placeholders
-from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.query import HogQLQueryExecutor, execute_hogql_query
 from posthog.hogql.utils import deserialize_hx_ast
 from posthog.hogql.variables import replace_variables
 from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator
@@ -25,6 +27,42 @@ from posthog.schema import (
 )
 
 
+# Well within the TTLs of the concurrency limiters, so a long stream doesn't lose its slots
+STREAM_LIMITS_REFRESH_INTERVAL = 60  # seconds
+
+
+class LimitedQueryBatches(Iterator[list]):
+    """
+    Batches of rows of a streamed query, holding on to the query's concurrency limit slots until they're exhausted or
+    closed. The slots are refreshed while batches keep coming, so they don't expire mid-stream.
+    """
+
+    def __init__(self, batches: Iterator[list], limits: ExitStack, refresh_limits: Callable[[], None]):
+        self._batches = batches
+        self._limits = limits
+        self._refresh_limits = refresh_limits
+        self._refreshed_at = time.monotonic()
+
+    def __next__(self) -> list:
+        try:
+            batch = next(self._batches)
+        except BaseException:
+            self.close()
+            raise
+        if time.monotonic() - self._refreshed_at >= STREAM_LIMITS_REFRESH_INTERVAL:
+            self._refresh_limits()
+            self._refreshed_at = time.monotonic()
+        return batch
+
+    def close(self) -> None:
+        try:
+            close_batches = getattr(self._batches, "close", None)
+            if close_batches is not None:
+                close_batches()
+        finally:
+            self._limits.close()
+
+
 class HogQLQueryRunner(QueryRunner):
     query: HogQLQuery | HogQLASTQuery
     response: HogQLQueryResponse
@@ -82,16 +120,7 @@ class HogQLQueryRunner(QueryRunner):
             execute_hogql_query if paginator is None else paginator.execute_hogql_query,
         )
 
-        if (
-            self.is_query_service
-            and app_settings.API_QUERIES_LEGACY_TEAM_LIST
-            and self.team.pk not in app_settings.API_QUERIES_LEGACY_TEAM_LIST
-        ):
-            assert self.settings is not None
-            # p95 threads is 102, limiting to 60 (below global max_threads of 64)
-            self.settings.max_threads = 60
-            # p95 duration of HogQL query is 2.78sec
-            self.settings.max_execution_time = 10
+        self._apply_query_service_settings()
 
         response = func(
             query_type="HogQLQuery",
@@ -109,6 +138,48 @@ class HogQLQueryRunner(QueryRunner):
             response = response.model_copy(update={**paginator.response_params(), "results": paginator.results})
         return response
 
+    def execute_iter(self, batch_size: int = 10_000) -> tuple[list[str], list[str], LimitedQueryBatches]:
+        """
+        Streams the results as batches of rows, for exports too big to hold in memory. This skips the cache and
+        pagination: the query's own LIMIT, or the default of the runner's limit context, caps the row count.
+        Returns the column names and their ClickHouse types along with the batches. The query's concurrency limits
+        are held until the batches are exhausted or closed, so callers must close them.
+        """
+        self._apply_query_service_settings()
+
+        with ExitStack() as limits:
+            refresh_limits = limits.enter_context(self.query_limits())
+            executor = HogQLQueryExecutor(
+                query_type="HogQLQuery",
+                query=self.to_query(),
+                filters=self.query.filters,
+                modifiers=self.query.modifiers or self.modifiers,
+                team=self.team,
+                timings=self.timings,
+                variables=self.query.variables,
+                limit_context=self.limit_context,
+                workload=self.workload,
+                settings=self.settings,
+            )
+            batches = executor.execute_iter(batch_size)
+            # Started fine, from here on the batches release the limits
+            batches_with_limits = LimitedQueryBatches(batches, limits.pop_all(), refresh_limits)
+
+        column_types = [column_type for _, column_type in executor.types or []]
+        return executor.print_columns, column_types, batches_with_limits
+
+    def _apply_query_service_settings(self):
+        if (
+            self.is_query_service
+            and app_settings.API_QUERIES_LEGACY_TEAM_LIST
+            and self.team.pk not in app_settings.API_QUERIES_LEGACY_TEAM_LIST
+        ):
+            assert self.settings is not None
+            # p95 threads is 102, limiting to 60 (below global max_threads of 64)
+            self.settings.max_threads = 60
+            # p95 duration of HogQL query is 2.78sec
+            self.settings.max_execution_time = 10
+
     def apply_dashboard_filters(self, dashboard_filter: DashboardFilter):
         self.query.filters = self.query.filters or HogQLFilters()
 
@@ -5757,3 +5757,47 @@ class TestTrendsQueryRunner(ClickhouseTestMixin, APIBaseTest):
         self.assertIsNotNone(response)
         self.assertEqual(len(response.results), 1)
         self.assertEqual(response.results[0]["breakdown_value"], cohort.pk)
+
+    @override_settings(TRENDS_INCREMENTAL_CALCULATION_ENABLED=True, TRENDS_INCREMENTAL_LOOKBACK_HOURS=24)
+    def test_incremental_refresh_reuses_closed_intervals(self):
+        _create_person(team_id=self.team.pk, distinct_ids=["p1"])
+        for day in ("2020-01-12", "2020-01-13", "2020-01-14", "2020-01-15"):
+            _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp=f"{day}T10:00:00Z")
+        flush_persons_and_events()
+
+        with freeze_time("2020-01-15T12:00:00Z"):
+            runner = self._create_query_runner("-7d", None, IntervalType.DAY, [EventsNode(event="$pageview")])
+            initial = runner.run()
+        assert initial.results[0]["data"] == [0, 0, 0, 0, 1, 1, 1, 1]
+
+        # This one arrives late for an interval that was already closed when the result got cached,
+        # so an incremental refresh doesn't see it, unlike a full calculation
+        _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp="2020-01-12T11:00:00Z")
+        for day in ("2020-01-15", "2020-01-16", "2020-01-17"):
+            _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp=f"{day}T11:00:00Z")
+        flush_persons_and_events()
+
+        with freeze_time("2020-01-17T12:00:00Z"):
+            runner = self._create_query_runner("-7d", None, IntervalType.DAY, [EventsNode(event="$pageview")])
+            with patch.object(runner, "calculate", wraps=runner.calculate) as mock_calculate:
+                refreshed = runner.run()
+            full = self._create_query_runner("-7d", None, IntervalType.DAY, [EventsNode(event="$pageview")]).calculate()
+
+        mock_calculate.assert_not_called()
+        assert refreshed.is_cached is False
+        assert refreshed.results[0]["days"] == full.results[0]["days"]
+        assert refreshed.results[0]["labels"] == full.results[0]["labels"]
+        assert refreshed.results[0]["data"] == [0, 0, 1, 1, 1, 2, 1, 1]
+        assert full.results[0]["data"] == [0, 0, 2, 1, 1, 2, 1, 1]
+        assert refreshed.results[0]["count"] == 7
+
+    @override_settings(TRENDS_INCREMENTAL_CALCULATION_ENABLED=True)
+    def test_incremental_refresh_not_used_with_breakdown(self):
+        runner = self._create_query_runner(
+            "-7d",
+            None,
+            IntervalType.DAY,
+            [EventsNode(event="$pageview")],
+            breakdown=BreakdownFilter(breakdown="$browser", breakdown_type=BreakdownType.EVENT),
+        )
+        assert runner._can_calculate_incrementally() is False
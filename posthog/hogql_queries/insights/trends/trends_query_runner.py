@@ -1,6 +1,6 @@
-import threading
 from copy import deepcopy
 from datetime import timedelta, datetime
+from functools import partial
 from math import ceil
 from operator import itemgetter
 from typing import Any, Optional, Union
@@ -15,8 +15,6 @@ from posthog.caching.insights_api import (
     REAL_TIME_INSIGHT_REFRESH_INTERVAL,
     REDUCED_MINIMUM_INSIGHT_REFRESH_INTERVAL,
 )
-from posthog.clickhouse import query_tagging
-from posthog.clickhouse.query_tagging import QueryTags
 from posthog.hogql import ast
 from posthog.hogql.constants import MAX_SELECT_RETURNED_ROWS, LimitContext
 from posthog.hogql.printer import to_printed_hogql
@@ -57,6 +55,7 @@ from posthog.schema import (
     CompareItem,
     DashboardFilter,
     DataWarehouseEventsModifier,
+    DateRange,
     DataWarehouseNode,
     DayItem,
     EventsNode,
@@ -358,17 +357,8 @@ class TrendsQueryRunner(QueryRunner):
         errors: list[Exception] = []
         debug_errors: list[str] = []
 
-        def run(
-            index: int,
-            query: ast.SelectQuery | ast.SelectSetQuery,
-            timings: HogQLTimings,
-            is_parallel: bool,
-            query_tags: Optional[QueryTags] = None,
-        ):
+        def run(index: int, query: ast.SelectQuery | ast.SelectSetQuery, timings: HogQLTimings):
             try:
-                if query_tags:
-                    query_tagging.update_tags(query_tags)
-
                 series_with_extra = self.series[index]
 
                 response = execute_hogql_query(
@@ -386,38 +376,17 @@ class TrendsQueryRunner(QueryRunner):
                     debug_errors.append(response.error)
             except Exception as e:
                 errors.append(e)
-            finally:
-                if is_parallel:
-                    from django.db import connection
-
-                    # This will only close the DB connection for the newly spawned thread and not the whole app
-                    connection.close()
 
         with self.timings.measure("execute_queries"):
             timings_matrix[0] = self.timings.to_list(back_out_stack=False)
             self.timings.clear_timings()
 
-            # This exists so that we're not spawning threads during unit tests. We can't do
-            # this right now due to the lack of multithreaded support of Django
-            if len(queries) == 1 or settings.IN_UNIT_TESTING:
-                for index, query in enumerate(queries):
-                    run(index, query, self.timings.clone_for_subquery(index), False)
-            else:
-                jobs = [
-                    threading.Thread(
-                        target=run,
-                        args=(
-                            index,
-                            query,
-                            self.timings.clone_for_subquery(index),
-                            True,
-                            query_tagging.get_query_tags().model_copy(deep=True),
-                        ),
-                    )
+            self.execute_in_parallel(
+                [
+                    partial(run, index, query, self.timings.clone_for_subquery(index))
                     for index, query in enumerate(queries)
                 ]
-                [j.start() for j in jobs]  # type:ignore
-                [j.join() for j in jobs]  # type:ignore
+            )
 
         # Raise any errors raised in a seperate thread
         if len(errors) > 0:
@@ -502,6 +471,108 @@ class TrendsQueryRunner(QueryRunner):
             ),
         )
 
+    def _can_calculate_incrementally(self) -> bool:
+        # Only plain time series where every interval is aggregated on its own can be stitched together from parts.
+        # Breakdowns pick their top values over the whole range, and cumulative or smoothed values depend on
+        # neighbouring intervals, so none of those can reuse old intervals.
+        trends_filter = self.query.trendsFilter
+        return (
+            settings.TRENDS_INCREMENTAL_CALCULATION_ENABLED
+            and not self.breakdown_enabled
+            and not self._trends_display.is_total_value()
+            and self._trends_display.display_type != ChartDisplayType.ACTIONS_LINE_GRAPH_CUMULATIVE
+            and not (trends_filter and trends_filter.formulaNodes)
+            and not (trends_filter and trends_filter.smoothingIntervals and trends_filter.smoothingIntervals > 1)
+            and not (self.query.compareFilter and self.query.compareFilter.compare)
+            and self.query_date_range.interval_name in ("hour", "day", "week", "month")
+            and not (self.query.dateRange and self.query.dateRange.date_from == "all")
+        )
+
+    def calculate_incremental(self, stale_response: CachedTrendsQueryResponse) -> Optional[TrendsQueryResponse]:
+        """
+        Reuse the cached values of intervals that were already closed when the stale response was calculated (minus a
+        lookback for late arriving events), and only query ClickHouse for the intervals after that.
+        """
+        if not self._can_calculate_incrementally() or stale_response.last_refresh is None:
+            return None
+
+        all_values = self.query_date_range.all_values()
+        reliable_until = stale_response.last_refresh - timedelta(hours=settings.TRENDS_INCREMENTAL_LOOKBACK_HOURS)
+        # The tail starts at the interval that was still open (or within the lookback) at `reliable_until`
+        tail_start = next(
+            (value for value in reversed(all_values) if value <= reliable_until.astimezone(value.tzinfo)), None
+        )
+        if tail_start is None or tail_start == all_values[0]:
+            return None
+
+        tail_query = self.query.model_copy(
+            update={
+                "dateRange": DateRange(
+                    date_from=tail_start.isoformat(),
+                    date_to=self.query.dateRange.date_to if self.query.dateRange else None,
+                    explicitDate=self.query.dateRange.explicitDate if self.query.dateRange else None,
+                )
+            }
+        )
+        tail_runner = TrendsQueryRunner(
+            query=tail_query,
+            team=self.team,
+            timings=self.timings,
+            modifiers=self.modifiers,
+            limit_context=self.limit_context,
+        )
+        tail_response = tail_runner.calculate()
+
+        stale_results = stale_response.results
+        if len(stale_results) != len(tail_response.results):
+            return None
+
+        days = [self._format_day(value) for value in all_values]
+        labels = [format_label_date(value, self.query_date_range, self.team.week_start_day) for value in all_values]
+        results = []
+        for stale_item, tail_item in zip(stale_results, tail_response.results):
+            if stale_item.get("label") != tail_item.get("label") or stale_item.get("action", {}).get(
+                "order"
+            ) != tail_item.get("action", {}).get("order"):
+                return None
+
+            values_by_day = dict(zip(stale_item["days"], stale_item["data"]))
+            values_by_day.update(zip(tail_item["days"], tail_item["data"]))
+            if any(day not in values_by_day for day in days):
+                # The cached response doesn't cover the start of the current range
+                return None
+
+            data = [values_by_day[day] for day in days]
+            results.append(
+                {
+                    **tail_item,
+                    "data": data,
+                    "days": days,
+                    "labels": labels,
+                    "count": float(sum(data)),
+                    "filter": self._query_to_filter(),
+                    "action": {**tail_item["action"], "days": all_values},
+                }
+            )
+
+        return TrendsQueryResponse(
+            results=results,
+            hasMore=False,
+            timings=tail_response.timings,
+            hogql=tail_response.hogql,
+            modifiers=self.modifiers,
+            error=tail_response.error,
+            resolved_date_range=ResolvedDateRangeResponse(
+                date_from=self.query_date_range.date_from(),
+                date_to=self.query_date_range.date_to(),
+            ),
+        )
+
+    def _format_day(self, value: datetime) -> str:
+        return value.strftime(
+            "%Y-%m-%d{}".format(" %H:%M:%S" if self.query_date_range.interval_name in ("hour", "minute") else "")
+        )
+
     def build_series_response(self, response: HogQLQueryResponse, series: SeriesWithExtras, series_count: int):
         def get_value(name: str, val: Any):
             if name not in ["date", "total", "breakdown_value"]:
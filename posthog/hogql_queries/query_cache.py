@@ -6,6 +6,11 @@ from django.core.cache import cache
 
 from posthog import redis
 from posthog.cache_utils import OrjsonJsonSerializer
+from posthog.hogql_queries.query_cache_format import (
+    UnsupportedQueryCacheFormat,
+    decode_query_cache_data,
+    encode_query_cache_data,
+)
 from posthog.utils import get_safe_cache
 
 
@@ -93,7 +98,10 @@ class QueryCacheManager:
         self.redis_client.zrem(f"cache_timestamps:{self.team_id}", self.identifier)
 
     def set_cache_data(self, *, response: dict, target_age: Optional[datetime]) -> None:
-        fresh_response_serialized = OrjsonJsonSerializer({}).dumps(response)
+        if settings.QUERY_CACHE_COMPACT_FORMAT:
+            fresh_response_serialized = encode_query_cache_data(response)
+        else:
+            fresh_response_serialized = OrjsonJsonSerializer({}).dumps(response)
         cache.set(self.cache_key, fresh_response_serialized, settings.CACHED_RESULTS_TTL)
 
         if target_age:
@@ -106,4 +114,8 @@ class QueryCacheManager:
         if not cached_response_bytes:
             return None
 
-        return OrjsonJsonSerializer({}).loads(cached_response_bytes)
+        try:
+            return decode_query_cache_data(cached_response_bytes)
+        except UnsupportedQueryCacheFormat:
+            # Written by a newer version of the code, treat as a cache miss
+            return None
@@ -0,0 +1,104 @@
+import time
+from typing import Optional
+
+import structlog
+from django.conf import settings
+from prometheus_client import Counter
+from redis.exceptions import LockError
+
+from posthog.hogql_queries.query_cache import QueryCacheManager
+
+logger = structlog.get_logger(__name__)
+
+QUERY_COALESCING_COUNTER = Counter(
+    "posthog_query_coalescing_total",
+    "Outcome of single-flight coordination between identical in-flight query calculations.",
+    labelnames=["result"],
+)
+
+
+class QueryCoalescer:
+    """
+    Single-flight for query calculations, keyed by cache_key.
+
+    The first caller takes a Redis lock and calculates. Callers arriving while the lock is held wait until a newer
+    result lands in the query cache and return that instead of hitting ClickHouse with the exact same query.
+    If the leader finishes without writing to the cache (e.g. the query errored), or waiting takes too long,
+    followers fall back to calculating themselves.
+    """
+
+    def __init__(self, cache_manager: QueryCacheManager):
+        self.cache_manager = cache_manager
+        self.redis_client = cache_manager.redis_client
+        self._lock = self.redis_client.lock(
+            f"query_coalescing:{cache_manager.cache_key}",
+            timeout=settings.QUERY_COALESCING_LOCK_TIMEOUT,
+            blocking=False,
+        )
+        self._is_leader = False
+        self._baseline_last_refresh: Optional[str] = None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.QUERY_COALESCING_ENABLED
+
+    def try_lead(self) -> bool:
+        # Read before taking the lock, so a leader finishing in between still counts as a newer result
+        self._baseline_last_refresh = self._cached_last_refresh()
+        try:
+            self._is_leader = bool(self._lock.acquire(blocking=False))
+        except Exception as e:
+            # Redis trouble shouldn't stop us from calculating, it just means no coalescing
+            logger.warning("query_coalescing_lock_failed", cache_key=self.cache_manager.cache_key, error=str(e))
+            self._is_leader = True
+            return True
+
+        if self._is_leader:
+            QUERY_COALESCING_COUNTER.labels(result="leader").inc()
+        return self._is_leader
+
+    def release(self) -> None:
+        if not self._is_leader:
+            return
+        self._is_leader = False
+        try:
+            self._lock.release()
+        except LockError:
+            # The lock expired while we were calculating, and might be held by someone else by now
+            pass
+        except Exception as e:
+            logger.warning("query_coalescing_release_failed", cache_key=self.cache_manager.cache_key, error=str(e))
+
+    def wait_for_result(self) -> Optional[dict]:
+        """
+        Block until the leader writes a result newer than what is cached right now. Returns None if the leader gave
+        up without caching anything or the wait timed out, in which case the caller should calculate itself.
+        """
+        baseline = self._baseline_last_refresh
+        deadline = time.monotonic() + settings.QUERY_COALESCING_WAIT_TIMEOUT
+        poll_interval = 0.05
+
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, 1.0)
+
+            cached = self.cache_manager.get_cache_data()
+            if cached is not None and cached.get("last_refresh") != baseline:
+                QUERY_COALESCING_COUNTER.labels(result="follower_hit").inc()
+                return cached
+
+            if not self._lock.locked():
+                # Check the cache one last time, the leader may have written just before releasing
+                cached = self.cache_manager.get_cache_data()
+                if cached is not None and cached.get("last_refresh") != baseline:
+                    QUERY_COALESCING_COUNTER.labels(result="follower_hit").inc()
+                    return cached
+                QUERY_COALESCING_COUNTER.labels(result="follower_abandoned").inc()
+                return None
+
+        QUERY_COALESCING_COUNTER.labels(result="follower_timeout").inc()
+        return None
+
+    def _cached_last_refresh(self) -> Optional[str]:
+        cached = self.cache_manager.get_cache_data()
+        return cached.get("last_refresh") if cached is not None else None
@@ -0,0 +1,97 @@
+"""
+Runs the independent ClickHouse queries of one insight (series, compare periods) in parallel.
+
+All runners share one bounded thread pool, and each runner keeps at most `INSIGHT_QUERY_FANOUT_MAX_PARALLELISM` of its
+queries in flight. The runner's own concurrency limiter slot covers one query. Every other query running at the same time
+needs an extra slot from the same limiters, and when there is none, it waits for the runner's earlier queries to finish
+instead, so a saturated organization degrades to running queries one after another.
+"""
+
+import contextvars
+from collections import deque
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import AbstractContextManager, ExitStack
+from typing import Optional
+
+from django.conf import settings
+from prometheus_client import Counter
+
+from posthog.clickhouse import query_tagging
+
+QUERY_FANOUT_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.INSIGHT_QUERY_FANOUT_MAX_WORKERS,
+    thread_name_prefix="insight_query_fanout",
+)
+
+QUERY_FANOUT_SLOT_COUNTER = Counter(
+    "posthog_insight_query_fanout_extra_slot",
+    "Attempts to run an insight query in parallel to another one of the same insight, by whether a slot was free.",
+    labelnames=["result"],
+)
+
+
+def _run_task(task: Callable[[], None], tags: query_tagging.QueryTags) -> None:
+    # Every task gets its own copy of the tags, as executing queries adds tags of its own
+    query_tagging.query_tags.set(tags.model_copy(deep=True))
+    try:
+        task()
+    finally:
+        from django.db import connection
+
+        # This will only close the DB connection for the pool thread and not the whole app
+        connection.close()
+
+
+def execute_in_parallel(
+    tasks: Sequence[Callable[[], None]],
+    *,
+    try_extra_slot: Callable[[int], AbstractContextManager[bool]],
+    max_parallelism: Optional[int] = None,
+) -> None:
+    """
+    Runs `tasks` concurrently and returns when all of them are done, raising the first error any of them raised.
+
+    `try_extra_slot(index)` must return a context manager yielding whether task `index` may run in parallel to the
+    others, holding on to whatever allowed it until the task is done.
+    """
+    max_parallelism = max(1, max_parallelism or settings.INSIGHT_QUERY_FANOUT_MAX_PARALLELISM)
+    tags = query_tagging.get_query_tags()
+    pending = deque(enumerate(tasks))
+    # Future -> whether the task runs on the runner's own slot, and the extra slot it holds otherwise
+    in_flight: dict[Future, tuple[bool, ExitStack]] = {}
+    own_slot_free = True
+    errors: list[BaseException] = []
+
+    try:
+        while pending or in_flight:
+            while pending and len(in_flight) < max_parallelism:
+                index, task = pending[0]
+                stack = ExitStack()
+                uses_own_slot = own_slot_free
+                if not uses_own_slot:
+                    got_slot = stack.enter_context(try_extra_slot(index))
+                    QUERY_FANOUT_SLOT_COUNTER.labels(result="acquired" if got_slot else "busy").inc()
+                    if not got_slot:
+                        stack.close()
+                        break
+                pending.popleft()
+                own_slot_free = own_slot_free and not uses_own_slot
+                context = contextvars.copy_context()
+                future = QUERY_FANOUT_EXECUTOR.submit(context.run, _run_task, task, tags)
+                in_flight[future] = (uses_own_slot, stack)
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                uses_own_slot, stack = in_flight.pop(future)
+                stack.close()
+                own_slot_free = own_slot_free or uses_own_slot
+                if future.exception() is not None:
+                    errors.append(future.exception())  # type: ignore[arg-type]
+    finally:
+        # Only reached with queries in flight if waiting was interrupted, don't leak their slots
+        for _, stack in in_flight.values():
+            stack.close()
+
+    if errors:
+        raise errors[0]
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import ExitStack, contextmanager
 from datetime import UTC, datetime, timedelta
 from enum import StrEnum
 from types import UnionType
@@ -29,6 +31,8 @@ from posthog.hogql.printer import print_ast
 from posthog.hogql.query import create_default_modifiers_for_team
 from posthog.hogql.timings import HogQLTimings
 from posthog.hogql_queries.query_cache import QueryCacheManager
+from posthog.hogql_queries.query_coalescing import QueryCoalescer
+from posthog.hogql_queries.query_fanout import execute_in_parallel
 from posthog.metrics import LABEL_TEAM_ID
 from posthog.models import Team, User
 from posthog.models.team import WeekStartDay
@@ -79,7 +83,7 @@ from posthog.schema import (
     MarketingAnalyticsTableQuery,
 )
 from posthog.schema_helpers import to_dict
-from posthog.utils import generate_cache_key, get_from_dict_or_attr, to_json
+from posthog.utils import generate_cache_key, generate_short_id, get_from_dict_or_attr, to_json
 
 logger = structlog.get_logger(__name__)
 
@@ -712,6 +716,10 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         self.limit_context = limit_context or LimitContext.QUERY
         self.query_id = query_id
         self.workload = workload
+        # Set when the cache held a result that's too old to serve, see `calculate_incremental`
+        self.stale_cached_response: Optional[CR] = None
+        # The dashboard the running calculation counts against, so parallel queries take slots of the same limiters
+        self.limits_dashboard_id: Optional[int] = None
 
         if not self.is_query_node(query):
             if isinstance(self.query_type, UnionType):
@@ -763,6 +771,25 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
     def calculate(self) -> R:
         raise NotImplementedError()
 
+    def calculate_incremental(self, stale_response: CR) -> Optional[R]:
+        """
+        Can be overridden to refresh a stale cached response by only recalculating the part of it that may have
+        changed since it was cached. Returning None falls back to a full `calculate()`.
+        """
+        return None
+
+    def _calculate_fresh(self) -> R:
+        if self.stale_cached_response is not None:
+            try:
+                with self.timings.measure("calculate_incremental"):
+                    response = self.calculate_incremental(self.stale_cached_response)
+            except Exception as e:
+                capture_exception(e)
+                response = None
+            if response is not None:
+                return response
+        return self.calculate()
+
     def enqueue_async_calculation(
         self,
         *,
@@ -833,6 +860,7 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
                 return cached_response
 
             self.count_query_cache_hit(hit="stale", trigger=cached_response.calculation_trigger or "")
+            self.stale_cached_response = cached_response
             # We have a stale result. If we aren't allowed to calculate, let's still return it
             # – otherwise let's proceed to calculation
             if execution_mode == ExecutionMode.CACHE_ONLY_NEVER_CALCULATE:
@@ -922,65 +950,133 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
                 if results:
                     return results
 
-            last_refresh = datetime.now(UTC)
-            target_age = self.cache_target_age(last_refresh=last_refresh)
+            coalescer: Optional[QueryCoalescer] = None
+            # A forced recalculation must not be answered from the cache, not even by a calculation that just finished
+            if execution_mode != ExecutionMode.CALCULATE_BLOCKING_ALWAYS and self._should_coalesce():
+                coalescer = QueryCoalescer(cache_manager)
+                if not coalescer.try_lead():
+                    coalesced_response = self._coalesced_response(coalescer)
+                    if coalesced_response is not None:
+                        return coalesced_response
+                    coalescer = None
+                # Another calculation may have finished since we looked, check the cache once more before calculating
+                fresh_cached_response = self._fresh_cached_response(cache_manager)
+                if fresh_cached_response is not None:
+                    if coalescer is not None:
+                        coalescer.release()
+                    return fresh_cached_response
 
-            # Avoid affecting cache key
-            # Add user based modifiers here, primarily for user specific feature flagging
-            if user:
-                self.modifiers = create_default_modifiers_for_user(user, self.team, self.modifiers)
-                self.modifiers.useMaterializedViews = True
+            try:
+                last_refresh = datetime.now(UTC)
+                target_age = self.cache_target_age(last_refresh=last_refresh)
+
+                # Avoid affecting cache key
+                # Add user based modifiers here, primarily for user specific feature flagging
+                if user:
+                    self.modifiers = create_default_modifiers_for_user(user, self.team, self.modifiers)
+                    self.modifiers.useMaterializedViews = True
+
+                with self.query_limits(dashboard_id=dashboard_id):
+                    fresh_response_dict = {
+                        **self._calculate_fresh().model_dump(),
+                        "is_cached": False,
+                        "last_refresh": last_refresh,
+                        "next_allowed_client_refresh": last_refresh + self._refresh_frequency(),
+                        "cache_key": cache_key,
+                        "timezone": self.team.timezone,
+                        "cache_target_age": target_age,
+                    }
+                if get_query_tag_value("trigger"):
+                    fresh_response_dict["calculation_trigger"] = get_query_tag_value("trigger")
+                fresh_response = CachedResponse(**fresh_response_dict)
+
+                # Don't cache debug queries with errors and export queries
+                has_error: Optional[list] = fresh_response_dict.get("error", None)
+                if (has_error is None or len(has_error) == 0) and self.limit_context != LimitContext.EXPORT:
+                    cache_manager.set_cache_data(
+                        response=fresh_response_dict,
+                        # This would be a possible place to decide to not ever keep this cache warm
+                        # Example: Not for super quickly calculated insights
+                        # Set target_age to None in that case
+                        target_age=target_age,
+                    )
+                    QUERY_CACHE_WRITE_COUNTER.labels(team_id=self.team.pk).inc()
 
-            concurrency_limit = self.get_api_queries_concurrency_limit()
-            with get_api_personal_rate_limiter().run(
-                is_api=self.is_query_service,
-                team_id=self.team.pk,
+                return fresh_response
+            finally:
+                if coalescer is not None:
+                    coalescer.release()
+
+    @contextmanager
+    def query_limits(self, dashboard_id: Optional[int] = None) -> Iterator[Callable[[], None]]:
+        """
+        Holds the API and app concurrency limits for the duration of a calculation, and tags API queries.
+        Yields a function that refreshes the held slots, for calculations that may outlive the limiters' TTLs.
+        """
+        concurrency_limit = self.get_api_queries_concurrency_limit()
+        with get_api_personal_rate_limiter().run(
+            is_api=self.is_query_service,
+            team_id=self.team.pk,
+            org_id=self.team.organization_id,
+            task_id=self.query_id,
+            limit=concurrency_limit,
+        ) as refresh_api_limit:
+            if self.is_query_service:
+                tag_queries(chargeable=1)
+
+            with get_app_org_rate_limiter().run(
                 org_id=self.team.organization_id,
                 task_id=self.query_id,
-                limit=concurrency_limit,
-            ):
-                if self.is_query_service:
-                    tag_queries(chargeable=1)
-
-                with get_app_org_rate_limiter().run(
+                team_id=self.team.id,
+                is_api=get_query_tag_value("access_method") == "personal_api_key",
+            ) as refresh_org_limit:
+                with get_app_dashboard_queries_rate_limiter().run(
                     org_id=self.team.organization_id,
+                    dashboard_id=dashboard_id,
                     task_id=self.query_id,
                     team_id=self.team.id,
                     is_api=get_query_tag_value("access_method") == "personal_api_key",
-                ):
-                    with get_app_dashboard_queries_rate_limiter().run(
-                        org_id=self.team.organization_id,
-                        dashboard_id=dashboard_id,
-                        task_id=self.query_id,
-                        team_id=self.team.id,
-                        is_api=get_query_tag_value("access_method") == "personal_api_key",
-                    ):
-                        fresh_response_dict = {
-                            **self.calculate().model_dump(),
-                            "is_cached": False,
-                            "last_refresh": last_refresh,
-                            "next_allowed_client_refresh": last_refresh + self._refresh_frequency(),
-                            "cache_key": cache_key,
-                            "timezone": self.team.timezone,
-                            "cache_target_age": target_age,
-                        }
-            if get_query_tag_value("trigger"):
-                fresh_response_dict["calculation_trigger"] = get_query_tag_value("trigger")
-            fresh_response = CachedResponse(**fresh_response_dict)
-
-            # Don't cache debug queries with errors and export queries
-            has_error: Optional[list] = fresh_response_dict.get("error", None)
-            if (has_error is None or len(has_error) == 0) and self.limit_context != LimitContext.EXPORT:
-                cache_manager.set_cache_data(
-                    response=fresh_response_dict,
-                    # This would be a possible place to decide to not ever keep this cache warm
-                    # Example: Not for super quickly calculated insights
-                    # Set target_age to None in that case
-                    target_age=target_age,
-                )
-                QUERY_CACHE_WRITE_COUNTER.labels(team_id=self.team.pk).inc()
+                ) as refresh_dashboard_limit:
+
+                    def refresh_limits() -> None:
+                        refresh_api_limit()
+                        refresh_org_limit()
+                        refresh_dashboard_limit()
+
+                    self.limits_dashboard_id = dashboard_id
+                    try:
+                        yield refresh_limits
+                    finally:
+                        self.limits_dashboard_id = None
+
+    def _should_coalesce(self) -> bool:
+        # Export results aren't cached, so there would be nothing for followers to pick up
+        return QueryCoalescer.is_enabled() and self.limit_context != LimitContext.EXPORT
+
+    def _coalesced_response(self, coalescer: QueryCoalescer) -> Optional[CR]:
+        """Wait for an identical in-flight calculation and return its result, if it lands in the cache in time."""
+        cached_response = self._parse_cached_response(coalescer.wait_for_result())
+        if cached_response is not None:
+            self.count_query_cache_hit(hit="coalesced", trigger=cached_response.calculation_trigger or "")
+        return cached_response
+
+    def _fresh_cached_response(self, cache_manager: QueryCacheManager) -> Optional[CR]:
+        cached_response = self._parse_cached_response(cache_manager.get_cache_data())
+        if cached_response is None or self._is_stale(last_refresh=last_refresh_from_cached_result(cached_response)):
+            return None
+        self.count_query_cache_hit(hit="hit", trigger=cached_response.calculation_trigger or "")
+        return cached_response
 
-            return fresh_response
+    def _parse_cached_response(self, cached_response_candidate: Optional[dict]) -> Optional[CR]:
+        if not self.is_cached_response(cached_response_candidate):
+            return None
+
+        cached_response_candidate["is_cached"] = True
+        try:
+            return self.cached_response_type(**cached_response_candidate)
+        except Exception as e:
+            capture_exception(Exception(f"Error parsing coalesced cached response: {e}"))
+            return None
 
     def get_api_queries_concurrency_limit(self):
         """
@@ -1001,6 +1097,57 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         feature = self.team.organization.get_available_feature(AvailableFeature.API_QUERIES_CONCURRENCY)
         return feature.get("limit") if feature else None
 
+    def execute_in_parallel(self, tasks: Sequence[Callable[[], None]]) -> None:
+        """
+        Runs independent queries of this runner concurrently, see `query_fanout`. Queries past the first one take
+        extra slots from all the limiters the runner itself went through in `query_limits`.
+        """
+        # This exists so that we're not spawning threads during unit tests. We can't do
+        # this right now due to the lack of multithreaded support of Django
+        if len(tasks) <= 1 or settings.IN_UNIT_TESTING:
+            for task in tasks:
+                task()
+            return
+
+        is_api = get_query_tag_value("access_method") == "personal_api_key"
+        api_concurrency_limit = self.get_api_queries_concurrency_limit()
+        query_id = self.query_id or generate_short_id()
+
+        @contextmanager
+        def try_extra_slot(index: int) -> Iterator[bool]:
+            # Also held as the member in Celery, where the task id of the limiters is the id of the Celery task
+            slot_id = f"{query_id}:fanout:{index}"
+            slots = (
+                get_api_personal_rate_limiter().run_if_available(
+                    is_api=self.is_query_service,
+                    team_id=self.team.pk,
+                    org_id=self.team.organization_id,
+                    task_id=slot_id,
+                    slot_id=slot_id,
+                    limit=api_concurrency_limit,
+                ),
+                get_app_org_rate_limiter().run_if_available(
+                    org_id=self.team.organization_id,
+                    task_id=slot_id,
+                    slot_id=slot_id,
+                    team_id=self.team.id,
+                    is_api=is_api,
+                ),
+                get_app_dashboard_queries_rate_limiter().run_if_available(
+                    org_id=self.team.organization_id,
+                    dashboard_id=self.limits_dashboard_id,
+                    task_id=slot_id,
+                    slot_id=slot_id,
+                    team_id=self.team.id,
+                    is_api=is_api,
+                ),
+            )
+            with ExitStack() as stack:
+                # Stops at the first limiter without a free slot
+                yield all(stack.enter_context(slot) for slot in slots)
+
+        execute_in_parallel(tasks, try_extra_slot=try_extra_slot)
+
     @abstractmethod
     def to_query(self) -> ast.SelectQuery | ast.SelectSetQuery:
         raise NotImplementedError()
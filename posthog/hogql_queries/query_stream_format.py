@@ -0,0 +1,215 @@
+"""
+Encoders for streamed query results.
+
+Each encoder turns an iterator of row batches (as yielded by `sync_execute_iter`) into an iterator of byte chunks,
+one or more per batch, so a `StreamingHttpResponse` can send rows as soon as ClickHouse returns them.
+"""
+
+import csv
+import io
+from collections.abc import Iterable, Iterator, Sequence
+from enum import StrEnum
+from typing import Any
+
+import orjson
+import pyarrow as pa
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class QueryStreamFormat(StrEnum):
+    JSONL = "jsonl"
+    CSV = "csv"
+    ARROW = "arrow"
+
+
+QUERY_STREAM_CONTENT_TYPES: dict[QueryStreamFormat, str] = {
+    QueryStreamFormat.JSONL: "application/jsonl",
+    QueryStreamFormat.CSV: "text/csv",
+    QueryStreamFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+RowBatches = Iterable[Sequence[Sequence[Any]]]
+
+
+def _dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=JSONEncoder().default, option=orjson.OPT_UTC_Z)
+
+
+def _unique_column_names(columns: list[str]) -> list[str]:
+    """Suffixes repeated column names, e.g. `count`, `count_2`, so they don't overwrite each other as object keys."""
+    seen: set[str] = set()
+    unique = []
+    for column in columns:
+        name, suffix = column, 1
+        while name in seen:
+            suffix += 1
+            name = f"{column}_{suffix}"
+        seen.add(name)
+        unique.append(name)
+    return unique
+
+
+def encode_jsonl(columns: list[str], column_types: list[str], batches: RowBatches) -> Iterator[bytes]:
+    keys = _unique_column_names(columns)
+    for batch in batches:
+        yield b"".join(_dumps(dict(zip(keys, row))) + b"\n" for row in batch)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, list | tuple | dict):
+        return _dumps(value).decode("utf-8")
+    return value
+
+
+def encode_csv(columns: list[str], column_types: list[str], batches: RowBatches) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    writer.writerow(columns)
+    yield flush()
+    for batch in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield flush()
+
+
+_ARROW_TYPES: dict[str, pa.DataType] = {
+    "Bool": pa.bool_(),
+    "UInt8": pa.uint8(),
+    "UInt16": pa.uint16(),
+    "UInt32": pa.uint32(),
+    "UInt64": pa.uint64(),
+    "Int8": pa.int8(),
+    "Int16": pa.int16(),
+    "Int32": pa.int32(),
+    "Int64": pa.int64(),
+    "Float32": pa.float32(),
+    "Float64": pa.float64(),
+    "Date": pa.date32(),
+    "Date32": pa.date32(),
+}
+
+_DATETIME64_UNITS = {0: "s", 3: "ms", 6: "us", 9: "ns"}
+
+
+def _unwrap(clickhouse_type: str, wrapper: str) -> str | None:
+    if clickhouse_type.startswith(f"{wrapper}(") and clickhouse_type.endswith(")"):
+        return clickhouse_type[len(wrapper) + 1 : -1]
+    return None
+
+
+def _type_arguments(arguments: str) -> list[str]:
+    return [argument.strip().strip("'") for argument in arguments.split(",")]
+
+
+def arrow_type(clickhouse_type: str) -> pa.DataType:
+    """
+    The Arrow type for values of a ClickHouse column type. Types without an Arrow counterpart (e.g. UUIDs, enums,
+    maps, tuples and 128 or 256 bit integers) are sent as strings.
+    """
+    for wrapper in ("Nullable", "LowCardinality"):
+        inner = _unwrap(clickhouse_type, wrapper)
+        if inner is not None:
+            return arrow_type(inner)
+
+    if clickhouse_type in _ARROW_TYPES:
+        return _ARROW_TYPES[clickhouse_type]
+    if (element_type := _unwrap(clickhouse_type, "Array")) is not None:
+        return pa.list_(arrow_type(element_type))
+    if clickhouse_type == "DateTime":
+        return pa.timestamp("s")
+    if (arguments := _unwrap(clickhouse_type, "DateTime")) is not None:
+        return pa.timestamp("s", tz=_type_arguments(arguments)[0])
+    if (arguments := _unwrap(clickhouse_type, "DateTime64")) is not None:
+        precision, *timezone = _type_arguments(arguments)
+        unit = next(unit for digits, unit in _DATETIME64_UNITS.items() if int(precision) <= digits)
+        return pa.timestamp(unit, tz=timezone[0] if timezone else None)
+    if (arguments := _unwrap(clickhouse_type, "Decimal")) is not None:
+        precision, scale = (int(argument) for argument in _type_arguments(arguments))
+        if precision <= 38:
+            return pa.decimal128(precision, scale)
+    return pa.string()
+
+
+def _arrow_values(values: list[Any], type: pa.DataType) -> list[Any]:
+    if pa.types.is_string(type):
+        return [None if value is None else str(_csv_value(value)) for value in values]
+    if pa.types.is_list(type):
+        return [None if value is None else _arrow_values(list(value), type.value_type) for value in values]
+    return values
+
+
+def _arrow_column(values: list[Any], type: pa.DataType) -> pa.Array:
+    return pa.array(_arrow_values(values, type), type=type)
+
+
+def encode_arrow(columns: list[str], column_types: list[str], batches: RowBatches) -> Iterator[bytes]:
+    """
+    Arrow IPC stream, with the schema derived from the ClickHouse column types.
+    """
+    sink = io.BytesIO()
+    # Field names don't need to be unique in Arrow, so columns are positional like in the other formats
+    schema = pa.schema([pa.field(name, arrow_type(type)) for name, type in zip(columns, column_types)])
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def flush() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+        return chunk
+
+    # The schema goes out before the first batch, so clients see the columns even if there are no rows
+    yield flush()
+    for batch in batches:
+        if not batch:
+            continue
+        column_values = [list(values) for values in zip(*batch)]
+        arrays = [_arrow_column(values, field.type) for values, field in zip(column_values, schema)]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        yield flush()
+
+    writer.close()
+    yield flush()
+
+
+QUERY_STREAM_ENCODERS = {
+    QueryStreamFormat.JSONL: encode_jsonl,
+    QueryStreamFormat.CSV: encode_csv,
+    QueryStreamFormat.ARROW: encode_arrow,
+}
+
+
+class EncodedQueryStream(Iterator[bytes]):
+    """
+    Encoded chunks that close the row batches too when closed, whether or not iteration started. Django closes the
+    content of a `StreamingHttpResponse` along with the response, which happens even if the body was never sent.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], batches: RowBatches):
+        self._chunks = chunks
+        self._batches = batches
+
+    def __next__(self) -> bytes:
+        return next(self._chunks)
+
+    def close(self) -> None:
+        try:
+            close_chunks = getattr(self._chunks, "close", None)
+            if close_chunks is not None:
+                close_chunks()
+        finally:
+            close_batches = getattr(self._batches, "close", None)
+            if close_batches is not None:
+                close_batches()
+
+
+def encode_query_stream(
+    stream_format: QueryStreamFormat, columns: list[str], column_types: list[str], batches: RowBatches
+) -> EncodedQueryStream:
+    """`column_types` are the ClickHouse types of the columns, e.g. `Nullable(String)`."""
+    return EncodedQueryStream(QUERY_STREAM_ENCODERS[stream_format](columns, column_types, batches), batches)
@@ -0,0 +1,95 @@
+from datetime import datetime, UTC
+
+from django.core.cache import cache
+from django.test import override_settings
+from parameterized import parameterized
+
+from posthog.cache_utils import OrjsonJsonSerializer
+from posthog.caching.tolerant_zlib_compressor import TolerantZlibCompressor
+from posthog.hogql_queries.query_cache import QueryCacheManager
+from posthog.hogql_queries.query_cache_format import (
+    QUERY_CACHE_FORMAT_MAGIC,
+    UnsupportedQueryCacheFormat,
+    decode_query_cache_data,
+    encode_query_cache_data,
+)
+from posthog.test.base import BaseTest
+
+
+class TestQueryCacheFormat(BaseTest):
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    @parameterized.expand(
+        [
+            ("table", [["a", 1, None], ["b", 2, 3.5], ["c", 3, None]]),
+            (
+                "series",
+                [
+                    {"label": "$pageview", "data": [1, 2, 3], "breakdown_value": "Chrome"},
+                    {"label": "$pageview", "data": [4, 5, 6], "breakdown_value": "Safari"},
+                ],
+            ),
+            ("ragged_rows", [["a", 1], ["b"]]),
+            ("mixed_dicts", [{"a": 1}, {"b": 2}]),
+            ("empty", []),
+            ("empty_rows", [[], []]),
+            ("not_a_list", {"some": "value"}),
+        ]
+    )
+    def test_round_trip(self, _name, results):
+        response = {"results": results, "is_cached": False, "cache_key": "abc", "timezone": "UTC"}
+
+        encoded = encode_query_cache_data(response)
+
+        assert encoded.startswith(QUERY_CACHE_FORMAT_MAGIC)
+        assert decode_query_cache_data(encoded) == response
+
+    def test_round_trip_without_results(self):
+        response = {"is_cached": False, "cache_key": "abc"}
+        assert decode_query_cache_data(encode_query_cache_data(response)) == response
+
+    def test_dates_serialize_like_plain_format(self):
+        response = {"results": [[1]], "last_refresh": datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC)}
+
+        decoded = decode_query_cache_data(encode_query_cache_data(response))
+
+        assert (
+            decoded["last_refresh"]
+            == OrjsonJsonSerializer({}).loads(OrjsonJsonSerializer({}).dumps(response))["last_refresh"]
+        )
+
+    def test_reads_plain_format(self):
+        response = {"results": [["a", 1]], "is_cached": False}
+        assert decode_query_cache_data(OrjsonJsonSerializer({}).dumps(response)) == response
+
+    def test_rejects_unknown_version(self):
+        encoded = encode_query_cache_data({"results": []})
+        with self.assertRaises(UnsupportedQueryCacheFormat):
+            decode_query_cache_data(QUERY_CACHE_FORMAT_MAGIC + bytes([255]) + encoded[5:])
+
+    def test_compact_format_is_smaller_than_compressed_plain_format(self):
+        browsers = ["Chrome", "Safari", "Firefox", "Edge"]
+        response = {
+            "results": [[f"2024-01-{i % 28 + 1:02d}", browsers[i * 7 % 4], (i * 7919) % 100003] for i in range(2000)]
+        }
+
+        # The plain format gets compressed by the Redis cache compressor, the compact format is stored as is
+        with override_settings(USE_REDIS_COMPRESSION=True):
+            compressed_plain = TolerantZlibCompressor({}).compress(OrjsonJsonSerializer({}).dumps(response))
+
+        assert len(encode_query_cache_data(response)) < len(compressed_plain) * 0.75
+
+    def test_cache_manager_reads_both_formats(self):
+        manager = QueryCacheManager(team_id=self.team.pk, cache_key="test_query_cache_format")
+        response = {"results": [["a", 1], ["b", 2]], "is_cached": False}
+
+        with override_settings(QUERY_CACHE_COMPACT_FORMAT=False):
+            manager.set_cache_data(response=response, target_age=None)
+        assert manager.get_cache_data() == response
+
+        with override_settings(QUERY_CACHE_COMPACT_FORMAT=True):
+            manager.set_cache_data(response=response, target_age=None)
+        assert cache.get("test_query_cache_format").startswith(QUERY_CACHE_FORMAT_MAGIC)
+        assert manager.get_cache_data() == response
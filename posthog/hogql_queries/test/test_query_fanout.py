@@ -0,0 +1,91 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.test import SimpleTestCase, override_settings
+
+from posthog.clickhouse.query_tagging import get_query_tag_value, tag_queries, tags_context
+from posthog.hogql_queries.query_fanout import execute_in_parallel
+
+
+class TestQueryFanout(SimpleTestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.finished: list[int] = []
+
+    def _task(self, index: int, duration: float = 0.05):
+        def task():
+            with self.lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(duration)
+            with self.lock:
+                self.running -= 1
+                self.finished.append(index)
+
+        return task
+
+    @staticmethod
+    @contextmanager
+    def _free_slot(index: int):
+        yield True
+
+    @staticmethod
+    @contextmanager
+    def _no_slot(index: int):
+        yield False
+
+    @override_settings(INSIGHT_QUERY_FANOUT_MAX_PARALLELISM=3)
+    def test_runs_tasks_in_parallel_up_to_the_limit(self):
+        execute_in_parallel([self._task(index) for index in range(6)], try_extra_slot=self._free_slot)
+
+        self.assertEqual(sorted(self.finished), list(range(6)))
+        self.assertEqual(self.max_running, 3)
+
+    def test_runs_one_at_a_time_without_extra_slots(self):
+        execute_in_parallel([self._task(index) for index in range(4)], try_extra_slot=self._no_slot)
+
+        self.assertEqual(self.finished, [0, 1, 2, 3])
+        self.assertEqual(self.max_running, 1)
+
+    def test_releases_extra_slots(self):
+        held: set[int] = set()
+        released: list[int] = []
+
+        @contextmanager
+        def counting_slot(index: int):
+            held.add(index)
+            try:
+                yield True
+            finally:
+                held.discard(index)
+                released.append(index)
+
+        execute_in_parallel([self._task(index) for index in range(3)], try_extra_slot=counting_slot)
+
+        self.assertEqual(held, set())
+        self.assertEqual(sorted(released), [1, 2])
+
+    def test_raises_first_error_after_all_tasks_ran(self):
+        def failing():
+            raise ValueError("nope")
+
+        with self.assertRaises(ValueError):
+            execute_in_parallel([failing, self._task(1), self._task(2)], try_extra_slot=self._free_slot)
+
+        self.assertEqual(sorted(self.finished), [1, 2])
+
+    def test_tasks_get_their_own_copy_of_query_tags(self):
+        seen: list = []
+
+        def task():
+            seen.append(get_query_tag_value("client_query_id"))
+            tag_queries(client_query_id="changed")
+
+        with tags_context(client_query_id="original"):
+            execute_in_parallel([task, task], try_extra_slot=self._free_slot)
+            self.assertEqual(get_query_tag_value("client_query_id"), "original")
+
+        self.assertEqual(seen, ["original", "original"])
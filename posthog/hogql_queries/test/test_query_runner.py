@@ -4,9 +4,12 @@ from unittest import mock
 from zoneinfo import ZoneInfo
 
 from django.core.cache import cache
+from django.test import override_settings
 from freezegun import freeze_time
 from pydantic import BaseModel
 
+from posthog.hogql_queries.query_cache import QueryCacheManager
+from posthog.hogql_queries.query_coalescing import QueryCoalescer
 from posthog.hogql_queries.query_runner import ExecutionMode, QueryRunner
 from posthog.hogql_queries.utils.query_date_range import QueryDateRange
 from posthog.models.team.team import Team, WeekStartDay
@@ -321,6 +324,113 @@ class TestQueryRunner(BaseTest):
             self.assertEqual(response.last_refresh.isoformat(), "2023-02-04T13:37:42+00:00")
             mock_on_commit.assert_called_once()
 
+    @override_settings(QUERY_COALESCING_ENABLED=True, QUERY_COALESCING_WAIT_TIMEOUT=5)
+    def test_coalesces_with_in_flight_calculation(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        leader = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        follower = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        cache_manager = QueryCacheManager(team_id=self.team.pk, cache_key=leader.get_cache_key())
+
+        # Simulate another worker holding the lock and finishing its calculation while we wait
+        leader_coalescer = QueryCoalescer(cache_manager)
+        assert leader_coalescer.try_lead()
+
+        def finish_leader(*args, **kwargs):
+            with override_settings(QUERY_COALESCING_ENABLED=False):
+                leader.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+            leader_coalescer.release()
+            return None
+
+        with (
+            mock.patch.object(QueryCoalescer, "_cached_last_refresh", side_effect=finish_leader),
+            mock.patch.object(follower, "calculate", wraps=follower.calculate) as mock_calculate,
+        ):
+            response = follower.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        self.assertIsInstance(response, TheTestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, True)
+        mock_calculate.assert_not_called()
+
+    @override_settings(QUERY_COALESCING_ENABLED=True, QUERY_COALESCING_WAIT_TIMEOUT=5)
+    def test_uses_result_of_calculation_finished_before_taking_the_lock(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        other = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        try_lead = QueryCoalescer.try_lead
+
+        def finish_other_then_lead(coalescer):
+            # Another worker calculates and caches the result between our cache lookup and taking the lock
+            with override_settings(QUERY_COALESCING_ENABLED=False):
+                other.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+            return try_lead(coalescer)
+
+        with (
+            mock.patch.object(QueryCoalescer, "try_lead", autospec=True, side_effect=finish_other_then_lead),
+            mock.patch.object(runner, "calculate", wraps=runner.calculate) as mock_calculate,
+        ):
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        self.assertIsInstance(response, TheTestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, True)
+        mock_calculate.assert_not_called()
+
+    @override_settings(QUERY_COALESCING_ENABLED=True, QUERY_COALESCING_WAIT_TIMEOUT=5)
+    def test_calculates_when_leader_gives_up_without_result(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        cache_manager = QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key())
+
+        leader_coalescer = QueryCoalescer(cache_manager)
+        assert leader_coalescer.try_lead()
+
+        def release_leader(*args, **kwargs):
+            leader_coalescer.release()
+            return None
+
+        with mock.patch.object(QueryCoalescer, "_cached_last_refresh", side_effect=release_leader):
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        self.assertIsInstance(response, TheTestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, False)
+
+    @override_settings(QUERY_COALESCING_ENABLED=True, QUERY_COALESCING_WAIT_TIMEOUT=5)
+    def test_forced_recalculation_ignores_calculation_finished_before_taking_the_lock(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        other = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        runner = TestQueryRunner(query={"some_attr": "bla"}, team=self.team)
+        other.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+
+        with (
+            mock.patch.object(QueryCoalescer, "try_lead") as mock_try_lead,
+            mock.patch.object(runner, "calculate", wraps=runner.calculate) as mock_calculate,
+        ):
+            response = runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+
+        self.assertIsInstance(response, TheTestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, False)
+        mock_calculate.assert_called_once()
+        mock_try_lead.assert_not_called()
+
+    @override_settings(QUERY_COALESCING_ENABLED=True, QUERY_COALESCING_WAIT_TIMEOUT=5)
+    def test_hogql_query_through_coalescing(self):
+        from posthog.hogql_queries.hogql_query_runner import HogQLQueryRunner
+
+        query = HogQLQuery(query="select 1 + 1")
+        first = HogQLQueryRunner(query=query, team=self.team).run(
+            execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE
+        )
+        second = HogQLQueryRunner(query=query, team=self.team).run(
+            execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE
+        )
+        forced = HogQLQueryRunner(query=query, team=self.team).run(
+            execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS
+        )
+
+        assert first.is_cached is False
+        assert second.is_cached is True
+        assert forced.is_cached is False
+        assert [[list(row) for row in response.results] for response in (first, second, forced)] == [[[2]]] * 3
+
     def test_modifier_passthrough(self):
         try:
             from ee.clickhouse.materialized_columns.analyze import materialize
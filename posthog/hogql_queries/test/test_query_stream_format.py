@@ -0,0 +1,122 @@
+import json
+from datetime import datetime, UTC
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import pyarrow as pa
+
+from posthog.hogql_queries.query_stream_format import QueryStreamFormat, encode_query_stream
+from posthog.test.base import BaseTest
+
+COLUMNS = ["event", "count", "tags"]
+TYPES = ["String", "UInt64", "Array(String)"]
+BATCHES = [[("sign up", 1, ["a", "b"]), ("sign out", 2, [])], [("pageview", 3, ["c"])]]
+
+
+class TestQueryStreamFormat(BaseTest):
+    def test_jsonl(self):
+        chunks = list(encode_query_stream(QueryStreamFormat.JSONL, COLUMNS, TYPES, BATCHES))
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(
+            [json.loads(line) for line in b"".join(chunks).decode().splitlines()],
+            [
+                {"event": "sign up", "count": 1, "tags": ["a", "b"]},
+                {"event": "sign out", "count": 2, "tags": []},
+                {"event": "pageview", "count": 3, "tags": ["c"]},
+            ],
+        )
+
+    def test_jsonl_serializes_dates_and_uuids(self):
+        row = (datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC), UUID("01234567-89ab-cdef-0123-456789abcdef"))
+        chunks = list(
+            encode_query_stream(
+                QueryStreamFormat.JSONL, ["timestamp", "uuid"], ["DateTime64(6, 'UTC')", "UUID"], [[row]]
+            )
+        )
+
+        self.assertEqual(
+            json.loads(b"".join(chunks)),
+            {"timestamp": "2024-01-02T03:04:05Z", "uuid": "01234567-89ab-cdef-0123-456789abcdef"},
+        )
+
+    def test_jsonl_keeps_duplicate_columns(self):
+        chunks = list(
+            encode_query_stream(QueryStreamFormat.JSONL, ["count", "count", "count_2"], ["UInt64"] * 3, [[(1, 2, 3)]])
+        )
+
+        self.assertEqual(json.loads(b"".join(chunks)), {"count": 1, "count_2": 2, "count_2_2": 3})
+
+    def test_csv(self):
+        chunks = list(encode_query_stream(QueryStreamFormat.CSV, COLUMNS, TYPES, BATCHES))
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(
+            b"".join(chunks).decode().splitlines(),
+            ["event,count,tags", 'sign up,1,"[""a"",""b""]"', "sign out,2,[]", 'pageview,3,"[""c""]"'],
+        )
+
+    def test_arrow(self):
+        stream = b"".join(encode_query_stream(QueryStreamFormat.ARROW, COLUMNS, TYPES, BATCHES))
+
+        table = pa.ipc.open_stream(stream).read_all()
+        self.assertEqual(table.column_names, COLUMNS)
+        self.assertEqual(table.to_pylist()[2], {"event": "pageview", "count": 3, "tags": ["c"]})
+
+    def test_arrow_sends_types_without_arrow_counterpart_as_strings(self):
+        uuid = UUID("01234567-89ab-cdef-0123-456789abcdef")
+        batches = [[(uuid, None, [uuid])], [(None, {"a": 1}, [])]]
+
+        stream = b"".join(
+            encode_query_stream(
+                QueryStreamFormat.ARROW,
+                ["uuid", "properties", "uuids"],
+                ["Nullable(UUID)", "Map(String, Int64)", "Array(UUID)"],
+                batches,
+            )
+        )
+
+        self.assertEqual(
+            pa.ipc.open_stream(stream).read_all().to_pylist(),
+            [
+                {"uuid": str(uuid), "properties": None, "uuids": [str(uuid)]},
+                {"uuid": None, "properties": '{"a":1}', "uuids": []},
+            ],
+        )
+
+    def test_arrow_without_rows(self):
+        stream = b"".join(encode_query_stream(QueryStreamFormat.ARROW, COLUMNS, TYPES, []))
+
+        table = pa.ipc.open_stream(stream).read_all()
+        self.assertEqual(table.column_names, COLUMNS)
+        self.assertEqual(table.num_rows, 0)
+
+    def test_arrow_schema_comes_from_clickhouse_types(self):
+        # The first batch alone would make these a null and an int64 column
+        batches = [[(None, 1)], [(5, 2**64 - 1)]]
+
+        stream = b"".join(
+            encode_query_stream(QueryStreamFormat.ARROW, ["late", "big"], ["Nullable(Int64)", "UInt64"], batches)
+        )
+
+        table = pa.ipc.open_stream(stream).read_all()
+        self.assertEqual(table.schema.types, [pa.int64(), pa.uint64()])
+        self.assertEqual(table.to_pylist(), [{"late": None, "big": 1}, {"late": 5, "big": 2**64 - 1}])
+
+    def test_arrow_timestamps_keep_their_timezone(self):
+        timestamp = datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=UTC)
+
+        stream = b"".join(
+            encode_query_stream(QueryStreamFormat.ARROW, ["timestamp"], ["DateTime64(3, 'UTC')"], [[(timestamp,)]])
+        )
+
+        table = pa.ipc.open_stream(stream).read_all()
+        self.assertEqual(table.schema.field("timestamp").type, pa.timestamp("ms", tz="UTC"))
+        self.assertEqual(table.to_pylist(), [{"timestamp": timestamp}])
+
+    def test_closing_the_stream_closes_the_batches(self):
+        batches = MagicMock()
+
+        encode_query_stream(QueryStreamFormat.JSONL, COLUMNS, TYPES, batches).close()
+
+        batches.close.assert_called_once()
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.22 on 2025-08-06 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import posthog.models.utils
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posthog", "0818_alter_integration_kind"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=posthog.models.utils.UUIDT, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("event", models.CharField(max_length=400)),
+                ("breakdown_property", models.CharField(blank=True, max_length=400, null=True)),
+                ("math_property", models.CharField(blank=True, max_length=400, null=True)),
+                (
+                    "interval",
+                    models.CharField(choices=[("hour", "Hour"), ("day", "Day")], default="day", max_length=10),
+                ),
+                ("timezone", models.CharField(blank=True, max_length=240, null=True)),
+                ("modifiers", models.JSONField(blank=True, null=True)),
+                ("materialized_from", models.DateTimeField(blank=True, null=True)),
+                ("materialized_until", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("team", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="posthog.team")),
+            ],
+        ),
+    ]
@@ -45,6 +45,7 @@ from .event.event import Event
 from .event_buffer import EventBuffer
 from .event_definition import EventDefinition
 from .event_property import EventProperty
+from .event_rollup import EventRollup
 from .experiment import (
     Experiment,
     ExperimentHoldout,
@@ -145,6 +146,7 @@ __all__ = [
     "EventBuffer",
     "EventDefinition",
     "EventProperty",
+    "EventRollup",
     "Experiment",
     "ExperimentHoldout",
     "ExperimentSavedMetric",
@@ -309,7 +309,11 @@ class Cohort(FileSystemSyncMixin, RootTeamMixin, models.Model):
             raise
         finally:
             self.is_calculating = False
-            self.save()
+            # Only the calculation status, so that signals of fields which didn't change (e.g. the cached local
+            # evaluation responses) don't fire on every calculation
+            self.save(
+                update_fields=["count", "last_calculation", "errors_calculating", "last_error_at", "is_calculating"]
+            )
 
         # Update filter to match pending version if still valid
         Cohort.objects.filter(pk=self.pk).filter(Q(version__lt=pending_version) | Q(version__isnull=True)).update(
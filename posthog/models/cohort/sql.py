@@ -50,6 +50,50 @@ FROM (
 SETTINGS optimize_aggregation_in_order = 1, join_algorithm = 'auto'
 """
 
+# Carries members of the previous version that didn't change over to the new version, and re-evaluates the cohort
+# only for persons that changed. The filter on `id` is pushed down into the cohort query by ClickHouse where possible.
+RECALCULATE_COHORT_INCREMENTALLY_BY_ID = """
+INSERT INTO cohortpeople
+SELECT person_id, %(cohort_id)s as cohort_id, %(team_id)s as team_id, 1 AS sign, %(new_version)s AS version
+FROM cohortpeople
+WHERE team_id = %(team_id)s AND cohort_id = %(cohort_id)s AND version = %(previous_version)s
+  AND person_id NOT IN ({changed_persons})
+GROUP BY person_id
+UNION ALL
+SELECT id, %(cohort_id)s as cohort_id, %(team_id)s as team_id, 1 AS sign, %(new_version)s AS version
+FROM (
+    {cohort_filter}
+) as person
+WHERE id IN ({changed_persons})
+SETTINGS optimize_aggregation_in_order = 1, join_algorithm = 'auto'
+"""
+
+# Inserts the members of several cohorts at once, from (id, cohort_id) pairs, each under its own new version
+RECALCULATE_COHORTS_BATCH = """
+INSERT INTO cohortpeople
+SELECT id, cohort_id, %(team_id)s as team_id, 1 AS sign, transform(cohort_id, %(cohort_ids)s, %(new_versions)s, 0) AS version
+FROM (
+    {cohorts_filter}
+) as person
+SETTINGS optimize_aggregation_in_order = 1, join_algorithm = 'auto'
+"""
+
+# Persons whose properties or distinct IDs changed since the previous calculation
+GET_CHANGED_COHORT_PERSONS = """
+SELECT id FROM person WHERE team_id = %(team_id)s AND _timestamp > %(changed_since)s
+UNION ALL
+SELECT person_id FROM person_distinct_id2 WHERE team_id = %(team_id)s AND _timestamp > %(changed_since)s
+"""
+
+# Events that were ingested since the previous calculation, or dropped out of a rolling window since then
+CHANGED_COHORT_EVENTS_CONDITIONS = """
+AND event IN %(cohort_events)s
+AND (
+    COALESCE(inserted_at, _timestamp) > %(changed_since)s
+    OR (timestamp > %(aged_out_from)s AND timestamp <= %(aged_out_to)s)
+)
+"""
+
 # NOTE: Group by version id to ensure that signs are summed between corresponding rows.
 # Version filtering is not necessary as only positive rows of the latest version will be selected by sum(sign) > 0
 
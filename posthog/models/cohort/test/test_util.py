@@ -1,6 +1,9 @@
+from dateutil.relativedelta import relativedelta
+
 from posthog.models.cohort import Cohort, CohortOrEmpty
 from posthog.models.cohort.util import (
     get_dependent_cohorts,
+    get_incremental_calculation_plan,
     print_cohort_hogql_query,
     simplified_cohort_filter_properties,
     sort_cohorts_topologically,
@@ -377,6 +380,65 @@ class TestCohortUtils(BaseTest):
         self.assertIn("optimize_min_equality_disjunction_chain_length=4294967295", sql)
 
 
+class TestIncrementalCalculationPlan(BaseTest):
+    def _cohort(self, *values):
+        return Cohort.objects.create(
+            team=self.team, name="cohort", filters={"properties": {"type": "AND", "values": list(values)}}
+        )
+
+    def test_plan_for_person_properties_and_rolling_windows(self):
+        cohort = self._cohort(
+            {"key": "name", "value": "test", "type": "person"},
+            {
+                "key": "$pageview",
+                "event_type": "events",
+                "time_interval": "day",
+                "time_value": 30,
+                "value": "performed_event",
+                "type": "behavioral",
+            },
+            {
+                "key": "$purchase",
+                "event_type": "events",
+                "time_interval": "week",
+                "time_value": 2,
+                "operator": "gte",
+                "operator_value": 2,
+                "value": "performed_event_multiple",
+                "type": "behavioral",
+            },
+        )
+
+        plan = get_incremental_calculation_plan(cohort)
+
+        assert plan is not None
+        self.assertEqual(plan.event_names, ["$pageview", "$purchase"])
+        self.assertEqual(plan.windows, [relativedelta(days=30), relativedelta(weeks=2)])
+
+    def test_no_plan_for_filters_that_change_without_new_data(self):
+        for prop in [
+            {"key": "$pageview", "event_type": "events", "explicit_datetime": "-30d", "value": "performed_event"},
+            {
+                "key": "$pageview",
+                "event_type": "events",
+                "time_interval": "day",
+                "time_value": 8,
+                "seq_time_interval": "day",
+                "seq_time_value": 3,
+                "seq_event": "$pageview",
+                "seq_event_type": "events",
+                "value": "performed_event_sequence",
+            },
+            {"key": "signed_up", "value": "-7d", "operator": "is_date_after", "type": "person"},
+            {"key": "id", "value": 1, "type": "cohort"},
+        ]:
+            cohort = self._cohort({"type": "behavioral", **prop})
+            self.assertIsNone(get_incremental_calculation_plan(cohort), prop)
+
+        static_cohort = _create_cohort(team=self.team, name="static", groups=[], is_static=True)
+        self.assertIsNone(get_incremental_calculation_plan(static_cohort))
+
+
 class TestDependentCohorts(BaseTest):
     def test_dependent_cohorts_for_simple_cohort(self):
         cohort = _create_cohort(
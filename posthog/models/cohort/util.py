@@ -1,11 +1,16 @@
+import hashlib
+import json
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union, cast
 
 import structlog
 from dateutil import parser
+from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.utils import timezone
+from prometheus_client import Counter
 from rest_framework.exceptions import ValidationError
 
 from posthog.hogql.resolver_utils import extract_select_queries
@@ -18,31 +23,48 @@ from posthog.hogql import ast
 from posthog.hogql.constants import LimitContext, HogQLGlobalSettings
 from posthog.hogql.hogql import HogQLContext
 from posthog.hogql.modifiers import create_default_modifiers_for_team
+from posthog.hogql.parser import parse_expr, parse_select
 from posthog.hogql.printer import print_ast
 from posthog.models import Action, Filter, Team
 from posthog.models.action.util import format_action_filter
 from posthog.models.cohort.cohort import Cohort, CohortOrEmpty
 from posthog.models.cohort.sql import (
     CALCULATE_COHORT_PEOPLE_SQL,
+    CHANGED_COHORT_EVENTS_CONDITIONS,
+    GET_CHANGED_COHORT_PERSONS,
     GET_COHORT_SIZE_SQL,
     GET_COHORTS_BY_PERSON_UUID,
     GET_PERSON_ID_BY_PRECALCULATED_COHORT_ID,
     GET_STATIC_COHORT_SIZE_SQL,
     GET_STATIC_COHORTPEOPLE_BY_PERSON_UUID,
     RECALCULATE_COHORT_BY_ID,
+    RECALCULATE_COHORT_INCREMENTALLY_BY_ID,
+    RECALCULATE_COHORTS_BATCH,
 )
 from posthog.models.person.sql import (
     INSERT_PERSON_STATIC_COHORT,
     PERSON_STATIC_COHORT_TABLE,
 )
-from posthog.models.property import Property, PropertyGroup
+from posthog.models.property import BehavioralPropertyType, Property, PropertyGroup
 from posthog.queries.person_distinct_id_query import get_team_distinct_ids_query
+from posthog.redis import get_client
 
 # temporary marker to denote when cohortpeople table started being populated
 TEMP_PRECALCULATED_MARKER = parser.parse("2021-06-07T15:00:00+00:00")
 
 logger = structlog.get_logger(__name__)
 
+COHORT_CALCULATION_COUNTER = Counter(
+    "posthog_cohort_calculation",
+    "Cohort recalculations, by whether all persons or only changed ones were evaluated",
+    labelnames=["mode"],
+)
+
+COHORT_CALCULATION_STATE_KEY = "cohort_calculation_state:cohort:{cohort_id}:team:{team_id}"
+COHORT_CALCULATION_STATE_TTL = 60 * 60 * 24 * 7
+# Person updates carry the time they were produced rather than the time they reached ClickHouse
+INCREMENTAL_CALCULATION_INGESTION_MARGIN = timedelta(hours=1)
+
 
 def format_person_query(cohort: Cohort, index: int, hogql_context: HogQLContext) -> tuple[str, dict[str, Any]]:
     if cohort.is_static:
@@ -324,10 +346,120 @@ def recalculate_cohortpeople(
     return count_by_team_id[cohort.team_id]
 
 
+@dataclass(frozen=True)
+class IncrementalCalculationPlan:
+    # Events the cohort's behavioral filters match on
+    event_names: list[str]
+    # Rolling windows of those filters, e.g. "performed $pageview in the last 30 days"
+    windows: list[relativedelta]
+
+
+_INCREMENTAL_BEHAVIORAL_TYPES = {
+    BehavioralPropertyType.PERFORMED_EVENT,
+    BehavioralPropertyType.PERFORMED_EVENT_MULTIPLE,
+}
+
+
+def get_incremental_calculation_plan(cohort: Cohort) -> Optional[IncrementalCalculationPlan]:
+    """
+    Returns what to look at to find persons whose membership may have changed since the previous calculation, or None
+    if the cohort can't be calculated incrementally.
+
+    Membership of a person in a cohort of person properties and rolling window behavioral filters only changes when
+    their properties or distinct IDs change, or when one of their matching events enters or leaves a window. Anything
+    else, like nested cohorts, sequences or relative dates, is always calculated in full.
+    """
+    if cohort.is_static or not cohort.properties.values:
+        return None
+
+    event_names: set[str] = set()
+    windows: list[relativedelta] = []
+    for prop in cohort.properties.flat:
+        if prop.type == "person":
+            if prop.operator and prop.operator.startswith("is_date"):
+                return None
+        elif prop.type == "behavioral":
+            if (
+                prop.value not in _INCREMENTAL_BEHAVIORAL_TYPES
+                or prop.event_type != "events"
+                or prop.negation
+                or prop.explicit_datetime
+                or not prop.time_value
+                or not prop.time_interval
+            ):
+                return None
+            event_names.add(str(prop.key))
+            windows.append(relativedelta(**{f"{prop.time_interval}s": int(prop.time_value)}))
+        else:
+            return None
+
+    return IncrementalCalculationPlan(event_names=sorted(event_names), windows=windows)
+
+
+def _cohort_filters_hash(cohort: Cohort) -> str:
+    return hashlib.sha256(json.dumps(cohort.properties.to_dict(), sort_keys=True).encode()).hexdigest()
+
+
+def _get_cohort_calculation_state(cohort: Cohort, team_id: int) -> Optional[dict[str, Any]]:
+    try:
+        state = get_client().get(COHORT_CALCULATION_STATE_KEY.format(cohort_id=cohort.pk, team_id=team_id))
+        return json.loads(state) if state else None
+    except Exception as err:
+        logger.warning("cohort_calculation_state_unavailable", cohort_id=cohort.pk, error=str(err))
+        return None
+
+
+def _set_cohort_calculation_state(cohort: Cohort, team_id: int, state: dict[str, Any]) -> None:
+    try:
+        get_client().set(
+            COHORT_CALCULATION_STATE_KEY.format(cohort_id=cohort.pk, team_id=team_id),
+            json.dumps(state),
+            ex=COHORT_CALCULATION_STATE_TTL,
+        )
+    except Exception as err:
+        logger.warning("cohort_calculation_state_unavailable", cohort_id=cohort.pk, error=str(err))
+
+
+def _get_incremental_calculation_params(
+    cohort: Cohort,
+    plan: IncrementalCalculationPlan,
+    state: Optional[dict[str, Any]],
+    started_at: datetime,
+) -> Optional[dict[str, Any]]:
+    """
+    Returns the parameters to recalculate the cohort incrementally with, or None if it has to be calculated in full.
+    The previous calculation must be of the cohort's current version and filters, and a full one recent enough.
+    """
+    if (
+        state is None
+        or state.get("version") != cohort.version
+        or state.get("filters_hash") != _cohort_filters_hash(cohort)
+    ):
+        return None
+    fully_calculated_at = parser.isoparse(state["fully_calculated_at"])
+    if started_at - fully_calculated_at > timedelta(hours=settings.COHORT_INCREMENTAL_FULL_CALCULATION_INTERVAL_HOURS):
+        return None
+
+    calculated_at = parser.isoparse(state["calculated_at"])
+    params: dict[str, Any] = {
+        "previous_version": cohort.version,
+        "changed_since": (calculated_at - INCREMENTAL_CALCULATION_INGESTION_MARGIN).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if plan.event_names:
+        # Any event that left one of the windows since the previous calculation
+        longest_window = min(plan.windows, key=lambda window: started_at - window)
+        shortest_window = max(plan.windows, key=lambda window: started_at - window)
+        params["cohort_events"] = plan.event_names
+        params["aged_out_from"] = (calculated_at - longest_window).strftime("%Y-%m-%d %H:%M:%S")
+        params["aged_out_to"] = (started_at - shortest_window).strftime("%Y-%m-%d %H:%M:%S")
+    return params
+
+
 def _recalculate_cohortpeople_for_team_hogql(
     cohort: Cohort, pending_version: int, team: Team, *, initiating_user_id: Optional[int]
 ) -> int:
     tag_queries(name="recalculate_cohortpeople_for_team_hogql")
+    started_at = timezone.now()
     cohort_params: dict[str, Any]
     # No need to do anything here, as we're only testing hogql
     if cohort.is_static:
@@ -348,12 +480,40 @@ def _recalculate_cohortpeople_for_team_hogql(
         # statement is used in a subquery. We remove it here.
         cohort_query = cohort_query[: cohort_query.rfind("SETTINGS")]
 
-    recalculate_cohortpeople_sql = RECALCULATE_COHORT_BY_ID.format(cohort_filter=cohort_query)
+    # Only scheduled recalculations are incremental, ones a user asked for re-evaluate everyone
+    plan = (
+        get_incremental_calculation_plan(cohort)
+        if settings.COHORT_INCREMENTAL_CALCULATION_ENABLED and initiating_user_id is None
+        else None
+    )
+    state = _get_cohort_calculation_state(cohort, team.id) if plan is not None else None
+    incremental_params = (
+        _get_incremental_calculation_params(cohort, plan, state, started_at) if plan is not None else None
+    )
+
+    if plan is not None and state is not None and incremental_params is not None:
+        changed_persons = GET_CHANGED_COHORT_PERSONS
+        if plan.event_names:
+            changed_persons += "UNION ALL\nSELECT person_id FROM ({distinct_ids_query})".format(
+                distinct_ids_query=get_team_distinct_ids_query(
+                    team.id, relevant_events_conditions=CHANGED_COHORT_EVENTS_CONDITIONS
+                )
+            )
+        recalculate_cohortpeople_sql = RECALCULATE_COHORT_INCREMENTALLY_BY_ID.format(
+            cohort_filter=cohort_query, changed_persons=changed_persons
+        )
+        cohort_params = {**cohort_params, **incremental_params}
+        fully_calculated_at = state["fully_calculated_at"]
+        COHORT_CALCULATION_COUNTER.labels(mode="incremental").inc()
+    else:
+        recalculate_cohortpeople_sql = RECALCULATE_COHORT_BY_ID.format(cohort_filter=cohort_query)
+        fully_calculated_at = started_at.isoformat()
+        COHORT_CALCULATION_COUNTER.labels(mode="full").inc()
 
     tag_queries(kind="cohort_calculation", query_type="CohortsQueryHogQL", feature=Feature.COHORT)
     hogql_global_settings = HogQLGlobalSettings()
 
-    return sync_execute(
+    result = sync_execute(
         recalculate_cohortpeople_sql,
         {
             **cohort_params,
@@ -375,6 +535,105 @@ def _recalculate_cohortpeople_for_team_hogql(
         ch_user=ClickHouseUser.COHORTS,
     )
 
+    if plan is not None:
+        _set_cohort_calculation_state(
+            cohort,
+            team.id,
+            {
+                "version": pending_version,
+                "filters_hash": _cohort_filters_hash(cohort),
+                "calculated_at": started_at.isoformat(),
+                "fully_calculated_at": fully_calculated_at,
+            },
+        )
+    return result
+
+
+def is_batchable_cohort(cohort: Cohort) -> bool:
+    """
+    Whether membership in the cohort is a condition on a person's properties alone, so that the cohort can be
+    calculated together with others in a single scan of persons.
+    """
+    return (
+        not cohort.is_static
+        and bool(cohort.properties.values)
+        and all(prop.type == "person" and not prop.negation for prop in cohort.properties.flat)
+    )
+
+
+def recalculate_cohortpeople_batch(cohorts: list[Cohort], pending_versions: dict[int, int]) -> dict[int, int]:
+    """
+    Recalculates cohorts that pass `is_batchable_cohort` and belong to the same project, for all environments of
+    the project, with one query per environment. Returns the count of each cohort for the team it was created in.
+    """
+    from posthog.hogql.property import property_to_expr
+    from posthog.hogql.query import HogQLQueryExecutor
+
+    project_team = cohorts[0].team
+    relevant_teams = Team.objects.order_by("id").filter(project_id=project_team.project_id)
+    counts: dict[int, int] = {}
+    tag_queries(name="recalculate_cohortpeople_batch")
+    for team in relevant_teams:
+        tag_queries(team_id=team.id)
+        conditions = [property_to_expr(cohort.properties, team, scope="person") for cohort in cohorts]
+        # Every person is emitted once for each of the cohorts they match
+        query = parse_select(
+            "SELECT id, arrayJoin(arrayFilter(x -> x != 0, {matches})) AS cohort_id FROM persons WHERE {where}",
+            placeholders={
+                "matches": ast.Array(
+                    exprs=[
+                        parse_expr(
+                            "if({condition}, {cohort_id}, 0)",
+                            placeholders={"condition": condition, "cohort_id": ast.Constant(value=cohort.pk)},
+                        )
+                        for cohort, condition in zip(cohorts, conditions)
+                    ]
+                ),
+                "where": ast.Or(exprs=conditions),
+            },
+        )
+        hogql_global_settings = HogQLGlobalSettings()
+        cohorts_query, hogql_context = HogQLQueryExecutor(
+            query_type="HogQLCohortsBatchQuery",
+            query=query,
+            team=team,
+            limit_context=LimitContext.COHORT_CALCULATION,
+            settings=HogQLGlobalSettings(allow_experimental_analyzer=None),
+        ).generate_clickhouse_sql()
+        # Same as for single cohorts, ClickHouse doesn't accept a "SETTINGS" clause in the subquery
+        cohorts_query = cohorts_query[: cohorts_query.rfind("SETTINGS")]
+
+        tag_queries(kind="cohort_calculation", query_type="CohortsBatchQueryHogQL", feature=Feature.COHORT)
+        sync_execute(
+            RECALCULATE_COHORTS_BATCH.format(cohorts_filter=cohorts_query),
+            {
+                **hogql_context.values,
+                "team_id": team.id,
+                "cohort_ids": [cohort.pk for cohort in cohorts],
+                "new_versions": [pending_versions[cohort.pk] for cohort in cohorts],
+            },
+            settings={
+                "max_execution_time": 600,
+                "send_timeout": 600,
+                "receive_timeout": 600,
+                "optimize_on_insert": 0,
+                "max_ast_elements": hogql_global_settings.max_ast_elements,
+                "max_expanded_ast_elements": hogql_global_settings.max_expanded_ast_elements,
+                "max_bytes_ratio_before_external_group_by": 0.5,
+                "max_bytes_ratio_before_external_sort": 0.5,
+            },
+            workload=Workload.OFFLINE,
+            ch_user=ClickHouseUser.COHORTS,
+        )
+
+        for cohort in cohorts:
+            if cohort.team_id == team.id:
+                counts[cohort.pk] = (
+                    get_cohort_size(cohort, override_version=pending_versions[cohort.pk], team_id=team.id) or 0
+                )
+
+    return counts
+
 
 def get_cohort_size(cohort: Cohort, override_version: Optional[int] = None, *, team_id: int) -> Optional[int]:
     tag_queries(name="get_cohort_size", feature=Feature.COHORT)
@@ -0,0 +1,3 @@
+from .event_rollup import EventRollup
+
+__all__ = ["EventRollup"]
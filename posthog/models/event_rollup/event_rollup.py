@@ -0,0 +1,35 @@
+from django.db import models
+
+from posthog.models.utils import UUIDModel, sane_repr
+
+
+class EventRollup(UUIDModel):
+    """
+    A trends shape kept pre-aggregated in ClickHouse: counts, unique persons and the sum and average of
+    `math_property` of `event`, per `interval` bucket and value of `breakdown_property`.
+
+    Buckets are aligned to the team's timezone when the rollup is first materialized. If the team's timezone changes
+    afterwards, the rollup is neither materialized nor queried anymore and has to be recreated.
+    """
+
+    class Interval(models.TextChoices):
+        HOUR = "hour", "Hour"
+        DAY = "day", "Day"
+
+    team = models.ForeignKey("posthog.Team", on_delete=models.CASCADE)
+    event = models.CharField(max_length=400)
+    breakdown_property = models.CharField(max_length=400, null=True, blank=True)
+    math_property = models.CharField(max_length=400, null=True, blank=True)
+    interval = models.CharField(max_length=10, choices=Interval.choices, default=Interval.DAY)
+
+    # Set when the rollup is first materialized
+    timezone = models.CharField(max_length=240, null=True, blank=True)
+    # The team's query modifiers the rollup is materialized with, see `EVENT_ROLLUP_MODIFIERS`
+    modifiers = models.JSONField(null=True, blank=True)
+    materialized_from = models.DateTimeField(null=True, blank=True)
+    # Buckets before this are materialized, later events are read from the events table
+    materialized_until = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    __repr__ = sane_repr("team_id", "event", "breakdown_property", "math_property", "interval")
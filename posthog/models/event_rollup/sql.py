@@ -0,0 +1,40 @@
+from posthog.clickhouse.cluster import ON_CLUSTER_CLAUSE
+from posthog.clickhouse.table_engines import AggregatingMergeTree, ReplicationScheme
+
+EVENT_ROLLUPS_TABLE = "event_rollups"
+
+# Columns holding aggregate function states, in the order they are inserted
+EVENT_ROLLUP_STATE_COLUMNS = ["events_count_state", "persons_uniq_exact_state", "math_sum_state", "math_avg_state"]
+
+
+def EVENT_ROLLUPS_TABLE_ENGINE():
+    return AggregatingMergeTree(EVENT_ROLLUPS_TABLE, replication_scheme=ReplicationScheme.REPLICATED)
+
+
+def EVENT_ROLLUPS_TABLE_SQL(on_cluster=True):
+    # `property_value` is nullable, as breakdowns tell a missing property apart from an empty one
+    return f"""
+CREATE TABLE IF NOT EXISTS {EVENT_ROLLUPS_TABLE} {ON_CLUSTER_CLAUSE(on_cluster=on_cluster)}
+(
+    team_id Int64,
+    rollup_id UUID,
+    bucket DateTime,
+    property_value Nullable(String),
+    events_count_state AggregateFunction(count),
+    persons_uniq_exact_state AggregateFunction(uniqExact, UUID),
+    math_sum_state AggregateFunction(sum, Nullable(Float64)),
+    math_avg_state AggregateFunction(avg, Nullable(Float64))
+) ENGINE = {EVENT_ROLLUPS_TABLE_ENGINE()}
+PARTITION BY toYYYYMM(bucket)
+ORDER BY (team_id, rollup_id, bucket, property_value)
+SETTINGS allow_nullable_key = 1
+"""
+
+
+INSERT_EVENT_ROLLUP_SQL = """
+INSERT INTO {table} (team_id, rollup_id, bucket, {columns})
+SELECT %(team_id)s, toUUID(%(rollup_id)s), bucket, {columns}
+FROM (
+    {select_query}
+)
+"""
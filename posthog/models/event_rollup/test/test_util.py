@@ -0,0 +1,107 @@
+from datetime import datetime, UTC
+from zoneinfo import ZoneInfo
+
+from django.test import override_settings
+from freezegun import freeze_time
+
+from posthog.clickhouse.client import sync_execute
+from posthog.models.event_rollup import EventRollup
+from posthog.models.event_rollup.util import materialize_event_rollup, ranges_to_materialize
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin, _create_event, _create_person
+
+
+class TestRangesToMaterialize(APIBaseTest):
+    def test_daily_ranges(self):
+        ranges = list(
+            ranges_to_materialize(
+                datetime(2025, 7, 1, tzinfo=UTC),
+                datetime(2025, 7, 3, tzinfo=UTC),
+                EventRollup.Interval.DAY,
+                ZoneInfo("UTC"),
+            )
+        )
+        assert ranges == [
+            (datetime(2025, 7, 1, tzinfo=UTC), datetime(2025, 7, 2, tzinfo=UTC)),
+            (datetime(2025, 7, 2, tzinfo=UTC), datetime(2025, 7, 3, tzinfo=UTC)),
+        ]
+
+    def test_hourly_ranges_are_whole_days_where_possible(self):
+        ranges = list(
+            ranges_to_materialize(
+                datetime(2025, 7, 1, 22, tzinfo=UTC),
+                datetime(2025, 7, 3, 2, tzinfo=UTC),
+                EventRollup.Interval.HOUR,
+                ZoneInfo("UTC"),
+            )
+        )
+        assert ranges == [
+            (datetime(2025, 7, 1, 22, tzinfo=UTC), datetime(2025, 7, 1, 23, tzinfo=UTC)),
+            (datetime(2025, 7, 1, 23, tzinfo=UTC), datetime(2025, 7, 2, tzinfo=UTC)),
+            (datetime(2025, 7, 2, tzinfo=UTC), datetime(2025, 7, 3, tzinfo=UTC)),
+            (datetime(2025, 7, 3, tzinfo=UTC), datetime(2025, 7, 3, 1, tzinfo=UTC)),
+            (datetime(2025, 7, 3, 1, tzinfo=UTC), datetime(2025, 7, 3, 2, tzinfo=UTC)),
+        ]
+
+    def test_daily_ranges_follow_the_timezone(self):
+        ranges = list(
+            ranges_to_materialize(
+                datetime(2025, 3, 29, 23, tzinfo=UTC),
+                datetime(2025, 3, 31, 22, tzinfo=UTC),
+                EventRollup.Interval.DAY,
+                ZoneInfo("Europe/Berlin"),
+            )
+        )
+        # The first day is an hour shorter, as clocks move forward
+        assert ranges == [
+            (datetime(2025, 3, 29, 23, tzinfo=UTC), datetime(2025, 3, 30, 22, tzinfo=UTC)),
+            (datetime(2025, 3, 30, 22, tzinfo=UTC), datetime(2025, 3, 31, 22, tzinfo=UTC)),
+        ]
+
+
+@override_settings(EVENT_ROLLUPS_BACKFILL_DAYS=3, EVENT_ROLLUPS_MATERIALIZATION_LAG_HOURS=2)
+class TestMaterializeEventRollup(ClickhouseTestMixin, APIBaseTest):
+    def _rollup_counts(self, rollup: EventRollup) -> list[tuple]:
+        return sync_execute(
+            """
+            SELECT bucket, countMerge(events_count_state) FROM event_rollups
+            WHERE team_id = %(team_id)s AND rollup_id = %(rollup_id)s
+            GROUP BY bucket ORDER BY bucket
+            """,
+            {"team_id": self.team.pk, "rollup_id": str(rollup.id)},
+        )
+
+    def test_materializes_incrementally(self):
+        _create_person(team=self.team, distinct_ids=["p1"])
+        for day in (11, 12, 12, 14):
+            _create_event(
+                team=self.team, event="$pageview", distinct_id="p1", timestamp=datetime(2025, 7, day, 8, tzinfo=UTC)
+            )
+        rollup = EventRollup.objects.create(team=self.team, event="$pageview")
+
+        with freeze_time("2025-07-14T01:00:00Z"):
+            assert materialize_event_rollup(rollup) == 2
+        rollup.refresh_from_db()
+        assert rollup.timezone == "UTC"
+        assert rollup.modifiers == {
+            "convertToProjectTimezone": True,
+            "materializationMode": "legacy_null_as_null",
+            "personsOnEventsMode": self.team.person_on_events_mode_flag_based_default.value,
+        }
+        assert rollup.materialized_from == datetime(2025, 7, 11, tzinfo=UTC)
+        assert rollup.materialized_until == datetime(2025, 7, 13, tzinfo=UTC)
+
+        with freeze_time("2025-07-15T03:00:00Z"):
+            assert materialize_event_rollup(rollup) == 2
+            # Nothing left to materialize
+            assert materialize_event_rollup(rollup) == 0
+
+        assert self._rollup_counts(rollup) == [
+            (datetime(2025, 7, 11), 1),
+            (datetime(2025, 7, 12), 2),
+            (datetime(2025, 7, 14), 1),
+        ]
+
+    def test_skips_rollup_after_timezone_change(self):
+        rollup = EventRollup.objects.create(team=self.team, event="$pageview", timezone="Europe/Berlin")
+
+        assert materialize_event_rollup(rollup) == 0
@@ -0,0 +1,145 @@
+"""
+Materializes event rollups into ClickHouse.
+
+A rollup is materialized oldest range first, moving `materialized_until` forward after each insert, until the last
+bucket that's at least EVENT_ROLLUPS_MATERIALIZATION_LAG_HOURS old. Ranges are whole days where possible, so that a
+backfill takes a query per day rather than per hour. Every insert carries a deduplication token derived from its
+range, so retrying a range whose insert went through but whose watermark wasn't saved doesn't count events twice.
+
+Events ingested more than the lag after their timestamp miss buckets that were already materialized.
+"""
+
+from collections.abc import Iterator
+from datetime import UTC, datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import structlog
+from django.conf import settings
+from django.utils import timezone
+from prometheus_client import Counter
+
+from posthog.clickhouse.client import sync_execute
+from posthog.clickhouse.client.connection import Workload
+from posthog.clickhouse.query_tagging import tag_queries
+from posthog.hogql import ast
+from posthog.hogql.constants import LimitContext
+from posthog.hogql.parser import parse_expr
+from posthog.hogql.query import HogQLQueryExecutor
+from posthog.hogql.modifiers import create_default_modifiers_for_team
+from posthog.hogql.transforms.event_rollups import event_rollup_events_select, event_rollup_modifiers
+from posthog.models.event_rollup.event_rollup import EventRollup
+from posthog.models.event_rollup.sql import EVENT_ROLLUP_STATE_COLUMNS, EVENT_ROLLUPS_TABLE, INSERT_EVENT_ROLLUP_SQL
+from posthog.schema import HogQLQueryModifiers
+
+logger = structlog.get_logger(__name__)
+
+EVENT_ROLLUP_RANGES_COUNTER = Counter(
+    "posthog_event_rollup_materialized_ranges",
+    "Bucket ranges of event rollups inserted into ClickHouse.",
+    labelnames=["interval"],
+)
+
+
+def _floor_to_bucket(value: datetime, interval: str, tz: ZoneInfo) -> datetime:
+    local = value.astimezone(tz)
+    if interval == EventRollup.Interval.HOUR:
+        local = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        local = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return local.astimezone(UTC)
+
+
+def _next_day(value: datetime, tz: ZoneInfo) -> datetime:
+    local = value.astimezone(tz)
+    return datetime.combine(local.date() + timedelta(days=1), time.min, tzinfo=tz).astimezone(UTC)
+
+
+def ranges_to_materialize(
+    start: datetime, until: datetime, interval: str, tz: ZoneInfo
+) -> Iterator[tuple[datetime, datetime]]:
+    while start < until:
+        end = _next_day(start, tz)
+        if interval == EventRollup.Interval.HOUR and (start != _floor_to_bucket(start, "day", tz) or end > until):
+            end = start + timedelta(hours=1)
+        yield start, end
+        start = end
+
+
+def _rollup_columns(rollup: EventRollup) -> list[str]:
+    columns = ["property_value"] if rollup.breakdown_property else []
+    columns.extend(
+        column for column in EVENT_ROLLUP_STATE_COLUMNS if rollup.math_property or not column.startswith("math_")
+    )
+    return columns
+
+
+def _insert_range(rollup: EventRollup, start: datetime, end: datetime) -> None:
+    columns = _rollup_columns(rollup)
+    select_query = event_rollup_events_select(
+        rollup,
+        columns,
+        where=parse_expr(
+            "event = {event} AND timestamp >= {start} AND timestamp < {end}",
+            placeholders={
+                "event": ast.Constant(value=rollup.event),
+                "start": ast.Constant(value=start),
+                "end": ast.Constant(value=end),
+            },
+        ),
+    )
+    select_sql, context = HogQLQueryExecutor(
+        query_type="EventRollupMaterialization",
+        query=select_query,
+        team=rollup.team,
+        modifiers=HogQLQueryModifiers.model_validate(rollup.modifiers or {}),
+        workload=Workload.OFFLINE,
+        limit_context=LimitContext.SAVED_QUERY,
+    ).generate_clickhouse_sql()
+    # The top level SETTINGS make the query read-only, and aren't allowed in a subquery anyway
+    if "SETTINGS" in select_sql:
+        select_sql = select_sql[: select_sql.rfind("SETTINGS")]
+
+    sync_execute(
+        INSERT_EVENT_ROLLUP_SQL.format(table=EVENT_ROLLUPS_TABLE, columns=", ".join(columns), select_query=select_sql),
+        {**context.values, "team_id": rollup.team_id, "rollup_id": str(rollup.id)},
+        settings={
+            "insert_deduplication_token": f"{rollup.id}:{start.isoformat()}:{end.isoformat()}",
+            "max_execution_time": 600,
+        },
+        workload=Workload.OFFLINE,
+    )
+    EVENT_ROLLUP_RANGES_COUNTER.labels(interval=rollup.interval).inc()
+
+
+def materialize_event_rollup(rollup: EventRollup, *, now: Optional[datetime] = None) -> int:
+    """Materializes the rollup's buckets that are complete and not materialized yet, returns the ranges inserted."""
+    team = rollup.team
+    if rollup.timezone is not None and rollup.timezone != team.timezone:
+        logger.warning("event_rollup_timezone_changed", rollup_id=str(rollup.id), team_id=team.pk)
+        return 0
+
+    tag_queries(team_id=team.pk, name="materialize_event_rollup")
+    tz = ZoneInfo(team.timezone)
+    now = now or timezone.now()
+    lag = timedelta(hours=settings.EVENT_ROLLUPS_MATERIALIZATION_LAG_HOURS)
+    until = _floor_to_bucket(now - lag, rollup.interval, tz)
+
+    if rollup.materialized_from is None or rollup.materialized_until is None:
+        start = _floor_to_bucket(now - timedelta(days=settings.EVENT_ROLLUPS_BACKFILL_DAYS), "day", tz)
+        rollup.timezone = team.timezone
+        # Later ranges are materialized with the same modifiers, even if the team's change
+        rollup.modifiers = event_rollup_modifiers(create_default_modifiers_for_team(team))
+        rollup.materialized_from = rollup.materialized_until = start
+        # Watermarks are saved with `update()`, so that they don't invalidate the team's compiled queries
+        EventRollup.objects.filter(pk=rollup.pk).update(
+            timezone=rollup.timezone, modifiers=rollup.modifiers, materialized_from=start, materialized_until=start
+        )
+
+    inserted = 0
+    for start, end in ranges_to_materialize(rollup.materialized_until, until, rollup.interval, tz):
+        _insert_range(rollup, start, end)
+        rollup.materialized_until = end
+        EventRollup.objects.filter(pk=rollup.pk).update(materialized_until=end)
+        inserted += 1
+    return inserted
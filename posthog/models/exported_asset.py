@@ -1,6 +1,6 @@
 import secrets
 from datetime import timedelta
-from typing import Optional
+from typing import IO, Optional
 
 import structlog
 from django.conf import settings
@@ -155,7 +155,8 @@ def get_content_response(asset: ExportedAsset, download: bool = False):
     return res
 
 
-def save_content(exported_asset: ExportedAsset, content: bytes) -> None:
+def save_content(exported_asset: ExportedAsset, content: bytes | IO[bytes]) -> None:
+    """Saves the content of the export, which can be a binary file for content too large to hold in memory."""
     try:
         if settings.OBJECT_STORAGE_ENABLED:
             save_content_to_object_storage(exported_asset, content)
@@ -172,12 +173,16 @@ def save_content(exported_asset: ExportedAsset, content: bytes) -> None:
         save_content_to_exported_asset(exported_asset, content)
 
 
-def save_content_to_exported_asset(exported_asset: ExportedAsset, content: bytes) -> None:
+def save_content_to_exported_asset(exported_asset: ExportedAsset, content: bytes | IO[bytes]) -> None:
+    if not isinstance(content, bytes):
+        # The file may have been partially read by a failed upload
+        content.seek(0)
+        content = content.read()
     exported_asset.content = content
     exported_asset.save(update_fields=["content"])
 
 
-def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes) -> None:
+def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes | IO[bytes]) -> None:
     path_parts: list[str] = [
         settings.OBJECT_STORAGE_EXPORTS_FOLDER,
         exported_asset.export_format.split("/")[1],
@@ -4,6 +4,8 @@ from .feature_flag import (
     set_feature_flags_for_team_in_cache,
     FeatureFlagDashboards,
 )
+from .local_evaluation import get_local_evaluation_response
 from .flag_matching import FeatureFlagMatcher, get_all_feature_flags, get_all_feature_flags_with_details
+from .bulk_flag_matching import get_feature_flag_values_for_distinct_ids
 from .permissions import can_user_edit_feature_flag
 from .user_blast_radius import get_user_blast_radius
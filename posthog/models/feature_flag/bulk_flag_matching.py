@@ -0,0 +1,313 @@
+"""
+Evaluates feature flags for many distinct_ids at once, for backend jobs that need flags of lots of users.
+
+`FeatureFlagMatcher` queries the person (and groups) of one distinct_id, annotated with every flag condition. The bulk
+matcher runs the same annotated queries for a whole batch of distinct_ids - one for persons, one per group type and one
+for hash key overrides - and then matches each distinct_id with a `FeatureFlagMatcher` handed its rows.
+
+The only properties known up front are the ones /decide always knows locally, `distinct_id` and `$group_key`. These
+differ per distinct_id, so they're matched in Python, and the rest of each condition in the query.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Optional, Union, cast
+
+from django.db.models import Q
+from django.db.models.expressions import Expression, ExpressionWrapper, RawSQL
+from django.db.models.fields import BooleanField
+
+from posthog.models.cohort import Cohort, CohortOrEmpty
+from posthog.models.group import Group
+from posthog.models.person import Person, PersonDistinctId
+from posthog.models.property import GroupTypeIndex, GroupTypeName
+from posthog.models.property.property import Property
+from posthog.models.team.team import Team
+from posthog.models.utils import execute_with_timeout
+from posthog.queries.base import match_property, properties_to_Q
+
+from .compiled_flags import CompiledFeatureFlag, parse_condition
+from .feature_flag import (
+    FeatureFlagHashKeyOverride,
+    get_feature_flags_for_team_in_cache,
+    set_feature_flags_for_team_in_cache,
+)
+from .flag_matching import (
+    DATABASE_FOR_PERSONS,
+    ENTITY_EXISTS_PREFIX,
+    PERSON_KEY,
+    FeatureFlagMatcher,
+    FlagsMatcherCache,
+    MatchableFeatureFlag,
+    _get_property_type_annotations,
+    add_local_person_and_group_properties,
+    get_all_properties_with_math_operators,
+)
+
+BULK_FLAG_MATCHING_BATCH_SIZE = 1_000
+# Queries cover a whole batch, so they get a lot more time than the ones of /decide
+BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS = 10_000
+
+PERSON_LOCAL_PROPERTY_KEYS = frozenset({"distinct_id"})
+GROUP_LOCAL_PROPERTY_KEYS = frozenset({"$group_key"})
+
+
+@dataclass(frozen=True)
+class _ConditionQuery:
+    # Same keys as `FeatureFlagMatcher.query_conditions`
+    key: str
+    group_type_index: Optional[GroupTypeIndex]
+    # Matched per distinct_id, against `distinct_id` and `$group_key`
+    local_properties: list[Property]
+    # Annotated on the person or group query, None if the condition doesn't need a query
+    expression: Optional[Q | RawSQL]
+    # Set if the query part of the condition is known without querying
+    constant: Optional[bool]
+    type_annotations: dict[str, Any]
+
+
+class BulkFeatureFlagMatcher:
+    def __init__(
+        self,
+        team_id: int,
+        project_id: int,
+        feature_flags: Sequence[MatchableFeatureFlag],
+        cohorts_cache: Optional[dict[int, CohortOrEmpty]] = None,
+        using_database: str = DATABASE_FOR_PERSONS,
+        batch_size: int = BULK_FLAG_MATCHING_BATCH_SIZE,
+    ):
+        self.team_id = team_id
+        self.project_id = project_id
+        self.feature_flags = feature_flags
+        self.cache = FlagsMatcherCache(project_id)
+        self.using_database = using_database
+        self.batch_size = batch_size
+        self.cohorts_cache = cohorts_cache if cohorts_cache is not None else {}
+        self._condition_queries: Optional[list[_ConditionQuery]] = None
+
+    def get_flag_values(
+        self, distinct_ids: Sequence[str], groups: Optional[dict[str, dict[GroupTypeName, str]]] = None
+    ) -> dict[str, dict[str, Union[str, bool]]]:
+        """
+        Returns the flag values of every distinct_id, like `get_all_feature_flags` does for one.
+        `groups` holds the groups of each distinct_id, keyed by distinct_id.
+        """
+        groups = groups or {}
+        flag_values: dict[str, dict[str, Union[str, bool]]] = {}
+        for start in range(0, len(distinct_ids), self.batch_size):
+            batch = list(dict.fromkeys(distinct_ids[start : start + self.batch_size]))
+            flag_values.update(self._get_batch_flag_values(batch, groups))
+        return flag_values
+
+    @property
+    def condition_queries(self) -> list[_ConditionQuery]:
+        if self._condition_queries is None:
+            if not self.cohorts_cache and any(feature_flag.uses_cohorts for feature_flag in self.feature_flags):
+                self.cohorts_cache.update(
+                    {
+                        cohort.pk: cohort
+                        for cohort in Cohort.objects.db_manager(self.using_database).filter(
+                            team__project_id=self.project_id, deleted=False
+                        )
+                    }
+                )
+            self._condition_queries = [
+                self._build_condition_query(key, feature_flag, condition)
+                for feature_flag in self.feature_flags
+                for key, condition in _conditions_to_query(feature_flag)
+            ]
+        return self._condition_queries
+
+    def _build_condition_query(self, key: str, feature_flag: MatchableFeatureFlag, condition: dict) -> _ConditionQuery:
+        group_type_index = feature_flag.aggregation_group_type_index
+        local_keys = PERSON_LOCAL_PROPERTY_KEYS if group_type_index is None else GROUP_LOCAL_PROPERTY_KEYS
+        if isinstance(feature_flag, CompiledFeatureFlag):
+            properties = feature_flag.parsed_condition(condition).properties
+        else:
+            properties = parse_condition(condition).properties
+
+        # Same split as the override short circuit of `property_to_Q`, which skips cohorts
+        local_properties = [prop for prop in properties if prop.type != "cohort" and prop.key in local_keys]
+        query_properties = [prop for prop in properties if prop.type == "cohort" or prop.key not in local_keys]
+
+        expression: Optional[Q | RawSQL] = None
+        constant: Optional[bool] = None
+        if not condition.get("properties"):
+            # Matches whenever the person or group exists
+            expression = RawSQL("true", [])
+        elif not query_properties:
+            constant = True
+        else:
+            expression = properties_to_Q(
+                self.project_id,
+                query_properties,
+                cohorts_cache=self.cohorts_cache,
+                using_database=self.using_database,
+            )
+            if expression == Q(pk__isnull=False):
+                expression, constant = None, True
+            elif expression == Q(pk__isnull=True):
+                expression, constant = None, False
+            elif not expression:
+                expression = RawSQL("true", [])
+
+        return _ConditionQuery(
+            key=key,
+            group_type_index=group_type_index,
+            local_properties=local_properties,
+            expression=expression,
+            constant=constant,
+            type_annotations=_get_property_type_annotations(
+                get_all_properties_with_math_operators(query_properties, self.cohorts_cache, self.project_id)
+            ),
+        )
+
+    def _query_rows(
+        self, queryset, id_field: str, condition_queries: list[_ConditionQuery]
+    ) -> dict[Any, dict[str, bool]]:
+        annotated = [query for query in condition_queries if query.expression is not None]
+        type_annotations: dict[str, Any] = {}
+        for query in annotated:
+            type_annotations.update(query.type_annotations)
+        queryset = queryset.annotate(
+            **type_annotations,
+            **{
+                query.key: ExpressionWrapper(cast(Expression, query.expression), output_field=BooleanField())
+                for query in annotated
+            },
+        )
+        return {row.pop(id_field): row for row in queryset.values(id_field, *(query.key for query in annotated))}
+
+    def _get_batch_flag_values(
+        self, distinct_ids: list[str], groups: dict[str, dict[GroupTypeName, str]]
+    ) -> dict[str, dict[str, Union[str, bool]]]:
+        person_condition_queries = [query for query in self.condition_queries if query.group_type_index is None]
+        group_condition_queries: dict[GroupTypeIndex, list[_ConditionQuery]] = {}
+        for query in self.condition_queries:
+            if query.group_type_index is not None:
+                group_condition_queries.setdefault(query.group_type_index, []).append(query)
+
+        with execute_with_timeout(BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS, self.using_database):
+            person_id_by_distinct_id: dict[str, int] = dict(
+                PersonDistinctId.objects.db_manager(self.using_database)
+                .filter(team_id=self.team_id, distinct_id__in=distinct_ids)
+                .values_list("distinct_id", "person_id")
+            )
+            person_rows = self._query_rows(
+                Person.objects.db_manager(self.using_database).filter(
+                    team_id=self.team_id, id__in=set(person_id_by_distinct_id.values())
+                ),
+                "id",
+                person_condition_queries,
+            )
+
+            hash_key_overrides_by_person_id: dict[int, dict[str, str]] = {}
+            if any(feature_flag.ensure_experience_continuity for feature_flag in self.feature_flags):
+                for person_id, feature_flag_key, hash_key in (
+                    FeatureFlagHashKeyOverride.objects.db_manager(self.using_database)
+                    .filter(team_id=self.team_id, person_id__in=set(person_id_by_distinct_id.values()))
+                    .values_list("person_id", "feature_flag_key", "hash_key")
+                ):
+                    hash_key_overrides_by_person_id.setdefault(person_id, {})[feature_flag_key] = hash_key
+
+            group_rows: dict[GroupTypeIndex, dict[str, dict[str, bool]]] = {}
+            for group_type_index in group_condition_queries:
+                group_type_name = self.cache.group_type_index_to_name.get(group_type_index)
+                group_keys = {
+                    groups[distinct_id][group_type_name]
+                    for distinct_id in distinct_ids
+                    if group_type_name in groups.get(distinct_id, {})
+                }
+                if not group_keys:
+                    continue
+                group_rows[group_type_index] = self._query_rows(
+                    Group.objects.db_manager(self.using_database).filter(
+                        team_id=self.team_id, group_type_index=group_type_index, group_key__in=group_keys
+                    ),
+                    "group_key",
+                    group_condition_queries[group_type_index],
+                )
+
+        flag_values: dict[str, dict[str, Union[str, bool]]] = {}
+        for distinct_id in distinct_ids:
+            distinct_id_groups = groups.get(distinct_id, {})
+            property_value_overrides, group_property_value_overrides = add_local_person_and_group_properties(
+                distinct_id, distinct_id_groups, {}, {}
+            )
+            person_id = person_id_by_distinct_id.get(distinct_id)
+            person_row = person_rows.get(person_id) if person_id is not None else None
+
+            query_conditions: dict[str, bool] = {f"{ENTITY_EXISTS_PREFIX}{PERSON_KEY}": person_row is not None}
+            for query in person_condition_queries:
+                query_conditions[query.key] = _condition_value(query, person_row, property_value_overrides)
+            for group_type_index, rows in group_rows.items():
+                group_type_name = self.cache.group_type_index_to_name[group_type_index]
+                if group_type_name not in distinct_id_groups:
+                    continue
+                group_row = rows.get(distinct_id_groups[group_type_name])
+                query_conditions[f"{ENTITY_EXISTS_PREFIX}{group_type_index}"] = group_row is not None
+                for query in group_condition_queries[group_type_index]:
+                    query_conditions[query.key] = _condition_value(
+                        query, group_row, group_property_value_overrides.get(group_type_name, {})
+                    )
+
+            flag_values[distinct_id], *_ = FeatureFlagMatcher(
+                self.team_id,
+                self.project_id,
+                self.feature_flags,
+                distinct_id,
+                groups=distinct_id_groups,
+                cache=self.cache,
+                hash_key_overrides=hash_key_overrides_by_person_id.get(person_id, {}) if person_id else {},
+                property_value_overrides=property_value_overrides,
+                group_property_value_overrides=group_property_value_overrides,
+                cohorts_cache=self.cohorts_cache,
+                precomputed_query_conditions=query_conditions,
+            ).get_matches_with_details()
+        return flag_values
+
+
+def _conditions_to_query(feature_flag: MatchableFeatureFlag) -> list[tuple[str, dict]]:
+    """The conditions `FeatureFlagMatcher.query_conditions` queries, with their keys."""
+    conditions = []
+    if feature_flag.super_conditions:
+        condition = feature_flag.super_conditions[0]
+        prop_key = (condition.get("properties") or [{}])[0].get("key")
+        if prop_key:
+            conditions.append((f"flag_{feature_flag.pk}_super_condition", condition))
+            conditions.append(
+                (
+                    f"flag_{feature_flag.pk}_super_condition_is_set",
+                    {"properties": [{"key": prop_key, "operator": "is_set"}]},
+                )
+            )
+    for index, condition in enumerate(feature_flag.conditions):
+        conditions.append((f"flag_{feature_flag.pk}_condition_{index}", condition))
+    return conditions
+
+
+def _condition_value(query: _ConditionQuery, row: Optional[dict[str, bool]], local_values: dict[str, Any]) -> bool:
+    if query.constant is not None:
+        value = query.constant
+    else:
+        value = bool(row and row.get(query.key))
+    return value and all(match_property(prop, local_values) for prop in query.local_properties)
+
+
+def get_feature_flag_values_for_distinct_ids(
+    team: Team,
+    distinct_ids: Sequence[str],
+    groups: Optional[dict[str, dict[GroupTypeName, str]]] = None,
+    flag_keys: Optional[list[str]] = None,
+) -> dict[str, dict[str, Union[str, bool]]]:
+    """Returns the values of the team's active flags for every distinct_id, keyed by distinct_id."""
+    feature_flags: Optional[Sequence[MatchableFeatureFlag]] = get_feature_flags_for_team_in_cache(team.project_id)
+    if feature_flags is None:
+        feature_flags = set_feature_flags_for_team_in_cache(team.project_id)
+    if flag_keys is not None:
+        flag_keys_set = set(flag_keys)
+        feature_flags = [feature_flag for feature_flag in feature_flags if feature_flag.key in flag_keys_set]
+    if not feature_flags:
+        return {distinct_id: {} for distinct_id in distinct_ids}
+
+    return BulkFeatureFlagMatcher(team.id, team.project_id, feature_flags).get_flag_values(distinct_ids, groups)
@@ -0,0 +1,225 @@
+"""
+Feature flags of a project compiled for evaluation on /decide.
+
+/decide reads the project's flags from Redis on every request, and used to decode them into `FeatureFlag` models and
+parse every condition's properties through `Filter` again before matching. Flags change rarely compared to how often
+they're evaluated, so they're compiled once per version of the cached flags instead: conditions come with their parsed
+properties and rollout thresholds, and variants with their lookup table.
+
+Compiled flags are kept in a process-local LRU, keyed by a digest of the cached flags. The digest is always worked
+out from what was read, as the flags are also written to Redis by services that don't know about compiled flags. So
+entries never go stale, and flags that haven't changed are only hashed, not decoded or parsed again.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter
+
+from posthog.models.filters import Filter
+from posthog.models.property import GroupTypeIndex
+from posthog.models.property.property import Property
+
+from .feature_flag import feature_flags_cache_key, feature_flags_cache_version
+
+logger = structlog.get_logger(__name__)
+
+COMPILED_FEATURE_FLAGS_CACHE_COUNTER = Counter(
+    "posthog_feature_flag_compiled_cache",
+    "Lookups of the process-local cache of compiled feature flags",
+    labelnames=["result"],
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedCondition:
+    properties: list[Property]
+    # `rollout_percentage` as a fraction, compared to the flag hash
+    rollout_threshold: Optional[float]
+
+
+@dataclass(frozen=True, slots=True)
+class VariantBucket:
+    key: str
+    value_min: float
+    value_max: float
+
+
+def parse_condition(condition: dict) -> ParsedCondition:
+    rollout_percentage = condition.get("rollout_percentage")
+    return ParsedCondition(
+        properties=Filter(data=condition).property_groups.flat if condition.get("properties") else [],
+        rollout_threshold=rollout_percentage / 100 if rollout_percentage is not None else None,
+    )
+
+
+def build_variant_lookup_table(variants: list[dict]) -> list[VariantBucket]:
+    # Contiguous sub-domains of [0, 1], e.g. the first of two variants with 50% rollout percentage will have
+    # value_max: 0.5 and the second will have value_min: 0.5 and value_max: 1.0
+    lookup_table = []
+    value_min = 0.0
+    for variant in variants:
+        value_max = value_min + variant["rollout_percentage"] / 100
+        lookup_table.append(VariantBucket(key=variant["key"], value_min=value_min, value_max=value_max))
+        value_min = value_max
+    return lookup_table
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledFeatureFlag:
+    """
+    Read-only stand-in for `FeatureFlag` in `FeatureFlagMatcher`, with everything matching derives from the filters
+    worked out up front.
+    """
+
+    id: int
+    team_id: int
+    key: str
+    name: str
+    version: Optional[int]
+    active: bool
+    deleted: bool
+    ensure_experience_continuity: bool
+    has_encrypted_payloads: bool
+    filters: dict
+    conditions: list[dict]
+    super_conditions: list[dict]
+    holdout_conditions: list[dict]
+    variants: list[dict]
+    aggregation_group_type_index: Optional[GroupTypeIndex]
+    uses_cohorts: bool
+    # Conditions with their index, with variant overrides first, the order they're evaluated in
+    sorted_conditions: list[tuple[int, dict]]
+    variant_keys: frozenset[str]
+    variant_lookup_table: list[VariantBucket]
+    payloads: dict
+    # Keyed by `id()` of the condition dicts above, which live as long as the compiled flag
+    _parsed_conditions: dict[int, ParsedCondition]
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    def get_filters(self) -> dict:
+        return self.filters
+
+    def get_payload(self, match_val: str) -> Optional[object]:
+        return self.payloads.get(match_val, None)
+
+    def parsed_condition(self, condition: dict) -> ParsedCondition:
+        parsed = self._parsed_conditions.get(id(condition))
+        # Conditions that failed to parse when compiling raise the same error here, failing only this flag
+        return parsed if parsed is not None else parse_condition(condition)
+
+
+def compile_feature_flag(flag: dict[str, Any]) -> CompiledFeatureFlag:
+    """Compiles a flag as serialized by `MinimalFeatureFlagSerializer`."""
+    filters = flag.get("filters") or {}
+    if "groups" not in filters:
+        # :TRICKY: Same backwards compatibility as `FeatureFlag.get_filters`
+        filters = {"groups": [{"properties": filters.get("properties", []), "rollout_percentage": None}]}
+
+    conditions = filters.get("groups", []) or []
+    super_conditions = filters.get("super_groups", []) or []
+    holdout_conditions = filters.get("holdout_groups", []) or []
+
+    # :TRICKY: .get("multivariate", {}) returns "None" if the key is explicitly set to "null" inside json filters
+    multivariate = filters.get("multivariate", None)
+    variants = multivariate.get("variants", None) if isinstance(multivariate, dict) else None
+    if not isinstance(variants, list):
+        variants = []
+
+    parsed_conditions: dict[int, ParsedCondition] = {}
+    for condition in [*conditions, *super_conditions, *holdout_conditions]:
+        try:
+            parsed_conditions[id(condition)] = parse_condition(condition)
+        except Exception:
+            continue
+
+    return CompiledFeatureFlag(
+        id=flag["id"],
+        team_id=flag["team_id"],
+        key=flag["key"],
+        name=flag.get("name") or "",
+        version=flag.get("version"),
+        active=flag.get("active", True),
+        deleted=flag.get("deleted", False),
+        ensure_experience_continuity=bool(flag.get("ensure_experience_continuity")),
+        has_encrypted_payloads=bool(flag.get("has_encrypted_payloads")),
+        filters=filters,
+        conditions=conditions,
+        super_conditions=super_conditions,
+        holdout_conditions=holdout_conditions,
+        variants=variants,
+        aggregation_group_type_index=filters.get("aggregation_group_type_index", None),
+        uses_cohorts=any(
+            prop.get("type") == "cohort" for condition in conditions for prop in condition.get("properties") or []
+        ),
+        # Stable sort, so conditions keep their order otherwise
+        sorted_conditions=sorted(enumerate(conditions), key=lambda item: 0 if item[1].get("variant") else 1),
+        variant_keys=frozenset(variant["key"] for variant in variants),
+        variant_lookup_table=build_variant_lookup_table(variants),
+        payloads=filters.get("payloads", {}) or {},
+        _parsed_conditions=parsed_conditions,
+    )
+
+
+_cache: "OrderedDict[int, tuple[str, list[CompiledFeatureFlag]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def clear_compiled_feature_flags_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def _get_cached(project_id: int, version: str) -> Optional[list[CompiledFeatureFlag]]:
+    with _cache_lock:
+        entry = _cache.get(project_id)
+        if entry is None or entry[0] != version:
+            return None
+        _cache.move_to_end(project_id)
+        return entry[1]
+
+
+def get_compiled_feature_flags_for_team_in_cache(project_id: int) -> Optional[list[CompiledFeatureFlag]]:
+    """
+    Returns the project's flags as cached by `set_feature_flags_for_team_in_cache`, compiled.
+    Returns None if they aren't cached, or can't be read or compiled, same as `get_feature_flags_for_team_in_cache`.
+    """
+    try:
+        flag_data = cache.get(feature_flags_cache_key(project_id))
+    except Exception:
+        # redis is unavailable
+        logger.exception("Redis is unavailable")
+        return None
+    if flag_data is None:
+        COMPILED_FEATURE_FLAGS_CACHE_COUNTER.labels(result="miss").inc()
+        return None
+
+    version = feature_flags_cache_version(flag_data)
+    compiled_flags = _get_cached(project_id, version)
+    if compiled_flags is not None:
+        COMPILED_FEATURE_FLAGS_CACHE_COUNTER.labels(result="hit").inc()
+        return compiled_flags
+
+    COMPILED_FEATURE_FLAGS_CACHE_COUNTER.labels(result="miss").inc()
+    try:
+        compiled_flags = [compile_feature_flag(flag) for flag in json.loads(flag_data)]
+    except Exception:
+        logger.exception("Error compiling flags from cache", project_id=project_id)
+        COMPILED_FEATURE_FLAGS_CACHE_COUNTER.labels(result="error").inc()
+        return None
+
+    with _cache_lock:
+        _cache[project_id] = (version, compiled_flags)
+        _cache.move_to_end(project_id)
+        while len(_cache) > settings.FEATURE_FLAG_COMPILED_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return compiled_flags
@@ -1,3 +1,4 @@
+import hashlib
 import json
 from django.http import HttpRequest
 import structlog
@@ -420,7 +421,10 @@ class FeatureFlag(FileSystemSyncMixin, ModelActivityMixin, RootTeamMixin, models
 
 @mutable_receiver([post_save, post_delete], sender=FeatureFlag)
 def refresh_flag_cache_on_updates(sender, instance, **kwargs):
+    from posthog.models.feature_flag.local_evaluation import invalidate_local_evaluation_cache
+
     set_feature_flags_for_team_in_cache(instance.team.project_id)
+    invalidate_local_evaluation_cache(instance.team.project_id)
 
 
 class FeatureFlagHashKeyOverride(models.Model):
@@ -458,6 +462,14 @@ class FeatureFlagOverride(models.Model):
         ]
 
 
+def feature_flags_cache_key(project_id: int) -> str:
+    return f"team_feature_flags_{project_id}"
+
+
+def feature_flags_cache_version(flag_data: str) -> str:
+    return hashlib.sha256(flag_data.encode("utf-8")).hexdigest()[:32]
+
+
 def set_feature_flags_for_team_in_cache(
     project_id: int,
     feature_flags: Optional[list[FeatureFlag]] = None,
@@ -477,7 +489,7 @@ def set_feature_flags_for_team_in_cache(
     serialized_flags = MinimalFeatureFlagSerializer(all_feature_flags, many=True).data
 
     try:
-        cache.set(f"team_feature_flags_{project_id}", json.dumps(serialized_flags), FIVE_DAYS)
+        cache.set(feature_flags_cache_key(project_id), json.dumps(serialized_flags), FIVE_DAYS)
     except Exception:
         # redis is unavailable
         logger.exception("Redis is unavailable")
@@ -488,7 +500,7 @@ def set_feature_flags_for_team_in_cache(
 
 def get_feature_flags_for_team_in_cache(project_id: int) -> Optional[list[FeatureFlag]]:
     try:
-        flag_data = cache.get(f"team_feature_flags_{project_id}")
+        flag_data = cache.get(feature_flags_cache_key(project_id))
     except Exception:
         # redis is unavailable
         logger.exception("Redis is unavailable")
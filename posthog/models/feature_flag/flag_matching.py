@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from enum import StrEnum
 import time
 import structlog
+from collections.abc import Sequence
 from typing import Literal, Optional, Union, cast
 
 from prometheus_client import Counter
@@ -35,6 +36,14 @@ from posthog.database_healthcheck import (
 from posthog.utils import label_for_team_id_to_track
 from posthog.helpers.encrypted_flag_payloads import get_decrypted_flag_payload
 
+from .compiled_flags import (
+    CompiledFeatureFlag,
+    ParsedCondition,
+    VariantBucket,
+    build_variant_lookup_table,
+    get_compiled_feature_flags_for_team_in_cache,
+    parse_condition,
+)
 from .feature_flag import (
     FeatureFlag,
     FeatureFlagHashKeyOverride,
@@ -44,6 +53,9 @@ from .feature_flag import (
 
 logger = structlog.get_logger(__name__)
 
+# Flags are matched as models, or compiled from the flags cached for /decide
+MatchableFeatureFlag = Union[FeatureFlag, CompiledFeatureFlag]
+
 __LONG_SCALE__ = float(0xFFFFFFFFFFFFFFF)
 
 FLAG_MATCHING_QUERY_TIMEOUT_MS = 500  # 500 ms. Any longer and we'll just error out.
@@ -163,7 +175,7 @@ class FeatureFlagMatcher:
         self,
         team_id: int,
         project_id: int,
-        feature_flags: list[FeatureFlag],
+        feature_flags: Sequence[MatchableFeatureFlag],
         distinct_id: str,
         groups: Optional[dict[GroupTypeName, str]] = None,
         cache: Optional[FlagsMatcherCache] = None,
@@ -172,6 +184,7 @@ class FeatureFlagMatcher:
         group_property_value_overrides: Optional[dict[str, dict[str, Union[str, int]]]] = None,
         skip_database_flags: bool = False,
         cohorts_cache: Optional[dict[int, CohortOrEmpty]] = None,
+        precomputed_query_conditions: Optional[dict[str, bool]] = None,
     ):
         if group_property_value_overrides is None:
             group_property_value_overrides = {}
@@ -191,13 +204,15 @@ class FeatureFlagMatcher:
         self.property_value_overrides = property_value_overrides
         self.group_property_value_overrides = group_property_value_overrides
         self.skip_database_flags = skip_database_flags
+        # Conditions queried in bulk for many distinct_ids by `BulkFeatureFlagMatcher`
+        self.precomputed_query_conditions = precomputed_query_conditions
 
         if cohorts_cache is None:
             self.cohorts_cache = {}
         else:
             self.cohorts_cache = cohorts_cache
 
-    def get_match(self, feature_flag: FeatureFlag) -> FeatureFlagMatch:
+    def get_match(self, feature_flag: MatchableFeatureFlag) -> FeatureFlagMatch:
         # If aggregating flag by groups and relevant group type is not passed - flag is off!
         if self.hashed_identifier(feature_flag) is None:
             return FeatureFlagMatch(match=False, reason=FeatureFlagMatchReason.NO_GROUP_TYPE)
@@ -250,15 +265,20 @@ class FeatureFlagMatcher:
         # Stable sort conditions with variant overrides to the top. This ensures that if overrides are present, they are
         # evaluated first, and the variant override is applied to the first matching condition.
         # :TRICKY: We need to include the enumeration index before the sort so the flag evaluation reason gets the right condition index.
-        sorted_flag_conditions = sorted(
-            enumerate(feature_flag.conditions),
-            key=lambda condition_tuple: 0 if condition_tuple[1].get("variant") else 1,
-        )
+        if isinstance(feature_flag, CompiledFeatureFlag):
+            sorted_flag_conditions = feature_flag.sorted_conditions
+            variant_keys = feature_flag.variant_keys
+        else:
+            sorted_flag_conditions = sorted(
+                enumerate(feature_flag.conditions),
+                key=lambda condition_tuple: 0 if condition_tuple[1].get("variant") else 1,
+            )
+            variant_keys = frozenset(variant["key"] for variant in feature_flag.variants)
         for index, condition in sorted_flag_conditions:
             is_match, evaluation_reason = self.is_condition_match(feature_flag, condition, index)
             if is_match:
                 variant_override = condition.get("variant")
-                if variant_override in [variant["key"] for variant in feature_flag.variants]:
+                if variant_override in variant_keys:
                     variant = variant_override
                 else:
                     variant = self.get_matching_variant(feature_flag)
@@ -339,16 +359,16 @@ class FeatureFlagMatcher:
             flags_details,
         )
 
-    def get_matching_variant(self, feature_flag: FeatureFlag) -> Optional[str]:
+    def get_matching_variant(self, feature_flag: MatchableFeatureFlag) -> Optional[str]:
         # Calculate hash once outside the loop since it's the same for all variants
         variant_hash = self.get_hash(feature_flag, salt="variant")
         for variant in self.variant_lookup_table(feature_flag):
-            if variant_hash >= variant["value_min"] and variant_hash < variant["value_max"]:
-                return variant["key"]
+            if variant_hash >= variant.value_min and variant_hash < variant.value_max:
+                return variant.key
         return None
 
     def get_matching_payload(
-        self, is_match: bool, match_variant: Optional[str], feature_flag: FeatureFlag
+        self, is_match: bool, match_variant: Optional[str], feature_flag: MatchableFeatureFlag
     ) -> Optional[object]:
         if is_match:
             if match_variant:
@@ -362,7 +382,9 @@ class FeatureFlagMatcher:
         else:
             return None
 
-    def is_holdout_condition_match(self, feature_flag: FeatureFlag) -> tuple[bool, str | None, FeatureFlagMatchReason]:
+    def is_holdout_condition_match(
+        self, feature_flag: MatchableFeatureFlag
+    ) -> tuple[bool, str | None, FeatureFlagMatchReason]:
         # TODO: Right now holdout conditions only support basic rollout %s, and not property overrides.
 
         # Evaluate if properties are empty
@@ -389,7 +411,7 @@ class FeatureFlagMatcher:
 
         return False, None, FeatureFlagMatchReason.NO_CONDITION_MATCH
 
-    def is_super_condition_match(self, feature_flag: FeatureFlag) -> tuple[bool, bool, FeatureFlagMatchReason]:
+    def is_super_condition_match(self, feature_flag: MatchableFeatureFlag) -> tuple[bool, bool, FeatureFlagMatchReason]:
         # TODO: Right now super conditions with property overrides bork when the database is down,
         # because we're still going to the database in the line below. Ideally, we should not go to the database.
         # Don't skip test: test_super_condition_with_override_properties_doesnt_make_database_requests when this is fixed.
@@ -424,12 +446,12 @@ class FeatureFlagMatcher:
         return False, False, FeatureFlagMatchReason.NO_CONDITION_MATCH
 
     def is_condition_match(
-        self, feature_flag: FeatureFlag, condition: dict, condition_index: int
+        self, feature_flag: MatchableFeatureFlag, condition: dict, condition_index: int
     ) -> tuple[bool, FeatureFlagMatchReason]:
-        rollout_percentage = condition.get("rollout_percentage")
-        properties = condition.get("properties")
-        if properties and len(properties) > 0:
-            properties = Filter(data=condition).property_groups.flat
+        parsed_condition = self._parse_condition(feature_flag, condition)
+        rollout_threshold = parsed_condition.rollout_threshold
+        if condition.get("properties"):
+            properties = parsed_condition.properties
             if self.can_compute_locally(properties, feature_flag.aggregation_group_type_index):
                 # :TRICKY: If overrides are enough to determine if a condition is a match,
                 # we can skip checking the query.
@@ -452,23 +474,28 @@ class FeatureFlagMatcher:
 
             if not condition_match:
                 return False, FeatureFlagMatchReason.NO_CONDITION_MATCH
-            elif rollout_percentage is None:
+            elif rollout_threshold is None:
                 return True, FeatureFlagMatchReason.CONDITION_MATCH
 
-        if rollout_percentage is not None and self.get_hash(feature_flag) > (rollout_percentage / 100):
+        if rollout_threshold is not None and self.get_hash(feature_flag) > rollout_threshold:
             return False, FeatureFlagMatchReason.OUT_OF_ROLLOUT_BOUND
 
         return True, FeatureFlagMatchReason.CONDITION_MATCH
 
-    def _super_condition_matches(self, feature_flag: FeatureFlag) -> bool:
+    def _parse_condition(self, feature_flag: MatchableFeatureFlag, condition: dict) -> ParsedCondition:
+        if isinstance(feature_flag, CompiledFeatureFlag):
+            return feature_flag.parsed_condition(condition)
+        return parse_condition(condition)
+
+    def _super_condition_matches(self, feature_flag: MatchableFeatureFlag) -> bool:
         return self._get_query_condition(f"flag_{feature_flag.pk}_super_condition")
 
-    def _super_condition_is_set(self, feature_flag: FeatureFlag) -> Optional[bool]:
+    def _super_condition_is_set(self, feature_flag: MatchableFeatureFlag) -> Optional[bool]:
         return self._get_query_condition(f"flag_{feature_flag.pk}_super_condition_is_set")
 
     def _condition_matches(
         self,
-        feature_flag: FeatureFlag,
+        feature_flag: MatchableFeatureFlag,
         condition_index: int,
         match_if_entity_doesnt_exist: bool = False,
         group_type_index: Optional[GroupTypeIndex] = None,
@@ -498,19 +525,15 @@ class FeatureFlagMatcher:
 
     # Define contiguous sub-domains within [0, 1].
     # By looking up a random hash value, you can find the associated variant key.
-    # e.g. the first of two variants with 50% rollout percentage will have value_max: 0.5
-    # and the second will have value_min: 0.5 and value_max: 1.0
-    def variant_lookup_table(self, feature_flag: FeatureFlag):
-        lookup_table = []
-        value_min = 0
-        for variant in feature_flag.variants:
-            value_max = value_min + variant["rollout_percentage"] / 100
-            lookup_table.append({"value_min": value_min, "value_max": value_max, "key": variant["key"]})
-            value_min = value_max
-        return lookup_table
+    def variant_lookup_table(self, feature_flag: MatchableFeatureFlag) -> list[VariantBucket]:
+        if isinstance(feature_flag, CompiledFeatureFlag):
+            return feature_flag.variant_lookup_table
+        return build_variant_lookup_table(feature_flag.variants)
 
     @cached_property
     def query_conditions(self) -> dict[str, bool]:
+        if self.precomputed_query_conditions is not None:
+            return self.precomputed_query_conditions
         try:
             # Some extra wiggle room here for timeouts because this depends on the number of flags as well,
             # and not just the database query.
@@ -555,7 +578,7 @@ class FeatureFlagMatcher:
                 annotate_query = True
                 nonlocal person_query
 
-                property_list = Filter(data=condition).property_groups.flat
+                property_list = self._parse_condition(feature_flag, condition).properties
                 properties_with_math_operators = get_all_properties_with_math_operators(
                     property_list, self.cohorts_cache, self.project_id
                 )
@@ -702,7 +725,7 @@ class FeatureFlagMatcher:
             # Covers all cases like invalid JSON, invalid operator, invalid property name, invalid group input format, etc.
             raise
 
-    def hashed_identifier(self, feature_flag: FeatureFlag) -> Optional[str]:
+    def hashed_identifier(self, feature_flag: MatchableFeatureFlag) -> Optional[str]:
         """
         If aggregating by people, returns distinct_id.
 
@@ -729,14 +752,14 @@ class FeatureFlagMatcher:
     # Given the same identifier and key, it'll always return the same float. These floats are
     # uniformly distributed between 0 and 1, so if we want to show this feature to 20% of traffic
     # we can do _hash(key, identifier) < 0.2
-    def get_hash(self, feature_flag: FeatureFlag, salt="") -> float:
+    def get_hash(self, feature_flag: MatchableFeatureFlag, salt="") -> float:
         return self.calculate_hash(f"{feature_flag.key}.", self.hashed_identifier(feature_flag), salt)
 
     # This function takes a identifier and a feature flag and returns a float between 0 and 1.
     # Given the same identifier and key, it'll always return the same float. These floats are
     # uniformly distributed between 0 and 1, and are keyed only on user's distinct id / group key.
     # Thus, irrespective of the flag, the same user will always get the same value.
-    def get_holdout_hash(self, feature_flag: FeatureFlag, salt="") -> float:
+    def get_holdout_hash(self, feature_flag: MatchableFeatureFlag, salt="") -> float:
         return self.calculate_hash("holdout-", self.hashed_identifier(feature_flag), salt)
 
     @classmethod
@@ -831,7 +854,7 @@ def get_feature_flag_hash_key_overrides(
 
 # Return a Dict with all flags and their values
 def _get_all_feature_flags(
-    feature_flags: list[FeatureFlag],
+    feature_flags: Sequence[MatchableFeatureFlag],
     team_id: int,
     project_id: int,
     distinct_id: str,
@@ -911,7 +934,11 @@ def get_all_feature_flags_with_details(
     property_value_overrides, group_property_value_overrides = add_local_person_and_group_properties(
         distinct_id, groups, property_value_overrides, group_property_value_overrides
     )
-    feature_flags_to_be_evaluated = get_feature_flags_for_team_in_cache(team.project_id)
+    feature_flags_to_be_evaluated: Optional[Sequence[MatchableFeatureFlag]]
+    if settings.FEATURE_FLAG_COMPILED_CACHE_ENABLED:
+        feature_flags_to_be_evaluated = get_compiled_feature_flags_for_team_in_cache(team.project_id)
+    else:
+        feature_flags_to_be_evaluated = get_feature_flags_for_team_in_cache(team.project_id)
     cache_hit = True
 
     if feature_flags_to_be_evaluated is None:
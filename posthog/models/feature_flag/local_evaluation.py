@@ -0,0 +1,315 @@
+"""
+Precomputed responses of the `local_evaluation` endpoint.
+
+Server-side SDKs poll the endpoint every 30 seconds from every pod they run on, and the response only changes when
+a flag, a cohort or a group type of the project changes. So the rendered response is kept in Redis per project,
+together with an ETag, and rebuilt from the signals of those models. Pollers that send the ETag back in
+`If-None-Match` get a 304 without the payload being read from Redis at all.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from prometheus_client import Counter
+from rest_framework.renderers import JSONRenderer
+
+from posthog.constants import SURVEY_TARGETING_FLAG_PREFIX
+from posthog.exceptions_capture import capture_exception
+from posthog.models.cohort import Cohort, CohortOrEmpty
+from posthog.models.feature_flag.feature_flag import FeatureFlag
+from posthog.models.group_type_mapping import GroupTypeMapping
+from posthog.models.signals import mutable_receiver
+
+logger = structlog.get_logger(__name__)
+
+LOCAL_EVALUATION_CACHE_COUNTER = Counter(
+    "posthog_local_evaluation_cache",
+    "Lookups of precomputed local evaluation responses",
+    labelnames=["result"],
+)
+
+# Fields of a cohort that end up in local evaluation responses, saves only touching others (e.g. counts) are ignored
+COHORT_FIELDS_USED_IN_LOCAL_EVALUATION = {"filters", "groups", "deleted", "is_static", "team"}
+
+
+class LocalEvaluationBuildError(Exception):
+    def __init__(self, code: str, detail: str):
+        super().__init__(detail)
+        self.code = code
+        self.detail = detail
+
+
+@dataclass(frozen=True)
+class LocalEvaluationResponse:
+    etag: str
+    content: bytes
+    # Responses with only survey targeting flags aren't billed
+    is_billable: bool
+
+
+def _etag_key(project_id: int, include_cohorts: bool) -> str:
+    return f"local_evaluation:etag:project:{project_id}:cohorts:{int(include_cohorts)}"
+
+
+def _response_key(project_id: int, include_cohorts: bool) -> str:
+    return f"local_evaluation:response:project:{project_id}:cohorts:{int(include_cohorts)}"
+
+
+def build_local_evaluation_response(
+    project_id: int, include_cohorts: bool, using_database: str, serializer_context: Optional[dict[str, Any]] = None
+) -> dict[str, Any]:
+    from posthog.api.feature_flag import MinimalFeatureFlagSerializer
+
+    try:
+        feature_flags = list(
+            FeatureFlag.objects.db_manager(using_database).filter(
+                ~Q(is_remote_configuration=True),
+                team__project_id=project_id,
+                deleted=False,
+            )
+        )
+        logger.info("Retrieved feature flags", flags_count=len(feature_flags))
+    except Exception as e:
+        logger.exception("Error fetching feature flags")
+        capture_exception(e)
+        raise LocalEvaluationBuildError("feature_flags_fetch_failed", "Error fetching feature flags")
+
+    cohorts: dict[str, Any] = {}
+    seen_cohorts_cache: dict[int, CohortOrEmpty] = {}
+
+    if include_cohorts:
+        try:
+            seen_cohorts_cache = {
+                cohort.pk: cohort
+                for cohort in Cohort.objects.db_manager(using_database).filter(
+                    team__project_id=project_id, deleted=False
+                )
+            }
+            logger.info("Prefetched cohorts", cohorts_count=len(seen_cohorts_cache))
+        except Exception as e:
+            logger.exception("Error prefetching cohorts")
+            capture_exception(e)
+            raise LocalEvaluationBuildError("cohorts_fetch_failed", "Error fetching cohorts")
+
+    parsed_flags = []
+    for feature_flag in feature_flags:
+        try:
+            filters = feature_flag.get_filters()
+            # transform cohort filters to be evaluated locally, but only if send_cohorts is false
+            if not include_cohorts and (
+                len(
+                    feature_flag.get_cohort_ids(
+                        using_database=using_database,
+                        seen_cohorts_cache=seen_cohorts_cache,
+                    )
+                )
+                == 1
+            ):
+                feature_flag.filters = {
+                    **filters,
+                    "groups": feature_flag.transform_cohort_filters_for_easy_evaluation(
+                        using_database=using_database,
+                        seen_cohorts_cache=seen_cohorts_cache,
+                    ),
+                }
+            else:
+                feature_flag.filters = filters
+
+            parsed_flags.append(feature_flag)
+
+            # when param set, send cohorts, for libraries that can handle evaluating them locally
+            # irrespective of complexity
+            if include_cohorts:
+                try:
+                    cohort_ids = feature_flag.get_cohort_ids(
+                        using_database=using_database,
+                        seen_cohorts_cache=seen_cohorts_cache,
+                    )
+
+                    for id in cohort_ids:
+                        # don't duplicate queries for already added cohorts
+                        if id not in cohorts:
+                            if id in seen_cohorts_cache:
+                                cohort = seen_cohorts_cache[id]
+                            else:
+                                cohort = (
+                                    Cohort.objects.db_manager(using_database)
+                                    .filter(id=id, team__project_id=project_id, deleted=False)
+                                    .first()
+                                )
+                                seen_cohorts_cache[id] = cohort or ""
+
+                            if cohort and not cohort.is_static:
+                                try:
+                                    cohorts[str(cohort.pk)] = cohort.properties.to_dict()
+                                except Exception:
+                                    logger.exception("Error processing cohort properties", cohort_id=id)
+                                    continue
+
+                except Exception:
+                    logger.exception("Error processing cohorts for feature flag", flag_id=feature_flag.pk)
+                    continue
+
+        except Exception:
+            logger.exception("Error processing feature flag", flag_id=feature_flag.pk)
+            continue
+
+    try:
+        return {
+            "flags": [
+                MinimalFeatureFlagSerializer(feature_flag, context=serializer_context or {}).data
+                for feature_flag in parsed_flags
+            ],
+            "group_type_mapping": {
+                str(row.group_type_index): row.group_type
+                for row in GroupTypeMapping.objects.db_manager(using_database).filter(project_id=project_id)
+            },
+            "cohorts": cohorts,
+        }
+    except Exception as e:
+        logger.exception("Error serializing response")
+        capture_exception(e)
+        raise LocalEvaluationBuildError("serialization_failed", "Error preparing response")
+
+
+def _render(
+    project_id: int, include_cohorts: bool, using_database: str, serializer_context: Optional[dict[str, Any]] = None
+) -> LocalEvaluationResponse:
+    response_data = build_local_evaluation_response(project_id, include_cohorts, using_database, serializer_context)
+    content = JSONRenderer().render(response_data)
+    # The variant is part of the ETag, so an ETag of one is never a match for the other even if their content is equal
+    digest = hashlib.sha256(f"cohorts:{int(include_cohorts)}:".encode() + content).hexdigest()
+    return LocalEvaluationResponse(
+        etag=f'"{digest[:32]}"',
+        content=content,
+        is_billable=any(not flag["key"].startswith(SURVEY_TARGETING_FLAG_PREFIX) for flag in response_data["flags"]),
+    )
+
+
+def _store(project_id: int, include_cohorts: bool, response: LocalEvaluationResponse, *, overwrite: bool) -> None:
+    timeout = settings.LOCAL_EVALUATION_CACHE_TTL
+    if overwrite:
+        cache.set(_response_key(project_id, include_cohorts), response, timeout)
+    # Built on a cache miss, possibly from data read before a change committed, so never replace what a signal
+    # rebuilt after the commit
+    elif not cache.add(_response_key(project_id, include_cohorts), response, timeout):
+        return
+    cache.set(_etag_key(project_id, include_cohorts), (response.etag, response.is_billable), timeout)
+
+
+def _delete(project_id: int, include_cohorts_options: tuple[bool, ...]) -> None:
+    cache.delete_many(
+        [
+            key
+            for include_cohorts in include_cohorts_options
+            for key in (_etag_key(project_id, include_cohorts), _response_key(project_id, include_cohorts))
+        ]
+    )
+
+
+def get_local_evaluation_etag(project_id: int, include_cohorts: bool) -> Optional[tuple[str, bool]]:
+    """
+    Returns the ETag of the cached response and whether it's billable, without reading the response itself.
+    """
+    if not settings.LOCAL_EVALUATION_CACHE_ENABLED:
+        return None
+    try:
+        return cache.get(_etag_key(project_id, include_cohorts))
+    except Exception as e:
+        logger.warning("local_evaluation_cache_unavailable", project_id=project_id, error=str(e))
+        return None
+
+
+def get_local_evaluation_response(
+    project_id: int, include_cohorts: bool, using_database: str, serializer_context: Optional[dict[str, Any]] = None
+) -> LocalEvaluationResponse:
+    """
+    Returns the cached response, building and caching it if it's missing.
+    Raises `LocalEvaluationBuildError` if building it fails.
+
+    `using_database` is only used when the cache is disabled. What's cached is read from the primary, as it's served
+    for up to LOCAL_EVALUATION_CACHE_TTL and a replica lagging behind a change would keep it that long.
+    """
+    if not settings.LOCAL_EVALUATION_CACHE_ENABLED:
+        return _render(project_id, include_cohorts, using_database, serializer_context)
+
+    try:
+        response: Optional[LocalEvaluationResponse] = cache.get(_response_key(project_id, include_cohorts))
+    except Exception as e:
+        logger.warning("local_evaluation_cache_unavailable", project_id=project_id, error=str(e))
+        response = None
+
+    if response is not None:
+        LOCAL_EVALUATION_CACHE_COUNTER.labels(result="hit").inc()
+        return response
+
+    LOCAL_EVALUATION_CACHE_COUNTER.labels(result="miss").inc()
+    response = _render(project_id, include_cohorts, "default", serializer_context)
+    try:
+        _store(project_id, include_cohorts, response, overwrite=False)
+    except Exception as e:
+        logger.warning("local_evaluation_cache_unavailable", project_id=project_id, error=str(e))
+    return response
+
+
+def rebuild_local_evaluation_cache(project_id: int, polled: list[bool]) -> None:
+    """
+    Drops the cached responses and rebuilds the ones in `polled` from the primary. Runs in the
+    `update_local_evaluation_cache` task once a change is committed.
+    """
+    try:
+        # A poll may have cached a response built before the change committed
+        _delete(project_id, (False, True))
+    except Exception as e:
+        logger.warning("local_evaluation_cache_unavailable", project_id=project_id, error=str(e))
+        return
+
+    for include_cohorts in polled:
+        try:
+            _store(project_id, include_cohorts, _render(project_id, include_cohorts, "default"), overwrite=True)
+        except Exception as e:
+            # Nothing stale is left behind, the next poll builds the response instead
+            logger.exception("local_evaluation_cache_rebuild_failed", project_id=project_id)
+            capture_exception(e)
+
+
+def invalidate_local_evaluation_cache(project_id: int) -> None:
+    """
+    Drops the cached responses right away, so no poll gets the old ones while the change is being committed.
+    Once it is, a task drops them again and rebuilds the ones that are being polled from the primary.
+    """
+    if not settings.LOCAL_EVALUATION_CACHE_ENABLED:
+        return
+
+    polled = [
+        include_cohorts
+        for include_cohorts in (False, True)
+        if get_local_evaluation_etag(project_id, include_cohorts) is not None
+    ]
+    try:
+        _delete(project_id, (False, True))
+    except Exception as e:
+        logger.warning("local_evaluation_cache_unavailable", project_id=project_id, error=str(e))
+    from posthog.tasks.feature_flags import update_local_evaluation_cache
+
+    transaction.on_commit(lambda: update_local_evaluation_cache.delay(project_id, polled))
+
+
+@mutable_receiver([post_save, post_delete], sender=Cohort)
+def refresh_local_evaluation_cache_on_cohort_updates(sender, instance: Cohort, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not COHORT_FIELDS_USED_IN_LOCAL_EVALUATION.intersection(update_fields):
+        return
+    invalidate_local_evaluation_cache(instance.team.project_id)
+
+
+@mutable_receiver([post_save, post_delete], sender=GroupTypeMapping)
+def refresh_local_evaluation_cache_on_group_type_updates(sender, instance: GroupTypeMapping, **kwargs):
+    invalidate_local_evaluation_cache(instance.project_id)
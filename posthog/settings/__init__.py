@@ -113,6 +113,93 @@ PROM_PUSHGATEWAY_ADDRESS: str | None = os.getenv("PROM_PUSHGATEWAY_ADDRESS", Non
 
 HOGQL_INCREASED_MAX_EXECUTION_TIME: int = get_from_env("HOGQL_INCREASED_MAX_EXECUTION_TIME", 600, type_cast=int)
 
+# Process-local cache of built HogQL databases, invalidated through per-team versions in Redis.
+# The TTL is a safety net for changes that bypass model signals (e.g. `QuerySet.update()`).
+HOGQL_DATABASE_CACHE_ENABLED: bool = get_from_env("HOGQL_DATABASE_CACHE_ENABLED", not TEST, type_cast=str_to_bool)
+HOGQL_DATABASE_CACHE_TTL: int = get_from_env("HOGQL_DATABASE_CACHE_TTL", 300, type_cast=int)
+HOGQL_DATABASE_CACHE_MAX_ENTRIES: int = get_from_env("HOGQL_DATABASE_CACHE_MAX_ENTRIES", 256, type_cast=int)
+
+# Process-local cache of compiled (printed) HogQL queries. The TTL bounds staleness from inputs that have no
+# version of their own, like property definitions and materialized columns.
+HOGQL_COMPILED_QUERY_CACHE_ENABLED: bool = get_from_env(
+    "HOGQL_COMPILED_QUERY_CACHE_ENABLED", not TEST, type_cast=str_to_bool
+)
+HOGQL_COMPILED_QUERY_CACHE_TTL: int = get_from_env("HOGQL_COMPILED_QUERY_CACHE_TTL", 60, type_cast=int)
+HOGQL_COMPILED_QUERY_CACHE_MAX_ENTRIES: int = get_from_env(
+    "HOGQL_COMPILED_QUERY_CACHE_MAX_ENTRIES", 2000, type_cast=int
+)
+
+# Process-local index of property types and materialized columns per project, invalidated through versions in Redis.
+# Most property definitions are written by ingestion without going through model signals, hence the short TTL.
+HOGQL_PROPERTY_INDEX_ENABLED: bool = get_from_env("HOGQL_PROPERTY_INDEX_ENABLED", not TEST, type_cast=str_to_bool)
+HOGQL_PROPERTY_INDEX_TTL: int = get_from_env("HOGQL_PROPERTY_INDEX_TTL", 60, type_cast=int)
+HOGQL_PROPERTY_INDEX_MAX_ENTRIES: int = get_from_env("HOGQL_PROPERTY_INDEX_MAX_ENTRIES", 512, type_cast=int)
+# Projects with more typed properties than this look types up per query instead
+HOGQL_PROPERTY_INDEX_MAX_PROPERTIES: int = get_from_env("HOGQL_PROPERTY_INDEX_MAX_PROPERTIES", 20_000, type_cast=int)
+
+# Independent queries of one insight (e.g. trends series) run in parallel on a shared pool of this many threads,
+# with at most INSIGHT_QUERY_FANOUT_MAX_PARALLELISM in flight per insight
+INSIGHT_QUERY_FANOUT_MAX_WORKERS: int = get_from_env("INSIGHT_QUERY_FANOUT_MAX_WORKERS", 32, type_cast=int)
+INSIGHT_QUERY_FANOUT_MAX_PARALLELISM: int = get_from_env("INSIGHT_QUERY_FANOUT_MAX_PARALLELISM", 4, type_cast=int)
+
+# Tiles of a dashboard are serialized in parallel on a shared pool of this many threads, with at most
+# DASHBOARD_TILES_MAX_PARALLELISM in flight per dashboard. Each thread uses a Postgres connection of its own.
+DASHBOARD_TILES_PARALLEL_ENABLED: bool = get_from_env("DASHBOARD_TILES_PARALLEL_ENABLED", False, type_cast=str_to_bool)
+DASHBOARD_TILES_MAX_WORKERS: int = get_from_env("DASHBOARD_TILES_MAX_WORKERS", 32, type_cast=int)
+DASHBOARD_TILES_MAX_PARALLELISM: int = get_from_env("DASHBOARD_TILES_MAX_PARALLELISM", 4, type_cast=int)
+
+# Single-flight for identical query runner calculations: followers wait for the leader's result to land in the cache
+QUERY_COALESCING_ENABLED: bool = get_from_env("QUERY_COALESCING_ENABLED", not TEST, type_cast=str_to_bool)
+QUERY_COALESCING_LOCK_TIMEOUT: int = get_from_env("QUERY_COALESCING_LOCK_TIMEOUT", 180, type_cast=int)
+QUERY_COALESCING_WAIT_TIMEOUT: int = get_from_env("QUERY_COALESCING_WAIT_TIMEOUT", 60, type_cast=int)
+
+# Refresh stale trends by only querying the intervals after the cached result's last refresh, minus a lookback
+# for late arriving events. Results can miss events that arrive later than the lookback for older intervals.
+TRENDS_INCREMENTAL_CALCULATION_ENABLED: bool = get_from_env(
+    "TRENDS_INCREMENTAL_CALCULATION_ENABLED", False, type_cast=str_to_bool
+)
+TRENDS_INCREMENTAL_LOOKBACK_HOURS: int = get_from_env("TRENDS_INCREMENTAL_LOOKBACK_HOURS", 24, type_cast=int)
+
+# Cache warming calculates insights sharing a cache key once, and the most viewed per ClickHouse time first, spending
+# at most CACHE_WARMING_TIME_BUDGET_SECONDS of estimated query time per run on the cluster
+CACHE_WARMING_PLANNER_ENABLED: bool = get_from_env("CACHE_WARMING_PLANNER_ENABLED", False, type_cast=str_to_bool)
+CACHE_WARMING_TIME_BUDGET_SECONDS: int = get_from_env("CACHE_WARMING_TIME_BUDGET_SECONDS", 60 * 60, type_cast=int)
+
+# Rendered feature flag local evaluation responses per project, rebuilt when flags, cohorts or group types change.
+# The TTL is a safety net for changes that bypass model signals (e.g. `QuerySet.update()`).
+LOCAL_EVALUATION_CACHE_ENABLED: bool = get_from_env("LOCAL_EVALUATION_CACHE_ENABLED", not TEST, type_cast=str_to_bool)
+LOCAL_EVALUATION_CACHE_TTL: int = get_from_env("LOCAL_EVALUATION_CACHE_TTL", 60 * 60, type_cast=int)
+
+# Process-local cache of feature flags compiled for /decide, keyed by a digest of the flags cached in Redis.
+# Entries can't go stale, as any change to the flags changes the digest.
+FEATURE_FLAG_COMPILED_CACHE_ENABLED: bool = get_from_env(
+    "FEATURE_FLAG_COMPILED_CACHE_ENABLED", True, type_cast=str_to_bool
+)
+FEATURE_FLAG_COMPILED_CACHE_MAX_ENTRIES: int = get_from_env(
+    "FEATURE_FLAG_COMPILED_CACHE_MAX_ENTRIES", 2_000, type_cast=int
+)
+
+# Scheduled recalculations of property and rolling window cohorts only re-evaluate persons that changed or produced
+# relevant events since the previous one. A full recalculation still runs at least this often.
+COHORT_INCREMENTAL_CALCULATION_ENABLED: bool = get_from_env(
+    "COHORT_INCREMENTAL_CALCULATION_ENABLED", False, type_cast=str_to_bool
+)
+COHORT_INCREMENTAL_FULL_CALCULATION_INTERVAL_HOURS: int = get_from_env(
+    "COHORT_INCREMENTAL_FULL_CALCULATION_INTERVAL_HOURS", 24, type_cast=int
+)
+
+# Scheduled calculations of a team's cohorts that only filter on person properties run together, in a single scan
+# of persons per batch of at most COHORT_BATCH_CALCULATION_MAX_SIZE cohorts
+COHORT_BATCH_CALCULATION_ENABLED: bool = get_from_env("COHORT_BATCH_CALCULATION_ENABLED", False, type_cast=str_to_bool)
+COHORT_BATCH_CALCULATION_MAX_SIZE: int = get_from_env("COHORT_BATCH_CALCULATION_MAX_SIZE", 100, type_cast=int)
+
+# Event rollups keep declared trends shapes pre-aggregated in ClickHouse. Buckets are materialized once they're
+# EVENT_ROLLUPS_MATERIALIZATION_LAG_HOURS old, starting EVENT_ROLLUPS_BACKFILL_DAYS back, and matching HogQL queries
+# read them instead of events
+EVENT_ROLLUPS_ENABLED: bool = get_from_env("EVENT_ROLLUPS_ENABLED", False, type_cast=str_to_bool)
+EVENT_ROLLUPS_BACKFILL_DAYS: int = get_from_env("EVENT_ROLLUPS_BACKFILL_DAYS", 90, type_cast=int)
+EVENT_ROLLUPS_MATERIALIZATION_LAG_HOURS: int = get_from_env("EVENT_ROLLUPS_MATERIALIZATION_LAG_HOURS", 2, type_cast=int)
+
 # Extend and override these settings with EE's ones
 if "ee.apps.EnterpriseConfig" in INSTALLED_APPS:
     from ee.settings import *  # noqa: F401, F403
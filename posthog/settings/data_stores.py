@@ -361,6 +361,9 @@ if not REDIS_URL:
 # The TolerantZlibCompressor is a drop-in replacement for the standard Django ZlibCompressor that
 # can cope with compressed and uncompressed reading at the same time
 USE_REDIS_COMPRESSION = get_from_env("USE_REDIS_COMPRESSION", True, type_cast=str_to_bool)
+# Write cached query results in the columnar, zstd-compressed format. Reading handles both formats, so only turn
+# this on once every reader has been deployed with support for it.
+QUERY_CACHE_COMPACT_FORMAT = get_from_env("QUERY_CACHE_COMPACT_FORMAT", False, type_cast=str_to_bool)
 
 # AWS ElastiCache supports "reader" endpoints.
 # See "Finding a Redis (Cluster Mode Disabled) Cluster's Endpoints (Console)"
@@ -17,6 +17,23 @@ USE_LOCAL_SETUP = TEST or (DEBUG and len(os.getenv("OBJECT_STORAGE_ENDPOINT", "h
 
 PYARROW_DEBUG_LOGGING = get_from_env("PYARROW_DEBUG_LOGGING", False, type_cast=str_to_bool)
 
+# Import pipelines read from the source in a background thread while writing to Delta, keeping at most
+# DATA_WAREHOUSE_PIPELINE_PREFETCH_MAX_BYTES of tables read ahead of the one being written
+DATA_WAREHOUSE_PIPELINE_PREFETCH_ENABLED: bool = get_from_env(
+    "DATA_WAREHOUSE_PIPELINE_PREFETCH_ENABLED", False, type_cast=str_to_bool
+)
+DATA_WAREHOUSE_PIPELINE_PREFETCH_MAX_BYTES: int = get_from_env(
+    "DATA_WAREHOUSE_PIPELINE_PREFETCH_MAX_BYTES", 400 * 1024 * 1024, type_cast=int
+)
+
+# Postgres, MySQL and MSSQL syncs reading a whole table with a single integer primary key split it into ranges of the
+# key, read over up to DATA_WAREHOUSE_SQL_PARALLEL_READERS connections, each for at least
+# DATA_WAREHOUSE_SQL_PARALLEL_READ_MIN_ROWS rows. 1 reads over a single connection.
+DATA_WAREHOUSE_SQL_PARALLEL_READERS: int = get_from_env("DATA_WAREHOUSE_SQL_PARALLEL_READERS", 1, type_cast=int)
+DATA_WAREHOUSE_SQL_PARALLEL_READ_MIN_ROWS: int = get_from_env(
+    "DATA_WAREHOUSE_SQL_PARALLEL_READ_MIN_ROWS", 5_000_000, type_cast=int
+)
+
 GOOGLE_ADS_SERVICE_ACCOUNT_CLIENT_EMAIL: str | None = os.getenv("GOOGLE_ADS_SERVICE_ACCOUNT_CLIENT_EMAIL")
 GOOGLE_ADS_SERVICE_ACCOUNT_PRIVATE_KEY: str | None = os.getenv("GOOGLE_ADS_SERVICE_ACCOUNT_PRIVATE_KEY")
 GOOGLE_ADS_SERVICE_ACCOUNT_PRIVATE_KEY_ID: str | None = os.getenv("GOOGLE_ADS_SERVICE_ACCOUNT_PRIVATE_KEY_ID")
@@ -7,6 +7,7 @@ from . import (
     demo_reset_master_team,
     email,
     exporter,
+    feature_flags,
     hog_functions,
     integrations,
     plugin_server,
@@ -30,6 +31,7 @@ __all__ = [
     "demo_reset_master_team",
     "email",
     "exporter",
+    "feature_flags",
     "hog_functions",
     "integrations",
     "plugin_server",
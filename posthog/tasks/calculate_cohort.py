@@ -1,6 +1,7 @@
 import posthoganalytics
 import structlog
 import time
+from collections import defaultdict
 
 from django.conf import settings
 
@@ -20,7 +21,13 @@ from posthog.exceptions_capture import capture_exception
 from posthog.api.monitoring import Feature
 from posthog.models import Cohort
 from posthog.models.cohort import CohortOrEmpty
-from posthog.models.cohort.util import get_static_cohort_size, get_dependent_cohorts, sort_cohorts_topologically
+from posthog.models.cohort.util import (
+    get_static_cohort_size,
+    get_dependent_cohorts,
+    is_batchable_cohort,
+    recalculate_cohortpeople_batch,
+    sort_cohorts_topologically,
+)
 from posthog.models.user import User
 from posthog.tasks.utils import CeleryQueue
 
@@ -50,6 +57,10 @@ COHORT_DEPENDENCY_CALCULATION_FAILURES_COUNTER = Counter(
 
 COHORT_STUCK_RESETS_COUNTER = Counter("cohort_stuck_resets_total", "Number of stuck cohorts that have been reset")
 
+COHORT_BATCH_CALCULATION_FAILURES_COUNTER = Counter(
+    "cohort_batch_calculation_failures_total", "Number of times batch cohort calculations have failed"
+)
+
 COHORT_MAXED_ERRORS_GAUGE = Gauge(
     "cohort_maxed_errors", "Number of cohorts that have reached the maximum number of errors"
 )
@@ -152,6 +163,8 @@ def enqueue_cohorts_to_calculate(parallel_count: int) -> None:
     )
 
     cohort_ids = []
+    # Cohorts that only filter on person properties are calculated in batches per team, with one scan of persons each
+    batchable_cohorts_by_team: dict[int, list[Cohort]] = defaultdict(list)
     for cohort in (
         get_cohort_calculation_candidates_queryset()
         .filter(
@@ -162,18 +175,25 @@ def enqueue_cohorts_to_calculate(parallel_count: int) -> None:
     ):
         cohort = Cohort.objects.filter(pk=cohort.pk).get()
         try:
+            if settings.COHORT_BATCH_CALCULATION_ENABLED and is_batchable_cohort(cohort):
+                batchable_cohorts_by_team[cohort.team_id].append(cohort)
+                continue
             increment_version_and_enqueue_calculate_cohort(cohort, initiating_user=None)
             cohort_ids.append(cohort.pk)
         except Exception as e:
-            logger.exception(
-                "enqueued_cohort_calculation_error", cohort_id=cohort.pk, team_id=cohort.team_id, error=str(e)
-            )
-            cohort.errors_calculating = F("errors_calculating") + 1
-            cohort.last_error_at = timezone.now()
-            cohort.save(update_fields=["errors_calculating", "last_error_at"])
-            capture_exception(error=e, additional_properties={"cohort_id": cohort.pk, "team_id": cohort.team_id})
+            _record_enqueue_error(cohort, e)
             # Skip this cohort and continue with others
             continue
+
+    for cohorts in batchable_cohorts_by_team.values():
+        for start in range(0, len(cohorts), settings.COHORT_BATCH_CALCULATION_MAX_SIZE):
+            batch = cohorts[start : start + settings.COHORT_BATCH_CALCULATION_MAX_SIZE]
+            try:
+                _enqueue_batch_cohort_calculation(batch)
+                cohort_ids.extend(cohort.pk for cohort in batch)
+            except Exception as e:
+                for cohort in batch:
+                    _record_enqueue_error(cohort, e)
     logger.warning("enqueued_cohort_calculation", cohort_ids=cohort_ids)
 
     backlog = get_cohort_calculation_candidates_queryset().count()
@@ -185,6 +205,14 @@ def enqueue_cohorts_to_calculate(parallel_count: int) -> None:
         logger.exception("failed_to_update_cohort_metrics", error=str(e))
 
 
+def _record_enqueue_error(cohort: Cohort, e: Exception) -> None:
+    logger.exception("enqueued_cohort_calculation_error", cohort_id=cohort.pk, team_id=cohort.team_id, error=str(e))
+    cohort.errors_calculating = F("errors_calculating") + 1
+    cohort.last_error_at = timezone.now()
+    cohort.save(update_fields=["errors_calculating", "last_error_at"])
+    capture_exception(error=e, additional_properties={"cohort_id": cohort.pk, "team_id": cohort.team_id})
+
+
 def increment_version_and_enqueue_calculate_cohort(cohort: Cohort, *, initiating_user: Optional[User]) -> None:
     dependent_cohorts = get_dependent_cohorts(cohort)
     if dependent_cohorts:
@@ -249,6 +277,16 @@ def _enqueue_single_cohort_calculation(cohort: Cohort, initiating_user: Optional
     calculate_cohort_ch.delay(cohort.id, cohort.pending_version, initiating_user.id if initiating_user else None)
 
 
+def _enqueue_batch_cohort_calculation(cohorts: list[Cohort]) -> None:
+    if len(cohorts) == 1:
+        _enqueue_single_cohort_calculation(cohorts[0], initiating_user=None)
+        return
+
+    for cohort in cohorts:
+        _prepare_cohort_for_calculation(cohort)
+    calculate_cohorts_batch_ch.delay([[cohort.id, cohort.pending_version] for cohort in cohorts])
+
+
 @shared_task(ignore_result=True, max_retries=2, queue=CeleryQueue.LONG_RUNNING.value)
 def calculate_cohort_ch(cohort_id: int, pending_version: int, initiating_user_id: Optional[int] = None) -> None:
     with posthoganalytics.new_context():
@@ -274,6 +312,62 @@ def calculate_cohort_ch(cohort_id: int, pending_version: int, initiating_user_id
         cohort.calculate_people_ch(pending_version, initiating_user_id=initiating_user_id)
 
 
+@shared_task(ignore_result=True, max_retries=2, queue=CeleryQueue.LONG_RUNNING.value)
+def calculate_cohorts_batch_ch(pending_versions: list[list[int]]) -> None:
+    """
+    Calculates cohorts of a team that only filter on person properties together. Cohorts whose filters changed since
+    being enqueued, and all of them if the batch fails, are calculated one by one instead.
+    """
+    versions = dict(pending_versions)
+    cohorts = list(Cohort.objects.filter(pk__in=versions.keys()).order_by("id"))
+    batch = [cohort for cohort in cohorts if is_batchable_cohort(cohort)]
+    for cohort in cohorts:
+        if cohort not in batch:
+            calculate_cohort_ch.delay(cohort.pk, versions[cohort.pk], None)
+    if not batch:
+        return
+
+    with posthoganalytics.new_context():
+        posthoganalytics.tag("feature", Feature.COHORT.value)
+        posthoganalytics.tag("team_id", batch[0].team_id)
+
+        tags = QueryTags(team_id=batch[0].team_id, feature=query_tagging.Feature.COHORT)
+        if current_task and current_task.request and current_task.request.id:
+            tags.celery_task_id = current_task.request.id
+        update_tags(tags)
+
+        start_time = time.monotonic()
+        try:
+            counts = recalculate_cohortpeople_batch(batch, versions)
+        except Exception:
+            COHORT_BATCH_CALCULATION_FAILURES_COUNTER.inc()
+            logger.warning("cohort_batch_calculation_failed", cohort_ids=[cohort.pk for cohort in batch], exc_info=True)
+            for cohort in batch:
+                calculate_cohort_ch.delay(cohort.pk, versions[cohort.pk], None)
+            return
+
+        for cohort in batch:
+            pending_version = versions[cohort.pk]
+            cohort.count = counts.get(cohort.pk, 0)
+            cohort.last_calculation = timezone.now()
+            cohort.errors_calculating = 0
+            cohort.last_error_at = None
+            cohort.is_calculating = False
+            cohort.save(
+                update_fields=["count", "last_calculation", "errors_calculating", "last_error_at", "is_calculating"]
+            )
+            # Update filter to match pending version if still valid
+            Cohort.objects.filter(pk=cohort.pk).filter(Q(version__lt=pending_version) | Q(version__isnull=True)).update(
+                version=pending_version, count=cohort.count
+            )
+
+        logger.warn(
+            "cohort_batch_calculation_completed",
+            cohort_ids=[cohort.pk for cohort in batch],
+            duration=(time.monotonic() - start_time),
+        )
+
+
 @shared_task(ignore_result=True, max_retries=1)
 def calculate_cohort_from_list(cohort_id: int, items: list[str], team_id: Optional[int] = None) -> None:
     """
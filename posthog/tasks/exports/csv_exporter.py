@@ -1,7 +1,11 @@
+import csv
 import datetime
 import io
+import pickle
+import tempfile
+from contextlib import contextmanager
 from typing import Any, Optional
-from collections.abc import Generator
+from collections.abc import Generator, Iterator
 from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlunparse
 
 from pydantic import BaseModel
@@ -296,7 +300,18 @@ def get_from_hogql_query(exported_asset: ExportedAsset, limit: int, resource: di
         return
 
 
-def _export_to_dict(exported_asset: ExportedAsset, limit: int) -> Any:
+@contextmanager
+def _export_to_table(
+    exported_asset: ExportedAsset, limit: int, header_from_first_row: bool
+) -> Iterator[Iterator[list[Any]]]:
+    """
+    Rows of the export, header first, as `OrderedCsvRenderer.tablize` would return them. The header depends on the
+    keys of every row, so rows are flattened and spooled to a temporary file as they're fetched, instead of being held
+    in memory, and read back once all of them are.
+
+    Without columns in the export context, CSV exports keep the key order of the first row if `header_from_first_row`
+    is set. Excel exports take the columns of every row in the order they were first seen instead.
+    """
     resource = exported_asset.export_context
 
     columns: list[str] = resource.get("columns", [])
@@ -307,50 +322,80 @@ def _export_to_dict(exported_asset: ExportedAsset, limit: int) -> Any:
     else:
         returned_rows = get_from_insights_api(exported_asset, limit, resource)
 
-    all_csv_rows = list(returned_rows)
     renderer = OrderedCsvRenderer()
-    render_context = {}
-    if columns:
-        render_context["header"] = columns
-
-    if len(all_csv_rows):
-        # NOTE: This is not ideal as some rows _could_ have different keys
-        # Ideally we would extend the csvrenderer to supported keeping the order in place
-        is_any_col_list_or_dict = [x for x in all_csv_rows[0].values() if isinstance(x, dict) or isinstance(x, list)]
-        if not is_any_col_list_or_dict:
-            # If values are serialised then keep the order of the keys, else allow it to be unordered
-            renderer.header = all_csv_rows[0].keys()
-    else:
-        # If we have no rows, that means we couldn't convert anything, so put something to avoid confusion
-        all_csv_rows = [{"error": "No data available or unable to format for export."}]
+    header: Optional[list[str]] = columns or None
+    unique_fields: dict[str, None] = {}
+    row_count = 0
 
-    return renderer, all_csv_rows, render_context
+    with tempfile.TemporaryFile() as spool:
+        for row in returned_rows:
+            if row_count == 0 and header is None and header_from_first_row:
+                # NOTE: This is not ideal as some rows _could_ have different keys
+                # Ideally we would extend the csvrenderer to supported keeping the order in place
+                is_any_col_list_or_dict = [x for x in row.values() if isinstance(x, dict) or isinstance(x, list)]
+                if not is_any_col_list_or_dict:
+                    # If values are serialised then keep the order of the keys, else allow it to be unordered
+                    header = list(row.keys())
 
+            flat_row = renderer.flatten_item(row)
+            unique_fields.update(dict.fromkeys(flat_row))
+            pickle.dump(flat_row, spool, protocol=pickle.HIGHEST_PROTOCOL)
+            row_count += 1
 
-def _export_to_csv(exported_asset: ExportedAsset, limit: int) -> None:
-    renderer, all_csv_rows, render_context = _export_to_dict(exported_asset, limit)
+        if row_count == 0:
+            # If we have no rows, that means we couldn't convert anything, so put something to avoid confusion
+            flat_row = {"error": "No data available or unable to format for export."}
+            unique_fields.update(dict.fromkeys(flat_row))
+            pickle.dump(flat_row, spool, protocol=pickle.HIGHEST_PROTOCOL)
+            row_count = 1
 
-    rendered_csv_content = renderer.render(all_csv_rows, renderer_context=render_context)
-    save_content(exported_asset, rendered_csv_content)
+        field_headers = renderer.get_field_headers(list(unique_fields), header)
 
+        def table() -> Iterator[list[Any]]:
+            yield renderer.get_header_row(field_headers)
 
-def _export_to_excel(exported_asset: ExportedAsset, limit: int) -> None:
-    output = io.BytesIO()
+            spool.seek(0)
+            for _ in range(row_count):
+                flat_row = pickle.load(spool)
+                yield [flat_row.get(key, None) for key in field_headers]
 
-    workbook = Workbook()
-    worksheet = workbook.active
+        yield table()
 
-    renderer, all_csv_rows, render_context = _export_to_dict(exported_asset, limit)
 
-    for row_num, row_data in enumerate(renderer.tablize(all_csv_rows, header=render_context.get("header"))):
-        for col_num, value in enumerate(row_data):
-            if value is not None and not isinstance(value, str | int | float | bool):
-                value = str(value)
-            worksheet.cell(row=row_num + 1, column=col_num + 1, value=value)
+def _export_to_csv(exported_asset: ExportedAsset, limit: int) -> None:
+    with (
+        _export_to_table(exported_asset, limit, header_from_first_row=True) as table,
+        tempfile.TemporaryFile() as output,
+    ):
+        text_output = io.TextIOWrapper(output, encoding="utf-8", newline="")
+        csv.writer(text_output).writerows(table)
+        # Leaves `output` open for saving
+        text_output.detach()
+
+        output.seek(0)
+        save_content(exported_asset, output)
+
+
+def _export_to_excel(exported_asset: ExportedAsset, limit: int) -> None:
+    # Write-only workbooks write rows out as they're appended, rather than keeping every cell in memory
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+
+    with (
+        _export_to_table(exported_asset, limit, header_from_first_row=False) as table,
+        tempfile.TemporaryFile() as output,
+    ):
+        for row_data in table:
+            worksheet.append(
+                [
+                    str(value) if value is not None and not isinstance(value, str | int | float | bool) else value
+                    for value in row_data
+                ]
+            )
 
-    workbook.save(output)
-    output.seek(0)
-    save_content(exported_asset, output.getvalue())
+        workbook.save(output)
+        output.seek(0)
+        save_content(exported_asset, output)
 
 
 def get_limit_param_key(path: str) -> str:
@@ -28,7 +28,21 @@ class OrderedCsvRenderer(
 
         # Get the set of all unique headers, and sort them.
         unique_fields = list(unique_everseen(itertools.chain(*(item.keys() for item in data))))
+        field_headers = self.get_field_headers(unique_fields, header)
 
+        # Return your "table", with the headers as the first row.
+        yield self.get_header_row(field_headers, labels)
+
+        # Create a row for each dictionary, filling in columns for which the
+        # item has no data with None values.
+        for item in data:
+            yield [item.get(key, None) for key in field_headers]
+
+    def get_field_headers(self, unique_fields: list[str], header: Any = None) -> list[str]:
+        """
+        Columns of the table for flattened items with the given keys, in the order they were first seen, with
+        fields nested under each header (e.g. `properties.$browser` for `properties`) in place of it.
+        """
         ordered_fields: dict[str, Any] = OrderedDict()
         for item in unique_fields:
             field = item.split(".")
@@ -40,27 +54,23 @@ class OrderedCsvRenderer(
 
         flat_ordered_fields = list(itertools.chain(*ordered_fields.values()))
         if not header:
-            field_headers = flat_ordered_fields
-        else:
-            field_headers = header
-            for single_header in field_headers:
-                if single_header in flat_ordered_fields or single_header not in ordered_fields:
-                    continue
+            return flat_ordered_fields
 
-                pos_single_header = field_headers.index(single_header)
-                field_headers.remove(single_header)
-                field_headers[pos_single_header:pos_single_header] = ordered_fields[single_header]
+        field_headers = header
+        for single_header in field_headers:
+            if single_header in flat_ordered_fields or single_header not in ordered_fields:
+                continue
 
-        # Return your "table", with the headers as the first row.
-        if labels:
-            yield [labels.get(x, x) for x in field_headers]
-        else:
-            yield [extract_expression_comment(header) for header in field_headers]
+            pos_single_header = field_headers.index(single_header)
+            field_headers.remove(single_header)
+            field_headers[pos_single_header:pos_single_header] = ordered_fields[single_header]
 
-        # Create a row for each dictionary, filling in columns for which the
-        # item has no data with None values.
-        for item in data:
-            yield [item.get(key, None) for key in field_headers]
+        return field_headers
+
+    def get_header_row(self, field_headers: list[str], labels: Any = None) -> list[str]:
+        if labels:
+            return [labels.get(x, x) for x in field_headers]
+        return [extract_expression_comment(header) for header in field_headers]
 
 
 def extract_expression_comment(header: str) -> str:
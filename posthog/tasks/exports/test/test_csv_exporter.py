@@ -31,6 +31,7 @@ from posthog.tasks.exports.csv_exporter import (
     _convert_response_to_csv_data,
     add_query_params,
 )
+from posthog.tasks.exports.ordered_csv_renderer import OrderedCsvRenderer
 from posthog.test.base import APIBaseTest, _create_event, _create_person, flush_persons_and_events
 from posthog.test.test_journeys import journeys_for
 from posthog.utils import absolute_uri
@@ -290,6 +291,33 @@ class TestCSVExporter(APIBaseTest):
                 ("2", "Safari", "event_name", None),
             ]
 
+    @patch("posthog.models.exported_asset.UUIDT")
+    @patch("posthog.models.exported_asset.object_storage.write")
+    def test_csv_exporter_excel_includes_keys_of_every_row(
+        self, mocked_object_storage_write: Any, mocked_uuidt: Any
+    ) -> None:
+        exported_asset = self._create_asset()
+        exported_asset.export_format = ExportedAsset.ExportFormat.XLSX
+        mocked_uuidt.return_value = "a-guid"
+        mocked_object_storage_write.side_effect = ObjectStorageError("mock write failed")
+
+        rows = [{"distinct_id": "2", "event": "event_name"}, {"event": "other_event", "tomato": "red"}]
+        with (
+            self.settings(OBJECT_STORAGE_ENABLED=True, OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports"),
+            patch("posthog.tasks.exports.csv_exporter.get_from_insights_api", return_value=iter(rows)),
+        ):
+            csv_exporter.export_tabular(exported_asset)
+
+            wb = load_workbook(filename=BytesIO(exported_asset.content))
+            ws = wb.active
+            data = list(ws.iter_rows(values_only=True))
+            # Unlike CSV exports, the header isn't taken from the first row only
+            assert data == [
+                ("distinct_id", "event", "tomato"),
+                ("2", "event_name", None),
+                (None, "other_event", "red"),
+            ]
+
     @patch("posthog.models.exported_asset.UUIDT")
     @patch("posthog.models.exported_asset.object_storage.write")
     @patch("requests.request")
@@ -633,6 +661,26 @@ class TestCSVExporter(APIBaseTest):
                 self.assertEqual(lines[0], "error")
                 self.assertEqual(lines[1], "No data available or unable to format for export.")
 
+    def test_csv_exporter_streams_rows_like_the_renderer(self) -> None:
+        rows = [
+            {"event": "$pageview", "properties": {"$browser": "Safari"}, "timestamp": datetime(2024, 3, 22)},
+            {"event": "$pageleave", "properties": {"$os": "Mac OS X", "$browser": "Chrome"}, "elements": ["a", "b"]},
+            {"event": "$autocapture", "count": 3, "person": None},
+        ] * 200
+        exported_asset = self._create_asset()
+
+        with (
+            patch("posthog.tasks.exports.csv_exporter.get_from_insights_api") as mocked_get_from_insights_api,
+            self.settings(OBJECT_STORAGE_ENABLED=False),
+        ):
+            mocked_get_from_insights_api.return_value = iter(rows)
+            csv_exporter.export_tabular(exported_asset)
+
+        assert exported_asset.content == OrderedCsvRenderer().render(rows)
+        assert exported_asset.content.startswith(
+            b"event,properties.$browser,properties.$os,timestamp,elements.0,elements.1,count,person\r\n"
+        )
+
     @patch("posthog.hogql.constants.MAX_SELECT_RETURNED_ROWS", 10)
     @patch("posthog.models.exported_asset.UUIDT")
     def test_csv_exporter_trends_query_with_none_action(
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from posthog.models.feature_flag.local_evaluation import rebuild_local_evaluation_cache
+from posthog.tasks.utils import CeleryQueue
+
+
+@shared_task(ignore_result=True, queue=CeleryQueue.DEFAULT.value)
+def update_local_evaluation_cache(project_id: int, polled: list[bool]) -> None:
+    rebuild_local_evaluation_cache(project_id, polled)
@@ -36,6 +36,7 @@ from posthog.tasks.tasks import (
     ee_persist_finished_recordings_v2,
     find_flags_with_enriched_analytics,
     ingestion_lag,
+    materialize_event_rollups,
     pg_plugin_server_query_timing,
     pg_row_count,
     pg_table_cache_hit_rate,
@@ -209,6 +210,12 @@ def setup_periodic_tasks(sender: Celery, **kwargs: Any) -> None:
         args=(settings.CALCULATE_X_PARALLEL_COHORTS_DURING_NIGHT,),
     )
 
+    sender.add_periodic_task(
+        crontab(hour="*", minute="15"),
+        materialize_event_rollups.s(),
+        name="materialize event rollups",
+    )
+
     add_periodic_task_with_expiry(
         sender,
         120,
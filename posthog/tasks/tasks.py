@@ -511,6 +511,27 @@ def calculate_cohort(parallel_count: int) -> None:
     reset_stuck_cohorts()
 
 
+@shared_task(ignore_result=True)
+def materialize_event_rollups() -> None:
+    from posthog.models.event_rollup import EventRollup
+
+    if not settings.EVENT_ROLLUPS_ENABLED:
+        return
+
+    for rollup_id in EventRollup.objects.values_list("id", flat=True):
+        materialize_event_rollup.delay(str(rollup_id))
+
+
+@shared_task(ignore_result=True, queue=CeleryQueue.LONG_RUNNING.value)
+def materialize_event_rollup(rollup_id: str) -> None:
+    from posthog.models.event_rollup import EventRollup
+    from posthog.models.event_rollup.util import materialize_event_rollup as materialize
+
+    rollup = EventRollup.objects.select_related("team").filter(id=rollup_id).first()
+    if rollup is not None:
+        materialize(rollup)
+
+
 class Polling:
     _SINGLETON_REDIS_KEY = "POLL_QUERY_PERFORMANCE_SINGLETON_REDIS_KEY"
     NANOSECONDS_IN_SECOND = int(1e9)
@@ -432,6 +432,61 @@ def calculate_cohort_test_factory(event_factory: Callable, person_factory: Calla
             assert args[0] == "enqueued_cohort_calculation"
             assert set(kwargs["cohort_ids"]) == {cohort1.pk, cohort2.pk}
 
+        @patch("posthog.tasks.calculate_cohort.calculate_cohort_ch.delay")
+        @patch("posthog.tasks.calculate_cohort.calculate_cohorts_batch_ch.delay")
+        def test_enqueue_cohorts_batches_person_property_cohorts(
+            self, mock_batch_delay: MagicMock, mock_single_delay: MagicMock
+        ) -> None:
+            person_cohorts = [
+                Cohort.objects.create(
+                    team_id=self.team.pk,
+                    name=f"person_cohort_{i}",
+                    filters={
+                        "properties": {
+                            "type": "AND",
+                            "values": [{"key": "email", "value": f"{i}@posthog.com", "type": "person"}],
+                        }
+                    },
+                )
+                for i in range(3)
+            ]
+            behavioral_cohort = Cohort.objects.create(
+                team_id=self.team.pk,
+                name="behavioral_cohort",
+                filters={
+                    "properties": {
+                        "type": "AND",
+                        "values": [
+                            {
+                                "key": "$pageview",
+                                "event_type": "events",
+                                "time_interval": "day",
+                                "time_value": 7,
+                                "value": "performed_event",
+                                "type": "behavioral",
+                            }
+                        ],
+                    }
+                },
+            )
+
+            with self.settings(COHORT_BATCH_CALCULATION_ENABLED=True, COHORT_BATCH_CALCULATION_MAX_SIZE=2):
+                enqueue_cohorts_to_calculate(10)
+
+            # Batches of at most 2, where a batch of 1 is calculated on its own
+            mock_batch_delay.assert_called_once()
+            batched_cohort_ids = {cohort_id for cohort_id, _ in mock_batch_delay.call_args[0][0]}
+            single_cohort_ids = {call[0][0] for call in mock_single_delay.call_args_list}
+            self.assertEqual(len(batched_cohort_ids), 2)
+            self.assertEqual(
+                batched_cohort_ids | single_cohort_ids, {cohort.pk for cohort in [*person_cohorts, behavioral_cohort]}
+            )
+            self.assertIn(behavioral_cohort.pk, single_cohort_ids)
+            for cohort in person_cohorts:
+                cohort.refresh_from_db()
+                self.assertTrue(cohort.is_calculating)
+                self.assertEqual(cohort.pending_version, 1)
+
         @patch("posthog.tasks.calculate_cohort.chain")
         @patch("posthog.tasks.calculate_cohort.calculate_cohort_ch.si")
         def test_increment_version_and_enqueue_calculate_cohort_with_nested_cohorts(
@@ -1,12 +1,15 @@
+import contextlib
 import gc
 import sys
 import time
+from collections.abc import Iterator
 from typing import Any, Literal
 
 import deltalake as deltalake
 import posthoganalytics
 import pyarrow as pa
 import pyarrow.compute as pc
+from django.conf import settings
 from django.db.models import F
 
 from posthog.exceptions_capture import capture_exception
@@ -19,6 +22,7 @@ from posthog.temporal.data_imports.pipelines.pipeline.delta_table_helper import
     DeltaTableHelper,
 )
 from posthog.temporal.data_imports.pipelines.pipeline.hogql_schema import HogQLSchema
+from posthog.temporal.data_imports.pipelines.pipeline.prefetch import TablePrefetcher
 from posthog.temporal.data_imports.pipelines.pipeline.typings import SourceResponse
 from posthog.temporal.data_imports.pipelines.pipeline.utils import (
     BillingLimitsWillBeReachedException,
@@ -121,9 +125,6 @@ class PipelineNonDLT:
                         f"Your account will hit your Data Warehouse billing limits syncing {self._resource.name} with {self._resource.rows_to_sync} rows"
                     )
 
-            buffer: list[Any] = []
-            buffer_size_bytes = 0
-            py_table = None
             row_count = 0
             chunk_index = 0
 
@@ -140,72 +141,26 @@ class PipelineNonDLT:
             # If the schema has no DWH table, it's a first ever sync
             is_first_ever_sync: bool = self._schema.table is None
 
-            for item in self._resource.items:
-                py_table = None
+            with self._pa_tables() as pa_tables:
+                for py_table in pa_tables:
+                    row_count += py_table.num_rows
 
-                if isinstance(item, list):
-                    if len(buffer) > 0:
-                        buffer.extend(item)
-                        buffer_size_bytes += _estimate_size(item)
-                        if buffer_size_bytes >= self._chunk_size_bytes or len(buffer) >= self._chunk_size:
-                            self._logger.debug(f"Processing pipeline buffer (list). Length of buffer = {len(buffer)}")
-
-                            py_table = table_from_py_list(buffer)
-                            buffer = []
-                            buffer_size_bytes = 0
-                        else:
-                            continue
-                    else:
-                        buffer_size_bytes += _estimate_size(item)
-                        if buffer_size_bytes >= self._chunk_size_bytes or len(item) >= self._chunk_size:
-                            self._logger.debug(f"Processing pipeline item (list). Length of item = {len(item)}")
-                            py_table = table_from_py_list(item)
-                            buffer_size_bytes = 0
-                        else:
-                            buffer.extend(item)
-                            continue
-                elif isinstance(item, dict):
-                    buffer.append(item)
-                    buffer_size_bytes += _estimate_size(item)
-                    if buffer_size_bytes < self._chunk_size_bytes and len(buffer) < self._chunk_size:
-                        continue
-
-                    self._logger.debug(f"Processing pipeline buffer (dict). Length of buffer = {len(buffer)}")
-                    py_table = table_from_py_list(buffer)
-                    buffer = []
-                    buffer_size_bytes = 0
-                elif isinstance(item, pa.Table):
-                    py_table = item
-                else:
-                    raise Exception(f"Unhandled item type: {item.__class__.__name__}")
-
-                assert py_table is not None
-                row_count += py_table.num_rows
-
-                self._process_pa_table(
-                    pa_table=py_table, index=chunk_index, row_count=row_count, is_first_ever_sync=is_first_ever_sync
-                )
+                    self._process_pa_table(
+                        pa_table=py_table, index=chunk_index, row_count=row_count, is_first_ever_sync=is_first_ever_sync
+                    )
 
-                chunk_index += 1
+                    chunk_index += 1
 
-                # Cleanup
-                if "py_table" in locals() and py_table is not None:
+                    # Cleanup
                     del py_table
-                pa_memory_pool.release_unused()
-                gc.collect()
+                    pa_memory_pool.release_unused()
+                    gc.collect()
 
-                # Only raise if we're not running in descending order, otherwise we'll often not
-                # complete the job before the incremental value can be updated
-                # TODO: raise when we're within `x` time of the worker being forced to shutdown
-                if self._schema.should_use_incremental_field and self._resource.sort_mode != "desc":
-                    self._shutdown_monitor.raise_if_is_worker_shutdown()
-
-            if len(buffer) > 0:
-                py_table = table_from_py_list(buffer)
-                row_count += py_table.num_rows
-                self._process_pa_table(
-                    pa_table=py_table, index=chunk_index, row_count=row_count, is_first_ever_sync=is_first_ever_sync
-                )
+                    # Only raise if we're not running in descending order, otherwise we'll often not
+                    # complete the job before the incremental value can be updated
+                    # TODO: raise when we're within `x` time of the worker being forced to shutdown
+                    if self._schema.should_use_incremental_field and self._resource.sort_mode != "desc":
+                        self._shutdown_monitor.raise_if_is_worker_shutdown()
 
             self._post_run_operations(row_count=row_count)
         finally:
@@ -218,14 +173,69 @@ class PipelineNonDLT:
             del self._resource
             del self._delta_table_helper
 
-            if "buffer" in locals() and buffer is not None:
-                del buffer
-            if "py_table" in locals() and py_table is not None:
-                del py_table
-
             pa_memory_pool.release_unused()
             gc.collect()
 
+    @contextlib.contextmanager
+    def _pa_tables(self) -> Iterator[Iterator[pa.Table]]:
+        """Tables to write to Delta, read from the source in a background thread when prefetching is enabled, so that
+        source reads overlap with writes to Delta."""
+        if not settings.DATA_WAREHOUSE_PIPELINE_PREFETCH_ENABLED:
+            yield self._iter_pa_tables()
+            return
+
+        with TablePrefetcher(
+            self._iter_pa_tables(), settings.DATA_WAREHOUSE_PIPELINE_PREFETCH_MAX_BYTES, self._logger
+        ) as prefetcher:
+            yield prefetcher
+
+    def _iter_pa_tables(self) -> Iterator[pa.Table]:
+        buffer: list[Any] = []
+        buffer_size_bytes = 0
+
+        for item in self._resource.items:
+            if isinstance(item, list):
+                if len(buffer) > 0:
+                    buffer.extend(item)
+                    buffer_size_bytes += _estimate_size(item)
+                    if buffer_size_bytes >= self._chunk_size_bytes or len(buffer) >= self._chunk_size:
+                        self._logger.debug(f"Processing pipeline buffer (list). Length of buffer = {len(buffer)}")
+
+                        py_table = table_from_py_list(buffer)
+                        buffer = []
+                        buffer_size_bytes = 0
+                    else:
+                        continue
+                else:
+                    buffer_size_bytes += _estimate_size(item)
+                    if buffer_size_bytes >= self._chunk_size_bytes or len(item) >= self._chunk_size:
+                        self._logger.debug(f"Processing pipeline item (list). Length of item = {len(item)}")
+                        py_table = table_from_py_list(item)
+                        buffer_size_bytes = 0
+                    else:
+                        buffer.extend(item)
+                        continue
+            elif isinstance(item, dict):
+                buffer.append(item)
+                buffer_size_bytes += _estimate_size(item)
+                if buffer_size_bytes < self._chunk_size_bytes and len(buffer) < self._chunk_size:
+                    continue
+
+                self._logger.debug(f"Processing pipeline buffer (dict). Length of buffer = {len(buffer)}")
+                py_table = table_from_py_list(buffer)
+                buffer = []
+                buffer_size_bytes = 0
+            elif isinstance(item, pa.Table):
+                py_table = item
+            else:
+                raise Exception(f"Unhandled item type: {item.__class__.__name__}")
+
+            yield py_table
+            del py_table
+
+        if len(buffer) > 0:
+            yield table_from_py_list(buffer)
+
     def _process_pa_table(self, pa_table: pa.Table, index: int, row_count: int, is_first_ever_sync: bool):
         delta_table = self._delta_table_helper.get_delta_table()
         previous_file_uris = delta_table.file_uris() if delta_table else []
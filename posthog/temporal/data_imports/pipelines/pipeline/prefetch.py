@@ -0,0 +1,107 @@
+import contextvars
+import threading
+from collections import deque
+from collections.abc import Generator, Iterator
+from typing import Any
+
+import pyarrow as pa
+from django.db import connections
+
+from posthog.temporal.common.logger import FilteringBoundLogger
+
+
+class _Done:
+    pass
+
+
+class _Failed:
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+class TablePrefetcher:
+    """Reads tables from `tables` in a background thread, ahead of the ones being consumed.
+
+    The thread stops reading once the tables waiting to be consumed take up `max_bytes`, so memory usage stays bounded
+    when the source is faster than the consumer. A table larger than `max_bytes` is still queued when none are waiting.
+    Exceptions raised by `tables` are re-raised to the consumer, after the tables read before them.
+    """
+
+    def __init__(self, tables: Iterator[pa.Table], max_bytes: int, logger: FilteringBoundLogger) -> None:
+        self._tables = tables
+        self._max_bytes = max_bytes
+        self._logger = logger
+        self._queue: deque[pa.Table | _Done | _Failed] = deque()
+        self._queued_bytes = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        # Runs in a copy of the current context, so that logging and activity info work the same in the thread
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._produce,), name="pipeline-prefetch", daemon=True
+        )
+
+    def __enter__(self) -> "TablePrefetcher":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def __iter__(self) -> "TablePrefetcher":
+        return self
+
+    def __next__(self) -> pa.Table:
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._queue) > 0)
+            item = self._queue[0]
+            if isinstance(item, pa.Table):
+                self._queue.popleft()
+                self._queued_bytes -= item.nbytes
+                self._condition.notify_all()
+                return item
+
+        if isinstance(item, _Failed):
+            raise item.exception
+        raise StopIteration
+
+    def stop(self) -> None:
+        """Stops reading ahead. A read in progress isn't interrupted, the thread closes `tables` and exits once it's
+        done."""
+        with self._condition:
+            self._stopped = True
+            self._queue.clear()
+            self._queued_bytes = 0
+            self._condition.notify_all()
+
+    def _can_enqueue(self, table: pa.Table) -> bool:
+        return self._stopped or self._queued_bytes == 0 or self._queued_bytes + table.nbytes <= self._max_bytes
+
+    def _produce(self) -> None:
+        last: _Done | _Failed = _Done()
+        try:
+            for table in self._tables:
+                with self._condition:
+                    self._condition.wait_for(lambda table=table: self._can_enqueue(table))
+                    if self._stopped:
+                        self._logger.debug("Stopped reading ahead of the pipeline")
+                        return
+
+                    self._queue.append(table)
+                    self._queued_bytes += table.nbytes
+                    self._condition.notify_all()
+                del table
+        except BaseException as e:
+            last = _Failed(e)
+        finally:
+            # When stopped early, let the source clean up (e.g. close its cursors) in the thread that reads from it
+            if isinstance(self._tables, Generator):
+                try:
+                    self._tables.close()
+                except Exception:
+                    self._logger.exception("Failed to close the source after reading ahead of the pipeline")
+            # Sources can use the Django ORM, which opens connections local to this thread
+            connections.close_all()
+
+        with self._condition:
+            self._queue.append(last)
+            self._condition.notify_all()
@@ -0,0 +1,87 @@
+import threading
+
+import pyarrow as pa
+import pytest
+import structlog
+
+from posthog.temporal.data_imports.pipelines.pipeline.prefetch import TablePrefetcher
+
+logger = structlog.get_logger(__name__)
+
+
+def _table(value: int) -> pa.Table:
+    return pa.table({"column": [value] * 100})
+
+
+def test_prefetcher_yields_tables_in_order():
+    tables = [_table(i) for i in range(10)]
+
+    with TablePrefetcher(iter(tables), max_bytes=tables[0].nbytes * 2, logger=logger) as prefetcher:
+        assert [table["column"][0].as_py() for table in prefetcher] == list(range(10))
+
+
+def test_prefetcher_stops_reading_ahead_at_max_bytes():
+    read = []
+    table_bytes = _table(0).nbytes
+
+    def tables():
+        for i in range(10):
+            read.append(i)
+            yield _table(i)
+
+    with TablePrefetcher(tables(), max_bytes=table_bytes * 2, logger=logger) as prefetcher:
+        first = next(prefetcher)
+        assert first["column"][0].as_py() == 0
+
+        # Wait for the thread to fill the queue and block on it
+        prefetcher._thread.join(timeout=0.5)
+        # 2 tables queued, plus 1 read and waiting to be queued
+        assert read == [0, 1, 2, 3]
+        assert prefetcher._queued_bytes <= table_bytes * 2
+
+
+def test_prefetcher_queues_tables_larger_than_max_bytes():
+    tables = [_table(i) for i in range(3)]
+
+    with TablePrefetcher(iter(tables), max_bytes=1, logger=logger) as prefetcher:
+        assert len(list(prefetcher)) == 3
+
+
+def test_prefetcher_raises_source_exceptions_after_tables_read_before():
+    def tables():
+        yield _table(0)
+        raise ValueError("source failed")
+
+    with TablePrefetcher(tables(), max_bytes=1024 * 1024, logger=logger) as prefetcher:
+        assert next(prefetcher)["column"][0].as_py() == 0
+        with pytest.raises(ValueError, match="source failed"):
+            next(prefetcher)
+
+
+def test_prefetcher_thread_exits_when_stopped():
+    def tables():
+        while True:
+            yield _table(0)
+
+    with TablePrefetcher(tables(), max_bytes=1, logger=logger) as prefetcher:
+        next(prefetcher)
+        thread: threading.Thread = prefetcher._thread
+
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_prefetcher_closes_tables_when_stopped():
+    closed = threading.Event()
+
+    def tables():
+        try:
+            while True:
+                yield _table(0)
+        finally:
+            closed.set()
+
+    with TablePrefetcher(tables(), max_bytes=1, logger=logger) as prefetcher:
+        next(prefetcher)
+
+    assert closed.wait(timeout=5)
@@ -0,0 +1,127 @@
+"""Reading a table from a SQL source over several connections at once.
+
+Syncs that read a whole table (full refreshes and first syncs of incremental tables) can split the table into ranges of
+its integer primary key, and read each range on its own connection. Tables are yielded in the order they're read, not
+in key or incremental field order, so sources using this must not rely on the pipeline checkpointing as it goes.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import dataclasses
+import queue
+import threading
+from collections.abc import Callable, Generator, Iterator, Sequence
+
+import pyarrow as pa
+from django.conf import settings
+
+from posthog.temporal.data_imports.sources.common.sql import Table
+
+
+@dataclasses.dataclass(frozen=True)
+class KeyRange:
+    """A range of key values, from `start` inclusive to `end` exclusive, unbounded on a side that's `None`."""
+
+    start: int | None
+    end: int | None
+
+
+def split_key_range(min_value: int, max_value: int, count: int) -> list[KeyRange]:
+    """Split the key values from `min_value` to `max_value` into `count` ranges of about the same width.
+
+    The first and last ranges are unbounded, so rows inserted outside of the range while reading are still read.
+    """
+    if count <= 1 or max_value <= min_value:
+        return [KeyRange(start=None, end=None)]
+
+    width = max_value - min_value + 1
+    # Narrow ranges can have duplicate bounds, which would make for empty ranges
+    bounds = sorted({bound for i in range(1, count) if (bound := min_value + width * i // count) > min_value})
+    return [KeyRange(start=start, end=end) for start, end in zip([None, *bounds], [*bounds, None])]
+
+
+def get_parallel_read_key(table: Table, primary_keys: list[str] | None) -> str | None:
+    """Return the column to split reads of `table` on, if it has a single integer primary key."""
+    if not primary_keys or len(primary_keys) != 1 or primary_keys[0] not in table:
+        return None
+
+    key = primary_keys[0]
+    if not pa.types.is_integer(table[key].to_arrow_field().type):
+        return None
+
+    return key
+
+
+def get_parallel_reader_count(rows_to_sync: int) -> int:
+    """Return how many connections to read a table with, 1 when it's too small to be worth splitting."""
+    min_rows = max(settings.DATA_WAREHOUSE_SQL_PARALLEL_READ_MIN_ROWS, 1)
+    return max(1, min(settings.DATA_WAREHOUSE_SQL_PARALLEL_READERS, rows_to_sync // min_rows))
+
+
+class _Done:
+    pass
+
+
+class _Failed:
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+def read_in_parallel(
+    readers: Sequence[Callable[[], Generator[pa.Table, None, None]]], max_queued_tables_per_reader: int = 2
+) -> Iterator[pa.Table]:
+    """Run each of `readers` in its own thread, yielding tables as any of them reads one.
+
+    At most `max_queued_tables_per_reader` tables per reader wait to be consumed before readers stop reading. The first
+    exception raised by a reader is re-raised, after which the other readers stop at their next table.
+    """
+    tables: queue.Queue[pa.Table | _Done | _Failed] = queue.Queue(
+        maxsize=max(len(readers) * max_queued_tables_per_reader, 1)
+    )
+    stopped = threading.Event()
+
+    def put(item: pa.Table | _Done | _Failed) -> bool:
+        while not stopped.is_set():
+            try:
+                tables.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read(reader: Callable[[], Generator[pa.Table, None, None]]) -> None:
+        try:
+            with contextlib.closing(reader()) as reader_tables:
+                for table in reader_tables:
+                    if not put(table):
+                        return
+                    del table
+        except BaseException as e:
+            put(_Failed(e))
+        else:
+            put(_Done())
+
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(read, reader), name=f"sql-reader-{index}", daemon=True
+        )
+        for index, reader in enumerate(readers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        remaining = len(threads)
+        while remaining > 0:
+            item = tables.get()
+            if isinstance(item, _Done):
+                remaining -= 1
+            elif isinstance(item, _Failed):
+                raise item.exception
+            else:
+                yield item
+                del item
+    finally:
+        stopped.set()
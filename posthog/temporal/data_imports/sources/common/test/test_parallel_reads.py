@@ -0,0 +1,106 @@
+import threading
+
+import pyarrow as pa
+import pytest
+from django.test import override_settings
+
+from posthog.temporal.data_imports.sources.common.parallel_reads import (
+    KeyRange,
+    get_parallel_read_key,
+    get_parallel_reader_count,
+    read_in_parallel,
+    split_key_range,
+)
+from posthog.temporal.data_imports.sources.common.sql import Column, Table
+
+
+class TestColumn(Column):
+    def __init__(self, name: str, arrow_type: pa.DataType) -> None:
+        self.name = name
+        self.arrow_type = arrow_type
+
+    def to_arrow_field(self) -> pa.Field:
+        return pa.field(self.name, self.arrow_type)
+
+
+@pytest.mark.parametrize(
+    "min_value,max_value,count,expected",
+    [
+        (1, 100, 1, [KeyRange(None, None)]),
+        (5, 5, 4, [KeyRange(None, None)]),
+        (1, 100, 4, [KeyRange(None, 26), KeyRange(26, 51), KeyRange(51, 76), KeyRange(76, None)]),
+        (0, 2, 4, [KeyRange(None, 1), KeyRange(1, 2), KeyRange(2, None)]),
+        (-10, 9, 2, [KeyRange(None, 0), KeyRange(0, None)]),
+    ],
+)
+def test_split_key_range(min_value, max_value, count, expected):
+    assert split_key_range(min_value, max_value, count) == expected
+
+
+def test_split_key_range_covers_every_value():
+    ranges = split_key_range(1, 1000, 7)
+
+    for value in range(-5, 1005):
+        matching = [
+            key_range
+            for key_range in ranges
+            if (key_range.start is None or value >= key_range.start)
+            and (key_range.end is None or value < key_range.end)
+        ]
+        assert len(matching) == 1
+
+
+def test_get_parallel_read_key():
+    table = Table(name="test", columns=[TestColumn("id", pa.int64()), TestColumn("name", pa.string())])
+
+    assert get_parallel_read_key(table, ["id"]) == "id"
+    assert get_parallel_read_key(table, ["name"]) is None
+    assert get_parallel_read_key(table, ["id", "name"]) is None
+    assert get_parallel_read_key(table, ["missing"]) is None
+    assert get_parallel_read_key(table, None) is None
+
+
+@override_settings(DATA_WAREHOUSE_SQL_PARALLEL_READERS=4, DATA_WAREHOUSE_SQL_PARALLEL_READ_MIN_ROWS=1000)
+@pytest.mark.parametrize("rows_to_sync,expected", [(0, 1), (1999, 1), (2000, 2), (1_000_000, 4)])
+def test_get_parallel_reader_count(rows_to_sync, expected):
+    assert get_parallel_reader_count(rows_to_sync) == expected
+
+
+def _reader(start: int, count: int):
+    def read():
+        for value in range(start, start + count):
+            yield pa.table({"id": [value]})
+
+    return read
+
+
+def test_read_in_parallel_reads_every_table():
+    tables = list(read_in_parallel([_reader(0, 10), _reader(10, 5), _reader(15, 0)]))
+
+    assert sorted(table["id"][0].as_py() for table in tables) == list(range(15))
+
+
+def test_read_in_parallel_raises_reader_exceptions():
+    def failing():
+        yield pa.table({"id": [0]})
+        raise ValueError("reader failed")
+
+    with pytest.raises(ValueError, match="reader failed"):
+        list(read_in_parallel([_reader(1, 100), failing]))
+
+
+def test_read_in_parallel_stops_readers_when_closed():
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                yield pa.table({"id": [0]})
+        finally:
+            closed.set()
+
+    tables = read_in_parallel([endless], max_queued_tables_per_reader=1)
+    next(tables)
+    tables.close()
+
+    assert closed.wait(timeout=5)
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import collections
 from contextlib import _GeneratorContextManager
+import functools
 import math
 import re
-from collections.abc import Iterator
+from collections.abc import Generator, Iterator
 from typing import Any
 from collections.abc import Callable
 
@@ -28,6 +29,13 @@ from posthog.temporal.data_imports.pipelines.pipeline.utils import (
     build_pyarrow_decimal_type,
     table_from_iterator,
 )
+from posthog.temporal.data_imports.sources.common.parallel_reads import (
+    KeyRange,
+    get_parallel_read_key,
+    get_parallel_reader_count,
+    read_in_parallel,
+    split_key_range,
+)
 from posthog.temporal.data_imports.sources.common.sql import Column, Table
 from posthog.temporal.data_imports.pipelines.pipeline.consts import (
     DEFAULT_CHUNK_SIZE,
@@ -130,6 +138,44 @@ def _build_query(
     }
 
 
+def _build_key_range_query(
+    schema: str,
+    table_name: str,
+    key: str,
+    key_range: KeyRange,
+    should_use_incremental_field: bool,
+    incremental_field: str | None,
+    incremental_field_type: IncrementalFieldType | None,
+    db_incremental_field_last_value: Any | None,
+) -> tuple[str, dict[str, Any]]:
+    """Same rows as `_build_query`, limited to a range of `key` values, in no particular order."""
+    conditions: list[str] = []
+    args: dict[str, Any] = {}
+
+    if should_use_incremental_field:
+        if incremental_field is None or incremental_field_type is None:
+            raise ValueError("incremental_field and incremental_field_type can't be None")
+
+        if db_incremental_field_last_value is None:
+            db_incremental_field_last_value = incremental_type_to_initial_value(incremental_field_type)
+
+        conditions.append(f"{_sanitize_identifier(incremental_field)} >= %(incremental_value)s")
+        args["incremental_value"] = db_incremental_field_last_value
+
+    if key_range.start is not None:
+        conditions.append(f"{_sanitize_identifier(key)} >= %(key_start)s")
+        args["key_start"] = key_range.start
+    if key_range.end is not None:
+        conditions.append(f"{_sanitize_identifier(key)} < %(key_end)s")
+        args["key_end"] = key_range.end
+
+    query = f"SELECT * FROM {_sanitize_identifier(schema)}.{_sanitize_identifier(table_name)}"
+    if conditions:
+        query = f"{query} WHERE {' AND '.join(conditions)}"
+
+    return query, args
+
+
 def _get_rows_to_sync(
     cursor: Cursor, inner_query: str, inner_query_args: dict[str, Any], logger: FilteringBoundLogger
 ) -> int:
@@ -234,6 +280,28 @@ def _get_primary_keys(cursor: Cursor, schema: str, table_name: str) -> list[str]
     return None
 
 
+def _get_key_ranges(
+    cursor: Cursor, schema: str, table_name: str, key: str, count: int, logger: FilteringBoundLogger
+) -> list[KeyRange] | None:
+    key_identifier = _sanitize_identifier(key)
+    query = f"SELECT MIN({key_identifier}), MAX({key_identifier}) FROM {_sanitize_identifier(schema)}.{_sanitize_identifier(table_name)}"
+
+    try:
+        cursor.execute(query)
+        row = cursor.fetchone()
+    except Exception as e:
+        capture_exception(e)
+        logger.debug(f"_get_key_ranges: returning None due to error: {e}")
+        return None
+
+    if row is None or row[0] is None or row[1] is None:
+        return None
+
+    key_ranges = split_key_range(int(row[0]), int(row[1]), count)
+    logger.debug(f"_get_key_ranges: key={key}, min={row[0]}, max={row[1]}, ranges={len(key_ranges)}")
+    return key_ranges
+
+
 class MySQLColumn(Column):
     """Implementation of the `Column` protocol for a MySQL source.
 
@@ -532,49 +600,87 @@ def mysql_source(
                     _get_partition_settings(cursor, schema, table_name) if should_use_incremental_field else None
                 )
 
+                # Only tables read as a whole are split, as ranges are read in no particular order
+                parallel_read_key = get_parallel_read_key(table, primary_keys)
+                reader_count = get_parallel_reader_count(rows_to_sync)
+                key_ranges = None
+                if (
+                    parallel_read_key is not None
+                    and reader_count > 1
+                    and (not should_use_incremental_field or db_incremental_field_last_value is None)
+                ):
+                    key_ranges = _get_key_ranges(cursor, schema, table_name, parallel_read_key, reader_count, logger)
+
                 # Fallback on checking for an `id` field on the table
                 if primary_keys is None and "id" in table:
                     primary_keys = ["id"]
 
-    def get_rows() -> Iterator[Any]:
+    def read_query(host: str, port: int, query: str, args: dict[str, Any]) -> Generator[pa.Table, None, None]:
         arrow_schema = table.to_arrow_schema()
 
-        with tunnel() as (host, port):
-            # PlanetScale needs this to be set
-            init_command = "SET workload = 'OLAP';" if host.endswith("psdb.cloud") else None
-
-            with pymysql.connect(
-                host=host,
-                port=port,
-                database=database,
-                user=user,
-                password=password,
-                connect_timeout=5,
-                ssl_ca=ssl_ca,
-                init_command=init_command,
-            ) as connection:
-                with connection.cursor(SSCursor) as cursor:
-                    query, args = _build_query(
-                        schema,
-                        table_name,
-                        should_use_incremental_field,
-                        incremental_field,
-                        incremental_field_type,
-                        db_incremental_field_last_value,
-                    )
-                    logger.debug(f"MySQL query: {query.format(args)}")
+        # PlanetScale needs this to be set
+        init_command = "SET workload = 'OLAP';" if host.endswith("psdb.cloud") else None
 
-                    cursor.execute(query, args)
+        with pymysql.connect(
+            host=host,
+            port=port,
+            database=database,
+            user=user,
+            password=password,
+            connect_timeout=5,
+            ssl_ca=ssl_ca,
+            init_command=init_command,
+        ) as connection:
+            with connection.cursor(SSCursor) as cursor:
+                logger.debug(f"MySQL query: {query.format(args)}")
 
-                    column_names = [column[0] for column in cursor.description or []]
+                cursor.execute(query, args)
 
-                    while True:
-                        # use chunk_size to fetch rows instead of DEFAULT_CHUNK_SIZE
-                        rows = cursor.fetchmany(chunk_size)
-                        if not rows:
-                            break
+                column_names = [column[0] for column in cursor.description or []]
 
-                        yield table_from_iterator((dict(zip(column_names, row)) for row in rows), arrow_schema)
+                while True:
+                    # use chunk_size to fetch rows instead of DEFAULT_CHUNK_SIZE
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+
+                    yield table_from_iterator((dict(zip(column_names, row)) for row in rows), arrow_schema)
+
+    def get_rows() -> Iterator[Any]:
+        with tunnel() as (host, port):
+            if key_ranges is None or parallel_read_key is None:
+                query, args = _build_query(
+                    schema,
+                    table_name,
+                    should_use_incremental_field,
+                    incremental_field,
+                    incremental_field_type,
+                    db_incremental_field_last_value,
+                )
+                yield from read_query(host, port, query, args)
+                return
+
+            logger.debug(f"Reading {len(key_ranges)} ranges of {parallel_read_key} in parallel")
+            yield from read_in_parallel(
+                [
+                    functools.partial(
+                        read_query,
+                        host,
+                        port,
+                        *_build_key_range_query(
+                            schema,
+                            table_name,
+                            parallel_read_key,
+                            key_range,
+                            should_use_incremental_field,
+                            incremental_field,
+                            incremental_field_type,
+                            db_incremental_field_last_value,
+                        ),
+                    )
+                    for key_range in key_ranges
+                ]
+            )
 
     name = NamingConvention().normalize_identifier(table_name)
 
@@ -585,4 +691,6 @@ def mysql_source(
         partition_count=partition_settings.partition_count if partition_settings else None,
         partition_size=partition_settings.partition_size if partition_settings else None,
         rows_to_sync=rows_to_sync,
+        # Ranges read in parallel aren't ordered by the incremental field, so it's only updated once all are read
+        sort_mode="desc" if key_ranges is not None and should_use_incremental_field else "asc",
     )
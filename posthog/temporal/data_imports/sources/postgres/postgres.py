@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import collections
 from contextlib import _GeneratorContextManager
+import functools
 import math
-from collections.abc import Iterator
+from collections.abc import Generator, Iterator
 from typing import Any, LiteralString, Optional, cast
 from collections.abc import Callable
 
@@ -26,6 +27,13 @@ from posthog.temporal.data_imports.pipelines.pipeline.utils import (
     build_pyarrow_decimal_type,
     table_from_iterator,
 )
+from posthog.temporal.data_imports.sources.common.parallel_reads import (
+    KeyRange,
+    get_parallel_read_key,
+    get_parallel_reader_count,
+    read_in_parallel,
+    split_key_range,
+)
 from posthog.temporal.data_imports.sources.common.sql import Column, Table
 from posthog.temporal.data_imports.pipelines.pipeline.consts import DEFAULT_CHUNK_SIZE, DEFAULT_TABLE_SIZE_BYTES
 from posthog.warehouse.types import IncrementalFieldType, PartitionSettings
@@ -216,6 +224,45 @@ def _build_query(
         return sql.SQL(query_str).format(incremental_field=sql.Identifier(incremental_field))
 
 
+def _build_key_range_query(
+    schema: str,
+    table_name: str,
+    key: str,
+    key_range: KeyRange,
+    should_use_incremental_field: bool,
+    incremental_field: Optional[str],
+    incremental_field_type: Optional[IncrementalFieldType],
+    db_incremental_field_last_value: Optional[Any],
+) -> sql.Composed:
+    """Same rows as `_build_query`, limited to a range of `key` values, in no particular order."""
+    conditions: list[sql.Composable] = []
+
+    if should_use_incremental_field:
+        if incremental_field is None or incremental_field_type is None:
+            raise ValueError("incremental_field and incremental_field_type can't be None")
+
+        if db_incremental_field_last_value is None:
+            db_incremental_field_last_value = incremental_type_to_initial_value(incremental_field_type)
+
+        conditions.append(
+            sql.SQL("{incremental_field} >= {last_value}").format(
+                incremental_field=sql.Identifier(incremental_field),
+                last_value=sql.Literal(db_incremental_field_last_value),
+            )
+        )
+
+    if key_range.start is not None:
+        conditions.append(sql.SQL("{} >= {}").format(sql.Identifier(key), sql.Literal(key_range.start)))
+    if key_range.end is not None:
+        conditions.append(sql.SQL("{} < {}").format(sql.Identifier(key), sql.Literal(key_range.end)))
+
+    query = sql.SQL("SELECT * FROM {}").format(sql.Identifier(schema, table_name))
+    if not conditions:
+        return query
+
+    return sql.SQL("{query} WHERE {conditions}").format(query=query, conditions=sql.SQL(" AND ").join(conditions))
+
+
 def _get_primary_keys(cursor: psycopg.Cursor, schema: str, table_name: str) -> list[str] | None:
     query = sql.SQL("""
         SELECT
@@ -377,6 +424,29 @@ def _get_partition_settings(
     return PartitionSettings(partition_count=partition_count, partition_size=partition_size)
 
 
+def _get_key_ranges(
+    cursor: psycopg.Cursor, schema: str, table_name: str, key: str, count: int, logger: FilteringBoundLogger
+) -> list[KeyRange] | None:
+    query = sql.SQL("SELECT min({key}), max({key}) FROM {schema}.{table}").format(
+        key=sql.Identifier(key), schema=sql.Identifier(schema), table=sql.Identifier(table_name)
+    )
+
+    try:
+        cursor.execute(query)
+        row = cursor.fetchone()
+    except Exception as e:
+        capture_exception(e)
+        logger.debug(f"_get_key_ranges: returning None due to error: {e}")
+        return None
+
+    if row is None or row[0] is None or row[1] is None:
+        return None
+
+    key_ranges = split_key_range(int(row[0]), int(row[1]), count)
+    logger.debug(f"_get_key_ranges: key={key}, min={row[0]}, max={row[1]}, ranges={len(key_ranges)}")
+    return key_ranges
+
+
 class PostgreSQLColumn(Column):
     """Implementation of the `Column` protocol for a PostgreSQL source.
 
@@ -602,12 +672,26 @@ def postgres_source(
                     )
                     has_duplicate_primary_keys = False
 
+                    # Only tables read as a whole are split, as ranges are read in no particular order
+                    parallel_read_key = get_parallel_read_key(table, primary_keys)
+                    reader_count = get_parallel_reader_count(rows_to_sync)
+                    key_ranges = None
+
                     # Fallback on checking for an `id` field on the table
                     if primary_keys is None and "id" in table:
                         primary_keys = ["id"]
                         has_duplicate_primary_keys = _has_duplicate_primary_keys(
                             cursor, schema, table_name, primary_keys
                         )
+
+                    if (
+                        parallel_read_key is not None
+                        and reader_count > 1
+                        and (not should_use_incremental_field or db_incremental_field_last_value is None)
+                    ):
+                        key_ranges = _get_key_ranges(
+                            cursor, schema, table_name, parallel_read_key, reader_count, logger
+                        )
                 except psycopg.errors.QueryCanceled:
                     if should_use_incremental_field:
                         raise QueryTimeoutException(
@@ -617,52 +701,85 @@ def postgres_source(
                 except Exception:
                     raise
 
-    def get_rows(chunk_size: int) -> Iterator[Any]:
+    def read_query(
+        host: str, port: int, query: sql.Composed, cursor_name: str, chunk_size: int
+    ) -> Generator[pa.Table, None, None]:
         arrow_schema = table.to_arrow_schema()
-        with tunnel() as (host, port):
-            with psycopg.connect(
-                host=host,
-                port=port,
-                dbname=database,
-                user=user,
-                password=password,
-                sslmode=sslmode,
-                connect_timeout=5,
-                sslrootcert="/tmp/no.txt",
-                sslcert="/tmp/no.txt",
-                sslkey="/tmp/no.txt",
-                cursor_factory=psycopg.ServerCursor,
-            ) as connection:
-                connection.adapters.register_loader("json", JsonAsStringLoader)
-                connection.adapters.register_loader("jsonb", JsonAsStringLoader)
-                connection.adapters.register_loader("int4range", RangeAsStringLoader)
-                connection.adapters.register_loader("int8range", RangeAsStringLoader)
-                connection.adapters.register_loader("numrange", RangeAsStringLoader)
-                connection.adapters.register_loader("tsrange", RangeAsStringLoader)
-                connection.adapters.register_loader("tstzrange", RangeAsStringLoader)
-                connection.adapters.register_loader("daterange", RangeAsStringLoader)
-
-                with connection.cursor(name=f"posthog_{team_id}_{schema}.{table_name}") as cursor:
-                    query = _build_query(
-                        schema,
-                        table_name,
-                        should_use_incremental_field,
-                        incremental_field,
-                        incremental_field_type,
-                        db_incremental_field_last_value,
-                    )
-                    logger.debug(f"Postgres query: {query.as_string()}")
+        with psycopg.connect(
+            host=host,
+            port=port,
+            dbname=database,
+            user=user,
+            password=password,
+            sslmode=sslmode,
+            connect_timeout=5,
+            sslrootcert="/tmp/no.txt",
+            sslcert="/tmp/no.txt",
+            sslkey="/tmp/no.txt",
+            cursor_factory=psycopg.ServerCursor,
+        ) as connection:
+            connection.adapters.register_loader("json", JsonAsStringLoader)
+            connection.adapters.register_loader("jsonb", JsonAsStringLoader)
+            connection.adapters.register_loader("int4range", RangeAsStringLoader)
+            connection.adapters.register_loader("int8range", RangeAsStringLoader)
+            connection.adapters.register_loader("numrange", RangeAsStringLoader)
+            connection.adapters.register_loader("tsrange", RangeAsStringLoader)
+            connection.adapters.register_loader("tstzrange", RangeAsStringLoader)
+            connection.adapters.register_loader("daterange", RangeAsStringLoader)
+
+            with connection.cursor(name=cursor_name) as cursor:
+                logger.debug(f"Postgres query: {query.as_string()}")
+
+                cursor.execute(query)
 
-                    cursor.execute(query)
+                column_names = [column.name for column in cursor.description or []]
 
-                    column_names = [column.name for column in cursor.description or []]
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
 
-                    while True:
-                        rows = cursor.fetchmany(chunk_size)
-                        if not rows:
-                            break
+                    yield table_from_iterator((dict(zip(column_names, row)) for row in rows), arrow_schema)
 
-                        yield table_from_iterator((dict(zip(column_names, row)) for row in rows), arrow_schema)
+    def get_rows(chunk_size: int) -> Iterator[Any]:
+        cursor_name = f"posthog_{team_id}_{schema}.{table_name}"
+
+        with tunnel() as (host, port):
+            if key_ranges is None or parallel_read_key is None:
+                query = _build_query(
+                    schema,
+                    table_name,
+                    should_use_incremental_field,
+                    incremental_field,
+                    incremental_field_type,
+                    db_incremental_field_last_value,
+                )
+                yield from read_query(host, port, query, cursor_name, chunk_size)
+                return
+
+            logger.debug(f"Reading {len(key_ranges)} ranges of {parallel_read_key} in parallel")
+            yield from read_in_parallel(
+                [
+                    functools.partial(
+                        read_query,
+                        host,
+                        port,
+                        _build_key_range_query(
+                            schema,
+                            table_name,
+                            parallel_read_key,
+                            key_range,
+                            should_use_incremental_field,
+                            incremental_field,
+                            incremental_field_type,
+                            db_incremental_field_last_value,
+                        ),
+                        f"{cursor_name}_{index}",
+                        chunk_size,
+                    )
+                    for index, key_range in enumerate(key_ranges)
+                ]
+            )
 
     name = NamingConvention().normalize_identifier(table_name)
 
@@ -674,4 +791,6 @@ def postgres_source(
         partition_size=partition_settings.partition_size if partition_settings else None,
         rows_to_sync=rows_to_sync,
         has_duplicate_primary_keys=has_duplicate_primary_keys,
+        # Ranges read in parallel aren't ordered by the incremental field, so it's only updated once all are read
+        sort_mode="desc" if key_ranges is not None and should_use_incremental_field else "asc",
     )
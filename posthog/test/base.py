@@ -56,6 +56,7 @@ from posthog.models.channel_type.sql import (
     DROP_CHANNEL_DEFINITION_TABLE_SQL,
 )
 from posthog.models.cohort.sql import TRUNCATE_COHORTPEOPLE_TABLE_SQL
+from posthog.models.event_rollup.sql import EVENT_ROLLUPS_TABLE_SQL
 from posthog.models.event.sql import (
     DISTRIBUTED_EVENTS_TABLE_SQL,
     DROP_EVENTS_TABLE_SQL,
@@ -1175,6 +1176,7 @@ def reset_clickhouse_database() -> None:
             WEB_STATS_SQL(table_name="web_pre_aggregated_stats_staging"),
             WEB_BOUNCES_SQL(table_name="web_pre_aggregated_bounces_staging"),
             WEB_PRE_AGGREGATED_TEAM_SELECTION_TABLE_SQL(),
+            EVENT_ROLLUPS_TABLE_SQL(),
         ]
     )
     run_clickhouse_statement_in_parallel(
@@ -1,10 +1,13 @@
 import concurrent.futures
+import json
 from datetime import datetime
 from typing import cast
+from unittest.mock import patch
 
 from django.core.cache import cache
 from django.db import IntegrityError, connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 from parameterized import parameterized
@@ -12,7 +15,12 @@ import pytest
 from flaky import flaky
 
 from posthog.models import Cohort, FeatureFlag, GroupTypeMapping, Person
-from posthog.models.feature_flag import get_feature_flags_for_team_in_cache
+from posthog.models.feature_flag import get_feature_flag_values_for_distinct_ids, get_feature_flags_for_team_in_cache
+from posthog.models.feature_flag.compiled_flags import (
+    clear_compiled_feature_flags_cache,
+    get_compiled_feature_flags_for_team_in_cache,
+)
+from posthog.models.feature_flag.feature_flag import feature_flags_cache_key
 from posthog.models.feature_flag.flag_matching import (
     FeatureFlagHashKeyOverride,
     FeatureFlagMatch,
@@ -758,6 +766,189 @@ class TestModelCache(BaseTest):
         self.assertEqual(0, len(cached_flags))
 
 
+class TestCompiledFeatureFlags(BaseTest):
+    def setUp(self):
+        cache.clear()
+        clear_compiled_feature_flags_cache()
+        return super().setUp()
+
+    def tearDown(self):
+        clear_compiled_feature_flags_cache()
+        return super().tearDown()
+
+    def test_compiled_flags_are_reused_until_flags_change(self):
+        self.assertIsNone(get_compiled_feature_flags_for_team_in_cache(self.team.project_id))
+
+        flag = FeatureFlag.objects.create(
+            team=self.team,
+            key="beta-feature",
+            created_by=self.user,
+            filters={"groups": [{"properties": [], "rollout_percentage": 50}]},
+        )
+
+        compiled_flags = get_compiled_feature_flags_for_team_in_cache(self.team.project_id)
+        assert compiled_flags is not None
+        self.assertEqual([compiled_flag.key for compiled_flag in compiled_flags], ["beta-feature"])
+        self.assertEqual(compiled_flags[0].parsed_condition(compiled_flags[0].conditions[0]).rollout_threshold, 0.5)
+        with self.assertNumQueries(0):
+            self.assertIs(get_compiled_feature_flags_for_team_in_cache(self.team.project_id), compiled_flags)
+
+        flag.key = "new-key"
+        flag.save()
+
+        updated_compiled_flags = get_compiled_feature_flags_for_team_in_cache(self.team.project_id)
+        assert updated_compiled_flags is not None
+        self.assertEqual([compiled_flag.key for compiled_flag in updated_compiled_flags], ["new-key"])
+
+    def test_compiled_flags_follow_flags_cached_by_other_writers(self):
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="beta-feature",
+            created_by=self.user,
+            filters={"groups": [{"properties": [], "rollout_percentage": 50}]},
+        )
+        compiled_flags = get_compiled_feature_flags_for_team_in_cache(self.team.project_id)
+        assert compiled_flags is not None
+
+        # Flags written to the cache without going through `set_feature_flags_for_team_in_cache`
+        flag_data = json.loads(cache.get(feature_flags_cache_key(self.team.project_id)))
+        flag_data[0]["key"] = "rewritten-key"
+        cache.set(feature_flags_cache_key(self.team.project_id), json.dumps(flag_data))
+
+        updated_compiled_flags = get_compiled_feature_flags_for_team_in_cache(self.team.project_id)
+        assert updated_compiled_flags is not None
+        self.assertEqual([compiled_flag.key for compiled_flag in updated_compiled_flags], ["rewritten-key"])
+        with patch("posthog.models.feature_flag.compiled_flags.compile_feature_flag") as mock_compile:
+            self.assertIs(get_compiled_feature_flags_for_team_in_cache(self.team.project_id), updated_compiled_flags)
+        mock_compile.assert_not_called()
+
+    def test_compiled_flags_match_the_same_as_models(self):
+        Person.objects.create(team=self.team, distinct_ids=["example_id"], properties={"email": "tim@posthog.com"})
+        Person.objects.create(team=self.team, distinct_ids=["other_id"], properties={"email": "other@example.com"})
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="email-flag",
+            created_by=self.user,
+            filters={
+                "groups": [
+                    {"properties": [{"key": "email", "value": "posthog", "operator": "icontains", "type": "person"}]}
+                ],
+                "payloads": {"true": {"some": "payload"}},
+            },
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="rollout-flag",
+            created_by=self.user,
+            filters={"groups": [{"properties": [], "rollout_percentage": 30}]},
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="multivariate-flag",
+            created_by=self.user,
+            filters={
+                "groups": [
+                    {"properties": [], "rollout_percentage": 100},
+                    {
+                        "properties": [{"key": "email", "value": "tim@posthog.com", "type": "person"}],
+                        "rollout_percentage": 100,
+                        "variant": "second-variant",
+                    },
+                ],
+                "multivariate": {
+                    "variants": [
+                        {"key": "first-variant", "rollout_percentage": 50},
+                        {"key": "second-variant", "rollout_percentage": 25},
+                        {"key": "third-variant", "rollout_percentage": 25},
+                    ],
+                },
+            },
+        )
+
+        for distinct_id in ["example_id", "other_id", "not_ingested_id"]:
+            with self.settings(FEATURE_FLAG_COMPILED_CACHE_ENABLED=True):
+                compiled_result = get_all_feature_flags(self.team, distinct_id)
+            with self.settings(FEATURE_FLAG_COMPILED_CACHE_ENABLED=False):
+                model_result = get_all_feature_flags(self.team, distinct_id)
+
+            self.assertEqual(compiled_result, model_result)
+
+        self.assertEqual(
+            get_all_feature_flags(self.team, "example_id")[0],
+            {"email-flag": True, "rollout-flag": True, "multivariate-flag": "second-variant"},
+        )
+
+
+class TestBulkFeatureFlagMatcher(BaseTest):
+    def setUp(self):
+        super().setUp()
+        Person.objects.create(team=self.team, distinct_ids=["example_id"], properties={"email": "tim@posthog.com"})
+        Person.objects.create(team=self.team, distinct_ids=["other_id"], properties={"email": "other@example.com"})
+        cohort = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "email", "value": "posthog", "type": "person", "operator": "icontains"}]}],
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="email-flag",
+            created_by=self.user,
+            filters={
+                "groups": [
+                    {"properties": [{"key": "email", "value": "other", "operator": "icontains", "type": "person"}]}
+                ]
+            },
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="cohort-flag",
+            created_by=self.user,
+            filters={"groups": [{"properties": [{"key": "id", "value": cohort.pk, "type": "cohort"}]}]},
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="distinct-id-flag",
+            created_by=self.user,
+            filters={
+                "groups": [
+                    {
+                        "properties": [
+                            {"key": "distinct_id", "value": "example", "operator": "icontains", "type": "person"},
+                            {"key": "email", "value": "tim", "operator": "icontains", "type": "person"},
+                        ]
+                    }
+                ]
+            },
+        )
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="rollout-flag",
+            created_by=self.user,
+            filters={"groups": [{"properties": [], "rollout_percentage": 30}]},
+        )
+
+    def test_flag_values_match_evaluating_each_distinct_id(self):
+        distinct_ids = ["example_id", "other_id", "not_ingested_id"]
+
+        flag_values = get_feature_flag_values_for_distinct_ids(self.team, distinct_ids)
+
+        self.assertEqual(
+            flag_values,
+            {distinct_id: get_all_feature_flags(self.team, distinct_id)[0] for distinct_id in distinct_ids},
+        )
+        self.assertEqual(
+            flag_values["example_id"],
+            {"email-flag": False, "cohort-flag": True, "distinct-id-flag": True, "rollout-flag": True},
+        )
+
+    def test_number_of_queries_does_not_depend_on_number_of_distinct_ids(self):
+        with CaptureQueriesContext(connection) as single_distinct_id_queries:
+            get_feature_flag_values_for_distinct_ids(self.team, ["example_id"])
+        with CaptureQueriesContext(connection) as many_distinct_ids_queries:
+            get_feature_flag_values_for_distinct_ids(self.team, ["example_id", "other_id", "not_ingested_id"])
+
+        self.assertEqual(len(many_distinct_ids_queries), len(single_distinct_id_queries))
+
+
 class TestFeatureFlagMatcher(BaseTest, QueryMatchingTest):
     maxDiff = None
 
@@ -435,6 +435,10 @@ class ConcurrentS3Consumer(ConsumerFromStage):
 
     It uses a memory buffer to store the data and upload it in parts. It uses 2 semaphores to limit the number of
     concurrent uploads and the memory buffer.
+
+    When splitting into multiple files, a file is completed in the background: Its last parts keep uploading, and the
+    multipart upload is completed once they are done, while we already move on to the next file. The upload semaphore
+    is shared by all files, so the number of concurrent part uploads stays bounded.
     """
 
     UPLOAD_PART_MAX_ATTEMPTS: int = 5
@@ -472,6 +476,8 @@ class ConcurrentS3Consumer(ConsumerFromStage):
         self.part_counter = 1
         self.upload_id: str | None = None
 
+        # Files being completed in the background, in the order they were started
+        self._completing_files: list[tuple[str, asyncio.Task]] = []
         self._finalized = False
 
     async def _get_s3_client(self) -> "S3Client":
@@ -507,13 +513,81 @@ class ConcurrentS3Consumer(ConsumerFromStage):
         return self._s3_client
 
     async def finalize_file(self):
-        await self._finalize_current_file()
+        if self.current_file_size > 0:
+            if len(self.current_buffer) > 0:
+                await self._upload_next_part(final=True)
+
+            key = self._get_current_key()
+            completion_task = asyncio.create_task(
+                self._complete_file(key, self.upload_id, self.pending_uploads, self.completed_parts)
+            )
+            self._completing_files.append((key, completion_task))
+
         await self._start_new_file()
 
+    async def _complete_file(
+        self,
+        key: str,
+        upload_id: str | None,
+        pending_uploads: dict[int, asyncio.Task],
+        completed_parts: dict[int, CompletedPartTypeDef],
+    ):
+        """Wait for all parts of a file to be uploaded, and complete its multipart upload."""
+        try:
+            if pending_uploads:
+                try:
+                    await asyncio.gather(*pending_uploads.values())
+                except Exception:
+                    self.logger.exception("One or more upload parts failed")
+                    raise
+
+            if upload_id:
+                await self._complete_multipart_upload(key, upload_id, completed_parts)
+
+            self.external_logger.info("Completed multipart upload for '%s'", key)
+
+        except BaseException:
+            # Including cancellation, see `_wait_for_completing_files`
+            await self._abort(key, upload_id)
+            raise
+
+    async def _wait_for_completing_files(self):
+        """Wait for files being completed in the background, adding them to the uploaded files in order.
+
+        If any of them fails, the others are cancelled, which aborts their uploads.
+        """
+        completing_files, self._completing_files = self._completing_files, []
+        try:
+            await asyncio.gather(*(task for _, task in completing_files))
+        except BaseException:
+            await self._cancel_completing_files(completing_files)
+            raise
+        self.files_uploaded.extend(key for key, _ in completing_files)
+
+    async def _cancel_completing_files(self, completing_files: list[tuple[str, asyncio.Task]]):
+        for _, task in completing_files:
+            task.cancel()
+        # Wait for them to abort their uploads
+        await asyncio.gather(*(task for _, task in completing_files), return_exceptions=True)
+
+    def _raise_if_file_completion_failed(self):
+        """Fail early if a file being completed in the background failed, instead of when finalizing."""
+        for _, task in self._completing_files:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise typing.cast(BaseException, task.exception())
+
     async def consume_chunk(self, data: bytes):
         if self._finalized:
             raise RuntimeError("Consumer already finalized")
 
+        try:
+            self._raise_if_file_completion_failed()
+        except Exception:
+            completing_files, self._completing_files = self._completing_files, []
+            await self._cancel_completing_files(completing_files)
+            await self._abort(self._get_current_key(), self.upload_id)
+            raise
+
         self.current_buffer.extend(data)
         self.current_file_size += len(data)
 
@@ -549,12 +623,24 @@ class ConcurrentS3Consumer(ConsumerFromStage):
         # Acquire upload semaphore (blocks if too many uploads in flight)
         await self.upload_semaphore.acquire()
 
-        # Create upload task
-        upload_task = asyncio.create_task(self._upload_part_with_cleanup(part_data, part_number))
-        upload_task.add_done_callback(lambda task: self._on_upload_complete(task, part_number))
+        # Create upload task. Everything it needs is bound now, as we may move on to the next file before it's done.
+        pending_uploads = self.pending_uploads
+        upload_task = asyncio.create_task(
+            self._upload_part_with_cleanup(
+                part_data,
+                part_number,
+                key=self._get_current_key(),
+                upload_id=self.upload_id,
+                file_number=self.current_file_index,
+                completed_parts=self.completed_parts,
+            )
+        )
+        upload_task.add_done_callback(
+            lambda task: self._on_upload_complete(task, part_number, pending_uploads=pending_uploads)
+        )
 
         # Track the upload
-        self.pending_uploads[part_number] = upload_task
+        pending_uploads[part_number] = upload_task
 
         if final:
             self.current_buffer.clear()
@@ -568,23 +654,27 @@ class ConcurrentS3Consumer(ConsumerFromStage):
         self,
         data: bytes,
         part_number: int,
+        key: str,
+        upload_id: str | None,
+        file_number: int,
+        completed_parts: dict[int, CompletedPartTypeDef],
     ):
         """Upload part and handle cleanup with retry logic.
 
-        Note: This can run concurrently so need to be careful
+        Note: This can run concurrently so need to be careful, and it may still be running after we have moved on
+        to the next file, which is why it doesn't read any of the current file's attributes.
         """
         # safety check - we should never have a part number without an upload id
-        if not self.upload_id:
+        if not upload_id:
             raise NoUploadInProgressError()
 
         try:
             self.logger.debug(
                 "Uploading file number %s part %s with upload id %s",
-                self.current_file_index,
+                file_number,
                 part_number,
-                self.upload_id,
+                upload_id,
             )
-            current_key = self._get_current_key()
             client = self._s3_client
             assert client is not None, "No S3 client, is multi-part initialized?"
 
@@ -602,8 +692,8 @@ class ConcurrentS3Consumer(ConsumerFromStage):
                     " seconds, speed: %(mb_per_second).2f MB/s"
                 ),
                 log_attributes={
-                    "file_number": self.current_file_index,
-                    "upload_id": self.upload_id,
+                    "file_number": file_number,
+                    "upload_id": upload_id,
                     "part_number": part_number,
                 },
             ) as recorder:
@@ -613,9 +703,9 @@ class ConcurrentS3Consumer(ConsumerFromStage):
                     try:
                         response = await client.upload_part(
                             Bucket=self.s3_inputs.bucket_name,
-                            Key=current_key,
+                            Key=key,
                             PartNumber=part_number,
-                            UploadId=self.upload_id,
+                            UploadId=upload_id,
                             Body=data,
                         )
 
@@ -625,7 +715,7 @@ class ConcurrentS3Consumer(ConsumerFromStage):
 
                         self.logger.warning(
                             "Caught ClientError while uploading file %s part %s: %s (attempt %s/%s)",
-                            self.current_file_index,
+                            file_number,
                             part_number,
                             error_code,
                             attempt,
@@ -649,16 +739,16 @@ class ConcurrentS3Consumer(ConsumerFromStage):
             part_info: CompletedPartTypeDef = {"ETag": response["ETag"], "PartNumber": part_number}
 
             # Store completed part info
-            self.completed_parts[part_number] = part_info
+            completed_parts[part_number] = part_info
 
             return part_info
 
         except Exception:
             self.logger.exception(
                 "Failed to upload file number %s part %s with upload id %s",
-                self.current_file_index,
+                file_number,
                 part_number,
-                self.upload_id,
+                upload_id,
             )
             raise
 
@@ -672,8 +762,9 @@ class ConcurrentS3Consumer(ConsumerFromStage):
         self.current_file_size = 0
         self.part_counter = 1
         self.upload_id = None
-        self.pending_uploads.clear()
-        self.completed_parts.clear()
+        # New containers, as the previous file's may still be used while it's being completed
+        self.pending_uploads = {}
+        self.completed_parts = {}
         self.external_logger.info(
             "Starting multipart upload to '%s' for file number %d", self._get_current_key(), self.current_file_index
         )
@@ -699,27 +790,27 @@ class ConcurrentS3Consumer(ConsumerFromStage):
 
             # Complete multipart upload if needed
             if self.upload_id:
-                await self._complete_multipart_upload()
+                await self._complete_multipart_upload(self._get_current_key(), self.upload_id, self.completed_parts)
 
             self.files_uploaded.append(self._get_current_key())
             self.external_logger.info("Completed multipart upload for file number %d", self.current_file_index)
 
         except Exception:
             # Cleanup on error
-            await self._abort()
+            await self._abort(self._get_current_key(), self.upload_id)
             raise
 
-    def _on_upload_complete(self, task: asyncio.Task, part_number: int):
+    def _on_upload_complete(self, task: asyncio.Task, part_number: int, pending_uploads: dict[int, asyncio.Task]):
         """Callback called when an upload task completes (success or failure)"""
         self.upload_semaphore.release()
 
-        # Remove from pending uploads immediately
-        self.pending_uploads.pop(part_number, None)
+        if task.cancelled() or task.exception() is not None:
+            # Kept in pending uploads, so that completing the file raises the error instead of leaving the part out
+            self.logger.error("Upload failed for part %s", part_number)
+            return
 
-        # Handle any exceptions
-        if task.exception() is not None:
-            # Log the error - the exception will be re-raised when the task is awaited
-            self.logger.exception("Upload failed for file number %s part %s", self.current_file_index, part_number)
+        # Remove from pending uploads immediately
+        pending_uploads.pop(part_number, None)
 
     async def _initialize_multipart_upload(self):
         """Initialize multipart upload with optimizations for large files"""
@@ -748,12 +839,15 @@ class ConcurrentS3Consumer(ConsumerFromStage):
             return
 
         try:
+            # Files completed in the background come before the current/last file
+            await self._wait_for_completing_files()
+
             # Finalize the current/last file
             await self._finalize_current_file()
 
         except Exception:
             # Cleanup on error
-            await self._abort()
+            await self._abort(self._get_current_key(), self.upload_id)
             raise
         finally:
             self._finalized = True
@@ -783,30 +877,29 @@ class ConcurrentS3Consumer(ConsumerFromStage):
     #     self.current_buffer.clear()
     #     self.current_file_size = 0
 
-    async def _complete_multipart_upload(self):
+    async def _complete_multipart_upload(
+        self, key: str, upload_id: str | None, completed_parts: dict[int, CompletedPartTypeDef]
+    ):
         """Complete multipart upload with parts in order"""
-        if not self.upload_id:
+        if not upload_id:
             raise NoUploadInProgressError()
 
         # Sort parts by part number
-        sorted_parts = [self.completed_parts[part_num] for part_num in sorted(self.completed_parts.keys())]
+        sorted_parts = [completed_parts[part_num] for part_num in sorted(completed_parts.keys())]
 
-        current_key = self._get_current_key()
         client = await self._get_s3_client()
         await client.complete_multipart_upload(
             Bucket=self.s3_inputs.bucket_name,
-            Key=current_key,
-            UploadId=self.upload_id,
+            Key=key,
+            UploadId=upload_id,
             MultipartUpload={"Parts": sorted_parts},
         )
 
-    async def _abort(self):
-        """Abort this S3 multi-part upload."""
-        if self.upload_id:
+    async def _abort(self, key: str, upload_id: str | None):
+        """Abort an S3 multi-part upload."""
+        if upload_id:
             try:
                 client = await self._get_s3_client()
-                await client.abort_multipart_upload(
-                    Bucket=self.s3_inputs.bucket_name, Key=self._get_current_key(), UploadId=self.upload_id
-                )
+                await client.abort_multipart_upload(Bucket=self.s3_inputs.bucket_name, Key=key, UploadId=upload_id)
             except Exception:
                 pass  # Best effort cleanup
@@ -16,6 +16,7 @@ import brotli
 import orjson
 import psycopg
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 import structlog
 from psycopg import sql
@@ -52,6 +53,131 @@ def json_dumps_bytes(d) -> bytes:
         return orjson.dumps(cleaned_d, default=str)
 
 
+def large_string_array_to_bytes(array: pa.Array) -> bytes:
+    """Return the values of a `pa.large_string()` array without nulls, concatenated."""
+    if len(array) == 0:
+        return b""
+    _, offsets_buffer, data_buffer = array.buffers()
+    offsets = pa.Array.from_buffers(pa.int64(), len(array) + 1, [None, offsets_buffer], offset=array.offset)
+    start, end = offsets[0].as_py(), offsets[-1].as_py()
+    return data_buffer.slice(start, end - start).to_pybytes()
+
+
+def _text(value: str) -> pa.Scalar:
+    """A scalar to use along `pa.large_string()` arrays in compute kernels, which don't cast `pa.string()` ones."""
+    return pa.scalar(value, type=pa.large_string())
+
+
+def _is_vectorizable_text(array: pa.Array) -> bool:
+    """Whether the values of `array` can be encoded with compute kernels, instead of one at a time in Python."""
+    if pa.types.is_integer(array.type):
+        return True
+    if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        try:
+            # Checks strings are valid UTF-8, which kernels don't.
+            array.validate(full=True)
+        except pa.ArrowInvalid:
+            return False
+        return True
+    return False
+
+
+# Control characters orjson escapes as `\uXXXX`, which is left to it.
+_JSON_UNICODE_ESCAPED_CHARACTERS = r"[\x00-\x07\x0b\x0e-\x1f]"
+_JSON_SHORT_ESCAPES = (
+    ("\\", "\\\\"),
+    ('"', '\\"'),
+    ("\n", "\\n"),
+    ("\r", "\\r"),
+    ("\t", "\\t"),
+    ("\b", "\\b"),
+    ("\f", "\\f"),
+)
+
+
+def encode_json_column(array: pa.Array) -> tuple[pa.Array, set[int]]:
+    """Encode the values of `array` as JSON, the same way `orjson.dumps(value, default=str)` would.
+
+    Returns a `pa.large_string()` array of encoded values without nulls, and the indices of values that
+    couldn't be encoded, which are left as `null` for the caller to encode some other way.
+    """
+    failed: set[int] = set()
+
+    if _is_vectorizable_text(array):
+        encoded = array.cast(pa.large_string())
+        if not pa.types.is_integer(array.type):
+            needs_orjson = pc.fill_null(
+                pc.match_substring_regex(encoded, pattern=_JSON_UNICODE_ESCAPED_CHARACTERS), False
+            )
+            if pc.any(needs_orjson).as_py():
+                failed = {index for index, value in enumerate(needs_orjson.to_pylist()) if value}
+            for character, escaped in _JSON_SHORT_ESCAPES:
+                encoded = pc.replace_substring(encoded, pattern=character, replacement=escaped)
+            encoded = pc.binary_join_element_wise(_text('"'), encoded, _text('"'), _text(""))
+        return pc.fill_null(encoded, "null"), failed
+
+    values = []
+    for index, value in enumerate(array.to_pylist()):
+        try:
+            values.append(orjson.dumps(value, default=str))
+        except orjson.JSONEncodeError:
+            values.append(b"null")
+            failed.add(index)
+    return pa.array(values, type=pa.large_binary()).cast(pa.large_string()), failed
+
+
+def _csv_str(value: typing.Any) -> str:
+    """Convert `value` to str like `csv.writer` does, with lists as PostgreSQL array literals."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ensure_curly_brackets_array(value)
+    return str(value)
+
+
+def encode_csv_column(
+    array: pa.Array,
+    delimiter: str,
+    quote_char: str,
+    escape_char: str | None,
+    line_terminator: str,
+    quoting: int,
+) -> pa.Array:
+    """Encode the values of `array` as CSV fields, the same way `csv.writer` would.
+
+    Only `csv.QUOTE_MINIMAL`, and `csv.QUOTE_NONE` with an `escape_char`, are supported. Returns a
+    `pa.large_string()` array of encoded fields without nulls.
+    """
+    if _is_vectorizable_text(array):
+        fields = array.cast(pa.large_string())
+    else:
+        fields = pa.array([_csv_str(value) for value in array.to_pylist()], type=pa.large_string())
+    fields = pc.fill_null(fields, "")
+    if pa.types.is_integer(array.type):
+        return fields
+
+    special_characters = list(dict.fromkeys([delimiter, quote_char, *line_terminator]))
+    if escape_char is not None:
+        fields = pc.replace_substring(fields, pattern=escape_char, replacement=escape_char * 2)
+
+    if quoting == csv.QUOTE_NONE:
+        for character in special_characters:
+            if character != escape_char:
+                fields = pc.replace_substring(fields, pattern=character, replacement=f"{escape_char}{character}")
+        return fields
+
+    needs_quotes = pc.match_substring(fields, pattern=special_characters[0])
+    for character in special_characters[1:]:
+        needs_quotes = pc.or_(needs_quotes, pc.match_substring(fields, pattern=character))
+    quoted = pc.binary_join_element_wise(
+        _text(quote_char),
+        pc.replace_substring(fields, pattern=quote_char, replacement=quote_char * 2),
+        _text(quote_char),
+        _text(""),
+    )
+    return pc.if_else(needs_quotes, quoted, fields)
+
+
 class BatchExportTemporaryFile:
     """A TemporaryFile used to as an intermediate step while exporting data.
 
@@ -628,12 +754,30 @@ class JSONLBatchExportWriter(BatchExportWriter):
         return n
 
     def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
-        """Write records to a temporary file as JSONL."""
-        for record_dict in record_batch.to_pylist():
-            if not record_dict:
-                continue
+        """Write records to a temporary file as JSONL.
+
+        Columns are encoded one at a time, and then joined into lines. Records with values that can only be
+        encoded with the fallbacks in `write_dict` are written with it, one by one.
+        """
+        if record_batch.num_columns == 0 or record_batch.num_rows == 0:
+            return
+
+        line_parts: list[pa.Array | pa.Scalar] = []
+        failed: set[int] = set()
+        for index, (name, column) in enumerate(zip(record_batch.column_names, record_batch.columns)):
+            encoded, failed_in_column = encode_json_column(column)
+            failed |= failed_in_column
+            prefix = "{" if index == 0 else ","
+            line_parts.extend([_text(prefix + orjson.dumps(name).decode("utf-8") + ":"), encoded])
+        line_parts.append(_text("}\n"))
+        lines = pc.binary_join_element_wise(*line_parts, _text(""))
 
-            self.write_dict(record_dict)
+        start = 0
+        for failed_index in sorted(failed):
+            self.batch_export_file.write(large_string_array_to_bytes(lines.slice(start, failed_index - start)))
+            self.write_dict(record_batch.slice(failed_index, 1).to_pylist()[0])
+            start = failed_index + 1
+        self.batch_export_file.write(large_string_array_to_bytes(lines.slice(start)))
 
 
 class CSVBatchExportWriter(BatchExportWriter):
@@ -699,12 +843,51 @@ class CSVBatchExportWriter(BatchExportWriter):
         Since this writer is only used in the PostgreSQL batch export, we do a
         replacement of [] for {} to support PostgreSQL literal arrays when writing
         a list.
+
+        Columns are encoded one at a time, and then joined into rows. Dialects we can't encode that way
+        go through `csv.DictWriter` instead, one row at a time.
         """
+        if record_batch.num_rows == 0:
+            return
+
+        if self._can_encode_columns(record_batch):
+            fields = [
+                encode_csv_column(
+                    record_batch.column(name),
+                    delimiter=self.delimiter,
+                    quote_char=self.quote_char,
+                    escape_char=self.escape_char,
+                    line_terminator=self.line_terminator,
+                    quoting=self.quoting,
+                )
+                if name in record_batch.column_names
+                else _text("")
+                for name in self.field_names
+            ]
+            rows = pc.binary_join_element_wise(
+                pc.binary_join_element_wise(*fields, _text(self.delimiter)), _text(self.line_terminator), _text("")
+            )
+            self.batch_export_file.write(large_string_array_to_bytes(rows))
+            return
+
         rows = []
         for record in record_batch.to_pylist():
             rows.append({k: ensure_curly_brackets_array(v) if isinstance(v, list) else v for k, v in record.items()})
         self.csv_writer.writerows(rows)
 
+    def _can_encode_columns(self, record_batch: pa.RecordBatch) -> bool:
+        if self.quoting not in (csv.QUOTE_MINIMAL, csv.QUOTE_NONE):
+            return False
+        if self.quoting == csv.QUOTE_NONE and self.escape_char is None:
+            # `csv.writer` raises if a field needs escaping, leave it to do so.
+            return False
+        if len(self.field_names) < 2:
+            # `csv.writer` quotes a row made of a single empty field.
+            return False
+        if self.extras_action == "raise" and not set(record_batch.column_names) <= set(self.field_names):
+            return False
+        return True
+
 
 def ensure_curly_brackets_array(v: list[typing.Any]) -> str:
     """Convert list to str and replace ends with curly braces."""
@@ -1676,6 +1676,80 @@ class TestErrorHandling:
         )
 
 
+async def test_concurrent_s3_consumer_completes_files_in_the_background(minio_client, bucket_name):
+    """Test files are uploaded in order and in full when completed while moving on to the next files."""
+    inputs = S3InsertInputs(
+        bucket_name=bucket_name,
+        region="us-east-1",
+        prefix="concurrent",
+        team_id=1,
+        data_interval_start="2023-01-01 00:00:00",
+        data_interval_end="2023-01-01 01:00:00",
+        aws_access_key_id="object_storage_root_user",
+        aws_secret_access_key="object_storage_root_password",
+        endpoint_url=settings.OBJECT_STORAGE_ENDPOINT,
+        max_file_size_mb=1,
+    )
+    consumer = ConcurrentS3Consumer(
+        data_interval_start=inputs.data_interval_start,
+        data_interval_end=inputs.data_interval_end,
+        s3_inputs=inputs,
+        part_size=5 * 1024 * 1024,
+        max_concurrent_uploads=2,
+    )
+    # Each file has a full part and a smaller final part
+    files = [bytes([file_number]) * (6 * 1024 * 1024 + file_number) for file_number in range(3)]
+
+    for data in files:
+        await consumer.consume_chunk(data)
+        await consumer.finalize_file()
+    await consumer.finalize()
+
+    assert consumer.files_uploaded == [get_s3_key(inputs, file_number) for file_number in range(3)]
+    for key, data in zip(consumer.files_uploaded, files):
+        response = await minio_client.get_object(Bucket=bucket_name, Key=key)
+        assert await response["Body"].read() == data
+
+
+async def test_concurrent_s3_consumer_cancels_completing_files_when_one_fails():
+    """Test files still being completed are aborted when completing another one fails."""
+    inputs = S3InsertInputs(
+        bucket_name="test",
+        region="us-east-1",
+        prefix="concurrent",
+        team_id=1,
+        data_interval_start="2023-01-01 00:00:00",
+        data_interval_end="2023-01-01 01:00:00",
+    )
+    consumer = ConcurrentS3Consumer(
+        data_interval_start=inputs.data_interval_start, data_interval_end=inputs.data_interval_end, s3_inputs=inputs
+    )
+    aborted_keys = []
+
+    async def complete_multipart_upload(key, upload_id, completed_parts):
+        if key == "failing":
+            raise ValueError("Completing failed")
+        await asyncio.Event().wait()
+
+    async def abort(key, upload_id):
+        aborted_keys.append(key)
+
+    with (
+        mock.patch.object(consumer, "_complete_multipart_upload", side_effect=complete_multipart_upload),
+        mock.patch.object(consumer, "_abort", side_effect=abort),
+    ):
+        consumer._completing_files = [
+            (key, asyncio.create_task(consumer._complete_file(key, "upload-id", {}, {})))
+            for key in ("stuck", "failing")
+        ]
+
+        with pytest.raises(ValueError):
+            await consumer._wait_for_completing_files()
+
+    assert sorted(aborted_keys) == ["failing", "stuck"]
+    assert consumer.files_uploaded == []
+
+
 # We don't care about these for the next test, just need something to be defined.
 base_inputs = {"bucket_name": "test", "region": "test", "team_id": 1}
 
@@ -3,6 +3,7 @@ import datetime as dt
 import io
 import json
 
+import orjson
 import pyarrow as pa
 import pyarrow.parquet as pq
 import pytest
@@ -13,6 +14,7 @@ from products.batch_exports.backend.temporal.temporary_file import (
     DateRange,
     JSONLBatchExportWriter,
     ParquetBatchExportWriter,
+    ensure_curly_brackets_array,
     json_dumps_bytes,
 )
 
@@ -563,3 +565,78 @@ def test_json_dumps_bytes_handles_integers_exceeding_64_bit_range(input_dict, ex
     assert isinstance(result, bytes)
     # check the reverse direction
     assert json.loads(result) == input_dict
+
+
+MIXED_RECORD_BATCH = pa.RecordBatch.from_pydict(
+    {
+        "event": pa.array(
+            ["plain", 'q"uote', "back\\slash", "new\nline", "tab\tulated", "control\x01char", None, "", "ünïcödé 😀"]
+        ),
+        "count": pa.array([1, -2, None, 2**62, 0, 5, 6, 7, 8]),
+        "ratio": pa.array([1.5, None, 1e20, 0.1, 2.0, 3.0, 4.0, 5.0, 6.0]),
+        "flag": pa.array([True, False, None] * 3),
+        "elements": pa.array([["a", "b"], [], None] * 3),
+        "_inserted_at": pa.array([dt.datetime.fromtimestamp(0)] * 9),
+    }
+)
+
+
+@pytest.mark.asyncio
+async def test_jsonl_writer_encodes_columns_like_orjson():
+    """Test column encoding produces the same lines as encoding each record with orjson."""
+    in_memory_file_obj = io.BytesIO()
+
+    async def store_in_memory_on_flush(batch_export_file, *args):
+        in_memory_file_obj.write(batch_export_file.read())
+
+    writer = JSONLBatchExportWriter(max_bytes=1, flush_callable=store_in_memory_on_flush)
+    async with writer.open_temporary_file():
+        await writer.write_record_batch(MIXED_RECORD_BATCH)
+
+    expected = b"".join(
+        orjson.dumps({k: v for k, v in record.items() if k != "_inserted_at"}, default=str) + b"\n"
+        for record in MIXED_RECORD_BATCH.to_pylist()
+    )
+    assert in_memory_file_obj.getvalue() == expected
+    assert writer.records_total == MIXED_RECORD_BATCH.num_rows
+
+
+@pytest.mark.parametrize(
+    "writer_kwargs",
+    [
+        {},
+        {"delimiter": "\t", "quoting": csv.QUOTE_MINIMAL, "escape_char": None},
+        {"quoting": csv.QUOTE_MINIMAL},
+    ],
+)
+@pytest.mark.asyncio
+async def test_csv_writer_encodes_columns_like_csv_writer(writer_kwargs):
+    """Test column encoding produces the same rows as `csv.DictWriter`, including for missing fields."""
+    in_memory_file_obj = io.BytesIO()
+
+    async def store_in_memory_on_flush(batch_export_file, *args):
+        in_memory_file_obj.write(batch_export_file.read())
+
+    field_names = ["event", "count", "ratio", "flag", "elements", "missing"]
+    writer = CSVBatchExportWriter(
+        max_bytes=1, field_names=field_names, flush_callable=store_in_memory_on_flush, **writer_kwargs
+    )
+    async with writer.open_temporary_file():
+        await writer.write_record_batch(MIXED_RECORD_BATCH)
+
+    expected = io.StringIO()
+    csv_writer = csv.DictWriter(
+        expected,
+        fieldnames=field_names,
+        extrasaction="ignore",
+        delimiter=writer_kwargs.get("delimiter", ","),
+        quotechar='"',
+        escapechar=writer_kwargs.get("escape_char", "\\"),
+        quoting=writer_kwargs.get("quoting", csv.QUOTE_NONE),
+        lineterminator="\n",
+    )
+    csv_writer.writerows(
+        {k: ensure_curly_brackets_array(v) if isinstance(v, list) else v for k, v in record.items()}
+        for record in MIXED_RECORD_BATCH.to_pylist()
+    )
+    assert in_memory_file_obj.getvalue().decode("utf-8") == expected.getvalue()